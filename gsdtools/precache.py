@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Pre-compute the GSDView cache for all raster products in a tree.
+
+Walk one or more directory trees and, for each raster product found,
+create the cached virtual dataset and the overviews exactly as GSDView
+does when the product is opened in the GUI (same cache layout).
+Products are processed in parallel.
+
+A job journal is kept (by default in the cache directory) so that an
+interrupted run can be resumed: products already processed and not
+modified since then are skipped.
+
+"""
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+import multiprocessing
+
+from osgeo import gdal
+
+from gsdview.utils import data_uuid
+from gsdview.appsite import USERCONFIGDIR
+from gsdview.gdalbackend import gdalsupport
+
+__version__ = '1.0'
+
+EX_FAILURE = 1
+if hasattr(os, 'EX_USAGE'):
+    EX_USAGE = os.EX_USAGE
+else:
+    EX_USAGE = 64
+
+CACHEDIR = os.path.join(USERCONFIGDIR, 'cache')
+JOURNAL_FILENAME = 'precache-journal.jsonl'
+
+# GDAL auxiliary files
+SKIP_EXTENSIONS = ('.ovr', '.aux', '.aux.xml', '.msk')
+
+
+class JobJournal(object):
+    """Append only journal of processed products.
+
+    Each line of the journal file is a JSON record containing (at least)
+    the product path, its fingerprint (see :func:`gsdview.utils.data_uuid`)
+    and the job status.
+    The last record of each path is the relevant one.
+
+    """
+
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.records = {}
+        if os.path.exists(filename):
+            self.load()
+
+    def load(self):
+        with open(self.filename) as fd:
+            for lineno, line in enumerate(fd, 1):
+                try:
+                    record = json.loads(line)
+                    self.records[record['path']] = record
+                except (ValueError, KeyError):
+                    # e.g. a truncated line from an interrupted run
+                    logging.debug('invalid journal record at line %d',
+                                  lineno)
+
+    def donefingerprint(self, path):
+        """Return the fingerprint of *path* if its last job is done."""
+
+        record = self.records.get(path)
+        if record and record['status'] == self.DONE:
+            return record['fingerprint']
+        return None
+
+    def isdone(self, path, fingerprint):
+        return (fingerprint is not None and
+                self.donefingerprint(path) == fingerprint)
+
+    def append(self, path, fingerprint, status, **kwargs):
+        record = dict(path=path, fingerprint=fingerprint, status=status,
+                      time=time.time())
+        record.update(kwargs)
+        self.records[path] = record
+
+        dirname = os.path.dirname(self.filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        with open(self.filename, 'a') as fd:
+            fd.write(json.dumps(record) + '\n')
+            fd.flush()
+            os.fsync(fd.fileno())
+
+
+def find_files(paths):
+    """Generate the list of (absolute) file names in the *paths* trees.
+
+    GDAL auxiliary files are skipped.
+
+    """
+
+    for path in paths:
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                if not filename.endswith(SKIP_EXTENSIONS):
+                    yield os.path.join(root, filename)
+
+
+def find_rasters(paths):
+    """Generate the list of raster products in the *paths* trees."""
+
+    gdal.PushErrorHandler('CPLQuietErrorHandler')
+    try:
+        for path in paths:
+            if not os.path.isdir(path):
+                yield os.path.abspath(path)
+                continue
+
+            for filename in find_files([path]):
+                if gdal.IdentifyDriver(filename) is not None:
+                    yield filename
+    finally:
+        gdal.PopErrorHandler()
+
+
+def build_overviews(vrtfilename, levels=None, plan=False, nthreads=1):
+    """Build overviews of a cached virtual dataset.
+
+    Overviews are computed in a private temporary directory and then
+    moved in the cache directory so that an interrupted computation
+    never leaves incomplete overview files in the cache.
+
+    """
+
+    dataset = gdal.Open(vrtfilename)
+    if levels is None:
+        if plan:
+            levels = gdalsupport.ovrPlanLevels(
+                dataset, cachedir=os.path.dirname(vrtfilename))
+        else:
+            levels = gdalsupport.ovrComputeLevels(dataset)
+
+    if gdalsupport.has_complex_bands(dataset):
+        resampling = 'average_magphase'
+    else:
+        resampling = 'average'
+    dataset = None
+
+    if not levels:
+        return []
+
+    dirname = os.path.dirname(vrtfilename)
+    tmpdir = tempfile.mkdtemp(prefix='precache-', dir=dirname)
+    try:
+        tmpfilename = os.path.join(tmpdir, os.path.basename(vrtfilename))
+        gdalsupport.safe_vrt_copy(vrtfilename, tmpfilename)
+
+        # preserve existing overviews
+        ovrfilename = vrtfilename + '.ovr'
+        if os.path.exists(ovrfilename):
+            shutil.copy(ovrfilename, tmpdir)
+
+        levels = gdalsupport.ovrBuild(tmpfilename, levels, resampling,
+                                      nthreads)
+
+        for filename in os.listdir(tmpdir):
+            if filename.endswith(('.ovr', '.aux')):
+                os.replace(os.path.join(tmpdir, filename),
+                           os.path.join(dirname, filename))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return levels
+
+
+def precache(filename, cachedir=CACHEDIR, levels=None, plan=False,
+             subdatasets=False, nthreads=1):
+    """Build the GSDView cache for the *filename* product.
+
+    The cached virtual dataset and overviews are stored in the same
+    place used by
+    :class:`gsdview.gdalbackend.modelitems.CachedDatasetItem`.
+    If *subdatasets* is True, the cache is also built for sub-datasets.
+
+    Return the dataset cache directory.
+
+    """
+
+    dataset = gdal.Open(filename)
+    if dataset is None:
+        raise ValueError('unable to open "%s"' % filename)
+
+    dscachedir = gdalsupport.datasetCacheDir(dataset, cachedir)
+
+    if dataset.RasterCount:
+        vrtfilename, vrtdataset = gdalsupport.openCachedVrt(dataset,
+                                                            dscachedir)
+        vrtdataset = None
+        build_overviews(vrtfilename, levels, plan, nthreads)
+
+    if subdatasets:
+        # same layout used by GDALBackend.openSubDataset
+        for index, (path, extrainfo) in enumerate(
+                dataset.GetSubDatasets(), 1):
+            subdataset = gdal.Open(path)
+            if subdataset is None or not subdataset.RasterCount:
+                logging.warning('unable to open sub-dataset "%s"', path)
+                continue
+
+            sdcachedir = os.path.join(dscachedir, 'subdataset%02d' % index)
+            vrtfilename, vrtdataset = gdalsupport.openCachedVrt(subdataset,
+                                                                sdcachedir)
+            vrtdataset = None
+            build_overviews(vrtfilename, levels, plan, nthreads)
+
+    return dscachedir
+
+
+def _precache_job(job):
+    # executed in worker processes: the status is None for skipped files
+    filename, donefingerprint, kwargs = job
+    try:
+        fingerprint = data_uuid(filename)
+    except OSError as e:
+        return filename, None, JobJournal.FAILED, dict(
+            error='unable to access the file: %s' % e)
+    if fingerprint == donefingerprint:
+        return filename, fingerprint, None, dict(reason='already done')
+
+    gdal.PushErrorHandler('CPLQuietErrorHandler')
+    try:
+        if gdal.IdentifyDriver(filename) is None:
+            return filename, fingerprint, None, {}
+
+        t0 = time.time()
+        dscachedir = precache(filename, **kwargs)
+        return filename, fingerprint, JobJournal.DONE, dict(
+            cachedir=dscachedir, elapsed=time.time() - t0)
+    except Exception as e:
+        return filename, fingerprint, JobJournal.FAILED, dict(error=str(e))
+    finally:
+        gdal.PopErrorHandler()
+
+
+def precache_tree(paths, cachedir=CACHEDIR, journal=None, nprocs=None,
+                  force=False, **kwargs):
+    """Build the GSDView cache for all products in *paths*.
+
+    Products are processed by a pool of *nprocs* processes (default
+    the number of CPUs).
+    Products already recorded as done in the *journal* (a
+    :class:`JobJournal` or a filename) are skipped unless *force*
+    is True or they have been modified.
+
+    Extra keyword arguments are passed to :func:`precache`.
+
+    Return the number of failed jobs.
+
+    """
+
+    if journal is None:
+        journal = os.path.join(cachedir, JOURNAL_FILENAME)
+    if not isinstance(journal, JobJournal):
+        journal = JobJournal(journal)
+
+    kwargs['cachedir'] = cachedir
+
+    # @NOTE: fingerprints and driver identification are computed in the
+    #        worker processes (they require reading each file)
+    jobs = []
+    for filename in find_files(paths):
+        if force:
+            donefingerprint = None
+        else:
+            donefingerprint = journal.donefingerprint(filename)
+        jobs.append((filename, donefingerprint, kwargs))
+
+    logging.info('%d files to check', len(jobs))
+
+    nfailures = 0
+    with multiprocessing.Pool(nprocs) as pool:
+        for count, (filename, fingerprint, status, info) in enumerate(
+                pool.imap_unordered(_precache_job, jobs), 1):
+            if status is None:
+                # not a raster or already done (reason given)
+                if 'reason' in info:
+                    logging.info('skip "%s" (%s)', filename, info['reason'])
+                continue
+
+            journal.append(filename, fingerprint, status, **info)
+            if status == JobJournal.DONE:
+                logging.info('[%d/%d] "%s" done in %.1f s', count, len(jobs),
+                             filename, info['elapsed'])
+            else:
+                nfailures += 1
+                logging.warning('[%d/%d] "%s" failed: %s', count, len(jobs),
+                                filename, info['error'])
+
+    return nfailures
+
+
+# Command line tool #########################################################
+def get_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='precache', description=__doc__)
+    parser.add_argument(
+        '--version', action='version',
+        version='%(prog)s {}'.format(__version__),
+    )
+    parser.add_argument(
+        '-c', '--cachedir', default=CACHEDIR,
+        help='GSDView cache directory (default: %(default)s)')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='number of products processed in parallel '
+             '(default: the number of CPUs)')
+    parser.add_argument(
+        '-t', '--threads', type=int, default=1,
+        help='number of threads used for the overview computation of each '
+             'product (default: %(default)s)')
+    parser.add_argument(
+        '--journal', default=None,
+        help='job journal file (default: "%s" in the cache directory)' %
+             JOURNAL_FILENAME)
+    parser.add_argument(
+        '-f', '--force', action='store_true', default=False,
+        help='process all products, including the ones already done '
+             'according to the journal (default: %(default)s)')
+    parser.add_argument(
+        '-s', '--subdatasets', action='store_true', default=False,
+        help='also process sub-datasets (default: %(default)s)')
+    parser.add_argument(
+        '-p', '--plan', action='store_true', default=False,
+        help='select overview levels using the cost model based planner '
+             '(default: %(default)s)')
+    parser.add_argument(
+        '-l', '--levels', type=int, nargs='+', default=None,
+        help='overview levels to compute (default: automatic)')
+
+    parser.add_argument('paths', nargs='+',
+                        help='input raster products or directories')
+
+    return parser
+
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv:
+        argv = gdal.GeneralCmdLineProcessor(argv)
+
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    return args
+
+
+def main(argv=None):
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO)
+
+    try:
+        args = parse_args(argv)
+        nfailures = precache_tree(args.paths, args.cachedir, args.journal,
+                                  args.jobs, args.force, levels=args.levels,
+                                  plan=args.plan,
+                                  subdatasets=args.subdatasets,
+                                  nthreads=args.threads)
+    except Exception as e:
+        logging.error(str(e))
+        logging.debug(str(e), exc_info=True)
+        sys.exit(EX_FAILURE)
+
+    if nfailures:
+        sys.exit(EX_FAILURE)
+
+
+if __name__ == '__main__':
+    main()
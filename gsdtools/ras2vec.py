@@ -25,7 +25,10 @@ Take in input one or more raster datasets and generate a vector file
 containing the bounding box polygon and, optionally, a GCP layer of
 each input dataset.
 
-Note: currently only the KML format is supported for output.
+In update mode (see :func:`update_index`) a footprint index of all the
+raster products in the input directory trees is created or updated
+incrementally: products are processed in parallel and only new or
+modified products are added to the index.
 
 This program aims to be an improved and more flexible version of the
 gdaltindex utility.
@@ -36,7 +39,6 @@ gdaltindex utility.
 
 # @TODO:
 #
-#   * support more output formats
 #   * confogurable spatial reference system
 #   * configurable database field for path storage (see gdaltindex)
 #   * colors
@@ -46,9 +48,13 @@ gdaltindex utility.
 import os
 import sys
 import logging
+import multiprocessing
 
 from osgeo import gdal, ogr, osr
 
+from gsdview.utils import data_uuid
+from gsdview.gdalbackend import gdalsupport
+
 __version__ = '1.0'
 
 EX_FAILURE = 1
@@ -187,6 +193,49 @@ def geographic_info(ds, srsout=None):
     return corners, outgcps
 
 
+def footprint_info(ds, srsout=None):
+    """Return the footprint of the valid data area of *ds*.
+
+    The outlines of the valid data mask (see
+    :func:`gsdview.gdalbackend.gdalsupport.validDataFootprint`) are
+    mapped through the geolocation model of the dataset (GCPs or
+    geo-transform).
+
+    Return the list of rings, i.e. lists of (x, y) vertices in the
+    *srsout* reference system (the geographic reference system of the
+    dataset is assumed as source, see
+    :meth:`gsdview.gdalbackend.gdalsupport.CoordinateMapper.geographicSrs`).
+
+    """
+
+    mapper = gdalsupport.coordinate_mapper(ds)
+    if mapper is None:
+        raise ValueError('no geographic info in "%s"' % ds.GetDescription())
+
+    rings = gdalsupport.validDataFootprint(ds)
+    if not rings:
+        raise ValueError('no valid data in "%s"' % ds.GetDescription())
+
+    srsout = makesrs(srsout)
+    srs = mapper.geographicSrs()
+    transformer = None
+    if not srs.IsSame(srsout):
+        srsout = srsout.Clone()
+        if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+            srsout.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        transformer = osr.CoordinateTransformation(srs, srsout)
+
+    outrings = []
+    for ring in rings:
+        # (lon, lat) coordinates
+        x, y = mapper.imgToGeoPoints(ring[:, 0], ring[:, 1])
+        if transformer is not None:
+            x, y = gdalsupport.transformPoints(transformer, x, y)
+        outrings.append(list(zip(x.tolist(), y.tolist())))
+
+    return outrings
+
+
 def export_bounding_box(layer, corners, description='', mark_corners=True):
     # ring
     ring = ogr.Geometry(type=ogr.wkbLinearRing)
@@ -416,6 +465,269 @@ def raster_tree_index(src, dst, boxlayer=None, gcplayer=None,
     gdal.PopErrorHandler()
 
 
+# Incremental index #########################################################
+# GDAL auxiliary files
+SKIP_EXTENSIONS = ('.ovr', '.aux', '.aux.xml', '.msk')
+
+#: number of features written in each OGR transaction
+BATCH_SIZE = 1000
+
+INDEX_LAYER_NAME = 'index'
+LOCATION_FIELD = 'Location'
+UUID_FIELD = 'UUID'
+
+
+def find_files(paths):
+    """Generate the list of (absolute) file names in the *paths* trees."""
+
+    for path in paths:
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                if not filename.endswith(SKIP_EXTENSIONS):
+                    yield os.path.join(root, filename)
+
+
+def _footprint_job(job):
+    # executed in worker processes: only plain python objects are returned
+    filename, uuid, srsout, footprint = job
+    try:
+        fingerprint = data_uuid(filename)
+    except OSError as e:
+        return filename, None, None, 'unable to access the file: %s' % e
+    if fingerprint == uuid:
+        # already indexed and not modified
+        return filename, fingerprint, None, None
+
+    gdal.PushErrorHandler('CPLQuietErrorHandler')
+    try:
+        if gdal.IdentifyDriver(filename) is None:
+            return filename, fingerprint, [], None
+
+        src = gdal.Open(filename)
+        if src is None:
+            return filename, fingerprint, None, 'unable to open the dataset'
+
+        datasets = [src]
+        datasets.extend(gdal.Open(subds)
+                        for subds, descr in src.GetSubDatasets())
+
+        records = []
+        for ds in datasets:
+            if ds is None:
+                continue
+            try:
+                corners, gcps = geographic_info(ds, srsout)
+            except ValueError:
+                # no geographic info
+                continue
+            rings = [[(gcp.GCPX, gcp.GCPY) for gcp in corners]]
+
+            if footprint:
+                try:
+                    rings = footprint_info(ds, srsout)
+                except ValueError as e:
+                    # keep the bounding box
+                    logging.debug('footprint: %s', e)
+
+            description = ds.GetDescription().strip()
+            records.extend((description, ring) for ring in rings)
+
+        return filename, fingerprint, records, None
+    except Exception as e:
+        return filename, fingerprint, None, str(e)
+    finally:
+        gdal.PopErrorHandler()
+
+
+def open_index(dst, drivername=None, srs=None):
+    """Open (or create) the index datasource and layer for update.
+
+    Return the (datasource, layer) tuple.
+
+    """
+
+    if isinstance(dst, str):
+        filename = dst
+        dst = ogr.Open(filename, update=1)
+        if dst is None:
+            if os.path.exists(filename):
+                raise RuntimeError(
+                    'unable to open "%s" in update mode.' % filename)
+            dst = create_datasource(filename, drivername)
+
+    layer = dst.GetLayerByName(INDEX_LAYER_NAME)
+    if layer is None:
+        layer = create_box_layer(dst, INDEX_LAYER_NAME, srs,
+                                 ogr.wkbPolygon)
+
+    defn = layer.GetLayerDefn()
+    for name in (LOCATION_FIELD, UUID_FIELD):
+        if defn.GetFieldIndex(name) < 0:
+            layer.CreateField(ogr.FieldDefn(name, ogr.OFTString))
+
+    return dst, layer
+
+
+def index_entries(layer):
+    """Return the {location: (uuid, fids)} dictionary of index entries."""
+
+    entries = {}
+    layer.SetIgnoredFields(['OGR_GEOMETRY', 'OGR_STYLE', 'Name',
+                            'Description'])
+    layer.ResetReading()
+    try:
+        for feature in layer:
+            location = feature.GetField(LOCATION_FIELD)
+            if not location:
+                continue
+            uuid, fids = entries.setdefault(
+                location, (feature.GetField(UUID_FIELD), []))
+            fids.append(feature.GetFID())
+    finally:
+        layer.SetIgnoredFields([])
+        layer.ResetReading()
+
+    return entries
+
+
+def _create_index_feature(layer, location, fingerprint, description,
+                          corners):
+    ring = ogr.Geometry(type=ogr.wkbLinearRing)
+    for x, y in corners:
+        ring.AddPoint_2D(x, y)
+    ring.CloseRings()
+
+    poly = ogr.Geometry(type=ogr.wkbPolygon)
+    poly.AddGeometry(ring)
+
+    feature = ogr.Feature(layer.GetLayerDefn())
+    feature.SetField('Name', os.path.basename(description))
+    feature.SetField('Description', description)
+    feature.SetField(LOCATION_FIELD, location)
+    feature.SetField(UUID_FIELD, fingerprint)
+    feature.SetStyleString('BRUSH(fc:#FF000064);PEN(c:#FF0000)')  # red filled
+    feature.SetGeometry(poly)
+
+    if layer.CreateFeature(feature) != 0:
+        raise RuntimeError('failed to create a new feature.')
+
+
+def update_index(paths, dst, drivername=None, srsout=None, nprocs=None,
+                 batchsize=BATCH_SIZE, footprint=False):
+    """Create or update the footprint index of all rasters in *paths*.
+
+    Bounding boxes of all raster products found in the *paths* trees
+    (and of their sub-datasets) are stored in the "index" layer of
+    *dst* (a filename or an OGR datasource open for update) together
+    with the product location and data fingerprint (see
+    :func:`gsdview.utils.data_uuid`).
+
+    Products already indexed and not modified are skipped, entries of
+    products that no longer exist are removed while the ones of files
+    that cannot be accessed are kept.
+    Fingerprints are computed, and new or modified products are
+    processed, by a pool of *nprocs* processes (default the number of
+    CPUs) and features are written in OGR transactions of *batchsize*
+    features.
+
+    If *footprint* is True the outline of the valid data area (see
+    :func:`footprint_info`) is stored instead of the bounding box
+    (one feature for each disjoint part).
+
+    .. note:: non raster files are identified (and skipped) at each
+              run since they are not recorded in the index.
+
+    Return the (nadded, nremoved, nfailures) tuple.
+
+    """
+
+    srsout = makesrs(srsout)
+    dst, layer = open_index(dst, drivername, srsout)
+    entries = index_entries(layer)
+
+    # @NOTE: fingerprints are computed by the worker processes, that
+    #        skip products already indexed and not modified
+    srswkt = srsout.ExportToWkt()
+    filenames = list(find_files(paths))
+    seen = set(filenames)
+    jobs = [(filename, entries.get(filename, (None,))[0], srswkt, footprint)
+            for filename in filenames]
+
+    # entries of deleted products
+    obsolete = [location for location in entries
+                if location not in seen and not os.path.exists(location)]
+
+    nremoved = 0
+    if obsolete:
+        layer.StartTransaction()
+        for location in obsolete:
+            for fid in entries[location][1]:
+                layer.DeleteFeature(fid)
+                nremoved += 1
+        layer.CommitTransaction()
+    logging.info('%d entries of deleted products removed', nremoved)
+
+    logging.info('%d files to check', len(jobs))
+
+    nadded = 0
+    nfailures = 0
+    pending = 0
+    with multiprocessing.Pool(nprocs) as pool:
+        layer.StartTransaction()
+        try:
+            for count, (filename, fingerprint, records, error) in enumerate(
+                    pool.imap_unordered(_footprint_job, jobs, chunksize=8),
+                    1):
+                if fingerprint is None:
+                    # keep the index entries of unreadable files
+                    logging.warning('[%d/%d] "%s": %s', count, len(jobs),
+                                    filename, error)
+                    continue
+
+                if records is None and error is None:
+                    # not modified
+                    continue
+
+                # modified products
+                if filename in entries:
+                    for fid in entries[filename][1]:
+                        layer.DeleteFeature(fid)
+                        nremoved += 1
+                        pending += 1
+
+                if error is not None:
+                    nfailures += 1
+                    logging.warning('[%d/%d] "%s" failed: %s', count,
+                                    len(jobs), filename, error)
+                    continue
+
+                for description, corners in records:
+                    _create_index_feature(layer, filename, fingerprint,
+                                          description, corners)
+                    nadded += 1
+                    pending += 1
+                if records:
+                    logging.debug('[%d/%d] "%s" added', count, len(jobs),
+                                  filename)
+
+                if pending >= batchsize:
+                    layer.CommitTransaction()
+                    layer.StartTransaction()
+                    pending = 0
+        finally:
+            layer.CommitTransaction()
+
+    logging.info('%d entries added', nadded)
+
+    return nadded, nremoved, nfailures
+
+
 # Command line tool #########################################################
 def get_parser():
     import argparse
@@ -427,8 +739,9 @@ def get_parser():
     )
     # parser.add_argument('-o', '--outfile', type='str',
     #                   help='output file name (default: generated)')
-    # parser.add_argument('-f', '--format', type='str', default='KML',
-    #                   help='output vector format (default: %(default)s)')
+    parser.add_argument(
+        '-f', '--format', default=DEFAULT_OGRDRIVER,
+        help='output vector format (default: %(default)s)')
     # parser.add_argument('-s', '--t_srs', type='str', default='EPSG:4326'
     #                   help='target spatial reference system '
     #                        '(default: %(default)s)')
@@ -443,6 +756,19 @@ def get_parser():
         '-a', '--abspath', action='store_true', default=False,
         help='store absolute path in bounding box feature description '
              '(default: %(default)s)')
+    parser.add_argument(
+        '-u', '--update', action='store_true', default=False,
+        help='create or update an incremental index: only new or modified '
+             'products are processed and entries of deleted products are '
+             'removed (default: %(default)s)')
+    parser.add_argument(
+        '-p', '--footprint', action='store_true', default=False,
+        help='in update mode store the outline of the valid data area '
+             'instead of the bounding box (default: %(default)s)')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='number of products processed in parallel in update mode '
+             '(default: the number of CPUs)')
 
     parser.add_argument('output', help='output vector file')
     parser.add_argument('inputs', nargs='+', help='input raster products')
@@ -452,7 +778,7 @@ def get_parser():
 
 def parse_args(argv=None):
     if argv is None:
-        argv = argv[1:]
+        argv = sys.argv[1:]
 
     # @NOTE: ogr.GeneralCmdLineProcessor is not available in GDAL 1.6.x
     if argv:
@@ -484,11 +810,19 @@ def main(argv=None):
 
     try:
         args = parse_args(argv)
+        if args.update:
+            nadded, nremoved, nfailures = update_index(
+                args.inputs, args.output, args.format, nprocs=args.jobs,
+                footprint=args.footprint)
+            if nfailures:
+                sys.exit(EX_FAILURE)
+            return
+
         if os.path.exists(args.output):
             logging.error(
                 'the output file ("%s") already exists.', args.output)
             sys.exit(EX_USAGE)
-        dst = create_datasource(args.output)    # , options.format)
+        dst = create_datasource(args.output, args.format)
 
         if len(args.inputs) > 1:
             if args.abspath:
@@ -32,6 +32,7 @@ from exectools.qt import QtToolController, QtDialogLoggingHandler
 from gsdview import info
 from gsdview import utils
 from gsdview import errors
+from gsdview import session
 from gsdview import qtsupport
 from gsdview import graphicsview
 from gsdview import mousemanager
@@ -222,6 +223,9 @@ class GSDView(ItemModelMainWindow):
         _log.info('Load settings ...')
         self.loadSettings(loglevel=loglevel)  # @TODO: pass cachedir
 
+        #: session manager
+        self.session = session.SessionManager(self)
+
         self.treeview.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.treeview.customContextMenuRequested.connect(self.itemContextMenu)
 
@@ -255,7 +259,7 @@ class GSDView(ItemModelMainWindow):
     def closeEvent(self, event):
         self.controller.stop_tool()
         # @TODO: wait for finished (??)
-        # @TODO: save opened datasets (??)
+        self.session.save()
         self.saveSettings()
         self.pluginmanager.save_settings(self.settings)
         self.closeAll()
@@ -720,8 +724,9 @@ class GSDView(ItemModelMainWindow):
                         if item:
                             self.datamodel.appendRow(item)
                             self.treeview.expand(item.index())
-                            _log.debug('File "%s" opened with backend "%s"',
-                                       filename, backendname)
+                            _log.debug('File "%s" opened with backend "%s" '
+                                       '(in background)', filename,
+                                       backendname)
                         else:
                             _log.info('file %s" already open', filename)
                         break
@@ -732,6 +737,15 @@ class GSDView(ItemModelMainWindow):
                 else:
                     _log.error('Unable to open file "%s"', filename)
 
+    @QtCore.Slot()
+    def restoreSession(self):
+        """Restore the previous session (if enabled in preferences)."""
+
+        value = self.settings.value('preferences/restore_session', True,
+                                    type=bool)
+        if value:
+            self.session.restore()
+
     @QtCore.Slot()
     def closeItem(self):
         # @TODO: extend for multiple datasets
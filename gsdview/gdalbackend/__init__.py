@@ -93,6 +93,9 @@ def init(app):
     global _backendobj
     _backendobj = GDALBackend(app)
 
+    # show the data cache usage in the about dialog
+    widget.cachemanager = _backendobj.cachemanager
+
     # @TODO: fix
     # gdal.SetConfigOption('GDAL_PAM_ENABLED', 'YES')
     # gdal.SetConfigOption('GDAL_PAM_PROXY_DIR',
@@ -156,6 +159,10 @@ del methodname, globals_, _definefunc
 
 def close(app):
     saveSettings(app.settings)
+    if _backendobj:
+        # @NOTE: the cache index is not saved at each access
+        _backendobj.cachemanager.wait()
+        _backendobj.cachemanager.save()
 
 
 def loadSettings(settings):
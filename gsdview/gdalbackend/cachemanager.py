@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Management of the GSDView data cache directory.
+
+Each dataset has its own sub-directory in the cache (see
+:func:`gsdview.gdalbackend.gdalsupport.datasetCacheDir`) containing
+the virtual dataset, overviews and other auxiliary files.
+The :class:`CacheManager` keeps track of the size and of the last
+access time of each entry and enforces a disk quota evicting least
+recently used entries.
+Sizes are updated incrementally: only entries accessed since the last
+update are measured, the whole cache directory is only scanned on
+demand (or if the index is missing).
+
+"""
+
+
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import collections
+
+from gsdview import utils
+
+
+_log = logging.getLogger(__name__)
+
+
+class CacheManager(object):
+    """Track usage of the cache directory and enforce a quota.
+
+    Entries are the top level sub-directories of *cachedir*.
+    Their size and last access time are stored in a small index file
+    (:attr:`INDEX_FILENAME`) in the cache directory.
+
+    Entries of open datasets can be protected using :meth:`pin` and
+    are never evicted.
+
+    The size of entries accessed via :meth:`pin`, :meth:`unpin` or
+    :meth:`touch` is updated by :meth:`refresh` (i.e. before each
+    eviction), while :meth:`scan` walks the whole cache directory.
+
+    A *quota* of 0 bytes means no limit.
+
+    """
+
+    #: name of the index file in the cache directory
+    INDEX_FILENAME = 'cache-index.json'
+
+    #: prefix of entries being removed (they are not cache entries)
+    TRASH_PREFIX = '.evicted-'
+
+    def __init__(self, cachedir, quota=0):
+        #: the cache directory
+        self.cachedir = cachedir
+
+        #: maximum size (in bytes) of the cache (0 means no limit)
+        self.quota = quota
+
+        self._lock = threading.RLock()
+        self._entries = None
+        self._pinned = collections.Counter()
+        self._dirty = set()
+        self._needscan = False
+        self._thread = None
+        self._pending = False
+        self._rescan = False
+
+    @property
+    def indexfilename(self):
+        return os.path.join(self.cachedir, self.INDEX_FILENAME)
+
+    @property
+    def entries(self):
+        """Mapping of entry names to size and last access time."""
+
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            return self._entries
+
+    def _load(self):
+        try:
+            with open(self.indexfilename) as fd:
+                return json.load(fd)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            _log.debug('unable to load the cache index: %s', e)
+
+        # @NOTE: sizes are unknown, a full scan is needed
+        self._needscan = True
+        return {}
+
+    def save(self):
+        """Save the cache index."""
+
+        with self._lock:
+            data = json.dumps(self.entries)
+
+        try:
+            if not os.path.isdir(self.cachedir):
+                os.makedirs(self.cachedir)
+            fd, tmpfilename = tempfile.mkstemp(dir=self.cachedir,
+                                               suffix='.json')
+            with os.fdopen(fd, 'w') as fd:
+                fd.write(data)
+            os.replace(tmpfilename, self.indexfilename)
+        except OSError as e:
+            _log.warning('unable to save the cache index: %s', e)
+
+    def entryname(self, path):
+        """Return the name of the cache entry *path* belongs to.
+
+        None is returned if *path* is not in the cache directory.
+
+        """
+
+        relpath = os.path.relpath(os.path.abspath(path),
+                                  os.path.abspath(self.cachedir))
+        name = relpath.split(os.sep)[0]
+        if name in (os.curdir, os.pardir):
+            return None
+        return name
+
+    def scan(self):
+        """Update the size of all entries in the cache directory."""
+
+        try:
+            names = [entry.name for entry in os.scandir(self.cachedir)
+                     if entry.is_dir(follow_symlinks=False)]
+        except FileNotFoundError:
+            names = []
+
+        # left over by interrupted evictions
+        trash = [name for name in names if name.startswith(self.TRASH_PREFIX)]
+        for name in trash:
+            shutil.rmtree(os.path.join(self.cachedir, name),
+                          ignore_errors=True)
+        names = [name for name in names if name not in trash]
+
+        sizes = {}
+        for name in names:
+            path = os.path.join(self.cachedir, name)
+            try:
+                sizes[name] = utils.get_tree_size(path)
+            except OSError:
+                # e.g. removed in the meanwhile
+                pass
+
+        with self._lock:
+            entries = self.entries
+            for name in list(entries):
+                if name not in sizes:
+                    del entries[name]
+            for name, size in sizes.items():
+                if name in entries:
+                    entries[name]['size'] = size
+                else:
+                    path = os.path.join(self.cachedir, name)
+                    atime = os.stat(path).st_mtime
+                    entries[name] = dict(size=size, atime=atime)
+            self._dirty.difference_update(sizes)
+            self._needscan = False
+
+    def refresh(self):
+        """Update the size of entries accessed since the last update."""
+
+        with self._lock:
+            names, self._dirty = self._dirty, set()
+
+        for name in names:
+            path = os.path.join(self.cachedir, name)
+            try:
+                size = utils.get_tree_size(path)
+            except OSError:
+                # e.g. removed in the meanwhile
+                size = None
+
+            with self._lock:
+                if size is None or not os.path.isdir(path):
+                    self.entries.pop(name, None)
+                elif name in self.entries:
+                    self.entries[name]['size'] = size
+
+    def usage(self):
+        """Return the total size (in bytes) of the cache."""
+
+        with self._lock:
+            return sum(entry['size'] for entry in self.entries.values())
+
+    def touch(self, path):
+        """Record an access to the cache entry *path* belongs to.
+
+        The index file is not written (see :meth:`save`), it is saved
+        at each eviction.
+
+        """
+
+        name = self.entryname(path)
+        if name is None:
+            return
+
+        with self._lock:
+            entry = self.entries.setdefault(name, dict(size=0, atime=0))
+            entry['atime'] = time.time()
+            self._dirty.add(name)
+
+    def pin(self, path):
+        """Protect the entry *path* belongs to from eviction.
+
+        Calls can be nested, the entry is protected until the same
+        number of calls to :meth:`unpin` are done.
+
+        """
+
+        name = self.entryname(path)
+        if name is not None:
+            with self._lock:
+                self._pinned[name] += 1
+            self.touch(path)
+
+    def unpin(self, path):
+        """Release a protection set by :meth:`pin`."""
+
+        name = self.entryname(path)
+        if name is not None:
+            with self._lock:
+                self._pinned[name] -= 1
+                if self._pinned[name] <= 0:
+                    del self._pinned[name]
+            self.touch(path)
+
+    def ispinned(self, path):
+        name = self.entryname(path)
+        with self._lock:
+            return self._pinned.get(name, 0) > 0
+
+    def evict(self, rescan=False):
+        """Evict least recently used entries exceeding the quota.
+
+        The size of entries accessed since the last update is updated
+        before eviction (see :meth:`refresh`), the whole cache
+        directory is scanned only if *rescan* is True or if the index
+        is not available.
+        Pinned entries are never evicted.
+
+        Return the list of evicted entry names.
+
+        """
+
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            rescan = rescan or self._needscan
+        if rescan:
+            self.scan()
+        else:
+            self.refresh()
+
+        evicted = []
+        trash = []
+        with self._lock:
+            if self.quota:
+                entries = self.entries
+                usage = self.usage()
+                lru = sorted(entries, key=lambda name: entries[name]['atime'])
+                for name in lru:
+                    if usage <= self.quota:
+                        break
+                    if self._pinned.get(name, 0) > 0:
+                        continue
+
+                    # @NOTE: evicted entries are only renamed while the
+                    #        lock is held (pin, unpin and touch are called
+                    #        in the GUI thread), they are removed later
+                    path = os.path.join(self.cachedir, name)
+                    trashpath = os.path.join(self.cachedir,
+                                             self.TRASH_PREFIX + name)
+                    try:
+                        if os.path.exists(path):
+                            os.rename(path, trashpath)
+                            trash.append(trashpath)
+                    except OSError as e:
+                        _log.debug('unable to evict "%s": %s', path, e)
+                        continue
+
+                    _log.debug('evict "%s" from the cache', path)
+                    usage -= entries.pop(name)['size']
+                    self._dirty.discard(name)
+                    evicted.append(name)
+
+        for path in trash:
+            shutil.rmtree(path, ignore_errors=True)
+
+        self.save()
+
+        return evicted
+
+    def _run(self, rescan):
+        while True:
+            try:
+                self.evict(rescan)
+            except Exception as e:
+                _log.warning('cache eviction failed: %s', e)
+                _log.debug('cache eviction failed', exc_info=True)
+
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                rescan = self._rescan
+                self._pending = False
+                self._rescan = False
+
+    def evictInBackground(self, rescan=False):
+        """Run :meth:`evict` in a background thread.
+
+        Requests made while an eviction is running are coalesced.
+
+        """
+
+        with self._lock:
+            if self._thread is not None:
+                self._pending = True
+                self._rescan = self._rescan or rescan
+                return
+
+            self._thread = threading.Thread(target=self._run,
+                                            args=(rescan,),
+                                            name='CacheManager')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        """Wait for the completion of the background eviction."""
+
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
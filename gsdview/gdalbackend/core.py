@@ -23,6 +23,7 @@
 
 import os
 import logging
+import functools
 
 from osgeo import gdal
 
@@ -34,6 +35,7 @@ from gsdview.gdalbackend import widgets
 from gsdview.gdalbackend import helpers
 from gsdview.gdalbackend import modelitems
 from gsdview.gdalbackend import gdalsupport
+from gsdview.gdalbackend import cachemanager
 from gsdview.gdalbackend import gdalexectools
 
 
@@ -52,6 +54,12 @@ class GDALBackend(QtCore.QObject):
     #
     # - sub-windows title and window menu
 
+    #: SIGNAL: it is emitted when a dataset opened in background has
+    #: been inserted in the data model (see :meth:`openFile`)
+    #:
+    #: :C++ signature: `void datasetOpened(QStandardItem*)`
+    datasetOpened = QtCore.Signal(object)
+
     _use_exceptions = None
 
     # @TODO: fix names
@@ -80,6 +88,11 @@ class GDALBackend(QtCore.QObject):
         self._tools = self._setupExternalTools()
         self._helpers = self._setupHelpers(self._tools)
 
+        #: manager of the cache directory
+        self.cachemanager = cachemanager.CacheManager(
+            modelitems.CachedDatasetItem.CACHEDIR)
+        modelitems.CachedDatasetItem.CACHEMANAGER = self.cachemanager
+
     def _setupExternalTools(self):
         tools = {}
 
@@ -87,10 +100,6 @@ class GDALBackend(QtCore.QObject):
         handler = gdalexectools.GdalOutputHandler(app.logger, app.statusBar(),
                                                   app.progressbar)
 
-        # gdaladdo
-        tool = gdalexectools.GdalAddOverviewDescriptor(stdout_handler=handler)
-        tools['addo'] = tool
-
         # gdalinfo for statistics computation
         tool = gdalexectools.GdalInfoDescriptor(stdout_handler=handler)
         tool.stats = True
@@ -114,11 +123,11 @@ class GDALBackend(QtCore.QObject):
 
         app = self._app
 
-        hmap['addo'] = helpers.AddoHelper(app, tools['addo'])
+        hmap['addo'] = helpers.AddoHelper(app)
         hmap['stats'] = helpers.StatsHelper(app, tools['stats'])
         hmap['statsdialog'] = helpers.StatsDialogHelper(app, tools['stats'])
         hmap['histdialog'] = helpers.HistDialogHelper(app, tools['hist'])
-        hmap['ovrdialog'] = helpers.AddoDialogHelper(app, tools['addo'])
+        hmap['ovrdialog'] = helpers.AddoDialogHelper(app)
 
         return hmap
 
@@ -146,8 +155,19 @@ class GDALBackend(QtCore.QObject):
                 pass
         return None
 
-    @qtsupport.overrideCursor
     def openFile(self, filename):
+        """Open *filename* asynchronously.
+
+        A placeholder item (:class:`modelitems.PendingDatasetItem`) is
+        returned immediately and it is replaced by the actual dataset
+        item when GDAL objects have been opened in background.
+
+        :exc:`gsdview.errors.OpenError` is raised immediately if no GDAL
+        driver can open *filename* (so that other backends can be
+        tried).
+
+        """
+
         item = self.findItemFromFilename(filename)
         if item:
             self._app.treeview.setCurrentIndex(item.index())
@@ -158,7 +178,108 @@ class GDALBackend(QtCore.QObject):
 
             # @TODO: maybe it is better to use an exception here
             return None
-        return modelitems.datasetitem(filename)
+
+        modelitems.identifydriver(filename)
+
+        item = modelitems.PendingDatasetItem(filename, self)
+        item.opener.finished.connect(
+            functools.partial(self._onDatasetOpened, item))
+        item.start()
+
+        return item
+
+    def _onDatasetOpened(self, placeholder):
+        opener = placeholder.opener
+        opener.deleteLater()
+
+        if placeholder.iscancelled() or placeholder.model() is None:
+            if opener.handles is not None:
+                modelitems.releasehandles(opener.handles)
+            _log.debug('opening of "%s" cancelled', placeholder.filename)
+            return
+
+        parent = placeholder.parent()
+        if parent is None:
+            parent = self._app.datamodel.invisibleRootItem()
+        row = placeholder.row()
+        current = self._app.currentItem() is placeholder
+
+        item = None
+        if opener.handles is not None:
+            try:
+                item = modelitems.datasetitem(placeholder.filename,
+                                              opener.handles)
+            except Exception as e:
+                modelitems.releasehandles(opener.handles)
+                opener.error = e
+
+        parent.takeRow(row)
+        if item is None:
+            _log.error('Unable to open file "%s": %s',
+                       placeholder.filename, opener.error)
+            return
+
+        parent.insertRow(row, item)
+        self._app.treeview.expand(item.index())
+        if current:
+            self._app.treeview.setCurrentIndex(item.index())
+        _log.debug('file "%s" opened', placeholder.filename)
+
+        self.datasetOpened.emit(item)
+
+    # Session ###############################################################
+    def itemState(self, item):
+        """Return a dictionary identifying *item* in the data model.
+
+        The returned dictionary is JSON serializable and can be used
+        to retrieve the item in a later session (see
+        :meth:`itemFromState`).
+
+        """
+
+        state = {}
+        while isinstance(item, modelitems.OverviewItem):
+            item = item.parent()
+        if isinstance(item, modelitems.BandItem):
+            # @NOTE: raster bands are always inserted before subdatasets
+            state['band'] = item.row() + 1
+            item = item.parent()
+        if isinstance(item, modelitems.SubDatasetItem):
+            state['subdataset'] = item.filename
+            item = item.parent()
+        state['filename'] = item.filename
+
+        return state
+
+    def itemFromState(self, state):
+        """Return the item identified by *state* (see :meth:`itemState`).
+
+        Sub-datasets are opened if necessary.
+        If the item is not found None is returned.
+
+        """
+
+        item = self.findItemFromFilename(state['filename'])
+        if not isinstance(item, modelitems.DatasetItem):
+            return None
+
+        subdataset = state.get('subdataset')
+        if subdataset:
+            for child in item.GetSubDatasets():
+                if child.filename == subdataset:
+                    break
+            else:
+                return None
+
+            if not child.isopen():
+                self.openSubDataset(child)
+            item = child
+
+        band = state.get('band')
+        if band:
+            item = item.GetRasterBand(band)
+
+        return item
 
     def itemActions(self, item):
         try:
@@ -292,6 +413,16 @@ class GDALBackend(QtCore.QObject):
             statusTip=self.tr('Build overviews for all raster bands'),
             triggered=self.buildOverviews)
 
+        # optimize for viewing
+        QtWidgets.QAction(
+            icon, self.tr('O&ptimize for viewing'),
+            actionsgroup, objectName='actionOptimizeForViewing',
+            toolTip=self.tr('Create an optimized copy of the dataset in the '
+                            'cache'),
+            statusTip=self.tr('Create a tiled and compressed copy of the '
+                              'dataset, with overviews, in the cache'),
+            triggered=self.optimizeForViewing)
+
         # @TODO: add band, add virtual band, open GCPs view
 
         # close
@@ -326,6 +457,22 @@ class GDALBackend(QtCore.QObject):
 
         return actionsgroup
 
+    def _setupPendingDatasetItemActions(self, actionsgroup=None):
+        if actionsgroup is None:
+            actionsgroup = QtWidgets.QActionGroup(self)
+
+        # cancel
+        icon = qtsupport.geticon('close.svg', 'gsdview')
+        QtWidgets.QAction(
+            icon, self.tr('Cancel'), actionsgroup,
+            objectName='actionCloseItem',
+            shortcut=self.tr('Ctrl+W'),
+            toolTip=self.tr('Cancel the opening of the dataset'),
+            statusTip=self.tr('Cancel the opening of the dataset'),
+            triggered=self.closeCurrentItem)
+
+        return actionsgroup
+
     def _setupActions(self, actionsmap=None):
         if actionsmap is None:
             actionsmap = {}
@@ -337,6 +484,8 @@ class GDALBackend(QtCore.QObject):
         actionsmap['DatasetItem'] = self._setupDatasetItemActions()
         actionsmap['CachedDatasetItem'] = actionsmap['DatasetItem']
         actionsmap['SubDatasetItem'] = self._setupSubDatasetItemActions()
+        actionsmap['PendingDatasetItem'] = (
+            self._setupPendingDatasetItemActions())
 
         return actionsmap
 
@@ -383,6 +532,15 @@ class GDALBackend(QtCore.QObject):
         else:
             action.setEnabled(False)
 
+        # optimize for viewing
+        action = actionsgroup.findChild(QtWidgets.QAction,
+                                        'actionOptimizeForViewing')
+        if isinstance(item, modelitems.CachedDatasetItem):
+            action.setEnabled(item.vrtfilename is not None and
+                              not item.isoptimized())
+        else:
+            action.setEnabled(False)
+
         return actionsgroup
 
     # @NOTE: this is needed for correct context menu setup
@@ -517,6 +675,49 @@ class GDALBackend(QtCore.QObject):
         dialog.overviewComputationRequest.connect(helper.start)
         dialog.exec_()
 
+    @QtCore.Slot()
+    @QtCore.Slot(QtGui.QStandardItem)
+    def optimizeForViewing(self, item=None):
+        if item is None:
+            item = self._app.currentItem()
+
+        assert isinstance(item, modelitems.CachedDatasetItem), (
+            'item = %s' % str(item))
+
+        dialog = QtWidgets.QProgressDialog(self._app)
+        dialog.setModal(True)
+        dialog.setWindowTitle(self.tr('Optimize for viewing'))
+        dialog.setLabelText(self.tr('Creating the optimized copy of "%s" ...')
+                            % item.text())
+        dialog.setRange(0, 100)
+        dialog.setMinimumDuration(0)
+
+        # @NOTE: the optimized copy is created in a worker thread, the
+        #        item is re-opened when it finishes
+        try:
+            optimizer = item.startOptimization()
+        except RuntimeError as e:
+            _log.error(str(e))
+            return
+
+        optimizer.progress.connect(
+            lambda complete, message: dialog.setValue(int(100 * complete)))
+        dialog.canceled.connect(optimizer.requestInterruption)
+
+        def onFinished():
+            # @NOTE: closing the dialog emits the "canceled" signal
+            if optimizer.error is None:
+                pass
+            elif optimizer.isInterruptionRequested():
+                _log.info('dataset optimization interrupted by the user')
+            else:
+                _log.error(str(optimizer.error))
+            dialog.canceled.disconnect(optimizer.requestInterruption)
+            dialog.close()
+
+        optimizer.finished.connect(onFinished)
+        dialog.show()
+
     # @TODO: add band, add virtual band, open GCPs view
 
     @QtCore.Slot()
@@ -527,8 +728,10 @@ class GDALBackend(QtCore.QObject):
 
     # Sub-dataset ###########################################################
     @QtCore.Slot()
-    def openSubDataset(self):
-        item = self._app.currentItem()
+    @QtCore.Slot(QtGui.QStandardItem)
+    def openSubDataset(self, item=None):
+        if item is None:
+            item = self._app.currentItem()
         assert isinstance(item, modelitems.SubDatasetItem)
         if item.isopen():
             if gdalsupport.isRGB(item):
@@ -611,9 +814,14 @@ class GDALBackend(QtCore.QObject):
         else:
             subwin.show()
 
-        # @TODO: check
-        helper = self._helpers['addo']
-        helper.start(item)
+        # @NOTE: in lazy overviews mode missing overview tiles are computed
+        #       on demand by the graphics item
+        if getattr(item, 'tilestore', None) is None:
+            # @TODO: check
+            helper = self._helpers['addo']
+            helper.start(item)
+
+        return subwin
 
     # @TODO: Open, Masked bands
     # @TODO: dataset --> Build overviews
@@ -671,9 +879,25 @@ class GDALBackend(QtCore.QObject):
 
             modelitems.VISIBLE_OVERVIEW_ITEMS = value
             # @TODO: reload all items
+
+            # compute overview tiles on demand
+            value = settings.value('lazy_overviews', False, type=bool)
+            modelitems.LAZY_OVERVIEWS = value
+
+            # cache quota (MB)
+            value = settings.value('cache_quota', 0, type=int)
+            self.cachemanager.quota = value * 1024 ** 2
+
+            # maximum number of open datasets
+            value = settings.value('max_open_datasets', 0, type=int)
+            modelitems.DATASET_POOL.maxsize = value
+            modelitems.DATASET_POOL.shrink()
         finally:
             settings.endGroup()
 
+        # @NOTE: the whole cache directory is scanned in any case
+        self.cachemanager.evictInBackground(rescan=True)
+
     def saveSettings(self, settings):
         # @NOTE: GDAL preferences are only modified via preferences dialog
 
@@ -682,6 +906,17 @@ class GDALBackend(QtCore.QObject):
             # show overviews in the treeview
             settings.setValue('visible_overview_items',
                               modelitems.VISIBLE_OVERVIEW_ITEMS)
+
+            # compute overview tiles on demand
+            settings.setValue('lazy_overviews', modelitems.LAZY_OVERVIEWS)
+
+            # cache quota (MB)
+            settings.setValue('cache_quota',
+                              self.cachemanager.quota // 1024 ** 2)
+
+            # maximum number of open datasets
+            settings.setValue('max_open_datasets',
+                              modelitems.DATASET_POOL.maxsize)
         finally:
             settings.endGroup()
 
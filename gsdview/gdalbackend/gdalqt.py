@@ -35,6 +35,7 @@ from qtpy import QtCore, QtWidgets, QtGui
 from gsdview import imgutils
 from gsdview import qtsupport
 from gsdview.gdalbackend import gdalsupport
+from gsdview.gdalbackend import tilestore
 
 
 _log = logging.getLogger(__name__)
@@ -75,6 +76,33 @@ def safeDataStats(data, nodata=None):
 # @TODO: move GraphicsView here
 
 
+class TileNotifier(QtCore.QObject):
+    """Update a graphics item when tiles of lazy overviews are ready.
+
+    Tiles are computed in worker threads: :attr:`tileReady` can be
+    emitted from any thread and the item is updated in the GUI thread.
+
+    """
+
+    #: SIGNAL: it is emitted when a requested tile is ready
+    #:
+    #: :C++ signature: `void tileReady()`
+    tileReady = QtCore.Signal()
+
+    def __init__(self, item, parent=None, **kwargs):
+        super(TileNotifier, self).__init__(parent, **kwargs)
+        self.item = item
+        self.tileReady.connect(self._onTileReady)
+
+    @QtCore.Slot()
+    def _onTileReady(self):
+        if self.item is not None:
+            self.item.update()
+
+    def __call__(self, level, tx, ty):
+        self.tileReady.emit()
+
+
 class BaseGdalGraphicsItem(QtWidgets.QGraphicsItem):
     Type = QtGui.QStandardItem.UserType + 1
 
@@ -102,6 +130,21 @@ class BaseGdalGraphicsItem(QtWidgets.QGraphicsItem):
         self._data_preproc = None
         self.colortable = None
 
+        #: overview level used in the last paint
+        self.ovrlevel = 1
+
+        #: if set, the next paint uses the overview with the closest
+        #: level greater or equal to *previewlevel* (if coarser than the
+        #: one needed) and then the item is refined (e.g. cached coarse
+        #: overviews are displayed first when a session is restored)
+        self.previewlevel = None
+
+        #: (x, y, data, level) tuple of raw data read in the last paint
+        #: (*x* and *y* are in coordinates of the overview *level*)
+        self.paintedblock = None
+
+        self._tilenotifier = None
+
     def type(self):
         return self.Type
 
@@ -175,6 +218,88 @@ class BaseGdalGraphicsItem(QtWidgets.QGraphicsItem):
                     band = band.GetOverview(ovrindex)
         return band, ovrlevel, ovrindex
 
+    @staticmethod
+    def _bestLazyOvrLevel(band, levelOfDetail, ovrband, ovrlevel):
+        """Return the lazy overview that best fits the level of detail.
+
+        Lazy overviews are only used if they fit the requested level of
+        detail better than *ovrlevel*, otherwise *ovrband* and *ovrlevel*
+        are returned unchanged.
+
+        """
+
+        tilestore = getattr(band, 'tilestore', None)
+        if tilestore is None or levelOfDetail <= 0:
+            return ovrband, ovrlevel
+
+        reqlevel = 1. / levelOfDetail
+        level = tilestore.bestLevel(reqlevel)
+        if level is not None and abs(reqlevel - level) < abs(reqlevel -
+                                                              ovrlevel):
+            return tilestore.overview(level), level
+
+        return ovrband, ovrlevel
+
+    def _availableLazyOvrLevel(self, rect, ovrband, ovrlevel, fallback):
+        """Return the lazy overview data available for *rect*.
+
+        Missing tiles of the *ovrband* lazy overview are requested
+        (see :meth:`gsdview.gdalbackend.tilestore.OvrTileStore.requestTiles`)
+        and, in the meanwhile, the first coarser lazy overview having
+        all tiles available is used (or the *fallback* (band, level) if
+        it is a GDAL overview).
+
+        (None, None) is returned if nothing can be displayed without
+        computing tiles.
+
+        """
+
+        store = ovrband.tilestore
+        x, y, w, h = self._clipRect(ovrband, rect, ovrlevel)
+        if w <= 0 or h <= 0:
+            return ovrband, ovrlevel
+
+        if self._tilenotifier is None:
+            self._tilenotifier = TileNotifier(self)
+        if store.requestTiles(ovrlevel, x, y, w, h, self._tilenotifier):
+            return ovrband, ovrlevel
+
+        for level in store.levels:
+            if level <= ovrlevel:
+                continue
+            band = store.overview(level)
+            x, y, w, h = self._clipRect(band, rect, level)
+            if w > 0 and h > 0 and not store.missingTiles(level, x, y, w, h):
+                return band, level
+
+        if fallback[1] > 1:
+            return fallback
+
+        return None, None
+
+    def _previewOvrLevel(self, band, ovrband, ovrlevel, ovrindex):
+        level = self.previewlevel
+        self.previewlevel = None
+        if not level or level <= ovrlevel:
+            return ovrband, ovrlevel, ovrindex
+
+        try:
+            index = gdalsupport.ovrBestIndex(band, level, 'GREATER')
+        except gdalsupport.MissingOvrError:
+            try:
+                index = gdalsupport.ovrBestIndex(band, level, 'SMALLER')
+            except gdalsupport.MissingOvrError:
+                return ovrband, ovrlevel, ovrindex
+
+        level = gdalsupport.ovrLevels(band)[index]
+        if level <= ovrlevel:
+            return ovrband, ovrlevel, ovrindex
+
+        # @NOTE: refine as soon as the preview has been displayed
+        QtCore.QTimer.singleShot(0, self.update)
+
+        return band.GetOverview(index), level, index
+
     @staticmethod
     def _defaultStretch(band, data=None, nsigma=5):
         # @NOTE: statistics computation is potentially slow so first check
@@ -211,6 +336,13 @@ class BaseGdalGraphicsItem(QtWidgets.QGraphicsItem):
         self.stretch.set_range(lower, upper)
         self._stretch_initialized = True
 
+    def setStretchRange(self, lower, upper):
+        """Set the input range of the stretch (e.g. from a session)."""
+
+        self.stretch.set_range(lower, upper)
+        self._stretch_initialized = True
+        self.update()
+
     @staticmethod
     def _dataRange(band, data=None):
         if band and gdalsupport.hasFastStats(band):
@@ -245,15 +377,47 @@ class BaseGdalGraphicsItem(QtWidgets.QGraphicsItem):
     def dataRange(self, data=None):
         return None, None
 
+    def displayValue(self, value):
+        """Return the display value (after stretching) of a raw *value*."""
+
+        if value is None or self.stretch is None:
+            return None
+
+        if not self._stretch_initialized:
+            return None
+
+        data = np.asarray([[value]])
+        if self._data_preproc:
+            data = self._data_preproc(data)
+        return self.stretch(data)[0, 0]
+
     def paint(self, painter, option, widget):
         levelOfDetail = self._levelOfDetail(option, painter)
         ovrband, ovrlevel, ovrindex = self._bestOvrLevel(self.gdalobj,
                                                          levelOfDetail)
-        x, y, w, h = self._clipRect(ovrband,
-                                    option.exposedRect.toAlignedRect(),
-                                    ovrlevel)
+        fallback = (ovrband, ovrlevel)
+        ovrband, ovrlevel = self._bestLazyOvrLevel(self.gdalobj,
+                                                   levelOfDetail,
+                                                   ovrband, ovrlevel)
+        if self.previewlevel:
+            ovrband, ovrlevel, ovrindex = self._previewOvrLevel(
+                self.gdalobj, ovrband, ovrlevel, ovrindex)
+
+        rect = option.exposedRect.toAlignedRect()
+        if isinstance(ovrband, tilestore.LazyOverview):
+            ovrband, ovrlevel = self._availableLazyOvrLevel(
+                rect, ovrband, ovrlevel, fallback)
+            if ovrband is None:
+                # @NOTE: nothing is painted until requested tiles are
+                #        ready (see TileNotifier)
+                self.paintedblock = None
+                return
+
+        self.ovrlevel = ovrlevel
+        x, y, w, h = self._clipRect(ovrband, rect, ovrlevel)
 
         data = ovrband.ReadAsArray(x, y, w, h)
+        self.paintedblock = (x, y, data, ovrlevel)
 
         if self._data_preproc:
             data = self._data_preproc(data)
@@ -434,16 +598,39 @@ class GdalRgbGraphicsItem(BaseGdalGraphicsItem):
         band = self.gdalobj.GetRasterBand(1)
         levelOfDetail = self._levelOfDetail(option, painter)
         ovrband, ovrlevel, ovrindex = self._bestOvrLevel(band, levelOfDetail)
+        if self.previewlevel:
+            ovrband, ovrlevel, ovrindex = self._previewOvrLevel(
+                band, ovrband, ovrlevel, ovrindex)
+        self.ovrlevel = ovrlevel
         x, y, w, h = self._clipRect(ovrband,
                                     option.exposedRect.toAlignedRect(),
                                     ovrlevel)
 
         dataset = self.gdalobj
         data = gdalsupport.ovrRead(dataset, x, y, w, h, ovrindex)
+        self.paintedblock = (x, y, data, ovrlevel)
         rect = self._targetRect(x, y, w, h, ovrlevel)
         image = qtsupport.numpy2qimage(data)
         painter.drawImage(rect, image)
 
+    def displayValue(self, value):
+        return None
+
+    def paintedBlocks(self):
+        """Return data read in the last paint.
+
+        A dictionary mapping band indices to (x, y, data, level) tuples
+        is returned
+        (see :class:`gsdview.gdalbackend.gdalsupport.PixelProbe`).
+
+        """
+
+        if self.paintedblock is None:
+            return {}
+        x, y, data, level = self.paintedblock
+        return {index + 1: (x, y, data[:, :, index], level)
+                for index in range(data.shape[2])}
+
 
 def graphicsItemFactory(gdalobj, parent=None):
     """Factory function for GDAL graphics items.
@@ -22,8 +22,12 @@
 
 
 import os
+import time
 import shutil
 import logging
+import tempfile
+import threading
+import collections
 
 try:
     from lxml import etree
@@ -35,7 +39,8 @@ import numpy as np
 from osgeo import gdal
 from osgeo import osr
 
-from gsdview.utils import data_uuid
+from gsdview import geomutils
+from gsdview.utils import data_uuid, fingerprint_index
 
 
 _log = logging.getLogger(__name__)
@@ -155,6 +160,18 @@ ATTRIBUTES_SKIP
 KML_DEBUG'''
 
 
+#: fingerprinting strategy used for products of specific GDAL drivers
+#: (see :func:`gsdview.utils.data_uuid`)
+FINGERPRINT_STRATEGIES = {
+    'SAFE': 'manifest',
+    'SENTINEL2': 'manifest',
+    'TSX': 'manifest',
+    'DIMAP': 'manifest',
+    'CEOS': 'header',
+    'JAXAPALSAR': 'header',
+}
+
+
 def uniqueDatasetID(prod):
     # @TODO: use also gdal.Band.Checksum or similia
 
@@ -201,7 +218,9 @@ def uniqueDatasetID(prod):
         parts[-1] = parts[-1].replace(':', '_')
         prod_id = '-'.join(parts)
     else:
-        prod_id = data_uuid(prod.GetDescription())
+        strategy = FINGERPRINT_STRATEGIES.get(driver_name)
+        prod_id = data_uuid(prod.GetDescription(), strategy=strategy,
+                            index=fingerprint_index())
 
     _log.debug('prod_id = %s', prod_id)
     return prod_id
@@ -610,6 +629,167 @@ def _fixedGCPs(gcps):
     return gcps
 
 
+def _setTraditionalAxisOrder(sref):
+    # @NOTE: since GDAL 3 the axis order of the CRS authority is used by
+    #        default (i.e. lat, lon for EPSG:4326)
+    if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+        sref.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+
+def transformPoints(transform, x, y, z=None):
+    """Transform arrays of points with a single call to the PROJ library.
+
+    The optional *z* array of heights is only used as input.
+
+    Return the (x, y) tuple of 1D arrays of transformed coordinates.
+
+    """
+
+    x = np.ravel(x).astype(np.float64)
+    y = np.ravel(y).astype(np.float64)
+    if not x.size:
+        return x, y
+
+    if z is None:
+        points = np.column_stack((x, y))
+    else:
+        points = np.column_stack((x, y, np.ravel(z).astype(np.float64)))
+
+    try:
+        # @NOTE: (N, 2) or (N, 3) arrays are accepted by GDAL >= 3
+        #        bindings
+        points = transform.TransformPoints(points)
+    except TypeError:
+        # older bindings only accept sequences of tuples
+        points = transform.TransformPoints(
+            [tuple(point) for point in points.tolist()])
+
+    points = np.asarray(points, dtype=np.float64)
+    return points[:, 0], points[:, 1]
+
+
+class GeolocationGrid(object):
+    """Lookup grid of geographic coordinates.
+
+    Geographic coordinates are tabulated on a regular grid of
+    (pixel, line) nodes and interpolated bilinearly.
+
+    Grid cells crossing the anti-meridian (i.e. with a jump of more
+    than 180 degrees of longitude between neighbouring nodes) are
+    interpolated using longitudes relative to their first node.
+
+    """
+
+    def __init__(self, xnodes, ynodes, lon, lat):
+        super(GeolocationGrid, self).__init__()
+        self.xnodes = np.asarray(xnodes, dtype=np.float64)
+        self.ynodes = np.asarray(ynodes, dtype=np.float64)
+
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+
+        # @NOTE: the total span of longitudes is not relevant (global
+        #        grids are wider than 180 degrees), only jumps between
+        #        neighbouring nodes are
+        with np.errstate(invalid='ignore'):
+            self.wrapped = bool(
+                np.any(np.abs(np.diff(lon, axis=-1)) > 180) or
+                np.any(np.abs(np.diff(lon, axis=0)) > 180))
+
+        self.lon = lon
+        self.lat = lat
+
+        # plain python copies for the scalar fast path
+        self._x0 = float(self.xnodes[0])
+        self._y0 = float(self.ynodes[0])
+        self._dx = float(self.xnodes[-1] - self._x0) / (len(self.xnodes) - 1)
+        self._dy = float(self.ynodes[-1] - self._y0) / (len(self.ynodes) - 1)
+        self._lonlist = lon.tolist()
+        self._latlist = lat.tolist()
+
+    @staticmethod
+    def _gridIndex(nodes, values):
+        step = (nodes[-1] - nodes[0]) / (len(nodes) - 1)
+        pos = (values - nodes[0]) / step
+        index = np.clip(np.floor(pos).astype(int), 0, len(nodes) - 2)
+        return index, pos - index
+
+    @staticmethod
+    def _interpolate(grid, ix, tx, iy, ty):
+        return ((1 - ty) * ((1 - tx) * grid[iy, ix] +
+                            tx * grid[iy, ix + 1]) +
+                ty * ((1 - tx) * grid[iy + 1, ix] +
+                      tx * grid[iy + 1, ix + 1]))
+
+    @staticmethod
+    def _interpolateLon(grid, ix, tx, iy, ty):
+        # longitudes of cell nodes relative to the first one
+        lon0 = grid[iy, ix]
+        d01 = (grid[iy, ix + 1] - lon0 + 180) % 360 - 180
+        d10 = (grid[iy + 1, ix] - lon0 + 180) % 360 - 180
+        d11 = (grid[iy + 1, ix + 1] - lon0 + 180) % 360 - 180
+        lon = lon0 + (1 - ty) * tx * d01 + ty * ((1 - tx) * d10 + tx * d11)
+        lon = np.where(lon > 180, lon - 360, lon)
+        return np.where(lon < -180, lon + 360, lon)
+
+    def interpolate(self, pixel, line):
+        """Vectorized (pixel,line) --> (lon,lat) interpolation."""
+
+        pixel = np.ravel(pixel).astype(np.float64)
+        line = np.ravel(line).astype(np.float64)
+
+        ix, tx = self._gridIndex(self.xnodes, pixel)
+        iy, ty = self._gridIndex(self.ynodes, line)
+
+        if self.wrapped:
+            lon = self._interpolateLon(self.lon, ix, tx, iy, ty)
+        else:
+            lon = self._interpolate(self.lon, ix, tx, iy, ty)
+        lat = self._interpolate(self.lat, ix, tx, iy, ty)
+
+        return lon, lat
+
+    def lookup(self, pixel, line):
+        """Single point (pixel,line) --> (lon,lat) interpolation.
+
+        Pure python implementation: no array is allocated.
+
+        """
+
+        nx = len(self._lonlist[0]) - 2
+        ny = len(self._lonlist) - 2
+
+        px = (pixel - self._x0) / self._dx
+        ix = min(max(int(px // 1), 0), nx)
+        tx = px - ix
+
+        py = (line - self._y0) / self._dy
+        iy = min(max(int(py // 1), 0), ny)
+        ty = py - iy
+
+        row0, row1 = self._latlist[iy], self._latlist[iy + 1]
+        lat = ((1 - ty) * ((1 - tx) * row0[ix] + tx * row0[ix + 1]) +
+               ty * ((1 - tx) * row1[ix] + tx * row1[ix + 1]))
+
+        row0, row1 = self._lonlist[iy], self._lonlist[iy + 1]
+        if not self.wrapped:
+            lon = ((1 - ty) * ((1 - tx) * row0[ix] + tx * row0[ix + 1]) +
+                   ty * ((1 - tx) * row1[ix] + tx * row1[ix + 1]))
+            return lon, lat
+
+        lon0 = row0[ix]
+        d01 = (row0[ix + 1] - lon0 + 180) % 360 - 180
+        d10 = (row1[ix] - lon0 + 180) % 360 - 180
+        d11 = (row1[ix + 1] - lon0 + 180) % 360 - 180
+        lon = lon0 + (1 - ty) * tx * d01 + ty * ((1 - tx) * d10 + tx * d11)
+        if lon > 180:
+            lon -= 360
+        elif lon < -180:
+            lon += 360
+
+        return lon, lat
+
+
 class InvalidProjection(ValueError):
     pass
 
@@ -617,11 +797,17 @@ class InvalidProjection(ValueError):
 class CoordinateMapper(object):
     geogCS = 'WGS84'
 
+    #: maximum number of nodes of the lookup grid along each axis
+    GRID_SIZE = 64
+
     def __init__(self, dataset):
         super(CoordinateMapper, self).__init__()
 
         projection = ''
         self._geotransform = None
+        self._xsize = dataset.RasterXSize
+        self._ysize = dataset.RasterYSize
+        self._grid = None
 
         if dataset.GetGCPCount():
             try:
@@ -649,9 +835,16 @@ class CoordinateMapper(object):
         if not sref.IsGeographic():
             sref_target = osr.SpatialReference()
             sref_target.SetWellKnownGeogCS(self.geogCS)
+            _setTraditionalAxisOrder(sref)
+            _setTraditionalAxisOrder(sref_target)
             self._srTransform = osr.CoordinateTransformation(sref, sref_target)
+            self._srInverseTransform = osr.CoordinateTransformation(
+                sref_target, sref)
+            self._geogSrs = sref_target
         else:
             self._srTransform = None
+            self._srInverseTransform = None
+            self._geogSrs = sref
 
         # Xgeo = GT(0) + Xpixel*GT(1) + Yline*GT(2)
         # Ygeo = GT(3) + Xpixel*GT(4) + Yline*GT(5)
@@ -674,6 +867,18 @@ class CoordinateMapper(object):
         C = -np.dot(M, C)
         self._inverse_transform = (M, C)
 
+    def geographicSrs(self):
+        """Return the reference system of (lon, lat) coordinates.
+
+        It is the one of the dataset if geographic, :attr:`geogCS`
+        otherwise.
+
+        """
+
+        srs = self._geogSrs.Clone()
+        _setTraditionalAxisOrder(srs)
+        return srs
+
     def _transform(self, x, y, M, C):
         x = np.ravel(x)
         y = np.ravel(y)
@@ -687,19 +892,53 @@ class CoordinateMapper(object):
         M, C = self._direct_transform
         xy = self._transform(pixel, line, M, C)
         if self._srTransform:
-            for index, (x, y) in enumerate(xy.transpose()):
-                xy[:, index] = self._srTransform.TransformPoint(x, y)[:2]
+            return transformPoints(self._srTransform, xy[0], xy[1])
         # @TODO: check single point
         return xy[0], xy[1]  # , 0    # @TODO: h
 
     def geoToImgPoints(self, lon, lat, h=0):
         """Coordinate conversion: (lon,lat) --> (pixel,line)."""
 
+        if self._srInverseTransform:
+            lon, lat = transformPoints(self._srInverseTransform, lon, lat)
+
         M, C = self._inverse_transform
         rc = self._transform(lon, lat, M, C)
         # @TODO: check single point
         return rc[0], rc[1]
 
+    def _gridNodes(self):
+        nx = int(min(self.GRID_SIZE, self._xsize + 1))
+        ny = int(min(self.GRID_SIZE, self._ysize + 1))
+        xnodes = np.linspace(0, self._xsize, max(nx, 2))
+        ynodes = np.linspace(0, self._ysize, max(ny, 2))
+        return xnodes, ynodes
+
+    def lookupGrid(self):
+        """Return the (cached) geolocation lookup grid.
+
+        The grid is computed on first use.
+
+        """
+
+        if self._grid is None:
+            xnodes, ynodes = self._gridNodes()
+            pixel, line = np.meshgrid(xnodes, ynodes)
+            lon, lat = self.imgToGeoPoints(pixel, line)
+            lon.shape = lat.shape = pixel.shape
+            self._grid = GeolocationGrid(xnodes, ynodes, lon, lat)
+        return self._grid
+
+    def imgToGeo(self, pixel, line):
+        """Fast single point conversion: (pixel,line) --> (lon,lat).
+
+        Coordinates are interpolated on the geolocation lookup grid
+        (see :meth:`lookupGrid`).  Return a tuple of floats.
+
+        """
+
+        return self.lookupGrid().lookup(pixel, line)
+
     def imgToGeoGrid(self, pixel, line):
         """Coordinate conversion: (pixel,line) --> (lon,lat) on regular grids.
 
@@ -731,9 +970,95 @@ class CoordinateMapper(object):
         return line, pixel
 
 
+class GCPCoordinateMapper(CoordinateMapper):
+    """Coordinate mapper for datasets georeferenced by GCPs.
+
+    A thin plate spline (or polynomial) model is fitted on GCPs and
+    evaluated once on a coarse regular grid of (pixel, line) nodes.
+    Direct queries are then answered by bilinear interpolation of the
+    (lon, lat) lookup grid, so the per-point cost does not depend on
+    the number of GCPs.
+
+    Inverse queries use the fitted model in bulk.
+
+    """
+
+    #: minimum number of GCPs required for the thin plate spline model
+    TPS_MIN_GCP_COUNT = 10
+
+    def __init__(self, dataset):
+        super(GCPCoordinateMapper, self).__init__(dataset)
+
+        if dataset.GetGCPCount() >= self.TPS_MIN_GCP_COUNT:
+            methods = ('GCP_TPS', 'GCP_POLYNOMIAL')
+        else:
+            methods = ('GCP_POLYNOMIAL',)
+
+        self._gcptransformer = None
+        for method in methods:
+            try:
+                transformer = gdal.Transformer(dataset, None,
+                                               ['METHOD=%s' % method])
+                success, point = transformer.TransformPoint(0, 0., 0.)
+            except (RuntimeError, TypeError, AttributeError):
+                continue
+            if success:
+                self._gcptransformer = transformer
+                _log.debug('GCP geolocation model: %s', method)
+                break
+        else:
+            raise ValueError('unable to setup the GCP geolocation model')
+
+        xnodes, ynodes = self._gridNodes()
+        pixel, line = np.meshgrid(xnodes, ynodes)
+        lon, lat = self._modelImgToGeo(pixel, line)
+        lon.shape = lat.shape = pixel.shape
+        self._grid = GeolocationGrid(xnodes, ynodes, lon, lat)
+
+    def _gcpTransform(self, x, y, inverse=False):
+        x = np.ravel(x).astype(np.float64)
+        y = np.ravel(y).astype(np.float64)
+        if not x.size:
+            return x, y
+
+        points = list(zip(x.tolist(), y.tolist()))
+        points, success = self._gcptransformer.TransformPoints(int(inverse),
+                                                               points)
+        points = np.asarray(points, dtype=np.float64)
+        invalid = np.logical_not(np.asarray(success, dtype=bool))
+        points[invalid, :2] = np.nan
+        return points[:, 0], points[:, 1]
+
+    def _modelImgToGeo(self, pixel, line):
+        x, y = self._gcpTransform(pixel, line)
+        if self._srTransform:
+            x, y = transformPoints(self._srTransform, x, y)
+        return x, y
+
+    def imgToGeoPoints(self, pixel, line):
+        """Coordinate conversion: (pixel,line) --> (lon,lat)."""
+
+        return self._grid.interpolate(pixel, line)
+
+    def geoToImgPoints(self, lon, lat, h=0):
+        """Coordinate conversion: (lon,lat) --> (pixel,line)."""
+
+        if self._srInverseTransform:
+            lon, lat = transformPoints(self._srInverseTransform, lon, lat)
+
+        return self._gcpTransform(lon, lat, inverse=True)
+
+
 def coordinate_mapper(dataset):
     try:
-        mapper = CoordinateMapper(dataset)
+        if dataset.GetGCPCount() >= 3:
+            try:
+                mapper = GCPCoordinateMapper(dataset)
+            except (ValueError, RuntimeError) as e:
+                _log.debug('unable to setup the GCP geolocation model: %s', e)
+                mapper = CoordinateMapper(dataset)
+        else:
+            mapper = CoordinateMapper(dataset)
     except ValueError:
         mapper = None
     else:
@@ -746,6 +1071,54 @@ def coordinate_mapper(dataset):
     return mapper
 
 
+#: max size (along each axis) of the valid data mask used to trace
+#: footprints
+FOOTPRINT_SIZE = 256
+
+
+def validDataFootprint(dataset, maxsize=FOOTPRINT_SIZE, tolerance=1.):
+    """Return the outlines of the valid data area of *dataset*.
+
+    The valid data mask of the first band is read at reduced resolution
+    (at most *maxsize* pixels along each axis, so that overviews are
+    used if available), its outlines are traced (see
+    :func:`gsdview.geomutils.maskOutlines`) and simplified with the
+    given *tolerance* (in reduced resolution pixels).
+
+    If the band has no mask (nor nodata value) null pixels are
+    considered not valid (zero filled areas of swaths and rotated
+    images).
+
+    Return the list of (N, 2) arrays of (pixel, line) coordinates of
+    the closed rings, one for each group of rows with valid data
+    (empty if there are no valid data).
+
+    """
+
+    band = dataset.GetRasterBand(1)
+    xsize, ysize = dataset.RasterXSize, dataset.RasterYSize
+    scale = max(xsize / float(maxsize), ysize / float(maxsize), 1.)
+    bufxsize = max(int(round(xsize / scale)), 1)
+    bufysize = max(int(round(ysize / scale)), 1)
+
+    if band.GetMaskFlags() & gdal.GMF_ALL_VALID:
+        data = band.ReadAsArray(0, 0, xsize, ysize, bufxsize, bufysize)
+        mask = data != 0
+    else:
+        data = band.GetMaskBand().ReadAsArray(0, 0, xsize, ysize,
+                                              bufxsize, bufysize)
+        mask = data > 0
+
+    rings = []
+    for ring in geomutils.maskOutlines(mask):
+        ring = geomutils.simplify(ring, tolerance)
+        ring[:, 0] *= xsize / float(bufxsize)
+        ring[:, 1] *= ysize / float(bufysize)
+        rings.append(ring)
+
+    return rings
+
+
 # Overviews handling helpers ###############################################
 OVRMEMSIE = 400 * 1024  # 400 kbytes
 
@@ -919,7 +1292,7 @@ def ovrComputeLevels(gdalobj, ovrsize=OVRMEMSIE, estep=3, threshold=0.1):
     maxesponent = np.ceil(maxfactor ** (1. / estep))
     exponents = np.arange(startexponent, maxesponent + 1)
     missinglevels = estep ** exponents
-    missinglevels = missinglevels.astype(np.int)
+    missinglevels = missinglevels.astype(int)
 
     # Remove existng levels to avoid re-computation
     levels = ovrLevels(gdalobj)
@@ -942,6 +1315,359 @@ def ovrComputeLevels(gdalobj, ovrsize=OVRMEMSIE, estep=3, threshold=0.1):
     return missinglevels
 
 
+#: default read cost (seconds per byte) for overviews computed by GSDView
+OVR_READ_COST = 2e-9
+
+#: default block size of overviews (GDAL default for tiled overviews)
+OVR_BLOCK_SIZE = (128, 128)
+
+#: fraction of the free disk space that can be used for overviews
+OVR_DISK_FRACTION = 0.25
+
+
+class OvrCostModel(object):
+    """Cost model for overview levels planning.
+
+    The model estimates the latency of the rendering of a frame
+    (i.e. a view of *viewsize* screen pixels) at a given zoom factor
+    as the time needed to read all data blocks intersecting the
+    visible area at the overview level that best fits the zoom factor
+    (see :meth:`gdalqt.BaseGdalGraphicsItem._bestOvrLevel`).
+
+    The expected latency is the average latency over zoom factors
+    log-uniformly distributed between 1 (full resolution) and the
+    factor that makes the whole image fit into the view.
+
+    :param xsize, ysize:
+        size of the full resolution raster
+    :param nbands:
+        number of raster bands (all bands are read to render a frame)
+    :param itemsize:
+        size in bytes of a pixel of a single band
+    :param blocksize:
+        (xsize, ysize) of blocks of the full resolution raster
+    :param readcost:
+        cost (seconds per byte) of reading full resolution blocks
+    :param ovrreadcost:
+        cost (seconds per byte) of reading overview blocks
+    :param levels:
+        available overview levels
+    :param viewsize:
+        (width, height) of the view in screen pixels
+
+    """
+
+    NSAMPLES = 64
+
+    def __init__(self, xsize, ysize, nbands=1, itemsize=1, blocksize=None,
+                 readcost=OVR_READ_COST, ovrreadcost=OVR_READ_COST,
+                 levels=(), viewsize=(1024, 768)):
+        super(OvrCostModel, self).__init__()
+
+        self.xsize = xsize
+        self.ysize = ysize
+        self.nbands = nbands
+        self.itemsize = itemsize
+        self.blocksize = tuple(blocksize) if blocksize else (xsize, 1)
+        self.readcost = readcost
+        self.ovrreadcost = ovrreadcost
+        self.levels = sorted(levels)
+        self.viewsize = viewsize
+
+        self.maxfactor = max(xsize / float(viewsize[0]),
+                             ysize / float(viewsize[1]), 1.)
+        self.zooms = np.logspace(0, np.log10(self.maxfactor), self.NSAMPLES)
+        self._cache = {}
+
+    def levelSize(self, level):
+        return -(-self.xsize // level), -(-self.ysize // level)
+
+    def storage(self, levels):
+        """Storage (bytes) needed for *levels* (existing ones excluded)."""
+
+        size = 0
+        for level in set(levels).difference(self.levels):
+            xsize, ysize = self.levelSize(level)
+            size += xsize * ysize
+        return size * self.nbands * self.itemsize
+
+    def readTime(self, level, zoom):
+        """Time needed to read a frame from *level* at *zoom* factor.
+
+        *zoom* can be an array of zoom factors.
+
+        """
+
+        xsize, ysize = self.levelSize(level)
+        if level == 1:
+            bx, by = self.blocksize
+            cost = self.readcost
+        else:
+            bx, by = OVR_BLOCK_SIZE
+            cost = self.ovrreadcost
+
+        # visible area in level coordinates
+        w = np.minimum(self.viewsize[0] * np.asarray(zoom) / level, xsize)
+        h = np.minimum(self.viewsize[1] * np.asarray(zoom) / level, ysize)
+
+        # whole blocks are read: on average an area not aligned to the
+        # block grid intersects one more block per direction
+        nx = np.minimum(w / bx + 1, np.ceil(xsize / float(bx)))
+        ny = np.minimum(h / by + 1, np.ceil(ysize / float(by)))
+        npixels = np.minimum(nx * bx, xsize) * np.minimum(ny * by, ysize)
+
+        return npixels * self.nbands * self.itemsize * cost
+
+    def _readTimes(self, level):
+        try:
+            return self._cache[level]
+        except KeyError:
+            times = self.readTime(level, self.zooms)
+            self._cache[level] = times
+            return times
+
+    def bestLevels(self, levels, zoom):
+        """Level used for each *zoom* factor given available *levels*.
+
+        The same policy of :meth:`BaseGdalGraphicsItem._bestOvrLevel`
+        is used.
+
+        """
+
+        zoom = np.asarray(zoom, dtype=float)
+        available = np.asarray(sorted(set(self.levels).union(levels)))
+        if not len(available):
+            return np.ones(zoom.shape, int)
+
+        distances = np.abs(available[:, np.newaxis] - zoom.ravel())
+        best = available[distances.argmin(axis=0)].reshape(zoom.shape)
+        return np.where(np.abs(zoom - best) <= np.abs(zoom - 1), best, 1)
+
+    def frameLatency(self, levels, zoom):
+        """Latency of a frame at the specified *zoom* factor."""
+
+        level = int(self.bestLevels(levels, [zoom])[0])
+        return float(self.readTime(level, zoom))
+
+    def latency(self, levels=()):
+        """Expected frame latency (seconds)."""
+
+        best = self.bestLevels(levels, self.zooms)
+        times = np.empty(len(self.zooms))
+        for level in np.unique(best):
+            mask = (best == level)
+            times[mask] = self._readTimes(int(level))[mask]
+        return times.mean()
+
+    def candidates(self, maxlevel=None):
+        """Candidate overview levels.
+
+        Candidates are all levels in the form 2**i * 3**j not larger
+        than *maxlevel* (default: the level at which the whole image
+        fits into the view) so that each level can be computed
+        from a finer one (cascade).
+
+        """
+
+        if maxlevel is None:
+            maxlevel = max(int(np.ceil(self.maxfactor)), 2)
+
+        levels = set()
+        factor2 = 1
+        while factor2 <= maxlevel:
+            level = factor2
+            while level <= maxlevel:
+                if level > 1:
+                    levels.add(ovrLevelAdjust(level, self.xsize))
+                level *= 3
+            factor2 *= 2
+
+        return sorted(levels.difference(self.levels))
+
+    def _greedy(self, candidates, budget, perbyte=True):
+        candidates = list(candidates)
+        selected = []
+        latency = self.latency(selected)
+        used = 0
+
+        while candidates:
+            best = None
+            bestgain = 0
+            for level in candidates:
+                size = self.storage([level])
+                if budget is not None and used + size > budget:
+                    continue
+                gain = latency - self.latency(selected + [level])
+                if perbyte:
+                    gain /= size
+                if gain > bestgain:
+                    best, bestgain = level, gain
+
+            if best is None:
+                break
+
+            selected.append(best)
+            candidates.remove(best)
+            used += self.storage([best])
+            latency = self.latency(selected)
+
+        return selected
+
+    def _swap(self, selected, candidates, budget):
+        """Improve *selected* by replacing single levels."""
+
+        selected = list(selected)
+        latency = self.latency(selected)
+        improved = True
+        while improved:
+            improved = False
+            for old in list(selected):
+                others = [level for level in selected if level != old]
+                for new in candidates:
+                    if new in selected:
+                        continue
+                    levels = others + [new]
+                    if budget is not None and self.storage(levels) > budget:
+                        continue
+                    value = self.latency(levels)
+                    if value < latency:
+                        selected, latency = levels, value
+                        improved = True
+                        break
+                if improved:
+                    break
+
+        return selected
+
+    def plan(self, budget=None, maxlevel=None):
+        """Return the levels that minimize the expected frame latency.
+
+        The total size of new levels does not exceed *budget* bytes
+        (no limit if *budget* is `None`).
+
+        Starting solutions are computed with greedy strategies (adding
+        at each step the level that provides the largest latency
+        reduction per byte or in absolute terms) and as geometric
+        sequences of levels.  Each one is refined by replacing single
+        levels as long as the expected latency decreases and the best
+        one is returned.
+
+        """
+
+        candidates = self.candidates(maxlevel)
+        solutions = [self._greedy(candidates, budget, perbyte)
+                     for perbyte in (True, False)]
+
+        # geometric sequences (e.g. the ones used by ovrComputeLevels)
+        for step in (2, 3, 4):
+            levels = [level for level in candidates
+                      if step ** int(round(np.log(level) / np.log(step))) ==
+                      level]
+            while levels and budget is not None and (
+                    self.storage(levels) > budget):
+                levels.pop(0)
+            solutions.append(levels)
+
+        solutions = [self._swap(levels, candidates, budget)
+                     for levels in solutions]
+        selected = min(solutions, key=self.latency)
+
+        # drop levels that do not contribute to latency reduction
+        latency = self.latency(selected)
+        for level in sorted(selected):
+            levels = [item for item in selected if item != level]
+            if self.latency(levels) <= latency:
+                selected = levels
+
+        return sorted(selected)
+
+
+def ovrMeasureReadCost(band, nblocks=8):
+    """Measure the read cost (seconds per byte) of a raster band.
+
+    The cost is measured reading *nblocks* blocks (in their natural
+    size) evenly distributed in the raster.
+
+    """
+
+    bx, by = band.GetBlockSize()
+    bx = min(bx, band.XSize)
+    by = min(by, band.YSize)
+    nbx = -(-band.XSize // bx)
+    nby = -(-band.YSize // by)
+
+    indices = np.linspace(0, nbx * nby - 1, min(nblocks, nbx * nby))
+    itemsize = gdal.GetDataTypeSize(band.DataType) // 8
+    elapsed = 0.
+    npixels = 0
+    for index in indices.astype(int):
+        x = (index % nbx) * bx
+        y = (index // nbx) * by
+        w = min(bx, band.XSize - x)
+        h = min(by, band.YSize - y)
+        t0 = time.perf_counter()
+        band.ReadAsArray(x, y, w, h)
+        elapsed += time.perf_counter() - t0
+        npixels += w * h
+
+    return elapsed / max(npixels * itemsize, 1)
+
+
+def ovrCostModel(gdalobj, viewsize=(1024, 768), measure=True):
+    """Build the :class:`OvrCostModel` for a GDAL dataset or raster band.
+
+    If *measure* is True the read cost of full resolution data and
+    of existing overviews is measured, otherwise default values are
+    used.
+
+    """
+
+    if hasattr(gdalobj, 'GetOverviewCount'):
+        band = gdalobj
+        nbands = 1
+    else:
+        band = gdalobj.GetRasterBand(1)
+        nbands = gdalobj.RasterCount
+
+    itemsize = gdal.GetDataTypeSize(band.DataType) // 8
+    levels = ovrLevels(band)
+
+    readcost = ovrreadcost = OVR_READ_COST
+    if measure:
+        readcost = ovrMeasureReadCost(band)
+        if levels:
+            ovrreadcost = ovrMeasureReadCost(band.GetOverview(0))
+
+    return OvrCostModel(band.XSize, band.YSize, nbands, itemsize,
+                        band.GetBlockSize(), readcost, ovrreadcost,
+                        levels, viewsize)
+
+
+def ovrPlanLevels(gdalobj, budget=None, cachedir=None, viewsize=(1024, 768),
+                  measure=True):
+    """Compute the overview levels to be generated using a cost model.
+
+    Differently from :func:`ovrComputeLevels` this function takes into
+    account the block size, data type, number of bands and the measured
+    read cost of the dataset and selects the levels that minimize the
+    expected frame latency (see :class:`OvrCostModel`) given a
+    storage *budget* (bytes).
+
+    If *budget* is `None` and *cachedir* is specified, the budget is
+    set to a fraction (:data:`OVR_DISK_FRACTION`) of the free space on
+    the disk containing *cachedir*.
+
+    """
+
+    if budget is None and cachedir is not None:
+        free = shutil.disk_usage(cachedir).free
+        budget = int(free * OVR_DISK_FRACTION)
+
+    model = ovrCostModel(gdalobj, viewsize, measure)
+
+    return model.plan(budget)
+
+
 def ovrRead(dataset, x=0, y=0, w=None, h=None, ovrindex=None,
             bstart=1, bcount=None, dtype=None):
     """Read an image block from overviews of all specified bands.
@@ -997,6 +1723,510 @@ def ovrRead(dataset, x=0, y=0, w=None, h=None, ovrindex=None,
         return data
 
 
+OVR_RESAMPLING_METHODS = ('nearest', 'average', 'average_magphase')
+OVRSTRIPSIZE = 16 * 1024 * 1024  # 16 Mbytes
+
+
+def ovrDownsample(data, factor, resampling='average', nodata=None):
+    """Reduce a 2D array by an integer *factor*.
+
+    The output array has shape ``(ceil(h / factor), ceil(w / factor))``
+    i.e. the same size of GDAL overviews.
+    Blocks on the right and bottom edges can be partial: only actual
+    data samples are taken into account in this case.
+
+    The *resampling* method can be:
+
+    :nearest:
+        the central sample of each block is taken
+    :average:
+        the average of all valid samples of each block is computed
+    :average_magphase:
+        for complex data, the average magnitude and the average phase
+        of all valid samples of each block are computed
+
+    Samples equal to *nodata* are not taken into account in averages.
+    Blocks not containing any valid sample are set to *nodata*.
+
+    """
+
+    factor = int(factor)
+    resampling = resampling.lower()
+    if resampling not in OVR_RESAMPLING_METHODS:
+        raise ValueError('invalid resampling method: "%s"' % resampling)
+
+    data = np.asarray(data)
+    if factor == 1:
+        return data.copy()
+
+    h, w = data.shape
+    oh = -(-h // factor)
+    ow = -(-w // factor)
+
+    if resampling == 'nearest':
+        rows = np.minimum(np.arange(oh) * factor + factor // 2, h - 1)
+        cols = np.minimum(np.arange(ow) * factor + factor // 2, w - 1)
+        return data[rows[:, None], cols]
+
+    mask = np.ones(data.shape, bool)
+    if nodata is not None:
+        mask &= (data != nodata)
+
+    if oh * factor != h or ow * factor != w:
+        padded = np.zeros((oh * factor, ow * factor), data.dtype)
+        padded[:h, :w] = data
+        data = padded
+        padded = np.zeros((oh * factor, ow * factor), bool)
+        padded[:h, :w] = mask
+        mask = padded
+
+    shape = (oh, factor, ow, factor)
+    mask = mask.reshape(shape)
+    count = mask.sum(axis=(1, 3))
+    valid = count > 0
+    count = np.where(valid, count, 1)
+
+    data = np.where(mask, data.reshape(shape), 0)
+    if resampling == 'average_magphase' and np.iscomplexobj(data):
+        magnitude = np.abs(data)
+        phase = np.where(magnitude > 0, data / np.where(magnitude > 0,
+                                                        magnitude, 1), 0)
+        magnitude = magnitude.sum(axis=(1, 3)) / count
+        phase = np.angle(phase.sum(axis=(1, 3)))
+        result = magnitude * np.exp(1j * phase)
+    else:
+        result = data.sum(axis=(1, 3), dtype=np.result_type(data, np.float64))
+        result /= count
+
+    dtype = data.dtype
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        result = np.clip(np.rint(result), info.min, info.max)
+    result = result.astype(dtype)
+
+    if nodata is not None:
+        result[~valid] = nodata
+
+    return result
+
+
+def _ovrSourceLevel(level, available):
+    """Return the coarsest available level *level* can be derived from."""
+
+    candidates = [src for src in available if src < level and not level % src]
+    return max(candidates) if candidates else 1
+
+
+def _ovrBand(dataset, bandindex, level):
+    band = dataset.GetRasterBand(bandindex)
+    if level == 1:
+        return band
+
+    levels = ovrLevels(band)
+    if level not in levels:
+        raise MissingOvrError(level)
+
+    return band.GetOverview(levels.index(level))
+
+
+def ovrBuild(filename, levels, resampling='average', nthreads=None,
+             callback=None):
+    """Build overviews of the dataset *filename* in parallel.
+
+    Overviews are stored exactly in the same way GDAL does (e.g.
+    external ".ovr" files for VRT datasets) so that they are seen
+    by any GDAL dataset opened from *filename* after the computation.
+
+    Each overview level is computed from the coarsest level it is
+    an integer multiple of (cascade), falling back to full resolution
+    data only when such a level is not available.
+    All levels of all bands are split in horizontal strips and
+    processed concurrently by a pool of *nthreads* worker threads
+    (default: the number of CPUs).
+    Each worker uses its own GDAL read handles (see
+    :data:`THREAD_HANDLES`) so no GDAL object is shared among threads;
+    the computed data are written by the calling thread only.
+
+    The *callback* function, if provided, has the same signature of
+    GDAL progress functions::
+
+        callback(complete, message, data)
+
+    and it is called after each strip written.  If it returns a false
+    value the computation is interrupted and :exc:`RuntimeError` is
+    raised.
+
+    If the computation fails or it is interrupted, levels allocated by
+    this call are removed so that no blank overview is left, while
+    overviews already available are preserved: a backup copy of the
+    external ".ovr" file is taken before the allocation and restored.
+    Since GDAL can only remove all internal overviews at once, if
+    *filename* already has internal overviews the backup is a copy of
+    the whole file.
+
+    Returns the list of computed levels.
+
+    """
+
+    resampling = resampling.lower()
+    if resampling not in OVR_RESAMPLING_METHODS:
+        raise ValueError('invalid resampling method: "%s"' % resampling)
+
+    dataset = gdal.Open(filename, gdal.GA_Update)
+    if dataset is None:
+        dataset = gdal.Open(filename)
+    if dataset is None:
+        raise ValueError('unable to open "%s"' % filename)
+
+    band = dataset.GetRasterBand(1)
+    existing = ovrLevels(band)
+    levels = sorted(set(ovrLevelAdjust(level, band.XSize)
+                        for level in levels if level > 1))
+    levels = [level for level in levels if level not in existing]
+    if not levels:
+        return []
+
+    # backup of existing overviews
+    backup = None
+    if existing:
+        backupsrc = filename + '.ovr'
+        if not os.path.isfile(backupsrc):
+            # internal overviews
+            backupsrc = filename
+        fd, backup = tempfile.mkstemp(
+            suffix=os.path.splitext(backupsrc)[1],
+            dir=os.path.dirname(os.path.abspath(filename)))
+        os.close(fd)
+        shutil.copyfile(backupsrc, backup)
+
+    try:
+        # allocate the overview structure (no data computation)
+        if dataset.BuildOverviews('NONE', levels) != 0:
+            raise RuntimeError(
+                'unable to create overviews for "%s"' % filename)
+
+        _ovrCompute(dataset, filename, levels, existing, resampling,
+                    nthreads, callback)
+    except BaseException:
+        THREAD_HANDLES.invalidate(filename)
+        try:
+            if backup is not None:
+                dataset = None
+                os.replace(backup, backupsrc)
+                backup = None
+            else:
+                # @NOTE: an empty list of levels removes all overviews
+                #        (only the ones allocated by this call)
+                dataset.BuildOverviews('NONE', [])
+                dataset.FlushCache()
+        except Exception:
+            _log.warning('unable to remove incomplete overviews of "%s"',
+                         filename, exc_info=True)
+        raise
+    finally:
+        if backup is not None:
+            os.remove(backup)
+
+    return levels
+
+
+def _ovrCompute(dataset, filename, levels, existing, resampling, nthreads,
+                callback):
+    from concurrent.futures import ThreadPoolExecutor
+
+    nbands = dataset.RasterCount
+    nodata = [dataset.GetRasterBand(index).GetNoDataValue()
+              for index in range(1, nbands + 1)]
+    if nthreads is None:
+        nthreads = os.cpu_count() or 1
+
+    def strips(level, srclevel):
+        srcband = _ovrBand(dataset, 1, srclevel)
+        dstband = _ovrBand(dataset, 1, level)
+        factor = level // srclevel
+        itemsize = gdal.GetDataTypeSize(srcband.DataType) // 8
+        nrows = OVRSTRIPSIZE // max(srcband.XSize * itemsize * factor, 1)
+        nrows = max(int(nrows), 1)
+        for bandindex in range(1, nbands + 1):
+            for row in range(0, dstband.YSize, nrows):
+                yield bandindex, row, min(nrows, dstband.YSize - row)
+
+    ntasks = 0
+    available = list(existing)
+    plan = []
+    for level in levels:
+        srclevel = _ovrSourceLevel(level, available)
+        plan.append((level, srclevel))
+        ntasks += len(list(strips(level, srclevel)))
+        available.append(level)
+
+    # @NOTE: only a bounded number of strips is submitted at once, so
+    #        that memory usage is limited and the interruption does not
+    #        wait for the computation of all the strips of a level
+    maxpending = 2 * nthreads
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=nthreads) as executor:
+        for level, srclevel in plan:
+            factor = level // srclevel
+
+            def compute(task, level=level, srclevel=srclevel,
+                        factor=factor):
+                bandindex, row, nrows = task
+                srcband = THREAD_HANDLES.band(filename, bandindex, srclevel)
+                y = row * factor
+                ysize = min(nrows * factor, srcband.YSize - y)
+                data = srcband.ReadAsArray(0, y, srcband.XSize, ysize)
+                return ovrDownsample(data, factor, resampling,
+                                     nodata[bandindex - 1])
+
+            # the previous level must be on disk before reading it back
+            # (worker handles are re-opened)
+            dataset.FlushCache()
+            THREAD_HANDLES.invalidate(filename)
+
+            tasks = strips(level, srclevel)
+            pending = collections.deque()
+            try:
+                while True:
+                    for task in tasks:
+                        pending.append(
+                            (task, executor.submit(compute, task)))
+                        if len(pending) >= maxpending:
+                            break
+                    if not pending:
+                        break
+
+                    (bandindex, row, nrows), future = pending.popleft()
+                    dstband = _ovrBand(dataset, bandindex, level)
+                    dstband.WriteArray(future.result(), 0, row)
+                    done += 1
+                    if callback and not callback(float(done) / ntasks, '',
+                                                 None):
+                        raise RuntimeError(
+                            'overview computation interrupted')
+            finally:
+                for task, future in pending:
+                    future.cancel()
+
+            _log.debug('overview level %d (from level %d) completed',
+                       level, srclevel)
+
+    dataset.FlushCache()
+    THREAD_HANDLES.invalidate(filename)
+
+
+# Thread-local handles ######################################################
+class HandleRegistry(object):
+    """Registry of GDAL dataset handles private to each thread.
+
+    GDAL datasets must not be shared among threads: workers reading
+    concurrently from the same product shall use :meth:`dataset` (or
+    :meth:`band`) to get handles opened, on first use, by the calling
+    thread.
+
+    Handles are identified by a *key* that is the name of the file to
+    open, including the sub-dataset syntax (e.g. the ``vrtfilename``
+    of cached dataset items).
+
+    When the file changes (e.g. the item is closed or re-opened)
+    :meth:`invalidate` shall be called: each thread re-opens the
+    dataset on next access and stale handles are released.
+
+    """
+
+    def __init__(self, mode=gdal.GA_ReadOnly):
+        #: GDAL open mode
+        self.mode = mode
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._version = 0
+
+    def generation(self, key):
+        """Return the number of invalidations of *key*."""
+
+        return self._generations.get(key, 0)
+
+    def _handles(self):
+        local = self._local
+        handles = getattr(local, 'handles', None)
+        if handles is None:
+            handles = local.handles = {}
+            local.version = self._version
+        elif local.version != self._version:
+            # release handles invalidated in the meanwhile
+            local.version = self._version
+            for key, (generation, dataset) in list(handles.items()):
+                if generation != self.generation(key):
+                    del handles[key]
+        return handles
+
+    def dataset(self, key):
+        """Return the dataset *key* opened by the calling thread."""
+
+        handles = self._handles()
+        generation = self.generation(key)
+        entry = handles.get(key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+
+        dataset = gdal.Open(key, self.mode)
+        if dataset is None:
+            raise ValueError('unable to open "%s"' % key)
+        handles[key] = (generation, dataset)
+
+        return dataset
+
+    def band(self, key, bandindex, level=1):
+        """Return the band (or overview) of the *key* dataset.
+
+        The band belongs to the dataset opened by the calling thread.
+
+        """
+
+        return _ovrBand(self.dataset(key), bandindex, level)
+
+    def invalidate(self, key=None):
+        """Invalidate handles of *key* (all handles if key is None)."""
+
+        with self._lock:
+            keys = [key] if key is not None else list(self._generations)
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._version += 1
+
+    def release(self):
+        """Release all handles of the calling thread."""
+
+        self._local.handles = None
+
+
+#: registry of per-thread GDAL dataset handles used by worker threads
+THREAD_HANDLES = HandleRegistry()
+
+
+# Pixel probe ###############################################################
+class PixelProbe(object):
+    """Read values of all bands of a dataset at a given pixel.
+
+    Values are looked up (in order):
+
+    * in blocks of full resolution data already in memory (e.g. data
+      read for the last paint) passed by the caller,
+    * in a LRU cache of recently probed pixels,
+    * in overview data already in memory (blocks read for the last
+      paint of a zoomed out view or tiles of lazy overviews): in this
+      case the value of the overview pixel including (*x*, *y*) is
+      returned,
+    * finally values of all bands are read from the dataset with a
+      single-pixel RasterIO.
+
+    """
+
+    def __init__(self, dataset, cachesize=4096):
+        #: the GDAL dataset
+        self.dataset = dataset
+
+        #: maximum number of pixels in the cache
+        self.cachesize = cachesize
+
+        self._cache = collections.OrderedDict()
+
+    def clear(self):
+        """Clear the cache of probed pixels."""
+
+        self._cache.clear()
+
+    @staticmethod
+    def _fromBlock(block, x, y):
+        x0, y0, data, level = block
+        col, row = x // level - x0, y // level - y0
+        if 0 <= row < data.shape[0] and 0 <= col < data.shape[1]:
+            return data[row, col]
+        return None
+
+    def _read(self, x, y):
+        dataset = self.dataset
+        datatypes = set(dataset.GetRasterBand(index + 1).DataType
+                        for index in range(dataset.RasterCount))
+        if len(datatypes) == 1:
+            # a single RasterIO for all bands
+            data = dataset.ReadAsArray(x, y, 1, 1)
+            if data is None:
+                return [None] * dataset.RasterCount
+            return list(np.asarray(data).reshape(-1))
+
+        # @NOTE: bands with different data types are read one by one to
+        #        avoid conversions
+        values = []
+        for index in range(dataset.RasterCount):
+            data = dataset.GetRasterBand(index + 1).ReadAsArray(x, y, 1, 1)
+            values.append(data[0, 0] if data is not None else None)
+        return values
+
+    def values(self, x, y, blocks=None, tilestores=None):
+        """Return the list of values of all bands at pixel (*x*, *y*).
+
+        The optional *blocks* dictionary maps band indices (starting
+        from 1) to (x0, y0, data, level) tuples of data of the overview
+        *level* (1 for full resolution) already in memory.
+        The optional *tilestores* dictionary maps band indices to
+        objects providing in memory values of lazy overviews
+        (see :meth:`gsdview.gdalbackend.tilestore.OvrTileStore.cachedValue`).
+
+        None is returned if the pixel is outside the dataset.
+
+        """
+
+        x, y = int(x), int(y)
+
+        dataset = self.dataset
+        if not (0 <= x < dataset.RasterXSize and 0 <= y < dataset.RasterYSize):
+            return None
+
+        blocks = blocks or {}
+        tilestores = tilestores or {}
+        nbands = dataset.RasterCount
+
+        # full resolution data (the most up to date)
+        values = [None] * nbands
+        for index in range(nbands):
+            block = blocks.get(index + 1)
+            if block is not None and block[3] == 1:
+                values[index] = self._fromBlock(block, x, y)
+
+        key = (x, y)
+        if None in values and key in self._cache:
+            self._cache.move_to_end(key)
+            values = [cached if value is None else value
+                      for value, cached in zip(values, self._cache[key])]
+
+        # overviews
+        if None in values:
+            for index in range(nbands):
+                if values[index] is not None:
+                    continue
+                block = blocks.get(index + 1)
+                if block is not None and block[3] > 1:
+                    values[index] = self._fromBlock(block, x, y)
+                tilestore = tilestores.get(index + 1)
+                if values[index] is None and tilestore is not None:
+                    values[index] = tilestore.cachedValue(x, y)
+
+        if None in values:
+            data = self._read(x, y)
+            values = [read if value is None else value
+                      for value, read in zip(values, data)]
+
+            self._cache[key] = data
+            while len(self._cache) > self.cachesize:
+                self._cache.popitem(last=False)
+
+        return values
+
+
 # Misc helpers ##############################################################
 def has_complex_bands(dataset):
     result = False
@@ -1027,3 +2257,206 @@ def safe_vrt_copy(src, dst):
 
     with open(dst, 'wb') as fd:
         fd.write(etree.tostring(xml.getroot()))
+
+
+# Cache helpers #############################################################
+#: name of the virtual dataset file in the cache directory of a dataset
+VRT_CACHE_FILENAME = 'virtual-dataset.vrt'
+
+
+def datasetCacheDir(gdalobj, cachedir):
+    """Return the cache directory of *gdalobj* in the *cachedir* tree."""
+
+    return os.path.join(cachedir, uniqueDatasetID(gdalobj))
+
+
+def openCachedVrt(gdalobj, cachedir):
+    """Open (create if needed) the cached virtual copy of *gdalobj*.
+
+    The virtual dataset is stored in *cachedir* (the cache directory of
+    the specific dataset, see :func:`datasetCacheDir`).
+
+    Return a tuple containing the virtual dataset filename and the
+    virtual dataset itself opened in update mode.
+
+    """
+
+    if not os.path.isdir(cachedir):
+        os.makedirs(cachedir)
+
+    vrtfilename = os.path.join(cachedir, VRT_CACHE_FILENAME)
+
+    # Create the virtual dataset
+    # @TODO: check 'openshared'
+    vrtdataset = None
+    if os.path.exists(vrtfilename):
+        # @TODO: check if opening the dataset in update mode
+        #        (gdal.GA_Update) is a better solution
+        vrtdataset = gdal.Open(vrtfilename, gdal.GA_Update)
+
+    if vrtdataset is None:
+        # Handle both non existing self.vrtfilename and errors in opening
+        # existing self.vrtfilename
+        if gdalobj.GetDriver().ShortName.upper() == 'VRT':
+            safe_vrt_copy(gdalobj, vrtfilename)
+            vrtdataset = gdal.Open(vrtfilename, gdal.GA_Update)
+        else:
+            driver = gdal.GetDriverByName('VRT')
+            vrtdataset = driver.CreateCopy(vrtfilename, gdalobj)
+
+    if vrtdataset is None:
+        raise ValueError('unable to open the GDAL virtual dataset: "%s"' %
+                         os.path.basename(vrtfilename))
+
+    return vrtfilename, vrtdataset
+
+
+#: name of the optimized copy of a dataset in its cache directory
+OPTIMIZED_CACHE_FILENAME = 'optimized.tif'
+
+#: creation options used for the optimized copy of cached datasets
+OPTIMIZED_CREATION_OPTIONS = (
+    'TILED=YES',
+    'COMPRESS=DEFLATE',
+    'INTERLEAVE=BAND',
+    'BIGTIFF=IF_SAFER',
+)
+
+
+def _scaledCallback(callback, offset, scale):
+    if callback is None:
+        return None
+
+    def scaled(complete, message, data):
+        return callback(offset + complete * scale, message, data)
+
+    return scaled
+
+
+def isOptimizedVrt(vrtfilename):
+    """Return True if *vrtfilename* only reads from an optimized copy.
+
+    See :func:`optimizeCachedVrt`.
+
+    """
+
+    if not os.path.exists(vrtfilename):
+        return False
+
+    cachedir = os.path.dirname(os.path.abspath(vrtfilename))
+    optimized = os.path.join(cachedir, OPTIMIZED_CACHE_FILENAME)
+
+    sources = set()
+    xml = etree.parse(vrtfilename)
+    for srcfile in xml.iter('SourceFilename'):
+        path = srcfile.text
+        if int(srcfile.get('relativeToVRT', 0)):
+            path = os.path.join(cachedir, path)
+        sources.add(os.path.abspath(path))
+
+    return sources == {optimized}
+
+
+def optimizeCachedVrt(vrtfilename, levels=None, nthreads=None,
+                      callback=None):
+    """Redirect a cached virtual dataset to an optimized GeoTIFF copy.
+
+    Data are copied into a tiled and compressed GeoTIFF file (see
+    :data:`OPTIMIZED_CREATION_OPTIONS`) stored in the same cache
+    directory of *vrtfilename*.
+    Internal overviews (*levels*, by default the ones computed by
+    :func:`ovrComputeLevels`) and statistics of all bands are
+    pre-computed and stored in the GeoTIFF file.
+    Finally the virtual dataset is re-written so that it only reads
+    from the optimized copy (any external overview file is removed).
+
+    The *callback* function, if provided, has the same signature of
+    GDAL progress functions.  If it returns a false value the
+    operation is interrupted, :exc:`RuntimeError` is raised and the
+    virtual dataset is left unchanged.
+
+    Return the filename of the optimized copy.
+
+    .. note:: the virtual dataset should not be kept open in update
+              mode with pending changes during the operation.
+
+    """
+
+    cachedir = os.path.dirname(os.path.abspath(vrtfilename))
+    filename = os.path.join(cachedir, OPTIMIZED_CACHE_FILENAME)
+
+    src = gdal.Open(vrtfilename)
+    if src is None:
+        raise ValueError('unable to open the GDAL virtual dataset: "%s"' %
+                         os.path.basename(vrtfilename))
+
+    if levels is None:
+        levels = ovrComputeLevels(src)
+
+    if has_complex_bands(src):
+        resampling = 'average_magphase'
+    else:
+        resampling = 'average'
+
+    fd, tmpfilename = tempfile.mkstemp(suffix='.tif', prefix='optimized-',
+                                       dir=cachedir)
+    os.close(fd)
+    fd, tmpvrtfilename = tempfile.mkstemp(suffix='.vrt', dir=cachedir)
+    os.close(fd)
+    try:
+        # full resolution data
+        driver = gdal.GetDriverByName('GTiff')
+        dst = driver.CreateCopy(tmpfilename, src, 0,
+                                list(OPTIMIZED_CREATION_OPTIONS),
+                                callback=_scaledCallback(callback, 0, 0.5))
+        if dst is None:
+            raise RuntimeError('unable to create "%s"' % filename)
+        dst = None
+        src = None
+
+        # internal overviews
+        if levels:
+            ovrBuild(tmpfilename, levels, resampling, nthreads,
+                     callback=_scaledCallback(callback, 0.5, 0.4))
+
+        # statistics (stored in the GeoTIFF metadata in update mode)
+        dst = gdal.Open(tmpfilename, gdal.GA_Update)
+        for index in range(1, dst.RasterCount + 1):
+            band = dst.GetRasterBand(index)
+            if gdal.DataTypeIsComplex(band.DataType):
+                continue
+            band.ComputeStatistics(False)
+            if callback and not callback(0.9 + 0.1 * index / dst.RasterCount,
+                                         '', None):
+                raise RuntimeError('operation interrupted by the user')
+        dst = None
+
+        os.replace(tmpfilename, filename)
+
+        # redirect the virtual dataset
+        driver = gdal.GetDriverByName('VRT')
+        vrtdataset = driver.CreateCopy(tmpvrtfilename, gdal.Open(filename))
+        vrtdataset = None
+
+        # the VRT file has been created in the same directory of the
+        # optimized copy so source filenames are relative to it
+        xml = etree.parse(tmpvrtfilename)
+        for srcfile in xml.iter('SourceFilename'):
+            srcfile.text = OPTIMIZED_CACHE_FILENAME
+            srcfile.set('relativeToVRT', '1')
+        with open(tmpvrtfilename, 'wb') as fd:
+            fd.write(etree.tostring(xml.getroot()))
+
+        os.replace(tmpvrtfilename, vrtfilename)
+    finally:
+        for name in (tmpfilename, tmpfilename + '.aux.xml', tmpvrtfilename):
+            if os.path.exists(name):
+                os.remove(name)
+
+    # overviews of the optimized copy are used by the VRT driver only
+    # if no external overview is available
+    for ext in ('.ovr', '.aux.xml'):
+        if os.path.exists(vrtfilename + ext):
+            os.remove(vrtfilename + ext)
+
+    return filename
@@ -198,37 +198,31 @@ class GdalHelper(object):
 
 
 class AddoHelper(GdalHelper):
-    """Helper class for gdaladdo execution on live datasets.
+    """Helper class for overview computation on live datasets.
 
-    In GSDView an external process running the gdaladdo is used to add
-    oveviews to (virtual) dataset that are already open in GSDView
-    itself.
+    Overviews of (virtual) datasets that are already open in GSDView
+    are computed by a :class:`gsdview.gdalbackend.modelitems.OverviewBuilder`
+    worker thread (see :func:`gsdview.gdalbackend.gdalsupport.ovrBuild`)
+    so that all bands and levels are processed in parallel.
 
-    Unfortunately, as far as I know, there is no way to safely handle
-    two dataset objects (pointing at the same vrt file) in two different
-    processes.
-
-    This helper class provides functions to perform overview
-    computation on a private environment and then move the ovr/aux
-    file back to the main cache folder of the dataset.
+    The computation is performed on a private copy of the virtual
+    dataset in order to not modify the one in use by the GUI, then the
+    ovr/aux file is moved back to the main cache folder of the dataset.
     After that the dataset is re-opened an all changes are safely
     reflected to the GUI.
 
     In case the overview computation is stopped before completion then
-    the private gdaladdo environment is simply cleaned and no side
-    effect arises.
+    the private environment is simply cleaned and no side effect
+    arises.
 
     .. note:: if one wants to add overviews to a vrt dataset that
               already has overviews (i.e. the ovr/aux file already
               exists) then the ovr/aux file should be copied in the
-              private gdaladdo environment before starting computation.
+              private environment before starting computation.
 
               In this way the pre-existing overview are preserved but
               the copy operation could be heavy weight.
 
-              Maybe some suggestion can be asked on the GDAL
-              mailing-list.
-
               An alternative solution, the one currently implemented,
               is to force re-computation of all overview levels (existing
               ones and newly selected) and then replace the ol overview
@@ -240,10 +234,11 @@ class AddoHelper(GdalHelper):
 
     """
 
-    def __init__(self, app, tool):
+    def __init__(self, app, tool=None):
         super(AddoHelper, self).__init__(app, tool)
         self._datasetitem = None
         self._band = None
+        self._builder = None
 
     def target_levels(self, dataset):
         if self._band is not None:
@@ -303,7 +298,7 @@ class AddoHelper(GdalHelper):
         if levels:
             _log.debug('requested levels: %s', levels)
 
-            # Run an external process for overviews computation
+            # Run a worker thread for overviews computation
             self.app.statusBar().showMessage('Quick look image generation ...')
 
             self._tmpdir = self.setup_tmpdir(dataset)
@@ -313,17 +308,68 @@ class AddoHelper(GdalHelper):
 
             # use averaging in magphase space for complex raster bands
             if gdalsupport.has_complex_bands(dataset):
-                self.tool.set_resampling_method('average_magphase')
+                resampling = 'average_magphase'
             else:
-                self.tool.set_resampling_method('average')
+                resampling = 'average'
 
-            args = [os.path.basename(vrtfilename)]
-            args.extend(str(level) for level in levels)
-            self.tool.cwd = os.path.dirname(vrtfilename)
-            self.controller.run_tool(self.tool, *args)
+            builder = modelitems.OverviewBuilder(vrtfilename, levels,
+                                                 resampling)
+            builder.progress.connect(self._onProgress)
+            builder.finished.connect(self._onFinished)
+            if self.progressdialog:
+                self.progressdialog.canceled.connect(
+                    builder.requestInterruption)
+            self._builder = builder
+            builder.start()
         else:
             return True
 
+    def start(self, item):
+        if self._builder is not None:
+            _log.warning('unable to perform overview computation: '
+                         'another computation is currently running.')
+            return
+
+        try:
+            startfailure = self.do_start(item)
+        except Exception as e:
+            _log.debug(str(e), exc_info=True)
+            startfailure = True
+
+        if startfailure:
+            self.cleanup()
+        else:
+            self.setProgressRange(*self._PROGRESS_RANGE)
+            if self.progressdialog:
+                self.progressdialog.show()
+
+    def _onProgress(self, complete, message):
+        value = int(round(100 * complete))
+        self.app.progressbar.setValue(value)
+        if self.progressdialog:
+            self.progressdialog.setValue(value)
+
+    def _onFinished(self):
+        builder, self._builder = self._builder, None
+        if self.progressdialog:
+            self.progressdialog.canceled.disconnect(
+                builder.requestInterruption)
+        builder.deleteLater()
+
+        try:
+            if builder.error is None:
+                self.do_finalize()
+            else:
+                if builder.isInterruptionRequested():
+                    _log.info('overview computation interrupted')
+                else:
+                    _log.error('overview computation failed: %s',
+                               builder.error)
+                self.do_finalize_on_error()
+        finally:
+            self.cleanup()
+            self._reset_progress()
+
     def do_finalize(self):
         # @TODO: check if opening the dataset in update mode
         #        (gdal.GA_Update) is a better solution
@@ -486,7 +532,7 @@ class AddoDialogHelper(AddoHelper):
 
     _PROGRESS_DIALOD_MSG = 'Overviews computation.'
 
-    def __init__(self, app, tool):
+    def __init__(self, app, tool=None):
         super(AddoDialogHelper, self).__init__(app, tool)
         self.dialog = None
         # self.setup_progress_dialog(app.tr(self._PROGRESS_DIALOD_MSG))
@@ -23,6 +23,7 @@
 
 import os
 import logging
+import collections
 
 from osgeo import gdal
 
@@ -33,18 +34,88 @@ from gsdview.errors import OpenError
 from gsdview.gdalbackend import info
 from gsdview.gdalbackend import gdalqt
 from gsdview.gdalbackend import gdalsupport
+from gsdview.gdalbackend import tilestore
 
 
 VISIBLE_OVERVIEW_ITEMS = False
 
+#: compute missing overview tiles on demand (see :mod:`tilestore`)
+LAZY_OVERVIEWS = False
+
 _log = logging.getLogger(__name__)
 
 
+class DatasetPool(object):
+    """Bounded pool of open datasets.
+
+    At most :attr:`maxsize` datasets (see :class:`CachedDatasetItem`)
+    are kept open at the same time.
+    When the limit is exceeded GDAL handles of least recently used
+    datasets are closed (see :meth:`CachedDatasetItem.suspend`) while
+    items stay in the model.
+    Handles are transparently re-opened on next access.
+
+    Datasets currently displayed in some view are never suspended.
+
+    A *maxsize* of 0 means no limit.
+
+    """
+
+    def __init__(self, maxsize=0):
+        #: maximum number of open datasets (0 means no limit)
+        self.maxsize = maxsize
+        self._items = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return id(item) in self._items
+
+    def touch(self, item):
+        """Record an access to *item*."""
+
+        key = id(item)
+        if key in self._items:
+            self._items.move_to_end(key)
+        else:
+            self._items[key] = item
+            self.shrink()
+
+    def discard(self, item):
+        """Remove *item* from the pool (e.g. when it is closed)."""
+
+        self._items.pop(id(item), None)
+
+    def shrink(self):
+        """Suspend least recently used datasets exceeding the limit."""
+
+        if not self.maxsize or len(self._items) <= self.maxsize:
+            return
+
+        # @NOTE: the most recently used item is never suspended
+        lru = list(self._items.items())[:-1]
+        for key, item in lru:
+            if len(self._items) <= self.maxsize:
+                break
+            if item.isbusy():
+                continue
+            del self._items[key]
+            item.suspend()
+
+
+#: pool of open GDAL datasets
+DATASET_POOL = DatasetPool()
+
+
 class MajorObjectItem(QtGui.QStandardItem):
     iconfile = qtsupport.geticon('metadata.svg', __name__)
     _type = QtGui.QStandardItem.UserType + 100
     backend = info.name
 
+    _gdalobj = None
+    _suspended = False
+
     def __init__(self, gdalobj, **kwargs):
         if isinstance(gdalobj, MajorObjectItem):
             self._obj = gdalobj._obj
@@ -62,6 +133,19 @@ class MajorObjectItem(QtGui.QStandardItem):
                                               description)  # , **kwargs)
         self.setToolTip(description)
 
+    @property
+    def _obj(self):
+        # @NOTE: GDAL handles of suspended items (see DatasetPool) are
+        #        transparently re-opened on access
+        if self._suspended:
+            self.resume()
+        return self._gdalobj
+
+    @_obj.setter
+    def _obj(self, gdalobj):
+        self._gdalobj = gdalobj
+        self._suspended = False
+
     # Give items the same iterface of GDAL objects.
     # NOTE: the widgets module doesn't need to import modelitems
     def __getattr__(self, name):
@@ -70,6 +154,27 @@ class MajorObjectItem(QtGui.QStandardItem):
     def type(self):
         return self._type
 
+    def _suspend(self):
+        # @NOTE: sub-datasets have their own GDAL handles
+        for row in range(self.rowCount()):
+            child = self.child(row)
+            if (isinstance(child, MajorObjectItem) and
+                    not isinstance(child, DatasetItem)):
+                child._suspend()
+        self._gdalobj = None
+        self._suspended = True
+
+    def resume(self):
+        """Re-open GDAL handles closed by :class:`DatasetPool`.
+
+        By default the request is forwarded to the parent item.
+
+        """
+
+        parent = self.parent()
+        if isinstance(parent, MajorObjectItem):
+            parent.resume()
+
     def _closeChildren(self):
         while self.hasChildren():
             try:
@@ -92,36 +197,91 @@ class MajorObjectItem(QtGui.QStandardItem):
         return '/'.join(parentpath, str(self.row))
 
 
-class BandItem(MajorObjectItem):
+class GraphicsItemMixin(object):
+    """Lazy initialization of the graphics scene and graphics item.
+
+    The graphics scene and the graphics item are only created (using
+    the :meth:`_setup_scene` method) on first access to the
+    :attr:`scene` or :attr:`graphicsitem` attributes, i.e. when a view
+    is actually requested.
+
+    """
+
+    _scene = None
+    _graphicsitem = None
+    _scene_initialized = False
+
+    def _setup_scene(self, parent=None):
+        raise NotImplementedError
+
+    def _init_scene(self):
+        self._scene, self._graphicsitem = self._setup_scene()
+        self._scene_initialized = True
+
+    def _reset_scene(self):
+        self._scene = None
+        self._graphicsitem = None
+        self._scene_initialized = False
+
+    def hasscene(self):
+        """Return True if the graphics scene has been already created.
+
+        Unlike the :attr:`scene` attribute this method never triggers
+        the scene creation.
+
+        """
+
+        return self._scene is not None
+
+    @property
+    def scene(self):
+        """Graphics scene associated to the item."""
+
+        if not self._scene_initialized:
+            self._init_scene()
+        return self._scene
+
+    @scene.setter
+    def scene(self, scene):
+        self._scene = scene
+        self._scene_initialized = True
+
+    @property
+    def graphicsitem(self):
+        """Graphics item representing the item."""
+
+        if not self._scene_initialized:
+            self._init_scene()
+        return self._graphicsitem
+
+    @graphicsitem.setter
+    def graphicsitem(self, graphicsitem):
+        self._graphicsitem = graphicsitem
+        self._scene_initialized = True
+
+
+class BandItem(GraphicsItemMixin, MajorObjectItem):
     """Raster band item.
 
     This class implements both the QStandardItem and the
     gdal.Band interface.
 
     It also as attached a graphics scene containing a GdalGraphicsItem
+    (created on demand)
 
     """
 
     iconfile = qtsupport.geticon('rasterband.svg', __name__)
     _type = MajorObjectItem._type + 10
 
+    #: store for lazy overview tiles (:class:`tilestore.OvrTileStore`)
+    tilestore = None
+
     def __init__(self, band, **kwargs):
         assert band is not None
         super(BandItem, self).__init__(band, **kwargs)
         self._setup_children()
 
-        #: graphics scene associated to the raster band
-        self.scene = None
-
-        #: graphics item representing the raster band
-        self.graphicsitem = None
-
-        # @TODO: lazy behaviour: postpone the scene/view initialization when
-        #        it is actualy needed
-        scene, graphicsitem = self._setup_scene()
-        self.scene = scene
-        self.graphicsitem = graphicsitem
-
     def footprint(self):
         return self.parent().footprint()
 
@@ -177,13 +337,17 @@ class BandItem(MajorObjectItem):
             return None, None
 
     def close(self):
-        self.scene.clear()
+        if self.hasscene():
+            self.scene.clear()
         self.graphicsitem = None
+        if self.tilestore is not None:
+            self.tilestore.close()
+        self.tilestore = None
         # self.scene = None    # @WARNING: causes problems in event filters
         # self._obj.FlushCache() # @TODO: check
         super(BandItem, self).close()
 
-    def _reopen(self, gdalobj=None):
+    def _reopen(self, gdalobj=None, notify=True):
         if not gdalobj:
             # assume self._obj has already been set from caller
             gdalobj = self._obj
@@ -210,7 +374,7 @@ class BandItem(MajorObjectItem):
                 else:
                     item = self.GetOverview(index)
                     newindex = levelsmap[level]
-                    item._reopen(gdalobj.GetOverview(newindex))
+                    item._reopen(gdalobj.GetOverview(newindex), notify)
 
             for index in toremove:
                 self.takeRow(index)
@@ -234,7 +398,8 @@ class BandItem(MajorObjectItem):
             # self.sortChildren(0, QtCore.Qt.AscendngOrder)
 
         self._obj = gdalobj
-        self.model().itemChanged.emit(self)
+        if notify:
+            self.model().itemChanged.emit(self)
 
 
 class OverviewItem(BandItem):
@@ -250,7 +415,7 @@ class OverviewItem(BandItem):
 #     #defaultaction = 'Open'
 
 
-class DatasetItem(MajorObjectItem):
+class DatasetItem(GraphicsItemMixin, MajorObjectItem):
     """Dataset item
 
     This class implements both the QStandardItem and the gdal.Dataset
@@ -261,9 +426,11 @@ class DatasetItem(MajorObjectItem):
     iconfile = qtsupport.geticon('dataset.svg', __name__)
     _type = MajorObjectItem._type + 100
 
-    def __init__(self, filename, mode=gdal.GA_ReadOnly, **kwargs):
+    def __init__(self, filename, mode=gdal.GA_ReadOnly, gdalobj=None,
+                 **kwargs):
         filename = os.path.abspath(filename)
-        gdalobj = self._checkedopen(filename, mode)
+        if gdalobj is None:
+            gdalobj = self._checkedopen(filename, mode)
         super(DatasetItem, self).__init__(gdalobj, **kwargs)
         if os.path.basename(filename) in self.text():
             self.setText(os.path.basename(filename))
@@ -276,17 +443,8 @@ class DatasetItem(MajorObjectItem):
         #: coordiante mapper
         self.cmapper = gdalsupport.coordinate_mapper(self._obj)
 
-        # @TODO: lazy behaviour: postpone the scene/view initialization when
-        #        it is actualy needed
-        scene, graphicsitem = self._setup_scene()
-
-        #: graphics scene associated to the item
-        self.scene = scene
-
-        #: graphics item representing the dataset
-        self.graphicsitem = graphicsitem
-
-    def _checkedopen(self, filename, mode=gdal.GA_ReadOnly):
+    @staticmethod
+    def _checkedopen(filename, mode=gdal.GA_ReadOnly):
         try:
             gdalobj = gdal.Open(filename, mode)
         except RuntimeError as e:
@@ -324,37 +482,113 @@ class DatasetItem(MajorObjectItem):
         If no geographic info is available in the dataset None is
         returned.
 
+        The footprint is computed only once so that GDAL handles of
+        suspended datasets (see :class:`DatasetPool`) are not re-opened
+        e.g. to draw the footprints overlay of the world map.
+
         """
 
         if not self.cmapper:
             return
 
-        lon, lat = self.cmapper.imgToGeoGrid([0.5, self.RasterXSize - 0.5],
-                                             [0.5, self.RasterYSize - 0.5])
-        polygon = QtGui.QPolygonF([
-            QtCore.QPointF(lon[0, 0], lat[0, 0]),
-            QtCore.QPointF(lon[0, 1], lat[0, 1]),
-            QtCore.QPointF(lon[1, 1], lat[1, 1]),
-            QtCore.QPointF(lon[1, 0], lat[1, 0])
-        ])
+        if self._footprint is None:
+            # @NOTE: private handles are used in order to not trigger
+            #        the pool
+            gdalobj = self._gdalobj
+            if gdalobj is None:
+                gdalobj = self._obj
+            lon, lat = self.cmapper.imgToGeoGrid(
+                [0.5, gdalobj.RasterXSize - 0.5],
+                [0.5, gdalobj.RasterYSize - 0.5])
+            self._footprint = QtGui.QPolygonF([
+                QtCore.QPointF(lon[0, 0], lat[0, 0]),
+                QtCore.QPointF(lon[0, 1], lat[0, 1]),
+                QtCore.QPointF(lon[1, 1], lat[1, 1]),
+                QtCore.QPointF(lon[1, 0], lat[1, 0])
+            ])
+
+        return QtGui.QPolygonF(self._footprint)
+
+    #: number of child items created at once (see :meth:`fetchMore`)
+    FETCH_BATCH_SIZE = 64
+
+    _subdatasets = None
+    _scanner = None
+    _nchildren = 0
+    _footprint = None
+
+    def _bandsobj(self):
+        # GDAL object raster bands are taken from
+        return self._obj
+
+    def _subdatasetlist(self, gdalobj=None):
+        if self._subdatasets is None:
+            if gdalobj is None:
+                gdalobj = self._obj
+            self._subdatasets = gdalobj.GetSubDatasets()
+        return self._subdatasets
+
+    def _rastercount(self):
+        # @NOTE: private handles are used in order to not trigger the
+        #        pool (children are counted at each repaint of views)
+        gdalobj = self._gdalobj
+        return gdalobj.RasterCount if gdalobj is not None else 0
+
+    def _childcount(self):
+        if self._suspended:
+            # @NOTE: don't re-open suspended datasets just to count children
+            return self._nchildren
+        if self._gdalobj is None:
+            return 0
+        return self._rastercount() + len(
+            self._subdatasetlist(self._gdalobj))
+
+    def canFetchMore(self):
+        """Return True if there are children still not created."""
+
+        return self.rowCount() < self._childcount()
+
+    def fetchMore(self, count=None):
+        """Create at most *count* child items.
+
+        Children are created on demand, e.g. when the item is expanded
+        in a view, in order to have a short opening time also for
+        products with hundreds of sub-datasets.
+        By default :data:`FETCH_BATCH_SIZE` items are created.
 
-        return polygon
+        """
+
+        if count is None:
+            count = self.FETCH_BATCH_SIZE
+
+        gdalobj = self._bandsobj()
+        stop = self.rowCount() + count
+        self._setup_child_bands(gdalobj, min(stop, gdalobj.RasterCount))
+        if stop > gdalobj.RasterCount:
+            self._setup_child_subdatasets(self._obj,
+                                          stop - gdalobj.RasterCount)
 
     def GetRasterBand(self, index):
         # @NOTE: raster bands numbering starts from 1
         if (index < 1) or (index > self._obj.RasterCount):
             return None
+        if self.rowCount() < index:
+            self._setup_child_bands(self._bandsobj(), index)
         # @NOTE: raster bands are always inserted before subdatasets
         return self.child(index - 1)
 
     def GetSubDatasets(self):
+        self.fetchMore(self._childcount())
         # @NOTE: raster bands are always inserted before subdatasets
         return [self.child(index) for index in range(self.RasterCount,
                                                      self.rowCount())]
 
-    def _setup_child_bands(self, gdalobj):
+    def _setup_child_bands(self, gdalobj, stop=None):
+        if stop is None:
+            stop = gdalobj.RasterCount
+
         # @NOTE: raster bands are always inserted before subdatasets
-        for index in range(self.rowCount(), gdalobj.RasterCount):
+        for index in range(self.rowCount(), stop):
             item = BandItem(gdalobj.GetRasterBand(index + 1))
             if not item.text():
                 text = 'Raster Band'
@@ -365,19 +599,111 @@ class DatasetItem(MajorObjectItem):
                 item.setToolTip(description)
             self.appendRow(item)
 
-    def _setup_child_subdatasets(self, gdalobj):
-        for path, extrainfo in gdalobj.GetSubDatasets():
+    def _setup_child_subdatasets(self, gdalobj, stop=None):
+        subdatasets = self._subdatasetlist(gdalobj)
+
+        # @NOTE: raster bands are always inserted before subdatasets
+        start = self.rowCount() - self._bandsobj().RasterCount
+        for path, extrainfo in subdatasets[start:stop]:
             # @TODO: pass full path for the sub-dataset filename (??)
             item = SubDatasetItem(path, extrainfo)
-
-            # @NOTE: raster bands are always inserted before subdatasets
+            if path in self._subdatasetinfo:
+                item.setToolTip(
+                    '%s\n%s' % (extrainfo, self._subdatasetinfo[path]))
             self.appendRow(item)
 
     def _setup_children(self):
-        self._setup_child_bands(self._obj)
-        self._setup_child_subdatasets(self._obj)
+        # @NOTE: only the first batch of children is created, the other
+        #        ones are created on demand (see fetchMore)
+        self._subdatasets = None
+        self._subdatasetinfo = {}
+        self.fetchMore()
+        self._start_subdataset_scan()
+
+    def _start_subdataset_scan(self):
+        subdatasets = self._subdatasetlist()
+        if not subdatasets or QtCore.QCoreApplication.instance() is None:
+            return
+
+        self._scanner = SubDatasetScanner(
+            [path for path, extrainfo in subdatasets])
+        self._scanner.scanned.connect(self._onSubDatasetScanned)
+        self._scanner.start()
+
+    def _stop_subdataset_scan(self):
+        if self._scanner is not None:
+            self._scanner.requestInterruption()
+            self._scanner.wait()
+            self._scanner = None
+
+    def _onSubDatasetScanned(self, path, info):
+        self._subdatasetinfo[path] = info
+
+        subdatasets = self._subdatasetlist()
+        for index, (sdpath, extrainfo) in enumerate(subdatasets):
+            if sdpath == path:
+                row = self._bandsobj().RasterCount + index
+                if row < self.rowCount():
+                    item = self.child(row)
+                    item.setToolTip('%s\n%s' % (extrainfo, info))
+                break
+
+    def handlekey(self):
+        """Return the key of the dataset in the handle registry.
+
+        Worker threads can use the key to get GDAL handles private to
+        the thread (see
+        :data:`gsdview.gdalbackend.gdalsupport.THREAD_HANDLES`).
+
+        """
+
+        return self.filename
+
+    _pixelprobe = None
+
+    def pixelValues(self, x, y):
+        """Return the list of values of all bands at pixel (*x*, *y*).
+
+        Data read in the last paint of open views (and tiles of lazy
+        overviews) are used if possible, a single-pixel read is only
+        performed on cache misses (see
+        :class:`gsdview.gdalbackend.gdalsupport.PixelProbe`).
+
+        """
+
+        dataset = self._obj
+        if dataset is None:
+            return None
+
+        if self._pixelprobe is None or self._pixelprobe.dataset is not dataset:
+            self._pixelprobe = gdalsupport.PixelProbe(dataset)
+
+        blocks = {}
+        tilestores = {}
+        if self.hasscene() and self._graphicsitem is not None:
+            blocks.update(self._graphicsitem.paintedBlocks())
+        for row in range(self.rowCount()):
+            child = self.child(row)
+            if not isinstance(child, BandItem):
+                break
+            if child.tilestore is not None:
+                tilestores[row + 1] = child.tilestore
+            if child.hasscene() and child._graphicsitem is not None:
+                block = child._graphicsitem.paintedblock
+                if block is not None:
+                    blocks[row + 1] = block
+
+        try:
+            return self._pixelprobe.values(x, y, blocks, tilestores)
+        except (ValueError, RuntimeError) as e:
+            _log.debug('unable to read pixel values: %s', e)
+            return None
 
     def close(self):
+        self._stop_subdataset_scan()
+        if self.handlekey():
+            gdalsupport.THREAD_HANDLES.invalidate(self.handlekey())
+        self._pixelprobe = None
         # self._obj.FlushCache() # @TODO: check
         self.filename = None
         self._mode = None
@@ -406,14 +732,22 @@ class CachedDatasetItem(DatasetItem):
 
     CACHEDIR = os.path.expanduser(os.path.join('~', '.gsdview', 'cache'))
 
-    def __init__(self, filename, mode=gdal.GA_Update, **kwargs):
+    #: manager of the cache directory
+    #: (:class:`gsdview.gdalbackend.cachemanager.CacheManager` or None)
+    CACHEMANAGER = None
+
+    def __init__(self, filename, mode=gdal.GA_Update, handles=None,
+                 **kwargs):
         # @TODO: check
         if mode == gdal.GA_ReadOnly:
             _log.warning('GDAL open mode ignored in cached datasets.')
             mode = gdal.GA_Update
 
         filename = os.path.abspath(filename)
-        gdalobj = self._checkedopen(filename, gdal.GA_ReadOnly)
+        if handles is None:
+            handles = self.openhandles(filename)
+        gdalobj, vrtfilename, vrtobj = handles
+
         # @NOTE: drop DataSetItem initializer
         MajorObjectItem.__init__(self, gdalobj, **kwargs)
         if os.path.basename(filename) in self.text():
@@ -423,8 +757,6 @@ class CachedDatasetItem(DatasetItem):
         self.filename = filename
         self._mode = mode
 
-        vrtfilename, vrtobj = self._vrtinit(self._obj)
-
         #: filename of the cached virtual dataset
         self.vrtfilename = vrtfilename
         self._vrtobj = vrtobj
@@ -434,55 +766,97 @@ class CachedDatasetItem(DatasetItem):
         #: coordinate mapper
         self.cmapper = gdalsupport.coordinate_mapper(self._obj)
 
-        # @TODO: lazy behaviour: postpone the scene/view initialization when
-        #        it is actualy needed
-        scene, graphicsitem = self._setup_scene()
+        DATASET_POOL.touch(self)
+
+    _vrtgdalobj = None
+    _optimizer = None
+
+    @property
+    def _vrtobj(self):
+        if self._suspended:
+            self.resume()
+        elif self._vrtgdalobj is not None:
+            DATASET_POOL.touch(self)
+        return self._vrtgdalobj
+
+    @_vrtobj.setter
+    def _vrtobj(self, gdalobj):
+        self._vrtgdalobj = gdalobj
+
+    @classmethod
+    def _get_cachedir(cls, gdalobj):
+        return gdalsupport.datasetCacheDir(gdalobj, cls.CACHEDIR)
+
+    @classmethod
+    def _vrtinit(cls, gdalobj, cachedir=None):
+        # Build the virtual dataset filename
+        if cachedir is None:
+            cachedir = cls._get_cachedir(gdalobj)
 
-        #: graphics scene associated to the item
-        self.scene = scene
+        # @NOTE: protect the cache entry from eviction before using it
+        if cls.CACHEMANAGER is not None:
+            cls.CACHEMANAGER.pin(cachedir)
+        try:
+            result = gdalsupport.openCachedVrt(gdalobj, cachedir)
+        except Exception:
+            if cls.CACHEMANAGER is not None:
+                cls.CACHEMANAGER.unpin(cachedir)
+            raise
 
-        #: graphics item representing the dataset
-        self.graphicsitem = graphicsitem
+        if cls.CACHEMANAGER is not None:
+            cls.CACHEMANAGER.evictInBackground()
 
-    def _get_cachedir(self, gdalobj):
-        id_ = gdalsupport.uniqueDatasetID(gdalobj)
-        cachedir = self.CACHEDIR
-        cachedir = os.path.join(cachedir, id_)
+        return result
 
-        return cachedir
+    @classmethod
+    def openhandles(cls, filename, callback=None):
+        """Open the dataset and its cached virtual dataset.
 
-    def _vrtinit(self, gdalobj, cachedir=None):
-        # Build the virtual dataset filename
-        if cachedir is None:
-            cachedir = self._get_cachedir(gdalobj)
-
-        if not os.path.isdir(cachedir):
-            os.makedirs(cachedir)
-
-        vrtfilename = os.path.join(cachedir, 'virtual-dataset.vrt')
-
-        # Create the virtual dataset
-        # @TODO: check 'openshared'
-        vrtdataset = None
-        if os.path.exists(vrtfilename):
-            # @TODO: check if opening the dataset in update mode
-            #        (gdal.GA_Update) is a better solution
-            vrtdataset = gdal.Open(vrtfilename, gdal.GA_Update)
-
-        if vrtdataset is None:
-            # Handle both non existing self.vrtfilename and errors in opening
-            # existing self.vrtfilename
-            if gdalobj.GetDriver().ShortName.upper() == 'VRT':
-                gdalsupport.safe_vrt_copy(gdalobj, vrtfilename)
-                vrtdataset = gdal.Open(vrtfilename, gdal.GA_Update)
-            else:
-                driver = gdal.GetDriverByName('VRT')
-                vrtdataset = driver.CreateCopy(vrtfilename, gdalobj)
-
-        if vrtdataset is None:
-            raise ValueError('unable to open the GDAL virtual dataset: "%s"' %
-                             os.path.basename(vrtfilename))
-        return vrtfilename, vrtdataset
+        Return a tuple containing the GDAL dataset, the filename of the
+        cached virtual dataset and the virtual dataset itself.
+
+        Only GDAL objects are created so it is safe to call this
+        method in a worker thread (see :class:`DatasetOpener`).
+        The optional *callback* is called with the fraction of work
+        done and a message at each step.
+
+        """
+
+        if callback is not None:
+            callback(0., 'open')
+        gdalobj = cls._checkedopen(filename, gdal.GA_ReadOnly)
+
+        if callback is not None:
+            callback(1. / 3, 'fingerprint')
+        cachedir = cls._get_cachedir(gdalobj)
+
+        if callback is not None:
+            callback(2. / 3, 'virtual dataset')
+        vrtfilename, vrtobj = cls._vrtinit(gdalobj, cachedir)
+        handles = gdalobj, vrtfilename, vrtobj
+
+        # @NOTE: the cache entry is pinned by _vrtinit
+        if callback is not None:
+            try:
+                callback(1., 'done')
+            except BaseException:
+                cls.releasehandles(handles)
+                raise
+
+        return handles
+
+    @classmethod
+    def releasehandles(cls, handles):
+        """Release *handles* returned by :meth:`openhandles`.
+
+        To be used when handles are not used to create an item
+        (e.g. because the opening has been cancelled).
+
+        """
+
+        gdalobj, vrtfilename, vrtobj = handles
+        if cls.CACHEMANAGER is not None:
+            cls.CACHEMANAGER.unpin(os.path.dirname(vrtfilename))
 
     # Give items the same iterface of GDAL objects.
     # NOTE: the widgets module doesn't need to import modelitems
@@ -546,18 +920,140 @@ class CachedDatasetItem(DatasetItem):
 
             return value
 
-    def _setup_children(self):
-        self._setup_child_bands(self._vrtobj)
-        self._setup_child_subdatasets(self._obj)
+    def _bandsobj(self):
+        return self._vrtobj
+
+    def _rastercount(self):
+        gdalobj = self._vrtgdalobj
+        return gdalobj.RasterCount if gdalobj is not None else 0
+
+    def handlekey(self):
+        # @NOTE: raster data are read from the virtual dataset
+        return self.vrtfilename
+
+    def _setup_child_bands(self, gdalobj, stop=None):
+        super(CachedDatasetItem, self)._setup_child_bands(gdalobj, stop)
+        if LAZY_OVERVIEWS:
+            self._setup_tilestores()
+
+    def _tilesstamp(self):
+        # @NOTE: the VRT file itself is excluded since it is re-written
+        #        each time e.g. statistics are computed, while source
+        #        and overview files change only if the dataset is
+        #        optimized or overviews are re-computed
+        filenames = self._vrtobj.GetFileList() or []
+        vrtfilename = os.path.abspath(self.vrtfilename)
+        return tilestore.sourceStamp(
+            filename for filename in filenames
+            if os.path.abspath(filename) != vrtfilename)
+
+    def _setup_tilestores(self):
+        tilesdir = os.path.join(os.path.dirname(self.vrtfilename), 'tiles')
+        nbands = min(self.rowCount(), self._vrtobj.RasterCount)
+        stamp = None
+        for index in range(1, nbands + 1):
+            item = self.child(index - 1)
+            if item.tilestore is None:
+                if stamp is None:
+                    stamp = self._tilesstamp()
+                rootdir = os.path.join(tilesdir, 'band%02d' % index)
+                item.tilestore = tilestore.OvrTileStore(
+                    item, rootdir, handlekey=self.handlekey(), stamp=stamp)
+
+    def _reset_tilestores(self):
+        # source data or overview levels may have been changed
+        for row in range(self.rowCount()):
+            item = self.child(row)
+            if isinstance(item, BandItem) and item.tilestore is not None:
+                item.tilestore.close()
+                item.tilestore = None
+        self._setup_tilestores()
+
+    def isbusy(self):
+        """Return True if the dataset or its bands are displayed.
+
+        Busy datasets are never suspended by :class:`DatasetPool`.
+        Datasets being optimized (see :meth:`startOptimization`) are
+        always busy.
+
+        """
+
+        if self._optimizer is not None:
+            return True
+
+        for row in range(self.rowCount()):
+            child = self.child(row)
+            if isinstance(child, BandItem) and child.hasscene():
+                if child.scene is not None and child.scene.views():
+                    return True
+
+        return self.hasscene() and bool(self.scene.views())
+
+    def suspend(self):
+        """Close GDAL handles of the dataset and of its raster bands.
+
+        The item is left in the model and GDAL handles are
+        transparently re-opened (see :meth:`resume`) on next access.
+
+        """
+
+        if self._suspended or self._vrtgdalobj is None:
+            return
+
+        _log.debug('suspend "%s"', self.filename)
+        # @NOTE: private handles are used in order to not trigger the pool
+        self._nchildren = (self._vrtgdalobj.RasterCount +
+                           len(self._subdatasetlist(self._gdalobj)))
+
+        # @NOTE: the footprint is computed before closing GDAL handles
+        self.footprint()
+
+        # @NOTE: write pending changes (e.g. statistics) to the VRT file
+        self._vrtgdalobj.FlushCache()
+        self._suspend()
+        self._vrtgdalobj = None
+
+    def resume(self):
+        """Re-open GDAL handles closed by :meth:`suspend`."""
+
+        if not self._suspended:
+            return
+
+        _log.debug('resume "%s"', self.filename)
+        gdalobj = self._checkedopen(self.filename, gdal.GA_ReadOnly)
+        vrtobj = self._checkedopen(self.vrtfilename, gdal.GA_Update)
+
+        self._obj = gdalobj
+        self._vrtobj = vrtobj
+
+        # @NOTE: same as reopen but without notification to the model
+        nbands = min(self.rowCount(), vrtobj.RasterCount)
+        for index in range(1, nbands + 1):
+            item = self.child(index - 1)
+            item._reopen(vrtobj.GetRasterBand(index), notify=False)
+
+        DATASET_POOL.touch(self)
 
     def close(self):
+        if self._optimizer is not None:
+            self._optimizer.requestInterruption()
+            self._optimizer.wait()
+            self._optimizer = None
+
+        DATASET_POOL.discard(self)
+        vrtfilename = self.vrtfilename
         super(CachedDatasetItem, self).close()
         # @NOTE: close virtual object after closing all children
         self._vrtobj = None
         self.vrtfilename = None
 
-    def reopen(self):
-        gdalobj = gdal.Open(self.vrtfilename, gdal.GA_Update)
+        if self.CACHEMANAGER is not None and vrtfilename:
+            self.CACHEMANAGER.unpin(os.path.dirname(vrtfilename))
+            self.CACHEMANAGER.evictInBackground()
+
+    def reopen(self, mode=gdal.GA_Update):
+        self.resume()
+        gdalobj = gdal.Open(self.vrtfilename, mode)
 
         if gdalobj.RasterCount < self.RasterCount:
             _log.warning(
@@ -565,26 +1061,442 @@ class CachedDatasetItem(DatasetItem):
             return
 
         # @WARNING: an error here would require node removal
-        for index in range(1, self.RasterCount + 1):
-            item = self.GetRasterBand(index)
+        # @NOTE: band items not yet created will use the new object
+        nbands = min(self.rowCount(), self.RasterCount)
+        for index in range(1, nbands + 1):
+            item = self.child(index - 1)
             item._reopen(gdalobj.GetRasterBand(index))
 
         self._vrtobj = gdalobj
+        gdalsupport.THREAD_HANDLES.invalidate(self.handlekey())
+        if LAZY_OVERVIEWS:
+            self._reset_tilestores()
 
         self.model().itemChanged.emit(self)
 
+    def isoptimized(self):
+        """Return True if data are read from an optimized copy.
+
+        See :meth:`optimize`.
+
+        """
+
+        return gdalsupport.isOptimizedVrt(self.vrtfilename)
+
+    def optimize(self, levels=None, callback=None):
+        """Optimize the cached dataset for viewing.
 
-def datasetitem(filename):
-    """Factory for dataset items."""
+        A tiled and compressed GeoTIFF copy of the dataset, including
+        internal overviews and statistics, is created in the cache
+        directory and the cached virtual dataset is redirected to it
+        so that, from now on (including next sessions), raster data
+        are only read from the optimized copy.
+
+        See :func:`gsdview.gdalbackend.gdalsupport.optimizeCachedVrt`
+        and :meth:`startOptimization` for the asynchronous version.
+
+        """
+
+        self._beginOptimization()
+        try:
+            gdalsupport.optimizeCachedVrt(self.vrtfilename, levels,
+                                          callback=callback)
+        finally:
+            self.reopen()
+
+    def _beginOptimization(self):
+        # @NOTE: the VRT file is replaced by the optimization: pending
+        #        changes are written and the update handle is replaced
+        #        by a read-only one, so that stale XML is never written
+        #        over the new VRT file when the old handle is closed
+        self._vrtobj.FlushCache()
+        self.reopen(gdal.GA_ReadOnly)
+
+    def startOptimization(self, levels=None):
+        """Optimize the cached dataset for viewing in background.
+
+        Same as :meth:`optimize` but the optimized copy is created by a
+        :class:`DatasetOptimizer` worker thread (returned already
+        started).  In the meantime data are read from the current
+        virtual dataset (in read-only mode), the item is re-opened when
+        the worker finishes.
+
+        """
+
+        if self._optimizer is not None:
+            raise RuntimeError('optimization already running')
+
+        self._beginOptimization()
+        optimizer = DatasetOptimizer(self.vrtfilename, levels)
+        optimizer.finished.connect(self._onOptimizationFinished)
+        self._optimizer = optimizer
+        optimizer.start()
+
+        return optimizer
+
+    def _onOptimizationFinished(self):
+        optimizer, self._optimizer = self._optimizer, None
+        if optimizer is None:
+            # the item has been closed
+            return
+
+        optimizer.deleteLater()
+        self.reopen()
+
+
+def subdatasetinfo(path):
+    """Return a short description of the *path* sub-dataset."""
+
+    gdal.PushErrorHandler('CPLQuietErrorHandler')
+    try:
+        dataset = gdal.Open(path)
+    except RuntimeError:
+        dataset = None
+    finally:
+        gdal.PopErrorHandler()
+
+    if dataset is None:
+        return ''
+
+    info = '%dx%d' % (dataset.RasterXSize, dataset.RasterYSize)
+    if dataset.RasterCount:
+        datatype = dataset.GetRasterBand(1).DataType
+        info += ' (%d bands, %s)' % (dataset.RasterCount,
+                                     gdal.GetDataTypeName(datatype))
+    return info
+
+
+class SubDatasetScanner(QtCore.QThread):
+    """Retrieve basic information about sub-datasets in background.
+
+    :SIGNALS:
+
+        * :attr:`scanned`
+
+    """
+
+    #: SIGNAL: it is emitted when a sub-dataset has been scanned
+    #:
+    #: :C++ signature: `void scanned(QString, QString)`
+    scanned = QtCore.Signal(str, str)
+
+    def __init__(self, paths, parent=None):
+        super(SubDatasetScanner, self).__init__(parent)
+        self.paths = list(paths)
+
+    def run(self):
+        # @NOTE: each sub-dataset is opened with a GDAL handle private
+        #        to this thread
+        for path in self.paths:
+            if self.isInterruptionRequested():
+                break
+            self.scanned.emit(path, subdatasetinfo(path))
+
+
+def identifydriver(filename):
+    """Return the GDAL driver that can open *filename*.
+
+    Only the file header is read so the check is fast enough to be
+    performed in the GUI thread before starting to open the dataset in
+    background (see :class:`DatasetOpener`).
+
+    An :exc:`OpenError` is raised if no GDAL driver can open the file.
+
+    """
+
+    try:
+        driver = gdal.IdentifyDriver(filename)
+    except RuntimeError as e:
+        # @NOTE: this is needed when GDAL exceptions are enabled
+        gdal.ErrorReset()
+        raise OpenError(str(e))
+
+    if driver is None:
+        raise OpenError('"%s" is not a valid GDAL dataset' %
+                        os.path.basename(filename))
+    return driver
+
+
+def openhandles(filename, callback=None):
+    """Open GDAL objects needed to create the item of *filename*.
+
+    Return a tuple containing the dataset item class and the GDAL
+    objects to be passed to :func:`datasetitem`.
+
+    It is safe to call this function in a worker thread (see
+    :class:`DatasetOpener`).
+
+    """
+
+    filename = os.path.abspath(filename)
 
     # Some dataset has only sub-datasets (no raster band).
     # In this case it is not possible to use a virtual datasets like
     # CachedDatasetItem does
     try:
-        return CachedDatasetItem(filename)
+        return CachedDatasetItem, CachedDatasetItem.openhandles(filename,
+                                                                callback)
     except OpenError:
         # @TODO: remove virtualfile created by CachedDatasetItem
-        return DatasetItem(filename)
+        return DatasetItem, DatasetItem._checkedopen(filename)
+
+
+def releasehandles(handles):
+    """Release *handles* returned by :func:`openhandles`."""
+
+    cls, gdalobjs = handles
+    if issubclass(cls, CachedDatasetItem):
+        cls.releasehandles(gdalobjs)
+
+
+def datasetitem(filename, handles=None):
+    """Factory for dataset items.
+
+    If *handles* (see :func:`openhandles`) is not provided the
+    dataset is opened synchronously.
+
+    """
+
+    if handles is None:
+        handles = openhandles(filename)
+
+    cls, gdalobjs = handles
+    if issubclass(cls, CachedDatasetItem):
+        return cls(filename, handles=gdalobjs)
+    else:
+        return cls(filename, gdalobj=gdalobjs)
+
+
+class _OpenCancelled(Exception):
+    pass
+
+
+class DatasetOpener(QtCore.QThread):
+    """Open a dataset in background.
+
+    GDAL objects (see :func:`openhandles`) are opened in the worker
+    thread and made available in the :attr:`handles` attribute when
+    the thread finishes.
+    If the opening fails the exception is stored in :attr:`error`.
+
+    Items shall be created in the GUI thread (see :func:`datasetitem`).
+
+    :SIGNALS:
+
+        * :attr:`progress`
+
+    """
+
+    #: SIGNAL: it is emitted at each step of the opening procedure
+    #:
+    #: :C++ signature: `void progress(float, QString)`
+    progress = QtCore.Signal(float, str)
+
+    def __init__(self, filename, parent=None):
+        super(DatasetOpener, self).__init__(parent)
+
+        #: name of the file to be opened
+        self.filename = filename
+
+        #: GDAL objects opened (see :func:`openhandles`)
+        self.handles = None
+
+        #: the exception raised in the worker thread (if any)
+        self.error = None
+
+    def _callback(self, fract, msg):
+        # @NOTE: GDAL calls cannot be interrupted, the cancellation
+        #        request is only checked between subsequent steps
+        if self.isInterruptionRequested():
+            raise _OpenCancelled()
+        self.progress.emit(fract, msg)
+
+    def run(self):
+        try:
+            handles = openhandles(self.filename, self._callback)
+        except _OpenCancelled:
+            return
+        except Exception as e:
+            _log.debug('unable to open "%s"', self.filename, exc_info=True)
+            self.error = e
+            return
+
+        if self.isInterruptionRequested():
+            releasehandles(handles)
+        else:
+            self.handles = handles
+            self.progress.emit(1., 'done')
+
+
+class DatasetOptimizer(QtCore.QThread):
+    """Optimize a cached virtual dataset in background.
+
+    See :func:`gsdview.gdalbackend.gdalsupport.optimizeCachedVrt`.
+    The computation is interrupted by :meth:`requestInterruption`, if
+    it fails (or it is interrupted) the exception is stored in
+    :attr:`error`.
+
+    :SIGNALS:
+
+        * :attr:`progress`
+
+    """
+
+    #: SIGNAL: it is emitted to report the progress of the computation
+    #:
+    #: :C++ signature: `void progress(float, QString)`
+    progress = QtCore.Signal(float, str)
+
+    def __init__(self, vrtfilename, levels=None, parent=None):
+        super(DatasetOptimizer, self).__init__(parent)
+
+        #: the cached virtual dataset
+        self.vrtfilename = vrtfilename
+
+        #: overview levels (by default computed automatically)
+        self.levels = levels
+
+        #: the exception raised in the worker thread (if any)
+        self.error = None
+
+    def _callback(self, complete, message, data):
+        self.progress.emit(complete, message or '')
+        return not self.isInterruptionRequested()
+
+    def run(self):
+        try:
+            gdalsupport.optimizeCachedVrt(self.vrtfilename, self.levels,
+                                          callback=self._callback)
+        except Exception as e:
+            _log.debug('unable to optimize "%s"', self.vrtfilename,
+                       exc_info=True)
+            self.error = e
+
+
+class OverviewBuilder(QtCore.QThread):
+    """Compute overviews of a dataset in background.
+
+    See :func:`gsdview.gdalbackend.gdalsupport.ovrBuild`.
+    The computation is interrupted by :meth:`requestInterruption`, if
+    it fails (or it is interrupted) the exception is stored in
+    :attr:`error`.
+
+    :SIGNALS:
+
+        * :attr:`progress`
+
+    """
+
+    #: SIGNAL: it is emitted to report the progress of the computation
+    #:
+    #: :C++ signature: `void progress(float, QString)`
+    progress = QtCore.Signal(float, str)
+
+    def __init__(self, filename, levels, resampling='average', parent=None):
+        super(OverviewBuilder, self).__init__(parent)
+
+        #: the dataset
+        self.filename = filename
+
+        #: overview levels
+        self.levels = levels
+
+        #: resampling method
+        self.resampling = resampling
+
+        #: the exception raised in the worker thread (if any)
+        self.error = None
+
+    def _callback(self, complete, message, data):
+        self.progress.emit(complete, message or '')
+        return not self.isInterruptionRequested()
+
+    def run(self):
+        try:
+            gdalsupport.ovrBuild(self.filename, self.levels, self.resampling,
+                                 callback=self._callback)
+        except Exception as e:
+            _log.debug('unable to build overviews of "%s"', self.filename,
+                       exc_info=True)
+            self.error = e
+
+
+class PendingDatasetItem(QtGui.QStandardItem):
+    """Placeholder for a dataset being opened in background.
+
+    The item is displayed in the tree view while the
+    :class:`DatasetOpener` (see :attr:`opener`) is running and shows
+    the progress of the opening procedure.
+    Closing the item cancels the opening and waits for the worker
+    thread.
+
+    """
+
+    iconfile = qtsupport.geticon('dataset.svg', __name__)
+    _type = DatasetItem._type + 20
+    backend = info.name
+
+    def __init__(self, filename, parent=None):
+        filename = os.path.normpath(os.path.abspath(filename))
+        super(PendingDatasetItem, self).__init__(
+            QtGui.QIcon(self.iconfile), os.path.basename(filename))
+        self.setToolTip(filename)
+
+        #: dataset filename
+        self.filename = filename
+
+        #: the worker thread (:class:`DatasetOpener`)
+        self.opener = DatasetOpener(filename, parent)
+        self.opener.progress.connect(self._onProgress)
+        self._cancelled = False
+
+    def type(self):
+        return self._type
+
+    def start(self):
+        """Start opening the dataset in background."""
+
+        # @NOTE: QThread.start resets interruption requests
+        if not self._cancelled:
+            self.opener.start()
+
+    def _onProgress(self, fract, msg):
+        basename = os.path.basename(self.filename)
+        self.setText('%s (%d%%)' % (basename, int(100 * fract)))
+        self.setToolTip('%s\n%s' % (self.filename, msg))
+
+    def iscancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Cancel the opening."""
+
+        self._cancelled = True
+        self.opener.requestInterruption()
+
+    def close(self):
+        self.cancel()
+
+        # @NOTE: the QThread shall not be destroyed while running (e.g.
+        #        at exit), handles already opened are released here
+        #        since the "finished" signal could be never delivered
+        self.opener.wait()
+        if self.opener.handles is not None:
+            releasehandles(self.opener.handles)
+            self.opener.handles = None
+
+        parent = self.parent()
+        if not parent and self.model() is not None:
+            parent = self.model().invisibleRootItem()
+        if parent:
+            parent.takeRow(self.row())
+
+    def __getattr__(self, name):
+        if name in dir(gdal.Dataset):
+            raise RuntimeError('unable to access "%s" on a non open '
+                               'object' % name)
+        else:
+            raise AttributeError(name)
 
 
 class SubDatasetItem(CachedDatasetItem):
@@ -607,18 +1519,19 @@ class SubDatasetItem(CachedDatasetItem):
         #: coordinate mapper
         self.cmapper = None
 
-        #: graphics scene associated to the item
-        self.scene = None
-
-        #: graphics item representing the dataset
-        self.graphicsitem = None
-
         #: filename of the cached virtual dataset
         self.vrtfilename = None
         self._vrtobj = None
 
     def isopen(self):
-        return self._obj is not None and self._vrtobj is not None
+        if self._suspended:
+            return True
+        return self._gdalobj is not None and self._vrtgdalobj is not None
+
+    def _init_scene(self):
+        # @NOTE: no scene for sub-datasets that are not open
+        if self.isopen():
+            super(SubDatasetItem, self)._init_scene()
 
     # @staticmethod
     def _normalize(self, filename):
@@ -652,15 +1565,10 @@ class SubDatasetItem(CachedDatasetItem):
 
         self.cmapper = gdalsupport.coordinate_mapper(self._vrtobj)
 
-        # @TODO: lazy behaviour: postpone the scene/view initialization when
-        #        it is actualy needed
-        scene, graphicsitem = self._setup_scene()
-
-        #: graphics scene associated to the item
-        self.scene = scene
+        # @NOTE: the scene is created on demand
+        self._reset_scene()
 
-        #: graphics item representing the dataset
-        self.graphicsitem = graphicsitem
+        DATASET_POOL.touch(self)
 
     def close(self):
         # @NOTE: preserve the filename, extrainfo and mode
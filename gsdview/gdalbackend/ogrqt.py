@@ -23,43 +23,20 @@
 
 import logging
 
+import numpy as np
 from osgeo import ogr, osr
 
 from qtpy import QtCore, QtGui, QtWidgets
 
 from gsdview import qtdraw
+from gsdview import qtsupport
+from gsdview import geomutils
+from gsdview.gdalbackend import gdalsupport
 
 
 _log = logging.getLogger(__name__)
 
 # Graphics Items ############################################################
-# class GraphicsLayerItem(qtdraw.GraphicsItemGroup):
-#     '''Qt graphics item representing an OGR Layer.'''
-#
-#     Type = QtWidgets.QGraphicsItem.UserType + 102
-#
-#     def __init__(self, name=None, index=None, datasource=None,
-#                  parent=None, scene=None, **kargs):
-#         super(GraphicsLayerItem, self).__init__(parent, scene, **kargs)
-#
-#         self.name = name
-#         self.index = index
-#         self.datasource = datasource
-#
-#         if name:
-#             self.setToolTip('Layer: %s' % name)
-#
-#     def graphicsFeature(self, fid):
-#         #return  self.childItems()[fid]
-#         for item in self.childItems():
-#             try:
-#                 if item.fid == fid:
-#                     return item
-#             except AttributeError:
-#                 logging.debug('item "%s" has no feature ID.' % item)
-#         return None
-
-
 # class GraphicsFeatureItem(qtdraw.GraphicsItemGroup):
 #     '''Qt graphics item representing an OGR feature.'''
 #
@@ -97,6 +74,59 @@ def transformGeometry(geom, transform):
     return geom
 
 
+def transformArrays(transform, x, y, z=None):
+    """Apply the *transform* callable to arrays of coordinates.
+
+    The `transform(x, y, z)` callable is called once with whole
+    coordinate arrays.  If it does not support arrays (e.g. it raises
+    TypeError) it is applied point by point.
+
+    :returns:
+        the (N, 2) array of transformed coordinates
+
+    """
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if z is None:
+        z = np.zeros_like(x)
+
+    try:
+        result = transform(x, y, z)
+        result = np.asarray(result[:2], dtype=np.float64)
+    except (TypeError, ValueError):
+        result = None
+    if result is not None and result.shape == (2, len(x)):
+        return result.T
+
+    # scalar callable
+    return np.array([transform(*point)[:2]
+                     for point in zip(x.tolist(), y.tolist(), z.tolist())],
+                    dtype=np.float64).reshape(-1, 2)
+
+
+def geometryPoints(geom, transform=None):
+    """Return coordinates of a single OGR geometry as a (N, 2) array.
+
+    Coordinates are retrieved in bulk and the optional *transform*
+    callable is applied to whole arrays (see :func:`transformArrays`).
+
+    .. note: for 2.5D geometries the *z* value is ignored.
+
+    """
+
+    points = geom.GetPoints()
+    if not points:
+        return np.zeros((0, 2))
+
+    points = np.asarray(points, dtype=np.float64)
+    if transform:
+        z = points[:, 2] if points.shape[1] > 2 else None
+        return transformArrays(transform, points[:, 0], points[:, 1], z)
+
+    return points[:, :2]
+
+
 def singleGeometryToGraphicsItem(geom, transform=None):
     """Convert a single OGR geometry into a Qt5 graphics item.
 
@@ -105,7 +135,8 @@ def singleGeometryToGraphicsItem(geom, transform=None):
 
     If the *transform* callable is provided then each point in the
     geometry is converted using the `transform(x, y, z)` call before
-    generating the graphics item path.
+    generating the graphics item path.  When possible the callable is
+    applied to whole coordinate arrays (see :func:`transformArrays`).
 
     .. note: for 2.5D geometries the *z* value is ignored.
 
@@ -159,28 +190,16 @@ def singleGeometryToGraphicsItem(geom, transform=None):
     elif gtype in (ogr.wkbLinearRing, ogr.wkbPolygon, ogr.wkbPolygon25D,
                    ogr.wkbLineString, ogr.wkbLineString25D):
 
+        qpoly = qtsupport.numpy2qpolygonf(geometryPoints(geom, transform))
+
         # @NOTE: use only if geometry is a ring
         if geom.IsRing():
-            qpoly = QtGui.QPolygonF(geom.GetPointCount())
-            for index in range(geom.GetPointCount()):
-                point = geom.GetPoint(index)
-                if transform:
-                    point = transform(*point)
-                qpoly[index] = QtCore.QPointF(point[0], point[1])
             qitem = QtWidgets.QGraphicsPolygonItem(qpoly)
             # qitem.setFillRule(QtCore.Qt.WindingFill)    # @TODO: check
         else:
             qpath = QtGui.QPainterPath()
             # qpath.setFillRule(QtCore.Qt.WindingFill)    # @TODO: check
-            point = geom.GetPoint(0)
-            if transform:
-                point = transform(*point)
-            qpath.moveTo(point[0], point[1])
-            for index in range(1, geom.GetPointCount()):
-                point = geom.GetPoint(index)
-                if transform:
-                    point = transform(*point)
-                qpath.lineTo(point[0], point[1])
+            qpath.addPolygon(qpoly)
             qitem = QtWidgets.QGraphicsPathItem(qpath)
 
     elif gtype in (ogr.wkbMultiPoint, ogr.wkbMultiPoint25D,
@@ -244,8 +263,9 @@ def geometryToGraphicsItem(geom, transform=None):
     return qitem
 
 
-#: the max number of features that are converted when the graphics item
-#: for a layer is generated
+#: the max number of features that are converted into individual graphics
+#: items when the graphics item for a layer is generated (larger layers
+#: are represented by a single :class:`GraphicsLayerItem`)
 MAX_FEATURE_COUNT = 600
 DATAKEY = {
     'name': 1,
@@ -255,7 +275,35 @@ DATAKEY = {
 }
 
 
-def layerToGraphicsItem(layer, srs=None, transform=None):
+def geometrySrsTransform(geom, layer_srs, srs=None, srs_transform=None):
+    """Return the coordinate transformation to be used for *geom*.
+
+    Geometries can have a spatial reference system that is different
+    from the one of the layer (*layer_srs*): in this case they are
+    converted into the target *srs* (or into the layer one if *srs* is
+    None).  Otherwise the layer transformation *srs_transform* is
+    returned.
+
+    """
+
+    geom_srs = geom.GetSpatialReference()
+    if not geom_srs:
+        return srs_transform
+
+    if layer_srs is not None:
+        if geom_srs.IsSame(layer_srs):
+            return srs_transform
+        target = srs if srs is not None else layer_srs
+    else:
+        target = srs
+
+    if target is None or geom_srs.IsSame(target):
+        return srs_transform
+
+    return osr.CoordinateTransformation(geom_srs, target)
+
+
+def layerToGraphicsItem(layer, srs=None, transform=None, indexed=None):
     """Convert an OGR layer into a Qt5 graphics item.
 
     If the *srs* parameter is provided each feature is converted into
@@ -274,8 +322,13 @@ def layerToGraphicsItem(layer, srs=None, transform=None):
         the target OSR spatial reference system
     :param transform:
         callable object for arbitrary coordinate conversion
+    :param indexed:
+        if True a single spatially indexed :class:`GraphicsLayerItem`
+        is returned, otherwise a QGraphicsItemGroup with one child item
+        per feature.  By default the indexed item is used for layers
+        with more than :data:`MAX_FEATURE_COUNT` features
     :returns:
-        a Qt5 graphics item (QGraphicsItemGroup) representing the layer
+        a Qt5 graphics item representing the layer
 
     .. seealso:: :func:`singleGeometryToGraphicsItem`,
                  :func:`geometryToGraphicsItem` and
@@ -283,6 +336,14 @@ def layerToGraphicsItem(layer, srs=None, transform=None):
 
     """
 
+    if indexed is None:
+        indexed = layer.GetFeatureCount() > MAX_FEATURE_COUNT
+
+    if indexed:
+        qlayer = GraphicsLayerItem()
+        qlayer.setLayer(layer, srs, transform)
+        return qlayer
+
     layer_srs = layer.GetSpatialRef()
     if (srs is not None and layer_srs is not None and
             not layer_srs.IsSame(srs)):
@@ -290,11 +351,6 @@ def layerToGraphicsItem(layer, srs=None, transform=None):
     else:
         srs_transform = None
 
-    if layer.GetFeatureCount() > MAX_FEATURE_COUNT:
-        raise RuntimeError('too many features in layer %s: %d' % (
-                           layer.GetName(), layer.GetFeatureCount()))
-
-    # qlayer = GraphicsLayerItem(layer.GetName())
     qlayer = qtdraw.GraphicsItemGroup()
     qlayer.setData(DATAKEY['name'], layer.GetName())
     for feature in layer:
@@ -304,19 +360,8 @@ def layerToGraphicsItem(layer, srs=None, transform=None):
 
         geom = feature.GetGeometryRef()
         if geom:
-            geotransform = srs_transform
-            geom_srs = geom.GetSpatialReference()
-            if geom_srs:
-                if layer_srs is not None and not geom_srs.IsSame(layer_srs):
-                    if srs is not None:
-                        geotransform = osr.CoordinateTransformation(geom_srs,
-                                                                    srs)
-                    else:
-                        geotransform = osr.CoordinateTransformation(geom_srs,
-                                                                    layer_srs)
-                elif srs is not None and not geom_srs.IsSame(srs):
-                    geotransform = osr.CoordinateTransformation(geom_srs, srs)
-
+            geotransform = geometrySrsTransform(geom, layer_srs, srs,
+                                                srs_transform)
             if geotransform:
                 geom = transformGeometry(geom, geotransform)
 
@@ -342,6 +387,850 @@ def layerToGraphicsItem(layer, srs=None, transform=None):
     return qlayer
 
 
+class GraphicsLayerItem(QtWidgets.QAbstractGraphicsShapeItem):
+    """Qt graphics item representing a whole OGR layer.
+
+    Unlike the item group returned by :func:`layerToGraphicsItem` (one
+    child item per feature) all geometries are stored in compact
+    coordinate arrays and a spatial index
+    (:class:`gsdview.geomutils.SpatialIndex`) of feature bounding boxes
+    is used to only paint features intersecting the exposed area and
+    to pick features (see :meth:`featureAt`).
+
+    """
+
+    Type = QtWidgets.QGraphicsItem.UserType + 102
+
+    # part kinds
+    POINT = 0
+    LINE = 1
+    RING = 2
+
+    #: radius of points [pixels]
+    RADIUS = 3
+
+    #: number of simplified versions of geometries (levels of detail)
+    LOD_COUNT = 3
+
+    #: ratio between simplification tolerances of consecutive levels
+    LOD_FACTOR = 4.
+
+    #: simplification tolerance of the coarsest level in units of the
+    #: layer extent (i.e. about one pixel when the whole layer is
+    #: displayed at the given resolution)
+    LOD_RESOLUTION = 1. / 2048
+
+    #: levels keeping more than this fraction of the vertices of the
+    #: finer one are discarded
+    LOD_MAX_RATIO = 0.5
+
+    def __init__(self, name=None, parent=None, **kwargs):
+        super(GraphicsLayerItem, self).__init__(parent, **kwargs)
+        # @NOTE: needed to get the actual exposed rect in paint
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setFlag(QtWidgets.QGraphicsItem.ItemIsSelectable)
+
+        pen = QtGui.QPen()
+        pen.setCosmetic(True)
+        self.setPen(pen)
+
+        self._coords = np.zeros((0, 2))
+        self._partoffsets = np.zeros(1, dtype=np.intp)
+        self._partkinds = np.zeros(0, dtype=np.uint8)
+        self._featureoffsets = np.zeros(1, dtype=np.intp)
+        self._fids = np.zeros(0, dtype=np.int64)
+        self._bboxes = np.zeros((0, 4))
+        self._index = geomutils.SpatialIndex(self._bboxes)
+        self._boundingRect = QtCore.QRectF()
+
+        #: list of (tolerance, coords, partoffsets) tuples of simplified
+        #: geometries, from the coarsest to the finest one
+        self._lods = []
+
+        if name:
+            self.setData(DATAKEY['name'], name)
+            self.setToolTip('Layer: %s' % name)
+
+    def type(self):
+        return self.Type
+
+    @classmethod
+    def _geometryParts(cls, geom, transform=None):
+        if geom.GetGeometryCount() > 0:
+            for subgeom in geom:
+                for part in cls._geometryParts(subgeom, transform):
+                    yield part
+            return
+
+        gtype = geom.GetGeometryType()
+        if gtype in (ogr.wkbPoint, ogr.wkbPoint25D):
+            kind = cls.POINT
+        elif geom.IsRing():
+            kind = cls.RING
+        else:
+            kind = cls.LINE
+
+        coords = geometryPoints(geom, transform)
+        if len(coords):
+            yield kind, coords
+
+    def setLayer(self, layer, srs=None, transform=None):
+        """Load all features of the OGR *layer*.
+
+        See :func:`layerToGraphicsItem` for the meaning of *srs* and
+        *transform*.
+
+        """
+
+        layer_srs = layer.GetSpatialRef()
+        if (srs is not None and layer_srs is not None and
+                not layer_srs.IsSame(srs)):
+            srs_transform = osr.CoordinateTransformation(layer_srs, srs)
+        else:
+            srs_transform = None
+
+        layer.ResetReading()
+        arrays = self.featureArrays(layer, srs_transform, transform,
+                                    srs=srs, layer_srs=layer_srs)
+
+        self.setData(DATAKEY['name'], layer.GetName())
+        self.setArrays(*arrays)
+        self.setToolTip('Layer "%s": %d features.' % (layer.GetName(),
+                                                      self.featureCount()))
+
+    @classmethod
+    def featureArrays(cls, features, srs_transform=None, transform=None,
+                      srs=None, layer_srs=None):
+        """Convert a sequence of OGR features into compact arrays.
+
+        :param features:
+            iterable of OGR features (e.g. an OGR layer)
+        :param srs_transform:
+            optional OSR coordinate transformation applied to
+            geometries
+        :param transform:
+            optional callable for arbitrary coordinate conversion
+            (see :func:`layerToGraphicsItem`)
+        :param srs:
+            the target OSR spatial reference system
+        :param layer_srs:
+            the spatial reference system of the layer, geometries with
+            a different one are converted into *srs* (see
+            :func:`geometrySrsTransform`)
+        :returns:
+            the (coords, partoffsets, partkinds, featureoffsets, fids)
+            tuple of arrays (see :meth:`setArrays`)
+
+        """
+
+        coords = []
+        partoffsets = [0]
+        partkinds = []
+        featureoffsets = [0]
+        fids = []
+        npoints = 0
+
+        for feature in features:
+            geom = feature.GetGeometryRef()
+            if not geom:
+                _log.info('feature %d has no geometry', feature.GetFID())
+                continue
+
+            geotransform = geometrySrsTransform(geom, layer_srs, srs,
+                                                srs_transform)
+            if geotransform:
+                geom = transformGeometry(geom, geotransform)
+
+            for kind, points in cls._geometryParts(geom, transform):
+                coords.append(points)
+                npoints += len(points)
+                partoffsets.append(npoints)
+                partkinds.append(kind)
+
+            if len(partkinds) > featureoffsets[-1]:
+                featureoffsets.append(len(partkinds))
+                fids.append(feature.GetFID())
+
+        return (
+            np.concatenate(coords) if coords else np.zeros((0, 2)),
+            np.asarray(partoffsets, dtype=np.intp),
+            np.asarray(partkinds, dtype=np.uint8),
+            np.asarray(featureoffsets, dtype=np.intp),
+            np.asarray(fids, dtype=np.int64),
+        )
+
+    def setArrays(self, coords, partoffsets, partkinds, featureoffsets,
+                  fids=None):
+        """Set geometries from compact arrays.
+
+        :param coords:
+            (N, 2) array of the coordinates of all vertices
+        :param partoffsets:
+            offsets of each part (sub-geometry) in *coords*
+            (len = nparts + 1)
+        :param partkinds:
+            kind of each part (:data:`POINT`, :data:`LINE` or
+            :data:`RING`)
+        :param featureoffsets:
+            offsets of the parts of each feature (len = nfeatures + 1)
+        :param fids:
+            feature IDs (by default the feature index)
+
+        """
+
+        self.prepareGeometryChange()
+
+        self._coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self._partoffsets = np.asarray(partoffsets, dtype=np.intp)
+        self._partkinds = np.asarray(partkinds, dtype=np.uint8)
+        self._featureoffsets = np.asarray(featureoffsets, dtype=np.intp)
+        nfeatures = len(self._featureoffsets) - 1
+        if fids is None:
+            fids = np.arange(nfeatures)
+        self._fids = np.asarray(fids, dtype=np.int64)
+
+        # per feature bounding boxes
+        bboxes = np.empty((nfeatures, 4))
+        if nfeatures:
+            vstarts = self._partoffsets[self._featureoffsets[:-1]]
+            x, y = self._coords[:, 0], self._coords[:, 1]
+
+            # @NOTE: points that cannot be transformed (inf or NaN) are
+            #        ignored
+            finite = np.isfinite(x) & np.isfinite(y)
+            if not finite.all():
+                x = np.where(finite, x, np.nan)
+                y = np.where(finite, y, np.nan)
+
+            bboxes[:, 0] = np.fmin.reduceat(x, vstarts)
+            bboxes[:, 1] = np.fmin.reduceat(y, vstarts)
+            bboxes[:, 2] = np.fmax.reduceat(x, vstarts)
+            bboxes[:, 3] = np.fmax.reduceat(y, vstarts)
+        self._bboxes = bboxes
+        self._index = geomutils.SpatialIndex(bboxes)
+
+        bounds = self._index.bounds()
+        if bounds is None:
+            self._boundingRect = QtCore.QRectF()
+        else:
+            xmin, ymin, xmax, ymax = bounds
+            self._boundingRect = QtCore.QRectF(xmin, ymin, xmax - xmin,
+                                               ymax - ymin)
+
+        self._setupLods()
+
+    def _setupLods(self):
+        self._lods = []
+        rect = self._boundingRect
+        extent = max(rect.width(), rect.height())
+        if not extent or self.LOD_COUNT <= 0:
+            return
+
+        # from the finest to the coarsest level, each level is computed
+        # from the finer one
+        coords, partoffsets = self._coords, self._partoffsets
+        tolerance = extent * self.LOD_RESOLUTION
+        tolerances = [tolerance / self.LOD_FACTOR ** level
+                      for level in range(self.LOD_COUNT)]
+        for tolerance in tolerances[::-1]:
+            lodcoords, lodoffsets = geomutils.simplifyParts(
+                coords, partoffsets, tolerance)
+            if len(lodcoords) > self.LOD_MAX_RATIO * len(coords):
+                continue
+            coords, partoffsets = lodcoords, lodoffsets
+            self._lods.insert(0, (tolerance, coords, partoffsets))
+
+        _log.debug('LOD vertices: %s (full resolution %d)',
+                   [len(lod[1]) for lod in self._lods], len(self._coords))
+
+    def _lodArrays(self, pixelsize):
+        # the coarsest level with sub-pixel simplification error
+        for tolerance, coords, partoffsets in self._lods:
+            if tolerance <= pixelsize / 2.:
+                return coords, partoffsets
+        return self._coords, self._partoffsets
+
+    def featureCount(self):
+        return len(self._fids)
+
+    def fids(self):
+        """Return the array of feature IDs."""
+
+        return self._fids
+
+    def _featureParts(self, feature, coords=None, partoffsets=None):
+        if coords is None:
+            coords, partoffsets = self._coords, self._partoffsets
+        for part in range(self._featureoffsets[feature],
+                          self._featureoffsets[feature + 1]):
+            start, stop = partoffsets[part:part + 2]
+            yield self._partkinds[part], coords[start:stop]
+
+    def featureCoords(self, feature):
+        """Return the list of (kind, coords) parts of the feature."""
+
+        return list(self._featureParts(feature))
+
+    def featuresInRect(self, rect):
+        """Return indices of features intersecting *rect* (bbox test)."""
+
+        return self._index.query(rect.left(), rect.top(),
+                                 rect.right(), rect.bottom())
+
+    def featureAt(self, pos, tolerance=0.):
+        """Return the index of the feature at *pos* (None if not found).
+
+        *tolerance* is expressed in item coordinates.
+
+        """
+
+        x, y = pos.x(), pos.y()
+        candidates = self._index.query(x - tolerance, y - tolerance,
+                                       x + tolerance, y + tolerance)
+        # topmost (last painted) first
+        for feature in candidates[::-1]:
+            for kind, coords in self._featureParts(feature):
+                if kind == self.RING:
+                    if geomutils.pointInRing(x, y, coords):
+                        return int(feature)
+                if geomutils.pointSegmentDistance(x, y, coords) <= tolerance:
+                    return int(feature)
+        return None
+
+    def boundingRect(self):
+        if self._boundingRect.isNull():
+            return self._boundingRect
+
+        # room for points and pen width
+        margin = self.pen().widthF() / 2.
+        return self._boundingRect.adjusted(-margin, -margin, margin, margin)
+
+    def contains(self, point):
+        return self.featureAt(point) is not None
+
+    @staticmethod
+    def _exposedRect(painter, option):
+        rect = option.exposedRect
+
+        # @NOTE: the exposed rect can be much larger than the painted
+        #        area (e.g. in QGraphicsScene.render)
+        if painter.hasClipping():
+            rect = rect.intersected(painter.clipBoundingRect())
+        device = painter.device()
+        transform, invertible = painter.worldTransform().inverted()
+        if device is not None and invertible:
+            devrect = QtCore.QRectF(0, 0, device.width(), device.height())
+            rect = rect.intersected(transform.mapRect(devrect))
+
+        return rect
+
+    def paint(self, painter, option, widget=None):
+        features = self.featuresInRect(self._exposedRect(painter, option))
+        if not len(features):
+            return
+
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        self._paintFeatures(painter, features, lod)
+
+    def _paintFeatures(self, painter, features, lod):
+        radius = self.RADIUS / lod if lod else self.RADIUS
+        lodarrays = self._lodArrays(1. / lod if lod else 0.)
+
+        painter.setPen(self.pen())
+        for feature in features:
+            for kind, coords in self._featureParts(feature, *lodarrays):
+                if kind == self.POINT:
+                    painter.save()
+                    painter.setBrush(self.pen().color())
+                    for x, y in coords.tolist():
+                        painter.drawEllipse(QtCore.QPointF(x, y),
+                                            radius, radius)
+                    painter.restore()
+                    continue
+
+                qpoly = qtsupport.numpy2qpolygonf(coords)
+                if kind == self.RING:
+                    painter.setBrush(self.brush())
+                    painter.drawPolygon(qpoly)
+                else:
+                    painter.drawPolyline(qpoly)
+
+
+# Streaming layers ##########################################################
+#: number of features read at each step by :class:`LayerLoader`
+BATCH_SIZE = 2000
+
+
+def transformRect(rect, transform, nsamples=8):
+    """Transform a (xmin, ymin, xmax, ymax) rectangle.
+
+    The *transform* callable (see :func:`transformArrays`) is applied
+    to *nsamples* points on each side of the rectangle and the bounding
+    box of transformed points is returned.
+
+    """
+
+    xmin, ymin, xmax, ymax = rect
+    t = np.linspace(0, 1, nsamples)
+    x = np.concatenate((xmin + (xmax - xmin) * t, np.full(nsamples, xmax),
+                        xmax - (xmax - xmin) * t, np.full(nsamples, xmin)))
+    y = np.concatenate((np.full(nsamples, ymin), ymin + (ymax - ymin) * t,
+                        np.full(nsamples, ymax), ymax - (ymax - ymin) * t))
+
+    xy = transformArrays(transform, x, y)
+    xy = xy[np.isfinite(xy).all(axis=1)]
+    if not len(xy):
+        return None
+
+    return (xy[:, 0].min(), xy[:, 1].min(), xy[:, 0].max(), xy[:, 1].max())
+
+
+def _srsTransformCallable(srs_transform):
+    def transform(x, y, z):
+        return gdalsupport.transformPoints(srs_transform, x, y, z)
+
+    return transform
+
+
+def _stopLoaders(loaders):
+    for loader in loaders:
+        loader.requestInterruption()
+    for loader in loaders:
+        loader.wait()
+
+
+class LayerLoader(QtCore.QThread):
+    """Read the features of an OGR layer in batches in background.
+
+    The OGR datasource is opened in the worker thread (OGR objects
+    cannot be shared between threads) and features are converted into
+    compact arrays (see :meth:`GraphicsLayerItem.featureArrays`) that
+    are emitted with the :attr:`batchReady` signal every
+    :attr:`batchsize` features.
+
+    If *rect* (xmin, ymin, xmax, ymax) is provided, in the target
+    spatial reference system *srs*, only features intersecting it are
+    read (the spatial filter is set on the OGR layer so that drivers
+    can use their own spatial index).
+
+    Features whose FID is in *skip* are ignored.  The *skip* container
+    is not copied: it is only read in the worker thread and it can be
+    updated (e.g. with FIDs of features already loaded) in the GUI
+    thread.
+
+    If the *transform* callable is provided (see
+    :func:`layerToGraphicsItem`) it is applied to coordinates in the
+    worker thread, so it must be thread safe.
+
+    :SIGNALS:
+
+        * :attr:`batchReady`
+
+    """
+
+    #: SIGNAL: it is emitted for each batch of features read
+    #:
+    #: :C++ signature: `void batchReady(PyQt_PyObject)`
+    batchReady = QtCore.Signal(object)
+
+    def __init__(self, datasource, layer=0, srs=None, rect=None, skip=(),
+                 batchsize=BATCH_SIZE, transform=None, parent=None):
+        super(LayerLoader, self).__init__(parent)
+
+        #: name of the OGR datasource
+        self.datasource = datasource
+
+        #: index or name of the layer
+        self.layer = layer
+
+        #: the target spatial reference system (WKT)
+        self.srs = srs.ExportToWkt() if srs is not None else None
+
+        #: the (xmin, ymin, xmax, ymax) area of interest
+        self.rect = rect
+
+        #: FIDs of features to be ignored
+        self.skip = skip
+
+        #: number of features emitted in each batch
+        self.batchsize = batchsize
+
+        #: callable for arbitrary coordinate conversion
+        self.transform = transform
+
+        #: True if the spatial filter has been applied to the layer
+        self.filtered = False
+
+        #: True if all the requested features have been read
+        self.done = False
+
+        #: the exception raised in the worker thread (if any)
+        self.error = None
+
+    def run(self):
+        try:
+            self._read()
+        except Exception as e:
+            _log.debug('unable to read layer %r of "%s"', self.layer,
+                       self.datasource, exc_info=True)
+            self.error = e
+
+    def _setSpatialFilter(self, layer, srs_inverse):
+        rect = self.rect
+        if srs_inverse is not None:
+            rect = transformRect(rect, _srsTransformCallable(srs_inverse))
+            if rect is None:
+                return
+        xmin, ymin, xmax, ymax = rect
+
+        try:
+            lxmin, lxmax, lymin, lymax = layer.GetExtent(force=0)
+        except Exception:
+            pass
+        else:
+            if (xmin <= lxmin and ymin <= lymin and
+                    xmax >= lxmax and ymax >= lymax):
+                # no need to filter
+                return
+
+        layer.SetSpatialFilterRect(xmin, ymin, xmax, ymax)
+        self.filtered = True
+
+    def _read(self):
+        ds = ogr.Open(self.datasource)
+        if ds is None:
+            raise ValueError('unable to open "%s"' % self.datasource)
+
+        layer = ds.GetLayer(self.layer)
+        if layer is None:
+            raise ValueError('unable to open layer %r of "%s"' % (
+                self.layer, self.datasource))
+
+        srs = None
+        srs_transform = None
+        srs_inverse = None
+        layer_srs = layer.GetSpatialRef()
+        if self.srs is not None:
+            srs = osr.SpatialReference(self.srs)
+        if srs is not None and layer_srs is not None:
+            if not layer_srs.IsSame(srs):
+                srs_transform = osr.CoordinateTransformation(layer_srs, srs)
+                srs_inverse = osr.CoordinateTransformation(srs, layer_srs)
+
+        if self.rect is not None:
+            self._setSpatialFilter(layer, srs_inverse)
+
+        features = []
+        for feature in layer:
+            if self.isInterruptionRequested():
+                return
+            if feature.GetFID() in self.skip:
+                continue
+
+            features.append(feature)
+            if len(features) >= self.batchsize:
+                self.batchReady.emit(GraphicsLayerItem.featureArrays(
+                    features, srs_transform, self.transform, srs=srs,
+                    layer_srs=layer_srs))
+                features = []
+
+        if features:
+            self.batchReady.emit(GraphicsLayerItem.featureArrays(
+                features, srs_transform, self.transform, srs=srs,
+                layer_srs=layer_srs))
+
+        self.done = not self.isInterruptionRequested()
+
+
+class StreamingLayerItem(QtWidgets.QGraphicsObject):
+    """Qt graphics item progressively loading an OGR layer.
+
+    Features are read in background (see :class:`LayerLoader`) and
+    each batch is added to the scene as a child
+    :class:`GraphicsLayerItem` as soon as it is available.
+
+    Only features in the exposed area (plus a margin, see
+    :data:`LOAD_MARGIN`) are loaded: the area of interest is pushed
+    down to the OGR driver as spatial filter, so that only the
+    displayed portion of huge layers is actually read.
+    Features in newly exposed areas are loaded when the view is
+    panned or zoomed out; the spatial filter is not used when the
+    exposed area covers the entire layer.
+
+    The *transform* callable has the same meaning as in
+    :func:`layerToGraphicsItem` and it is applied in worker threads.
+    If it is provided, the *inverse* callable (with the same interface)
+    is needed to compute the spatial filter from the exposed area,
+    otherwise the entire layer is loaded.
+
+    """
+
+    Type = QtWidgets.QGraphicsItem.UserType + 104
+
+    #: delay [ms] before loading features of a newly exposed area
+    LOAD_DELAY = 100
+
+    #: the exposed area is enlarged by this fraction on each side
+    #: before setting the spatial filter
+    LOAD_MARGIN = 0.5
+
+    def __init__(self, datasource, layer=0, srs=None, transform=None,
+                 inverse=None, batchsize=BATCH_SIZE, parent=None, **kwargs):
+        super(StreamingLayerItem, self).__init__(parent, **kwargs)
+        # @NOTE: needed to get the actual exposed rect in paint
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        #: name of the OGR datasource
+        self.datasource = datasource
+
+        #: index or name of the layer
+        self.layer = layer
+
+        #: number of features loaded in each step
+        self.batchsize = batchsize
+
+        self._srs = srs
+        self._transform = transform
+        self._inverse = inverse
+
+        pen = QtGui.QPen()
+        pen.setCosmetic(True)
+        self._pen = pen
+        self._brush = QtGui.QBrush()
+
+        self._loader = None
+        self._loaderrect = None
+        self._loaders = []
+        self._loadedfids = set()
+        self._loadedrects = []
+        self._complete = False
+
+        self._exposed = QtCore.QRectF()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.LOAD_DELAY)
+        self._timer.timeout.connect(self._load)
+
+        # @NOTE: loaders have no Qt parent and a running QThread must
+        #        not be destroyed: stop them if the item is deleted
+        #        without calling close (e.g. together with the scene)
+        loaders = self._loaders
+        self.destroyed.connect(lambda: _stopLoaders(loaders))
+
+        self._rect = self._layerRect()
+        if self._rect.isNull():
+            # unknown extent: load the entire layer
+            self._startLoader(None, None)
+
+    def _layerRect(self):
+        ds = ogr.Open(self.datasource)
+        if ds is None:
+            raise ValueError('unable to open "%s"' % self.datasource)
+
+        layer = ds.GetLayer(self.layer)
+        if layer is None:
+            raise ValueError('unable to open layer %r of "%s"' % (
+                self.layer, self.datasource))
+
+        name = layer.GetName()
+        self.setData(DATAKEY['name'], name)
+        self.setData(DATAKEY['datasource'], ds.GetName())
+        self.setToolTip('Layer: %s' % name)
+
+        try:
+            xmin, xmax, ymin, ymax = layer.GetExtent(force=0)
+        except Exception:
+            return QtCore.QRectF()
+
+        rect = (xmin, ymin, xmax, ymax)
+        layer_srs = layer.GetSpatialRef()
+        if (self._srs is not None and layer_srs is not None and
+                not layer_srs.IsSame(self._srs)):
+            srs_transform = osr.CoordinateTransformation(layer_srs,
+                                                         self._srs)
+            rect = transformRect(rect, _srsTransformCallable(srs_transform))
+        if rect is not None and self._transform is not None:
+            rect = transformRect(rect, self._transform)
+        if rect is None:
+            return QtCore.QRectF()
+
+        xmin, ymin, xmax, ymax = rect
+        return QtCore.QRectF(xmin, ymin, xmax - xmin, ymax - ymin)
+
+    def type(self):
+        return self.Type
+
+    def pen(self):
+        return QtGui.QPen(self._pen)
+
+    def setPen(self, pen):
+        self._pen = QtGui.QPen(pen)
+        for item in self.childItems():
+            item.setPen(self._pen)
+
+    def brush(self):
+        return QtGui.QBrush(self._brush)
+
+    def setBrush(self, brush):
+        self._brush = QtGui.QBrush(brush)
+        for item in self.childItems():
+            item.setBrush(self._brush)
+
+    def featureCount(self):
+        """Number of features loaded so far."""
+
+        return sum(item.featureCount() for item in self.childItems())
+
+    def featureAt(self, pos, tolerance=0.):
+        """Return the FID of the feature at *pos* (None if not found).
+
+        *tolerance* is expressed in item coordinates.
+
+        """
+
+        for item in self.childItems()[::-1]:
+            feature = item.featureAt(pos, tolerance)
+            if feature is not None:
+                return int(item.fids()[feature])
+        return None
+
+    def isLoading(self):
+        return self._loader is not None
+
+    def isComplete(self):
+        """Return True if all features of the layer have been loaded."""
+
+        return self._complete
+
+    def close(self):
+        """Stop all the worker threads.
+
+        It is called automatically when the item is removed from the
+        scene.
+
+        """
+
+        self._timer.stop()
+        self._loader = None
+        _stopLoaders(self._loaders)
+
+    def itemChange(self, change, value):
+        if (change == QtWidgets.QGraphicsItem.ItemSceneHasChanged and
+                value is None):
+            self.close()
+        return super(StreamingLayerItem, self).itemChange(change, value)
+
+    def _covered(self, rect):
+        if self._complete:
+            return True
+        if self._loader is not None and (
+                self._loaderrect is None or self._loaderrect.contains(rect)):
+            return True
+        return any(loaded.contains(rect) for loaded in self._loadedrects)
+
+    def _load(self):
+        rect = self._exposed
+        self._exposed = QtCore.QRectF()
+        if rect.isEmpty() or self._covered(rect):
+            return
+
+        dx = rect.width() * self.LOAD_MARGIN
+        dy = rect.height() * self.LOAD_MARGIN
+        rect = rect.adjusted(-dx, -dy, dx, dy)
+
+        filterrect = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        if self._transform is not None:
+            if self._inverse is None:
+                filterrect = None
+            else:
+                filterrect = transformRect(filterrect, self._inverse)
+
+        if filterrect is None or rect.contains(self._rect):
+            rect = None
+            filterrect = None
+
+        self._startLoader(rect, filterrect)
+
+    def _startLoader(self, rect, filterrect):
+        if self._loader is not None:
+            # batches of the old loader are discarded
+            self._loader.requestInterruption()
+
+        _log.debug('load layer %r of "%s" (filter: %s)', self.layer,
+                   self.datasource, filterrect)
+
+        # @NOTE: the set of loaded FIDs is shared with the loader (no
+        #        copy), it is only updated by batches of the current
+        #        loader (see _onBatchReady)
+        loader = LayerLoader(self.datasource, self.layer, self._srs,
+                             filterrect, self._loadedfids, self.batchsize,
+                             self._transform)
+        loader.batchReady.connect(self._onBatchReady)
+        loader.finished.connect(self._onLoaderFinished)
+        self._loader = loader
+        self._loaderrect = rect
+        self._loaders.append(loader)
+        loader.start()
+
+    @QtCore.Slot(object)
+    def _onBatchReady(self, arrays):
+        if self.sender() is not self._loader:
+            return
+
+        coords, partoffsets, partkinds, featureoffsets, fids = arrays
+        if not len(fids):
+            return
+
+        if self._rect.isNull():
+            self.prepareGeometryChange()
+
+        item = GraphicsLayerItem(parent=self)
+        item.setPen(self._pen)
+        item.setBrush(self._brush)
+        item.setArrays(coords, partoffsets, partkinds, featureoffsets, fids)
+        self._loadedfids.update(fids.tolist())
+
+        self.setToolTip('Layer "%s": %d features.' % (
+            self.data(DATAKEY['name']), self.featureCount()))
+
+    @QtCore.Slot()
+    def _onLoaderFinished(self):
+        loader = self.sender()
+        if loader in self._loaders:
+            self._loaders.remove(loader)
+        if loader is not self._loader:
+            return
+
+        self._loader = None
+        if loader.error is not None:
+            _log.warning('unable to load layer %r of "%s": %s',
+                         self.layer, self.datasource, loader.error)
+        elif loader.done:
+            if loader.filtered:
+                self._loadedrects.append(self._loaderrect)
+            else:
+                self._complete = True
+            _log.debug('%d features loaded', len(self._loadedfids))
+
+        # the exposed area could have been changed in the meanwhile
+        self.update()
+
+    def boundingRect(self):
+        if self._rect.isNull():
+            return self.childrenBoundingRect()
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        # @NOTE: features are painted by child items
+        if self._complete:
+            return
+
+        rect = GraphicsLayerItem._exposedRect(painter, option)
+        if not self._covered(rect):
+            self._exposed = self._exposed.united(rect)
+            self._timer.start()
+
+
 # Helpers for layers management #############################################
 # class LayerItemModel(QtGui.QStandardItemModel):
 #     #def __init__(self, parent=None, **kargs):
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Disk tile store for lazy (on-demand) overviews.
+
+Overview levels that are not available in the dataset are not computed
+in advance: only tiles that are actually requested (i.e. the visible
+ones) are computed, starting from the next finer level, and stored
+on disk in the dataset cache directory so that they can be re-used
+in later sessions.
+
+Graphics items do not compute tiles while painting: missing tiles are
+requested (see :meth:`OvrTileStore.requestTiles`) and computed in
+background threads while coarser data are displayed.
+
+The layout of the tile store is the following::
+
+    <rootdir>/
+        stamp.json
+        level003/
+            <ty>_<tx>.npy
+            ...
+        level009/
+            ...
+
+The ``stamp.json`` file records the state of the files providing the
+source data (see :func:`sourceStamp`): stored tiles are discarded
+when the source changes (e.g. after the dataset has been optimized for
+viewing or its overviews have been re-computed).
+
+"""
+
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from osgeo import gdal
+
+from gsdview.gdalbackend import gdalsupport
+
+
+_log = logging.getLogger(__name__)
+
+STAMP_FILENAME = 'stamp.json'
+
+
+def sourceStamp(filenames):
+    """Return a JSON serializable stamp of the specified files.
+
+    The stamp includes the size and the modification time of each
+    file, missing files are ignored.
+
+    """
+
+    stamp = []
+    for filename in sorted(set(filenames)):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            continue
+        stamp.append([filename, st.st_size, st.st_mtime_ns])
+
+    return stamp
+
+
+class LazyOverview(object):
+    """Overview level stored in a :class:`OvrTileStore`.
+
+    The object provides the (minimal) subset of the gdal.Band interface
+    used by graphics items for data access.
+
+    """
+
+    def __init__(self, tilestore, level):
+        self.tilestore = tilestore
+        self.level = level
+        self.XSize, self.YSize = tilestore.levelSize(level)
+        self.DataType = tilestore.band.DataType
+
+    def GetNoDataValue(self):
+        return self.tilestore.nodata
+
+    def ReadAsArray(self, xoff=0, yoff=0, win_xsize=None, win_ysize=None):
+        if win_xsize is None:
+            win_xsize = self.XSize - xoff
+        if win_ysize is None:
+            win_ysize = self.YSize - yoff
+        return self.tilestore.read(self.level, int(xoff), int(yoff),
+                                   int(win_xsize), int(win_ysize))
+
+
+class OvrTileStore(object):
+    """Lazy overview levels for a raster band.
+
+    Missing tiles of a lazy level *L* are computed by down-sampling
+    data of the next finer level *F* (*L* multiple of *F*).
+    *F* can be another lazy level, an overview level already available
+    in the band or the full resolution band itself.
+
+    Tiles requested with :meth:`requestTiles` are computed in
+    background threads: each thread reads data using its own handle
+    of the *handlekey* dataset
+    (see :data:`gsdview.gdalbackend.gdalsupport.THREAD_HANDLES`).
+    If *handlekey* is None requested tiles are computed synchronously.
+
+    If a *stamp* of the source data is provided (see :func:`sourceStamp`)
+    and it does not match the one recorded in *rootdir*, tiles stored
+    on disk are removed.
+
+    """
+
+    TILESIZE = 256
+
+    #: number of tiles kept in memory
+    MEMTILES = 64
+
+    #: number of threads computing requested tiles
+    NTHREADS = 2
+
+    def __init__(self, band, rootdir, levels=None, resampling=None,
+                 tilesize=TILESIZE, handlekey=None, stamp=None):
+        super(OvrTileStore, self).__init__()
+
+        self.band = band
+        self.rootdir = rootdir
+        self.tilesize = int(tilesize)
+        self.nodata = band.GetNoDataValue()
+
+        #: key of the dataset in the handle registry (used by workers)
+        self.handlekey = handlekey
+        self._bandindex = band.GetBand() if handlekey is not None else None
+
+        if resampling is None:
+            if gdal.DataTypeIsComplex(band.DataType):
+                resampling = 'average_magphase'
+            else:
+                resampling = 'average'
+        self.resampling = resampling
+
+        if levels is None:
+            levels = gdalsupport.ovrComputeLevels(band)
+        xsize = band.XSize
+        levels = set(gdalsupport.ovrLevelAdjust(level, xsize)
+                     for level in levels if level > 1)
+        self.levels = sorted(levels.difference(gdalsupport.ovrLevels(band)))
+
+        self._tiles = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = None
+
+        #: stamp of the source data (see :func:`sourceStamp`)
+        self.stamp = stamp
+        self._stampsaved = False
+        if stamp is not None:
+            self._checkStamp()
+
+    def _stamppath(self):
+        return os.path.join(self.rootdir, STAMP_FILENAME)
+
+    def _checkStamp(self):
+        filename = self._stamppath()
+        try:
+            with open(filename) as fd:
+                stamp = json.load(fd)
+        except (OSError, ValueError):
+            stamp = None
+
+        # @NOTE: JSON round trip for a consistent comparison
+        if stamp == json.loads(json.dumps(self.stamp)):
+            self._stampsaved = True
+        elif os.path.isdir(self.rootdir):
+            _log.debug('source data changed: remove tiles in "%s"',
+                       self.rootdir)
+            shutil.rmtree(self.rootdir, ignore_errors=True)
+
+    def _saveStamp(self):
+        if not os.path.isdir(self.rootdir):
+            os.makedirs(self.rootdir, exist_ok=True)
+
+        fd, tmpfilename = tempfile.mkstemp(suffix='.json', dir=self.rootdir)
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(self.stamp, fp)
+            os.replace(tmpfilename, self._stamppath())
+        except Exception:
+            if os.path.exists(tmpfilename):
+                os.remove(tmpfilename)
+            raise
+        self._stampsaved = True
+
+    def levelSize(self, level):
+        """Return the (xsize, ysize) of the specified level."""
+
+        return (-(-self.band.XSize // level), -(-self.band.YSize // level))
+
+    def overview(self, level):
+        """Return a band-like object for the lazy *level*."""
+
+        if level not in self.levels:
+            raise gdalsupport.MissingOvrError(level)
+        return LazyOverview(self, level)
+
+    def bestLevel(self, reqlevel):
+        """Return the lazy level closest to *reqlevel* or None."""
+
+        if not self.levels:
+            return None
+        return min(self.levels, key=lambda level: abs(level - reqlevel))
+
+    def _tilepath(self, level, tx, ty):
+        return os.path.join(self.rootdir, 'level%03d' % level,
+                            '%d_%d.npy' % (ty, tx))
+
+    def _sourceLevel(self, level, band):
+        available = self.levels + gdalsupport.ovrLevels(band)
+        candidates = [src for src in available
+                      if src < level and not level % src]
+        return max(candidates) if candidates else 1
+
+    def _readSource(self, level, x, y, w, h, band):
+        if level == 1:
+            return band.ReadAsArray(x, y, w, h)
+        elif level in self.levels:
+            return self.read(level, x, y, w, h, band)
+        else:
+            index = gdalsupport.ovrLevels(band).index(level)
+            return band.GetOverview(index).ReadAsArray(x, y, w, h)
+
+    def _computeTile(self, level, tx, ty, band):
+        srclevel = self._sourceLevel(level, band)
+        factor = level // srclevel
+        xsize, ysize = self.levelSize(level)
+        srcxsize, srcysize = self.levelSize(srclevel)
+
+        tilesize = self.tilesize
+        x = tx * tilesize * factor
+        y = ty * tilesize * factor
+        w = min(tilesize * factor, srcxsize - x)
+        h = min(tilesize * factor, srcysize - y)
+
+        data = self._readSource(srclevel, x, y, w, h, band)
+        _log.debug('lazy overview tile (%d, %d) of level %d computed from '
+                   'level %d', tx, ty, level, srclevel)
+
+        return gdalsupport.ovrDownsample(data, factor, self.resampling,
+                                         self.nodata)
+
+    def _save(self, filename, data):
+        if self.stamp is not None and not self._stampsaved:
+            self._saveStamp()
+
+        dirname = os.path.dirname(filename)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname, exist_ok=True)
+
+        # write a temporary file and move it atomically in its final place
+        fd, tmpfilename = tempfile.mkstemp(suffix='.npy', dir=dirname)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                np.save(fp, data)
+            os.replace(tmpfilename, filename)
+        except Exception:
+            if os.path.exists(tmpfilename):
+                os.remove(tmpfilename)
+            raise
+
+    def _memTile(self, key):
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is not None:
+                self._tiles.move_to_end(key)
+            return data
+
+    def tile(self, level, tx, ty, band=None):
+        """Return the (tx, ty) tile of the specified *level*.
+
+        The tile is computed (reading data from *band*, by default the
+        band of the store) and stored if it is not available.
+
+        """
+
+        key = (level, tx, ty)
+        data = self._memTile(key)
+        if data is not None:
+            return data
+
+        filename = self._tilepath(level, tx, ty)
+        if os.path.exists(filename):
+            try:
+                data = np.load(filename)
+            except (OSError, ValueError) as e:
+                _log.warning('unable to load tile "%s": %s', filename, e)
+
+        if data is None:
+            if band is None:
+                band = self.band
+            data = self._computeTile(level, tx, ty, band)
+            try:
+                self._save(filename, data)
+            except OSError as e:
+                _log.warning('unable to save tile "%s": %s', filename, e)
+
+        with self._lock:
+            self._tiles[key] = data
+            while len(self._tiles) > self.MEMTILES:
+                self._tiles.popitem(last=False)
+
+        return data
+
+    def cachedValue(self, x, y):
+        """Return the value at the full resolution pixel (*x*, *y*).
+
+        The value is taken from the finest level having the tile in
+        memory, no tile is loaded or computed.  None is returned if no
+        tile is available.
+
+        """
+
+        tilesize = self.tilesize
+        for level in self.levels:
+            col, row = x // level, y // level
+            data = self._memTile((level, col // tilesize, row // tilesize))
+            if data is not None:
+                return data[row % tilesize, col % tilesize]
+        return None
+
+    def _checkWindow(self, level, x, y, w, h):
+        xsize, ysize = self.levelSize(level)
+        if x < 0 or y < 0 or w <= 0 or h <= 0:
+            raise ValueError('invalid window: (%d, %d, %d, %d)' % (x, y, w, h))
+        if x + w > xsize or y + h > ysize:
+            raise ValueError('window (%d, %d, %d, %d) is out of the level '
+                             'extent (%d, %d)' % (x, y, w, h, xsize, ysize))
+
+    def _windowTiles(self, x, y, w, h):
+        tilesize = self.tilesize
+        return [(tx, ty)
+                for ty in range(y // tilesize, (y + h - 1) // tilesize + 1)
+                for tx in range(x // tilesize, (x + w - 1) // tilesize + 1)]
+
+    def isAvailable(self, level, tx, ty):
+        """Return True if the tile is in memory or stored on disk."""
+
+        with self._lock:
+            if (level, tx, ty) in self._tiles:
+                return True
+        return os.path.exists(self._tilepath(level, tx, ty))
+
+    def missingTiles(self, level, x, y, w, h):
+        """Return the list of tiles of a data block that are not available.
+
+        See :meth:`read` for the meaning of parameters.
+
+        """
+
+        self._checkWindow(level, x, y, w, h)
+        return [(tx, ty) for tx, ty in self._windowTiles(x, y, w, h)
+                if not self.isAvailable(level, tx, ty)]
+
+    def _computeInBackground(self, level, tx, ty, callback):
+        try:
+            band = gdalsupport.THREAD_HANDLES.band(self.handlekey,
+                                                   self._bandindex)
+            self.tile(level, tx, ty, band)
+        except Exception:
+            _log.warning('unable to compute tile (%d, %d) of level %d',
+                         tx, ty, level, exc_info=True)
+            return
+        finally:
+            with self._lock:
+                self._pending.pop((level, tx, ty), None)
+
+        if callback is not None:
+            try:
+                callback(level, tx, ty)
+            except RuntimeError:
+                # e.g. the underlying C/C++ object has been deleted
+                _log.debug('unable to notify tile (%d, %d) of level %d',
+                           tx, ty, level, exc_info=True)
+
+    def requestTiles(self, level, x, y, w, h, callback=None):
+        """Request the tiles of a data block of the lazy *level*.
+
+        Missing tiles are computed in background (tiles that are already
+        being computed are not requested again) and *callback*, if
+        provided, is called in the worker thread with the
+        (level, tx, ty) arguments each time a tile is ready.
+
+        Return True if all the tiles of the block are available, i.e.
+        :meth:`read` does not need to compute any tile.
+
+        """
+
+        missing = self.missingTiles(level, x, y, w, h)
+        if not missing:
+            return True
+
+        if self.handlekey is None:
+            for tx, ty in missing:
+                self.tile(level, tx, ty)
+            return True
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.NTHREADS)
+            for tx, ty in missing:
+                key = (level, tx, ty)
+                if key not in self._pending:
+                    self._pending[key] = self._executor.submit(
+                        self._computeInBackground, level, tx, ty, callback)
+
+        return False
+
+    def pendingCount(self):
+        """Return the number of tiles being computed in background."""
+
+        with self._lock:
+            return len(self._pending)
+
+    def close(self, wait=False):
+        """Cancel pending tile requests and stop background workers.
+
+        If *wait* is True wait for the completion of tiles that are
+        being computed.
+
+        """
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def read(self, level, x, y, w, h, band=None):
+        """Read a data block from the lazy overview *level*.
+
+        Only the tiles intersecting the requested block are computed
+        (reading data from *band*, by default the band of the store).
+
+        """
+
+        self._checkWindow(level, x, y, w, h)
+
+        tilesize = self.tilesize
+        out = None
+        for tx, ty in self._windowTiles(x, y, w, h):
+            data = self.tile(level, tx, ty, band)
+            if out is None:
+                out = np.empty((h, w), data.dtype)
+
+            x0 = max(x, tx * tilesize)
+            y0 = max(y, ty * tilesize)
+            x1 = min(x + w, (tx + 1) * tilesize)
+            y1 = min(y + h, (ty + 1) * tilesize)
+
+            out[y0 - y:y1 - y, x0 - x:x1 - x] = data[
+                y0 - ty * tilesize:y1 - ty * tilesize,
+                x0 - tx * tilesize:x1 - tx * tilesize]
+
+        return out
+
+    def clear(self):
+        """Remove all stored tiles."""
+
+        self.close()
+        with self._lock:
+            self._tiles.clear()
+            self._stampsaved = False
+        if os.path.isdir(self.rootdir):
+            shutil.rmtree(self.rootdir)
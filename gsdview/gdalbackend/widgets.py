@@ -47,6 +47,10 @@ class GDALInfoWidget(QtWidgets.QWidget, GDALInfoWidgetBase):
         super(GDALInfoWidget, self).__init__(parent, flags, **kwargs)
         self.setupUi(self)
 
+        #: manager of the data cache directory
+        #: (:class:`gsdview.gdalbackend.cachemanager.CacheManager`)
+        self.cachemanager = None
+
         # Context menu actions
         qtsupport.setViewContextActions(self.gdalDriversTableWidget)
 
@@ -119,6 +123,21 @@ class GDALInfoWidget(QtWidgets.QWidget, GDALInfoWidgetBase):
         self.gdalCacheUsedValue.setText(
             '%.3f MB' % (gdal.GetCacheUsed() / 1024. ** 2))
 
+        # data cache directory
+        if self.cachemanager is None:
+            self.dataCacheUsedValue.setText(self.tr('n/a'))
+            self.dataCacheQuotaValue.setText(self.tr('n/a'))
+        else:
+            self.dataCacheUsedValue.setText('%.3f MB (%d products)' % (
+                self.cachemanager.usage() / 1024. ** 2,
+                len(self.cachemanager.entries)))
+            self.dataCacheUsedValue.setToolTip(self.cachemanager.cachedir)
+            if self.cachemanager.quota:
+                self.dataCacheQuotaValue.setText(
+                    '%d MB' % (self.cachemanager.quota // 1024 ** 2))
+            else:
+                self.dataCacheQuotaValue.setText(self.tr('unlimited'))
+
     def showEvent(self, event):
         self.updateCacheInfo()
         QtWidgets.QWidget.showEvent(self, event)
@@ -336,8 +355,51 @@ class BackendPreferencesPage(GDALPreferencesPage):
         checkbox = QtWidgets.QCheckBox(self.tr(msg), toolTip=self.tr(tip))
         self.showOverviewCheckbox = checkbox
 
+        msg = 'Compute overviews on demand (only visible tiles).'
+        tip = (msg + '\nMissing overview tiles are computed when needed '
+               'and stored in the cache directory.\n'
+               "NOTE: this setting doesn't affects items already open.")
+        checkbox = QtWidgets.QCheckBox(self.tr(msg), toolTip=self.tr(tip))
+        self.lazyOverviewsCheckbox = checkbox
+
+        msg = 'Data cache quota:'
+        tip = ('Maximum size of the data cache directory.\n'
+               'Least recently used entries are removed when the quota is '
+               'exceeded (entries of open datasets are never removed).')
+        label = QtWidgets.QLabel(self.tr(msg), toolTip=self.tr(tip))
+        spinbox = QtWidgets.QSpinBox(toolTip=self.tr(tip))
+        spinbox.setRange(0, 1024 ** 2)
+        spinbox.setSingleStep(256)
+        spinbox.setSuffix(' MB')
+        spinbox.setSpecialValueText(self.tr('unlimited'))
+        self.cacheQuotaSpinBox = spinbox
+
+        quotalayout = QtWidgets.QHBoxLayout()
+        quotalayout.addWidget(label)
+        quotalayout.addWidget(self.cacheQuotaSpinBox)
+        quotalayout.addStretch()
+
+        msg = 'Maximum number of open datasets:'
+        tip = ('GDAL handles of least recently used datasets are closed '
+               'when the limit is exceeded\n'
+               'and transparently re-opened when needed '
+               '(datasets displayed in views are never closed).')
+        label = QtWidgets.QLabel(self.tr(msg), toolTip=self.tr(tip))
+        spinbox = QtWidgets.QSpinBox(toolTip=self.tr(tip))
+        spinbox.setRange(0, 1024)
+        spinbox.setSpecialValueText(self.tr('unlimited'))
+        self.maxOpenDatasetsSpinBox = spinbox
+
+        poollayout = QtWidgets.QHBoxLayout()
+        poollayout.addWidget(label)
+        poollayout.addWidget(self.maxOpenDatasetsSpinBox)
+        poollayout.addStretch()
+
         layout = QtWidgets.QVBoxLayout()
-        layout.addWidget(checkbox)
+        layout.addWidget(self.showOverviewCheckbox)
+        layout.addWidget(self.lazyOverviewsCheckbox)
+        layout.addLayout(quotalayout)
+        layout.addLayout(poollayout)
         # layout.addSpacerItem(QtWidgets.QSpacerItem(0, 20))
 
         self.groupbox = QtWidgets.QGroupBox(
@@ -352,6 +414,18 @@ class BackendPreferencesPage(GDALPreferencesPage):
             value = settings.value('visible_overview_items')
             if value is not None:
                 self.showOverviewCheckbox.setChecked(value)
+
+            # compute overview tiles on demand
+            value = settings.value('lazy_overviews', False, type=bool)
+            self.lazyOverviewsCheckbox.setChecked(value)
+
+            # cache quota (MB)
+            value = settings.value('cache_quota', 0, type=int)
+            self.cacheQuotaSpinBox.setValue(value)
+
+            # maximum number of open datasets
+            value = settings.value('max_open_datasets', 0, type=int)
+            self.maxOpenDatasetsSpinBox.setValue(value)
         finally:
             settings.endGroup()
 
@@ -363,6 +437,18 @@ class BackendPreferencesPage(GDALPreferencesPage):
             # show overviews in the treeview
             value = self.showOverviewCheckbox.isChecked()
             settings.setValue('visible_overview_items', bool(value))
+
+            # compute overview tiles on demand
+            value = self.lazyOverviewsCheckbox.isChecked()
+            settings.setValue('lazy_overviews', bool(value))
+
+            # cache quota (MB)
+            value = self.cacheQuotaSpinBox.value()
+            settings.setValue('cache_quota', value)
+
+            # maximum number of open datasets
+            value = self.maxOpenDatasetsSpinBox.value()
+            settings.setValue('max_open_datasets', value)
         finally:
             settings.endGroup()
 
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Tools for vector geometries handling."""
+
+
+import numpy as np
+
+
+# Spatial index #############################################################
+class SpatialIndex(object):
+    """Static R-tree spatial index of bounding boxes.
+
+    The tree is bulk loaded using the Sort-Tile-Recursive (STR)
+    algorithm and stored in flat numpy arrays (one array of node
+    bounding boxes per level).  Queries are vectorized level by level.
+
+    Bounding boxes are (xmin, ymin, xmax, ymax) tuples, query results
+    are indices of the input bounding boxes.
+    NaN values are ignored when node boxes are computed, boxes with
+    NaN values are never returned by queries.
+
+    """
+
+    def __init__(self, bboxes, nodesize=16):
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+        #: max number of children of each node
+        self.nodesize = int(nodesize)
+
+        self._order = self._strOrder(bboxes, self.nodesize)
+
+        boxes = bboxes[self._order]
+        self._levels = [boxes]
+        while len(boxes) > self.nodesize:
+            starts = np.arange(0, len(boxes), self.nodesize)
+            parents = np.empty((len(starts), 4))
+            parents[:, 0] = np.fmin.reduceat(boxes[:, 0], starts)
+            parents[:, 1] = np.fmin.reduceat(boxes[:, 1], starts)
+            parents[:, 2] = np.fmax.reduceat(boxes[:, 2], starts)
+            parents[:, 3] = np.fmax.reduceat(boxes[:, 3], starts)
+            boxes = parents
+            self._levels.append(boxes)
+
+    def __len__(self):
+        return len(self._order)
+
+    @staticmethod
+    def _strOrder(bboxes, nodesize):
+        n = len(bboxes)
+        if n <= nodesize:
+            return np.arange(n)
+
+        cx = (bboxes[:, 0] + bboxes[:, 2]) / 2.
+        cy = (bboxes[:, 1] + bboxes[:, 3]) / 2.
+
+        nleaves = int(np.ceil(n / float(nodesize)))
+        nslices = int(np.ceil(np.sqrt(nleaves)))
+        slicesize = int(np.ceil(nleaves / float(nslices))) * nodesize
+
+        rank = np.empty(n, dtype=np.intp)
+        rank[np.argsort(cx, kind='stable')] = np.arange(n)
+
+        return np.lexsort((cy, rank // slicesize))
+
+    def bounds(self):
+        """Return the (xmin, ymin, xmax, ymax) extent of the index.
+
+        None is returned if the index is empty (or if no bounding box
+        is valid).
+
+        """
+
+        if not len(self):
+            return None
+
+        boxes = self._levels[-1]
+        valid = ~np.isnan(boxes).any(axis=1)
+        if not valid.any():
+            return None
+
+        boxes = boxes[valid]
+        return (boxes[:, 0].min(), boxes[:, 1].min(),
+                boxes[:, 2].max(), boxes[:, 3].max())
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """Return indices of bounding boxes intersecting the query box."""
+
+        if not len(self):
+            return np.zeros(0, dtype=np.intp)
+
+        nodesize = self.nodesize
+        candidates = np.arange(len(self._levels[-1]))
+        for level in range(len(self._levels) - 1, -1, -1):
+            boxes = self._levels[level][candidates]
+            mask = ((boxes[:, 0] <= xmax) & (boxes[:, 2] >= xmin) &
+                    (boxes[:, 1] <= ymax) & (boxes[:, 3] >= ymin))
+            candidates = candidates[mask]
+            if level == 0:
+                break
+
+            children = candidates[:, np.newaxis] * nodesize
+            children = (children + np.arange(nodesize)).ravel()
+            candidates = children[children < len(self._levels[level - 1])]
+
+        return np.sort(self._order[candidates])
+
+
+# Geometry helpers ##########################################################
+def pointSegmentDistance(x, y, coords):
+    """Return the minimum distance of (*x*, *y*) from a polyline.
+
+    *coords* is the (N, 2) array of polyline vertices.
+
+    """
+
+    coords = np.asarray(coords, dtype=np.float64)
+    if len(coords) == 1:
+        return np.hypot(coords[0, 0] - x, coords[0, 1] - y)
+
+    p0 = coords[:-1]
+    d = coords[1:] - p0
+    norm2 = (d ** 2).sum(axis=1)
+    norm2[norm2 == 0] = 1.
+    t = ((x - p0[:, 0]) * d[:, 0] + (y - p0[:, 1]) * d[:, 1]) / norm2
+    t = np.clip(t, 0, 1)
+    px = p0[:, 0] + t * d[:, 0]
+    py = p0[:, 1] + t * d[:, 1]
+
+    return np.hypot(px - x, py - y).min()
+
+
+def pointInRing(x, y, coords):
+    """Return True if (*x*, *y*) is inside the ring (even-odd rule).
+
+    *coords* is the (N, 2) array of ring vertices.
+
+    """
+
+    coords = np.asarray(coords, dtype=np.float64)
+    x0, y0 = coords[:, 0], coords[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+
+    crossing = (y0 > y) != (y1 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xcross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    inside = crossing & (x < xcross)
+
+    return bool(np.count_nonzero(inside) % 2)
+
+
+def _rowSpans(mask):
+    # indices of rows with valid cells and their [first, last) spans
+    mask = np.asarray(mask, dtype=bool)
+    rows = np.flatnonzero(mask.any(axis=1))
+    ncols = mask.shape[1]
+    first = np.argmax(mask[rows], axis=1).astype(np.float64)
+    last = ncols - np.argmax(mask[rows, ::-1], axis=1).astype(np.float64)
+    return rows, first, last
+
+
+def _rowsOutline(rows, first, last):
+    # left side top to bottom, right side bottom to top
+    top = rows.astype(np.float64)
+    left = np.empty((2 * len(rows), 2))
+    left[:, 0] = np.repeat(first, 2)
+    left[0::2, 1] = top
+    left[1::2, 1] = top + 1
+    right = np.empty((2 * len(rows), 2))
+    right[:, 0] = np.repeat(last[::-1], 2)
+    right[0::2, 1] = top[::-1] + 1
+    right[1::2, 1] = top[::-1]
+
+    return np.concatenate((left, right, left[:1]))
+
+
+def maskOutlines(mask):
+    """Return the outlines of the valid cells of a 2D boolean *mask*.
+
+    The outlines are traced row by row: for each row containing valid
+    cells the polygon includes the span from the first to the last
+    valid cell, so the result is exact for row-convex regions (e.g.
+    the valid data area of rotated images or swaths).
+    Rows without valid cells split the mask in disjoint polygons.
+    Vertices are on cell edges, i.e. cell (i, j) spans [j, j + 1] along
+    x and [i, i + 1] along y.
+
+    Return the list of (N, 2) arrays of vertices of the closed rings
+    (empty if no cell is valid).
+
+    """
+
+    rows, first, last = _rowSpans(mask)
+    if not len(rows):
+        return []
+
+    splits = np.flatnonzero(np.diff(rows) > 1) + 1
+    return [_rowsOutline(*parts) for parts in zip(
+        np.split(rows, splits), np.split(first, splits),
+        np.split(last, splits))]
+
+
+def maskOutline(mask):
+    """Return the outline of the valid cells of a 2D boolean *mask*.
+
+    Same as :func:`maskOutlines` but spans of all rows are joined in a
+    single polygon, i.e. gaps of empty rows are filled.
+
+    Return the (N, 2) array of vertices of the closed ring (empty if
+    no cell is valid).
+
+    """
+
+    rows, first, last = _rowSpans(mask)
+    if not len(rows):
+        return np.zeros((0, 2))
+
+    return _rowsOutline(rows, first, last)
+
+
+# Simplification ############################################################
+def _douglasPeucker(coords, first, last, tolerance):
+    # Douglas-Peucker simplification of many polylines at once: each
+    # iteration processes all the pending (first, last) intervals with
+    # a fixed number of vectorized operations
+    x = np.ascontiguousarray(coords[:, 0])
+    y = np.ascontiguousarray(coords[:, 1])
+
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[first] = True
+    keep[last] = True
+
+    while len(first):
+        ninner = last - first - 1
+        mask = ninner > 0
+        first, last, ninner = first[mask], last[mask], ninner[mask]
+        if not len(first):
+            break
+
+        # inner vertices of all intervals
+        offsets = np.zeros(len(first), dtype=np.intp)
+        np.cumsum(ninner[:-1], out=offsets[1:])
+        interval = np.repeat(np.arange(len(first)), ninner)
+        index = np.arange(len(interval)) + np.repeat(first + 1 - offsets,
+                                                     ninner)
+
+        x0, y0 = x[first], y[first]
+        dx, dy = x[last] - x0, y[last] - y0
+        norm = np.hypot(dx, dy)
+        degenerate = norm == 0
+        norm[degenerate] = 1.
+        dx /= norm
+        dy /= norm
+
+        vx = x[index] - x0[interval]
+        vy = y[index] - y0[interval]
+        dist = np.abs(dx[interval] * vy - dy[interval] * vx)
+        if degenerate.any():
+            mask = degenerate[interval]
+            dist[mask] = np.hypot(vx[mask], vy[mask])
+
+        # @NOTE: non-finite vertices (or end points) are considered
+        #        infinitely far, i.e. they are always kept
+        dist[~np.isfinite(dist)] = np.inf
+
+        # farthest vertex of each interval
+        maxdist = np.maximum.reduceat(dist, offsets)
+        candidates = np.flatnonzero(dist == maxdist[interval])
+        ids = interval[candidates]
+        firstcandidate = np.ones(len(ids), dtype=bool)
+        firstcandidate[1:] = ids[1:] != ids[:-1]
+        farthest = index[candidates[firstcandidate]]
+
+        split = maxdist > tolerance
+        farthest = farthest[split]
+        keep[farthest] = True
+
+        first = np.concatenate((first[split], farthest))
+        last = np.concatenate((farthest, last[split]))
+
+    return keep
+
+
+def simplifyMask(coords, tolerance):
+    """Douglas-Peucker simplification of a polyline.
+
+    Return the boolean mask of the vertices of *coords* ((N, 2) array)
+    to keep.  First and last vertices are always kept.
+    Polylines with non-finite (NaN or inf) coordinates are not
+    simplified.
+
+    """
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if (len(coords) <= 2 or not tolerance > 0 or
+            not np.isfinite(coords).all()):
+        return np.ones(len(coords), dtype=bool)
+
+    return _douglasPeucker(coords, np.array([0]),
+                           np.array([len(coords) - 1]), tolerance)
+
+
+def simplify(coords, tolerance):
+    """Douglas-Peucker simplification of a polyline (see simplifyMask)."""
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return coords[simplifyMask(coords, tolerance)]
+
+
+def simplifyParts(coords, partoffsets, tolerance):
+    """Simplify all the parts of a compact geometry array.
+
+    Parts are stored in the (N, 2) *coords* array, *partoffsets* are
+    the offsets of parts (nparts + 1 values).  All parts are simplified
+    at once with the Douglas-Peucker algorithm.
+    Parts with non-finite (NaN or inf) coordinates are not simplified.
+
+    Return the new (coords, partoffsets) tuple.
+
+    """
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    partoffsets = np.asarray(partoffsets, dtype=np.intp)
+    if not len(coords) or not tolerance > 0:
+        return coords, partoffsets
+
+    sizes = np.diff(partoffsets)
+    nonempty = sizes > 0
+    first = partoffsets[:-1][nonempty]
+    last = partoffsets[1:][nonempty] - 1
+
+    invalid = ~np.isfinite(coords).all(axis=1)
+    if invalid.any():
+        invalidparts = np.add.reduceat(invalid.astype(np.intp), first) > 0
+        keep = _douglasPeucker(coords, first[~invalidparts],
+                               last[~invalidparts], tolerance)
+        for start, stop in zip(first[invalidparts], last[invalidparts]):
+            keep[start:stop + 1] = True
+    else:
+        keep = _douglasPeucker(coords, first, last, tolerance)
+
+    newsizes = np.zeros(len(sizes), dtype=np.intp)
+    newsizes[nonempty] = np.add.reduceat(keep.astype(np.intp), first)
+    newoffsets = np.concatenate(([0], np.cumsum(newsizes)))
+
+    return coords[keep], newoffsets
@@ -92,6 +92,7 @@ MODULES = [
     # 'gsdview.qtdraw',
     'gsdview.qtsupport',
     'gsdview.qtwindowlistmenu',
+    'gsdview.session',
     'gsdview.utils',
     'gsdview.widgets',
     'gsdview.gdalbackend',
@@ -210,7 +211,7 @@ def main():
     timer = Timer()
 
     # splash screen #########################################################
-    from qtpy import QtWidgets, QtGui
+    from qtpy import QtCore, QtWidgets, QtGui
     log.debug('Qt import: %d.%06ds', *timer.update())
 
     import sys
@@ -263,6 +264,9 @@ def main():
     # @COMPATIBILITY: this will raise the window on Mac OS X
     mainwin.raise_()
 
+    # @NOTE: products are opened in background once the event loop runs
+    QtCore.QTimer.singleShot(0, mainwin.restoreSession)
+
     sys.exit(app.exec_())
 
 
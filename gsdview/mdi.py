@@ -67,12 +67,50 @@ class ItemSubWindow(QtWidgets.QMdiSubWindow):
         self.item = item
 
 
+class ItemModel(QtGui.QStandardItemModel):
+    """Standard item model supporting incremental population of items.
+
+    Items can create their children on demand implementing the
+    `canFetchMore()` and `fetchMore()` methods (with the same semantics
+    of the corresponding QAbstractItemModel methods).
+    Views call them when an item is expanded.
+
+    """
+
+    def _fetchableitem(self, parent):
+        if not parent.isValid():
+            return None
+        item = self.itemFromIndex(parent)
+        if hasattr(item, 'canFetchMore'):
+            return item
+        return None
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        item = self._fetchableitem(parent)
+        if item is not None and item.canFetchMore():
+            return True
+        return super(ItemModel, self).hasChildren(parent)
+
+    def canFetchMore(self, parent):
+        item = self._fetchableitem(parent)
+        if item is not None:
+            return item.canFetchMore()
+        return super(ItemModel, self).canFetchMore(parent)
+
+    def fetchMore(self, parent):
+        item = self._fetchableitem(parent)
+        if item is not None:
+            item.fetchMore()
+        else:
+            super(ItemModel, self).fetchMore(parent)
+
+
 class ItemModelMainWindow(MdiMainWindow):
     def __init__(self, parent=None, flags=QtCore.Qt.WindowFlags(0), **kwargs):
         super(ItemModelMainWindow, self).__init__(parent, flags, **kwargs)
 
-        #: main application datamodel (QStandardItemModel)
-        self.datamodel = QtGui.QStandardItemModel(self)
+        #: main application datamodel (:class:`ItemModel`)
+        self.datamodel = ItemModel(self)
 
         # @TODO: custom treeview with "currentChanged" slot re-implemented
         #: tree view for the main application data model
@@ -311,7 +311,9 @@ class OverviewController(QtCore.QObject):
     # @QtCore.Slot(QtGui.QStandardItem)
     @QtCore.Slot('QStandardItem*')  # @TODO:check
     def onItemChanged(self, item):
-        if hasattr(item, 'scene'):
+        # @NOTE: use "hasscene" in order to avoid the creation of the scene
+        #        of items that have never been displayed
+        if hasattr(item, 'hasscene') and item.hasscene():
             srcview = self.app.currentGraphicsView()
             if (srcview and srcview.scene() is item.scene and
                     not self.panel.graphicsview.scene()):
@@ -43,6 +43,7 @@ def init(app):
     statusbar = app.statusBar()
     statusbar.addPermanentWidget(tool.coorview)
     statusbar.addPermanentWidget(tool.geocoorview)
+    statusbar.addPermanentWidget(tool.valueview)
 
     app.progressbar.installEventFilter(tool)
 
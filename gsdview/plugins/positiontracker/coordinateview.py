@@ -70,9 +70,63 @@ class GeoCoordinateView(CoordinateView):
 
         self.show()
 
-        # @TODO: the imgToGeoPoints method should return the same type
-        vlon, vlat = cmapper.imgToGeoPoints(scenepos.x(), scenepos.y())
-        lon, lat = vlon[0], vlat[0]    # @TODO: fix
+        if hasattr(cmapper, 'imgToGeo'):
+            lon, lat = cmapper.imgToGeo(scenepos.x(), scenepos.y())
+        else:
+            # @TODO: the imgToGeoPoints method should return the same type
+            vlon, vlat = cmapper.imgToGeoPoints(scenepos.x(), scenepos.y())
+            lon, lat = vlon[0], vlat[0]    # @TODO: fix
 
         self.xedit.setText(str(lon))
         self.yedit.setText(str(lat))
+
+
+class ValueView(QtWidgets.QWidget):
+    """Values of all bands (and the display value) under the cursor."""
+
+    #: maximum number of band values displayed in the status bar (all
+    #: values are available in the tooltip)
+    MAX_VALUES = 4
+
+    def __init__(self, parent=None, flags=QtCore.Qt.WindowFlags(0), **kwargs):
+        super(ValueView, self).__init__(parent, flags, **kwargs)
+
+        layout = QtWidgets.QHBoxLayout()
+
+        self.label = QtWidgets.QLabel('value:')
+        layout.addWidget(self.label)
+
+        self.edit = QtWidgets.QLineEdit()
+        self.edit.setReadOnly(True)
+        layout.addWidget(self.edit)
+
+        self.setLayout(layout)
+
+    @staticmethod
+    def _format(value):
+        if value is None:
+            return '-'
+        if hasattr(value, 'imag') and value.imag:
+            return str(value)
+        return '%g' % getattr(value, 'real', value)
+
+    def updateValues(self, values=None, displayvalue=None):
+        if not values:
+            self.hide()
+            return
+
+        self.show()
+
+        items = [self._format(value) for value in values]
+        text = ', '.join(items[:self.MAX_VALUES])
+        if len(items) > self.MAX_VALUES:
+            text += ', ...'
+        if displayvalue is not None:
+            text += ' [%s]' % self._format(displayvalue)
+        self.edit.setText(text)
+
+        tooltip = '\n'.join('band %d: %s' % (index, item)
+                            for index, item in enumerate(items, 1))
+        if displayvalue is not None:
+            tooltip += '\ndisplay: %s' % self._format(displayvalue)
+        self.edit.setToolTip(tooltip)
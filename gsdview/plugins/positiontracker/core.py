@@ -21,12 +21,15 @@
 """Core module for position tracker plugin."""
 
 
-from qtpy import QtCore
+from qtpy import QtCore, QtGui
 
-from .coordinateview import CoordinateView, GeoCoordinateView
+from .coordinateview import CoordinateView, GeoCoordinateView, ValueView
 
 
 class TrackingTool(QtCore.QObject):
+    #: refresh rate used if the screen one is not available [Hz]
+    DEFAULT_REFRESH_RATE = 60.
+
     def __init__(self, app, **kwargs):
         super(TrackingTool, self).__init__(app, **kwargs)
         self.app = app
@@ -41,22 +44,53 @@ class TrackingTool(QtCore.QObject):
         geocoorview.hide()
         app.monitor.leave.connect(geocoorview.hide)
 
+        # pixel values
+        valueview = ValueView()
+        valueview.hide()
+        app.monitor.leave.connect(valueview.hide)
+
         self.coorview = coorview
         self.geocoorview = geocoorview
+        self.valueview = valueview
+
+        # @NOTE: mouse events are coalesced to the display refresh rate
+        self._lastpos = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self._refreshInterval())
+        self._timer.timeout.connect(self.updatePos)
+        app.monitor.leave.connect(self._timer.stop)
 
         self.app.monitor.mouseMoved.connect(self.onMouseMoved)
 
+    def _refreshInterval(self):
+        rate = 0
+        screen = QtGui.QGuiApplication.primaryScreen()
+        if screen is not None:
+            rate = screen.refreshRate()
+        if not rate or rate <= 0:
+            rate = self.DEFAULT_REFRESH_RATE
+        return max(int(1000. / rate), 1)
+
     def eventFilter(self, obj, event):
         if event.type() == QtCore.QEvent.Show:
             self.coorview.hide()
             self.geocoorview.hide()
+            self.valueview.hide()
         return obj.eventFilter(obj, event)
 
     # @QtCore.Slot(QtWidgets.QGraphicsScene, QtCore.QPointF,
     #              QtCore.Qt.MouseButtons)  # @TODO: check
     # @QtCore.Slot('QGraphicsScene, QPointF, Qt::MouseButtons')
     def onMouseMoved(self, scene, pos, buttons):
-        if self.app.progressbar.isVisible():
+        self._lastpos = QtCore.QPointF(pos)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @QtCore.Slot()
+    def updatePos(self):
+        pos, self._lastpos = self._lastpos, None
+        if pos is None or self.app.progressbar.isVisible():
             return
 
         self.coorview.updatePos(pos)
@@ -67,3 +101,32 @@ class TrackingTool(QtCore.QObject):
         except AttributeError:
             cmapper = None
         self.geocoorview.updatePos(pos, cmapper)
+
+        values, displayvalue = self._pixelValues(item, pos)
+        self.valueview.updateValues(values, displayvalue)
+
+    @staticmethod
+    def _pixelValues(item, pos):
+        dataset = item
+        while dataset is not None and not hasattr(dataset, 'pixelValues'):
+            dataset = dataset.parent()
+        if dataset is None:
+            return None, None
+
+        x, y = pos.x(), pos.y()
+        if x < 0 or y < 0:
+            return None, None
+        values = dataset.pixelValues(x, y)
+        if not values:
+            return None, None
+
+        # display value of the current band
+        displayvalue = None
+        if item is not dataset and item.parent() is dataset:
+            graphicsitem = None
+            if item.hasscene():
+                graphicsitem = item.graphicsitem
+            if graphicsitem is not None and item.row() < len(values):
+                displayvalue = graphicsitem.displayValue(values[item.row()])
+
+        return values, displayvalue
@@ -58,6 +58,7 @@ def close(app):
     _instance = None
 
     if instance:
+        instance.panel.worldmapitem.close()
         app.removeDockWidget(instance.panel)
         instance.panel.deleteLater()
 
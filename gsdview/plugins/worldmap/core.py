@@ -21,13 +21,20 @@
 """World map component for GSDView."""
 
 
-import numpy as np
+import logging
 
 from qtpy import QtCore, QtWidgets, QtGui
 
 from gsdview import utils
+from gsdview import errors
 from gsdview import qtsupport
 
+from .tiles import TilePyramid, TiledWorldmapItem
+from .footprints import FootprintsItem
+
+
+_log = logging.getLogger(__name__)
+
 
 class WorldmapPanel(QtWidgets.QDockWidget):
     # @TODO: use zoom plugin
@@ -48,11 +55,31 @@ class WorldmapPanel(QtWidgets.QDockWidget):
         self.worldmapitem = None
         self.setWorldmapItem()
 
+        # footprints overlays
+        self.productsitem = FootprintsItem()
+        self.productsitem.setZValue(0.5)
+        self.productsitem.setVisible(False)
+        scene.addItem(self.productsitem)
+
+        self.indexitem = FootprintsItem()
+        self.indexitem.setZValue(0.4)
+        pen = QtGui.QPen(QtGui.QColor(0, 255, 255))
+        pen.setCosmetic(True)
+        self.indexitem.setPen(pen)
+        self.indexitem.setBrush(QtGui.QColor(0, 255, 255, 32))
+        scene.addItem(self.indexitem)
+
         self.actions = self._setupActions()
         self.actionZoomIn, self.actionZoomOut = self.actions.actions()
 
+        self.overlayActions = self._setupOverlayActions()
+        (self.actionShowFootprints, self.actionLoadIndex,
+         self.actionClearIndex) = self.overlayActions.actions()
+
         toolbar = qtsupport.actionGroupToToolbar(self.actions,
                                                  self.tr('Zoom toolbar'))
+        toolbar.addSeparator()
+        toolbar.addActions(self.overlayActions.actions())
         toolbar.setOrientation(QtCore.Qt.Vertical)
 
         mainlayout = QtWidgets.QHBoxLayout()
@@ -94,6 +121,38 @@ class WorldmapPanel(QtWidgets.QDockWidget):
 
         return actions
 
+    def _setupOverlayActions(self):
+        actions = QtWidgets.QActionGroup(self)
+        actions.setExclusive(False)
+
+        # Show all footprints
+        icon = qtsupport.geticon('area.svg', 'gsdview')
+        QtWidgets.QAction(
+            icon, self.tr('Show All Footprints'), actions,
+            objectName='showFootprintsAction',
+            statusTip=self.tr('Show the footprints of all open products'),
+            checkable=True,
+            toggled=self.productsitem.setVisible)
+
+        # Load index
+        icon = qtsupport.geticon('open.svg', 'gsdview')
+        QtWidgets.QAction(
+            icon, self.tr('Load Footprint Index'), actions,
+            objectName='loadIndexAction',
+            statusTip=self.tr('Show footprints of a raster index'),
+            triggered=lambda: self.loadFootprintIndex())
+
+        # Clear index
+        icon = qtsupport.geticon('close.svg', 'gsdview')
+        QtWidgets.QAction(
+            icon, self.tr('Clear Footprint Index'), actions,
+            objectName='clearIndexAction',
+            statusTip=self.tr('Remove the raster index footprints'),
+            enabled=False,
+            triggered=self.clearFootprintIndex)
+
+        return actions
+
     def eventFilter(self, obj, event):
         if event.type() in (QtCore.QEvent.Resize, QtCore.QEvent.Show):
             self._fitInView()
@@ -102,21 +161,17 @@ class WorldmapPanel(QtWidgets.QDockWidget):
     def setWorldmapItem(self, resolution='low'):
         scene = self.graphicsview.scene()
         if self.worldmapitem is not None:
+            self.worldmapitem.close()
             scene.removeItem(self.worldmapitem)
 
         # imgfile = qtsupport.geticonfile('world_2160x1080.jpg', __name__)
         imgfile = qtsupport.geticonfile('world_4320x2160.jpg', __name__)
         # imgfile = qtsupport.geticonfile('world_5400x2700.jpg', __name__)
-        worldmap = QtGui.QPixmap(imgfile)
 
-        worldmapitem = scene.addPixmap(worldmap)
-        worldmapitem.setTransformationMode(QtCore.Qt.SmoothTransformation)
+        # @NOTE: tiles are generated only once and loaded on demand
+        worldmapitem = TiledWorldmapItem(TilePyramid(imgfile))
+        scene.addItem(worldmapitem)
 
-        # @NOTE: reverse the y axis
-        worldmapitem.setTransform(
-            QtGui.QTransform(360. / worldmap.width(), 0,
-                             0, -180. / worldmap.height(),
-                             -180, 90))
         self.worldmapitem = worldmapitem
         # return worldmapitem
 
@@ -160,16 +215,12 @@ class WorldmapPanel(QtWidgets.QDockWidget):
         if not polygon:
             return
 
-        lon = np.asarray([p.x() for p in polygon])
-        lat = np.asarray([p.y() for p in polygon])
-
-        mlon = lon.mean()
-        mlat = lat.mean()
+        mlon, mlat = qtsupport.qpolygonf2numpy(polygon).mean(axis=0)
 
         delta = mlon - utils.geonormalize(mlon)
         if delta:
-            lon -= delta
             mlon -= delta
+            polygon = QtGui.QPolygonF(polygon)
             polygon.translate(-delta, 0)
 
         self.box = self.plot(polygon)
@@ -189,15 +240,46 @@ class WorldmapPanel(QtWidgets.QDockWidget):
         self.actionZoomIn.setEnabled(True)
 
     def clear(self):
+        # @NOTE: only remove the footprint boxes, overlays are preserved
         scene = self.graphicsview.scene()
-        for item in scene.items():
-            if item is not self.worldmapitem:
+        for item in (self.box, self.bigbox):
+            if item is not None:
                 scene.removeItem(item)
+        self.box = None
+        self.bigbox = None
         self.actionZoomIn.setEnabled(False)
         self.actionZoomOut.setEnabled(False)
         self.fitItem = self.worldmapitem
         self._fitInView()
 
+    def loadFootprintIndex(self, filename=None):
+        """Show footprints of a raster index (see the ras2vec tool).
+
+        If *filename* is not provided the user is asked to select it.
+
+        """
+
+        if filename is None:
+            filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, self.tr('Load Footprint Index'))
+            if not filename:
+                return
+
+        try:
+            self.indexitem.loadIndex(filename)
+        except Exception as e:
+            _log.debug('unable to load "%s"', filename, exc_info=True)
+            QtWidgets.QMessageBox.warning(
+                self, self.tr('Load Footprint Index'),
+                self.tr('Unable to load "%s": %s') % (filename, e))
+            return
+
+        self.actionClearIndex.setEnabled(True)
+
+    def clearFootprintIndex(self):
+        self.indexitem.clear()
+        self.actionClearIndex.setEnabled(False)
+
 
 class WorldmapController(QtCore.QObject):
     def __init__(self, app, **kwargs):
@@ -206,6 +288,10 @@ class WorldmapController(QtCore.QObject):
 
         self.panel = WorldmapPanel(app)
         self.panel.setObjectName('worldmapPanel')   # @TODO: check
+        self.panel.productsitem.selectionCallback = self.onProductSelected
+        self.panel.indexitem.activationCallback = self.openProduct
+        self.panel.actionShowFootprints.toggled.connect(
+            self.updateFootprints)
 
         app.mdiarea.subWindowActivated.connect(self.onSubWindowChanged)
         app.treeview.clicked.connect(self.onItemClicked)
@@ -223,6 +309,56 @@ class WorldmapController(QtCore.QObject):
             footprint = None
 
         self.panel.setFootprint(footprint)
+        productsitem = self.panel.productsitem
+        productsitem.setSelectedFeature(productsitem.findKey(item))
+
+    @QtCore.Slot()
+    def updateFootprints(self):
+        """Update the footprints overlay of open products."""
+
+        if not self.panel.actionShowFootprints.isChecked():
+            self.panel.productsitem.clear()
+            return
+
+        items = []
+        polygons = []
+        root = self.app.datamodel.invisibleRootItem()
+        for row in range(root.rowCount()):
+            item = root.child(row)
+            try:
+                footprint = item.footprint()
+            except AttributeError:
+                continue
+            if footprint:
+                items.append(item)
+                polygons.append(footprint)
+
+        self.panel.productsitem.setFootprints(
+            polygons, [item.text() for item in items], items)
+
+    def onProductSelected(self, item):
+        index = item.index()
+        if index.isValid():
+            self.app.treeview.setCurrentIndex(index)
+            self.setItemFootprint(item)
+
+    def openProduct(self, filename):
+        """Open *filename* (e.g. a product of a raster index)."""
+
+        for backendname in self.app.backends:
+            backend = self.app.pluginmanager.plugins[backendname]
+            try:
+                item = backend.openFile(filename)
+            except errors.OpenError:
+                _log.debug('Backend "%s" failed to open file "%s"',
+                           backendname, filename)
+                continue
+
+            if item:
+                self.app.datamodel.appendRow(item)
+            break
+        else:
+            _log.error('Unable to open file "%s"', filename)
 
     @QtCore.Slot()
     @QtCore.Slot(QtWidgets.QMdiSubWindow)
@@ -250,6 +386,7 @@ class WorldmapController(QtCore.QObject):
     @QtCore.Slot()
     @QtCore.Slot(QtCore.QModelIndex, int, int)
     def onModelChanged(self, index=None, start=None, stop=None):
+        self.updateFootprints()
         subwin = self.app.mdiarea.activeSubWindow()
         if subwin:
             self.onSubWindowChanged(subwin)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Footprints overlay for the world map.
+
+The :class:`FootprintsItem` displays, in a single graphics item, the
+geographic footprints of many products, e.g. all the open datasets or
+all the entries of a raster index generated by the ras2vec tool.
+Footprints are stored in compact arrays and indexed with a R-tree, so
+that paint, hover highlighting and picking only deal with footprints
+in the area of interest.
+
+"""
+
+
+import logging
+
+import numpy as np
+from osgeo import ogr, osr
+
+from qtpy import QtCore, QtGui, QtWidgets
+
+from gsdview import qtsupport
+from gsdview.gdalbackend.ogrqt import DATAKEY, GraphicsLayerItem
+
+
+_log = logging.getLogger(__name__)
+
+
+#: name of the layer of raster indexes generated by ras2vec
+INDEX_LAYER_NAME = 'index'
+
+#: fields used (in order of preference) to label footprints loaded
+#: from vector files
+LABEL_FIELDS = ('Location', 'Description', 'Name')
+
+
+def geonormalizeFeatures(coords, offsets):
+    """Shift features so that their mean longitude is in [-180, 180].
+
+    *coords* is the (N, 2) array of (lon, lat) vertices of all features
+    and *offsets* are the offsets of the vertices of each feature
+    (nfeatures + 1 values).  Each feature is translated by a multiple
+    of 360 degrees (in place).
+
+    Return *coords*.
+
+    """
+
+    sizes = np.diff(offsets)
+    nonempty = sizes > 0
+    if not nonempty.any():
+        return coords
+
+    starts = np.asarray(offsets[:-1])[nonempty]
+    mlon = np.add.reduceat(coords[:, 0], starts) / sizes[nonempty]
+    delta = np.zeros(len(sizes))
+    delta[nonempty] = 360. * np.round(mlon / 360.)
+    coords[:, 0] -= np.repeat(delta, sizes)
+
+    return coords
+
+
+def footprintArrays(polygons):
+    """Convert a sequence of footprints into compact arrays.
+
+    *polygons* can be QPolygonF or (N, 2) arrays of (lon, lat)
+    vertices.  Empty footprints are discarded and each footprint is
+    normalized with :func:`geonormalizeFeatures`.
+
+    Return the (coords, partoffsets, partkinds, featureoffsets,
+    indices) tuple of arrays (see
+    :meth:`gsdview.gdalbackend.ogrqt.GraphicsLayerItem.setArrays`)
+    where *indices* are the positions of valid footprints in
+    *polygons*.
+
+    """
+
+    coords = []
+    indices = []
+    for index, polygon in enumerate(polygons):
+        if isinstance(polygon, QtGui.QPolygonF):
+            xy = qtsupport.qpolygonf2numpy(polygon)
+        else:
+            xy = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        if len(xy):
+            coords.append(xy)
+            indices.append(index)
+
+    sizes = np.asarray([len(xy) for xy in coords], dtype=np.intp)
+    partoffsets = np.zeros(len(sizes) + 1, dtype=np.intp)
+    np.cumsum(sizes, out=partoffsets[1:])
+    coords = np.concatenate(coords) if coords else np.zeros((0, 2))
+    geonormalizeFeatures(coords, partoffsets)
+
+    return (
+        coords,
+        partoffsets,
+        np.full(len(sizes), GraphicsLayerItem.RING, dtype=np.uint8),
+        np.arange(len(sizes) + 1, dtype=np.intp),
+        np.asarray(indices, dtype=np.int64),
+    )
+
+
+class FootprintsItem(GraphicsLayerItem):
+    """Graphics item displaying a large number of footprints.
+
+    Each footprint is associated to a label, used as tooltip, and to a
+    key (any python object) that identifies the product.
+
+    Footprints smaller than :data:`MIN_SIZE` pixels are drawn as
+    points, all at once.  The footprint under the mouse pointer is
+    highlighted, clicking on a footprint selects it and
+    :attr:`selectionCallback` is called with its key, a double click
+    calls :attr:`activationCallback`.
+
+    .. note:: highlighted and selected footprints are drawn by child
+              items so that the (cached) rendering of the whole set of
+              footprints is not invalidated by mouse interaction.
+
+    """
+
+    Type = QtWidgets.QGraphicsItem.UserType + 111
+
+    #: footprints smaller than MIN_SIZE pixels are drawn as points
+    MIN_SIZE = 4
+
+    #: tolerance for footprint picking [pixels]
+    PICK_TOLERANCE = 3
+
+    def __init__(self, name=None, parent=None, **kwargs):
+        super(FootprintsItem, self).__init__(name, parent, **kwargs)
+        self.setAcceptHoverEvents(True)
+        self.setCacheMode(QtWidgets.QGraphicsItem.DeviceCoordinateCache)
+
+        pen = QtGui.QPen(QtGui.QColor(255, 255, 0))
+        pen.setCosmetic(True)
+        self.setPen(pen)
+        self.setBrush(QtGui.QColor(255, 255, 0, 32))
+
+        #: callable invoked with the key of the selected footprint
+        self.selectionCallback = None
+
+        #: callable invoked with the key of the double clicked footprint
+        self.activationCallback = None
+
+        self._labels = []
+        self._keys = []
+        self._hovered = None
+        self._selected = None
+        self._picktolerance = 0.
+
+        self._hoveritem = self._highlightItem(QtGui.QColor(255, 255, 255))
+        self._selecteditem = self._highlightItem(QtGui.QColor(255, 0, 0))
+
+    def _highlightItem(self, color):
+        pen = QtGui.QPen(color)
+        pen.setCosmetic(True)
+        pen.setWidth(2)
+        color = QtGui.QColor(color)
+        color.setAlpha(64)
+
+        item = QtWidgets.QGraphicsPathItem(self)
+        item.setPen(pen)
+        item.setBrush(color)
+        item.setVisible(False)
+
+        return item
+
+    def type(self):
+        return self.Type
+
+    def setFootprints(self, polygons, labels=None, keys=None):
+        """Set footprints.
+
+        :param polygons:
+            sequence of footprints (QPolygonF or (N, 2) arrays of
+            (lon, lat) vertices)
+        :param labels:
+            sequence of labels (one for each footprint)
+        :param keys:
+            sequence of keys (by default the footprint index)
+
+        Empty footprints are discarded.
+
+        """
+
+        polygons = list(polygons)
+        if labels is None:
+            labels = [''] * len(polygons)
+        if keys is None:
+            keys = range(len(polygons))
+        labels = list(labels)
+        keys = list(keys)
+
+        arrays = footprintArrays(polygons)
+        indices = arrays[-1]
+        self._setFootprintArrays(arrays[:-1], [labels[i] for i in indices],
+                                 [keys[i] for i in indices])
+
+    def loadIndex(self, filename, layer=None):
+        """Load footprints from a vector file.
+
+        By default the "index" layer of raster indexes generated by the
+        ras2vec tool is used (or the first layer if it is not
+        available).  The label of each footprint is the value of the
+        first available field in :data:`LABEL_FIELDS`, the key is the
+        label itself (i.e. the location of the product for ras2vec
+        indexes).
+
+        """
+
+        ds = ogr.Open(filename)
+        if ds is None:
+            raise ValueError('unable to open "%s"' % filename)
+
+        if layer is None:
+            layer = ds.GetLayerByName(INDEX_LAYER_NAME) or ds.GetLayer(0)
+        elif not isinstance(layer, ogr.Layer):
+            layer = ds.GetLayer(layer)
+        if layer is None:
+            raise ValueError('no layer found in "%s"' % filename)
+
+        srs = osr.SpatialReference()
+        srs.SetWellKnownGeogCS('WGS84')
+        if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+            srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        layer_srs = layer.GetSpatialRef()
+        if layer_srs is not None and not layer_srs.IsSame(srs):
+            srs_transform = osr.CoordinateTransformation(layer_srs, srs)
+        else:
+            srs_transform = None
+
+        defn = layer.GetLayerDefn()
+        fieldnames = [defn.GetFieldDefn(index).GetName()
+                      for index in range(defn.GetFieldCount())]
+        fieldname = next(
+            (name for name in LABEL_FIELDS if name in fieldnames), None)
+
+        labels = {}
+
+        def features():
+            for feature in layer:
+                fid = feature.GetFID()
+                if fieldname is None:
+                    labels[fid] = str(fid)
+                else:
+                    labels[fid] = feature.GetField(fieldname) or str(fid)
+                yield feature
+
+        layer.ResetReading()
+        coords, partoffsets, partkinds, featureoffsets, fids = (
+            self.featureArrays(features(), srs_transform, srs=srs,
+                               layer_srs=layer_srs))
+        geonormalizeFeatures(coords, partoffsets[featureoffsets])
+
+        labels = [labels[fid] for fid in fids.tolist()]
+        self._setFootprintArrays(
+            (coords, partoffsets, partkinds, featureoffsets, fids),
+            labels, labels)
+        self.setData(DATAKEY['name'], layer.GetName())
+
+        _log.debug('%d footprints loaded from "%s"', self.featureCount(),
+                   filename)
+
+    def _setFootprintArrays(self, arrays, labels, keys):
+        self.setHoveredFeature(None)
+        self.setSelectedFeature(None)
+        self._labels = labels
+        self._keys = keys
+        self.setArrays(*arrays)
+
+    def clear(self):
+        self.setFootprints([])
+
+    def label(self, feature):
+        return self._labels[feature]
+
+    def key(self, feature):
+        return self._keys[feature]
+
+    def findKey(self, key):
+        """Return the index of the footprint with *key* (or None)."""
+
+        for feature, value in enumerate(self._keys):
+            if value is key or value == key:
+                return feature
+        return None
+
+    def _featurePath(self, feature):
+        path = QtGui.QPainterPath()
+        for kind, coords in self._featureParts(feature):
+            path.addPolygon(qtsupport.numpy2qpolygonf(coords))
+            if kind == self.RING:
+                path.closeSubpath()
+        return path
+
+    def _setHighlight(self, item, feature):
+        if feature is None:
+            item.setVisible(False)
+        else:
+            item.setPath(self._featurePath(feature))
+            item.setVisible(True)
+
+    def hoveredFeature(self):
+        return self._hovered
+
+    def setHoveredFeature(self, feature):
+        if feature == self._hovered:
+            return
+        self._hovered = feature
+        self._setHighlight(self._hoveritem, feature)
+        self.setToolTip(self._labels[feature] if feature is not None else '')
+
+    def selectedFeature(self):
+        return self._selected
+
+    def setSelectedFeature(self, feature):
+        if feature == self._selected:
+            return
+        self._selected = feature
+        self._setHighlight(self._selecteditem, feature)
+
+    def contains(self, point):
+        return self.featureAt(point, self._picktolerance) is not None
+
+    def hoverMoveEvent(self, event):
+        self.setHoveredFeature(
+            self.featureAt(event.pos(), self._picktolerance))
+        super(FootprintsItem, self).hoverMoveEvent(event)
+
+    def hoverLeaveEvent(self, event):
+        self.setHoveredFeature(None)
+        super(FootprintsItem, self).hoverLeaveEvent(event)
+
+    def mousePressEvent(self, event):
+        feature = self.featureAt(event.pos(), self._picktolerance)
+        if feature is None or event.button() != QtCore.Qt.LeftButton:
+            event.ignore()
+            return
+
+        self.setSelectedFeature(feature)
+        if self.selectionCallback is not None:
+            self.selectionCallback(self._keys[feature])
+
+    def mouseDoubleClickEvent(self, event):
+        feature = self.featureAt(event.pos(), self._picktolerance)
+        if feature is None or event.button() != QtCore.Qt.LeftButton:
+            event.ignore()
+            return
+
+        if self.activationCallback is not None:
+            self.activationCallback(self._keys[feature])
+
+    def paint(self, painter, option, widget=None):
+        features = self.featuresInRect(self._exposedRect(painter, option))
+        if not len(features):
+            return
+
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if not lod:
+            return
+        self._picktolerance = self.PICK_TOLERANCE / lod
+
+        bboxes = self._bboxes[features]
+        sizes = np.maximum(bboxes[:, 2] - bboxes[:, 0],
+                           bboxes[:, 3] - bboxes[:, 1])
+        small = sizes * lod < self.MIN_SIZE
+        if small.any():
+            centers = (bboxes[small, :2] + bboxes[small, 2:]) / 2.
+            pen = QtGui.QPen(self.pen())
+            pen.setWidthF(self.MIN_SIZE)
+            pen.setCapStyle(QtCore.Qt.RoundCap)
+            painter.save()
+            painter.setPen(pen)
+            painter.drawPoints(qtsupport.numpy2qpolygonf(centers))
+            painter.restore()
+
+        self._paintFeatures(painter, features[~small], lod)
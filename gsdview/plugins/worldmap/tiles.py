@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Multi-resolution tiled world map.
+
+The bundled world image is split, once, into a pyramid of tiles
+(:class:`TilePyramid`) stored in the user configuration directory.
+Tiles are loaded on demand by the :class:`TiledWorldmapItem` according
+to the level of detail of the view and kept in a LRU pixmap cache.
+
+"""
+
+
+import os
+import math
+import json
+import shutil
+import logging
+import tempfile
+import collections
+
+from qtpy import QtCore, QtWidgets, QtGui
+
+from gsdview.appsite import USERCONFIGDIR
+
+
+_log = logging.getLogger(__name__)
+
+
+#: default directory for tile pyramids
+TILEDIR = os.path.join(USERCONFIGDIR, 'worldmap')
+
+#: size (in pixels) of tiles
+TILE_SIZE = 256
+
+
+class TilePyramid(object):
+    """Pyramid of tiles of an equirectangular world image.
+
+    Level 0 has the full resolution of the source image, the size of
+    each subsequent level is halved down to a single tile.
+    Tiles are stored in *tiledir* as "<level>/<row>_<col>.jpg" files.
+
+    The pyramid is valid if the "pyramid.json" file, written at the
+    end of :meth:`build`, matches the source image and tile size.
+
+    """
+
+    INFO_FILENAME = 'pyramid.json'
+    TILE_FORMAT = 'jpg'
+    TILE_QUALITY = 90
+
+    def __init__(self, srcfile, tiledir=TILEDIR, tilesize=TILE_SIZE):
+        self.srcfile = srcfile
+        self.tiledir = tiledir
+        self.tilesize = tilesize
+        self._info = None
+
+    def _sourceInfo(self):
+        st = os.stat(self.srcfile)
+        return {
+            'source': os.path.basename(self.srcfile),
+            'srcsize': st.st_size,
+            'srcmtime': st.st_mtime,
+            'tilesize': self.tilesize,
+        }
+
+    @property
+    def info(self):
+        if self._info is None:
+            try:
+                with open(os.path.join(self.tiledir,
+                                       self.INFO_FILENAME)) as fd:
+                    info = json.load(fd)
+            except (OSError, ValueError):
+                return None
+
+            srcinfo = self._sourceInfo()
+            if any(info.get(key) != value for key, value in srcinfo.items()):
+                return None
+            self._info = info
+
+        return self._info
+
+    def isvalid(self):
+        return self.info is not None
+
+    def levelCount(self):
+        return len(self.info['levels'])
+
+    def levelSize(self, level):
+        """Return the (width, height) of the *level* image."""
+
+        return tuple(self.info['levels'][level])
+
+    def tileFilename(self, level, row, col):
+        return os.path.join(self.tiledir, str(level),
+                            '%d_%d.%s' % (row, col, self.TILE_FORMAT))
+
+    def build(self, interrupted=None):
+        """Generate all tiles of the pyramid.
+
+        Tiles are created in a temporary directory that replaces the
+        old pyramid only when all tiles have been written.
+        The *interrupted* callable can be used to stop the procedure
+        (it is checked after each level).
+
+        .. note:: only QImage is used, so the pyramid can be built in a
+                  worker thread.
+
+        """
+
+        image = QtGui.QImage(self.srcfile)
+        if image.isNull():
+            raise ValueError('unable to load "%s"' % self.srcfile)
+
+        parent = os.path.dirname(os.path.abspath(self.tiledir))
+        if not os.path.isdir(parent):
+            os.makedirs(parent)
+        tmpdir = tempfile.mkdtemp(prefix='worldmap-', dir=parent)
+        try:
+            levels = []
+            level = 0
+            while True:
+                levels.append((image.width(), image.height()))
+                self._writeTiles(image, os.path.join(tmpdir, str(level)))
+                if interrupted is not None and interrupted():
+                    return False
+
+                if (image.width() <= self.tilesize and
+                        image.height() <= self.tilesize):
+                    break
+
+                image = image.scaled(
+                    max(image.width() // 2, 1), max(image.height() // 2, 1),
+                    QtCore.Qt.IgnoreAspectRatio,
+                    QtCore.Qt.SmoothTransformation)
+                level += 1
+
+            info = self._sourceInfo()
+            info['levels'] = levels
+            with open(os.path.join(tmpdir, self.INFO_FILENAME), 'w') as fd:
+                json.dump(info, fd)
+
+            if os.path.exists(self.tiledir):
+                shutil.rmtree(self.tiledir)
+            os.replace(tmpdir, self.tiledir)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        self._info = None
+        _log.debug('worldmap tile pyramid (%d levels) created in "%s"',
+                   len(levels), self.tiledir)
+
+        return True
+
+    def _writeTiles(self, image, dirname):
+        os.makedirs(dirname)
+        imgrect = image.rect()
+        for row in range(int(math.ceil(image.height() / self.tilesize))):
+            for col in range(int(math.ceil(image.width() / self.tilesize))):
+                rect = QtCore.QRect(col * self.tilesize, row * self.tilesize,
+                                    self.tilesize, self.tilesize)
+                tile = image.copy(rect.intersected(imgrect))
+                filename = os.path.join(
+                    dirname, '%d_%d.%s' % (row, col, self.TILE_FORMAT))
+                if not tile.save(filename, self.TILE_FORMAT,
+                                 self.TILE_QUALITY):
+                    raise OSError('unable to write "%s"' % filename)
+
+
+class TilePyramidBuilder(QtCore.QThread):
+    """Build a :class:`TilePyramid` in background.
+
+    If the building fails the exception is stored in :attr:`error`.
+
+    """
+
+    def __init__(self, pyramid, parent=None):
+        super(TilePyramidBuilder, self).__init__(parent)
+
+        #: the :class:`TilePyramid` to be built
+        self.pyramid = pyramid
+
+        #: the exception raised in the worker thread (if any)
+        self.error = None
+
+    def run(self):
+        try:
+            self.pyramid.build(self.isInterruptionRequested)
+        except Exception as e:
+            _log.debug('unable to build the worldmap tile pyramid',
+                       exc_info=True)
+            self.error = e
+
+
+class TiledWorldmapItem(QtWidgets.QGraphicsItem):
+    """Graphics item displaying a :class:`TilePyramid`.
+
+    The item covers the [-180, 180] x [-90, 90] (lon, lat) area.
+    At paint time only the tiles of the pyramid level matching the
+    level of detail of the view and intersecting the exposed area are
+    drawn.  Tiles are loaded on demand and kept in a LRU cache of
+    :attr:`cachesize` pixmaps.
+
+    If the pyramid is not available it is built in background (see
+    :class:`TilePyramidBuilder`) and the item is updated at the end.
+
+    """
+
+    Type = QtWidgets.QGraphicsItem.UserType + 110
+
+    #: number of cached tile pixmaps
+    CACHE_SIZE = 128
+
+    def __init__(self, pyramid, parent=None, **kwargs):
+        super(TiledWorldmapItem, self).__init__(parent, **kwargs)
+        # @NOTE: needed to get the actual exposed rect in paint
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        #: the :class:`TilePyramid`
+        self.pyramid = pyramid
+
+        #: max number of cached tile pixmaps
+        self.cachesize = self.CACHE_SIZE
+
+        self._cache = collections.OrderedDict()
+        self._builder = None
+
+        if not pyramid.isvalid():
+            self._builder = TilePyramidBuilder(pyramid)
+            self._builder.finished.connect(self._onBuilderFinished)
+            self._builder.start()
+
+    def type(self):
+        return self.Type
+
+    def boundingRect(self):
+        return QtCore.QRectF(-180, -90, 360, 180)
+
+    def isReady(self):
+        return self._builder is None and self.pyramid.isvalid()
+
+    def close(self):
+        """Stop the pyramid building (if running)."""
+
+        if self._builder is not None:
+            self._builder.requestInterruption()
+            self._builder.wait()
+            self._builder = None
+
+    def _onBuilderFinished(self):
+        builder, self._builder = self._builder, None
+        if builder is not None and builder.error is not None:
+            _log.warning('unable to build the worldmap tile pyramid: %s',
+                         builder.error)
+        self._cache.clear()
+        self.update()
+
+    def _levelTransform(self, level):
+        # (pixel, line) of the level image --> (lon, lat)
+        width, height = self.pyramid.levelSize(level)
+        return QtGui.QTransform(360. / width, 0, 0, -180. / height, -180, 90)
+
+    def level(self, lod):
+        """Return the pyramid level for the *lod* level of detail.
+
+        *lod* is the number of device pixels per degree, the coarsest
+        level with at least the same resolution is selected.
+
+        """
+
+        width = self.pyramid.levelSize(0)[0]
+        if lod <= 0:
+            return self.pyramid.levelCount() - 1
+
+        level = int(math.floor(math.log(width / 360. / lod, 2)))
+        return min(max(level, 0), self.pyramid.levelCount() - 1)
+
+    def tile(self, level, row, col):
+        """Return the tile pixmap (from the cache if available)."""
+
+        key = (level, row, col)
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+            return pixmap
+
+        pixmap = QtGui.QPixmap(self.pyramid.tileFilename(level, row, col))
+        if pixmap.isNull():
+            _log.debug('unable to load tile %s', key)
+        self._cache[key] = pixmap
+        while len(self._cache) > self.cachesize:
+            self._cache.popitem(last=False)
+
+        return pixmap
+
+    def paint(self, painter, option, widget=None):
+        if not self.isReady():
+            return
+
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.level(lod)
+        width, height = self.pyramid.levelSize(level)
+        tilesize = self.pyramid.tilesize
+
+        transform = self._levelTransform(level)
+        inverse, invertible = transform.inverted()
+        rect = inverse.mapRect(option.exposedRect).intersected(
+            QtCore.QRectF(0, 0, width, height))
+        if rect.isEmpty():
+            return
+
+        painter.save()
+        try:
+            painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+            painter.setTransform(transform, True)
+            for row in range(int(rect.top() // tilesize),
+                             int(math.ceil(rect.bottom() / tilesize))):
+                for col in range(int(rect.left() // tilesize),
+                                 int(math.ceil(rect.right() / tilesize))):
+                    pixmap = self.tile(level, row, col)
+                    if not pixmap.isNull():
+                        painter.drawPixmap(
+                            QtCore.QPointF(col * tilesize, row * tilesize),
+                            pixmap)
+        finally:
+            painter.restore()
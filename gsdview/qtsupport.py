@@ -843,6 +843,59 @@ def numpy2qimage(data, colortable=GRAY_COLORTABLE):
     return result
 
 
+def numpy2qpolygonf(xy):
+    """Convert a (N, 2) array of coordinates into a QPolygonF.
+
+    When the Qt binding exposes the internal buffer of the polygon
+    (PyQt) coordinates are copied in bulk, otherwise points are set one
+    by one.
+
+    """
+
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    npoints = len(xy)
+
+    qpoly = QtGui.QPolygonF(npoints)
+    if not npoints:
+        return qpoly
+
+    try:
+        ptr = qpoly.data()
+        ptr.setsize(xy.nbytes)
+        buf = np.frombuffer(ptr, np.float64)
+    except (AttributeError, TypeError, ValueError):
+        for index, (x, y) in enumerate(xy.tolist()):
+            qpoly[index] = QtCore.QPointF(x, y)
+    else:
+        buf[:] = xy.ravel()
+
+    return qpoly
+
+
+def qpolygonf2numpy(qpoly):
+    """Convert a QPolygonF into a (N, 2) array of coordinates.
+
+    This is the inverse of :func:`numpy2qpolygonf`: when possible
+    coordinates are copied in bulk from the internal buffer of the
+    polygon.
+
+    """
+
+    npoints = qpoly.size()
+    if not npoints:
+        return np.zeros((0, 2))
+
+    try:
+        ptr = qpoly.data()
+        ptr.setsize(2 * npoints * np.dtype(np.float64).itemsize)
+        xy = np.frombuffer(ptr, np.float64).copy()
+    except (AttributeError, TypeError, ValueError):
+        xy = np.asarray([(point.x(), point.y()) for point in qpoly],
+                        dtype=np.float64)
+
+    return xy.reshape(-1, 2)
+
+
 # Resources helpers #########################################################
 def getuifile(name, package=None):
     """Return the ui file path.
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+
+"""Save and restore of working sessions.
+
+A session records open products (and sub-datasets), MDI sub-windows
+geometry, view transforms, stretch ranges and overview levels.
+
+Products are re-opened in background (in parallel) and views are
+restored as soon as the corresponding product is available, the first
+paint of each view uses cached coarse overviews.
+
+"""
+
+
+import os
+import json
+import logging
+import tempfile
+
+from qtpy import QtCore, QtGui, QtWidgets
+
+from gsdview.appsite import USERCONFIGDIR
+
+
+_log = logging.getLogger(__name__)
+
+
+#: default session file
+SESSION_FILENAME = os.path.join(USERCONFIGDIR, 'session.json')
+
+#: the first paint of restored views uses overviews that are
+#: PREVIEW_FACTOR times coarser than the ones used in the saved session
+PREVIEW_FACTOR = 4
+
+
+class SessionManager(QtCore.QObject):
+    """Save and restore the state of the application.
+
+    Backends are expected to provide the following interface:
+
+    * `openFile(filename)` returning a (placeholder) item
+    * `itemState(item)` and `itemFromState(state)`
+    * `newImageView(item)` returning the new sub-window
+    * the `datasetOpened(item)` signal
+
+    """
+
+    VERSION = 1
+
+    def __init__(self, app, filename=SESSION_FILENAME, **kwargs):
+        super(SessionManager, self).__init__(app, **kwargs)
+        self.app = app
+
+        #: session file
+        self.filename = filename
+
+        self._pending = {}
+        self._connected = set()
+
+    def _backend(self, item):
+        try:
+            backend = self.app.pluginmanager.plugins[item.backend]
+        except (AttributeError, KeyError):
+            return None
+        if not hasattr(backend, 'itemState'):
+            return None
+        return backend
+
+    # Save ##################################################################
+    def _datasetState(self, item):
+        subdatasets = []
+        for row in range(item.rowCount()):
+            child = item.child(row)
+            isopen = getattr(child, 'isopen', None)
+            if isopen is not None and isopen():
+                subdatasets.append(child.filename)
+
+        return {
+            'backend': item.backend,
+            'filename': item.filename,
+            'subdatasets': subdatasets,
+        }
+
+    def _windowState(self, subwin, backend):
+        state = {
+            'backend': subwin.item.backend,
+            'item': backend.itemState(subwin.item),
+            'geometry': bytes(subwin.saveGeometry().toHex()).decode('ascii'),
+            'maximized': bool(subwin.isMaximized()),
+            'active': subwin is self.app.mdiarea.activeSubWindow(),
+        }
+
+        view = subwin.widget()
+        if isinstance(view, QtWidgets.QGraphicsView):
+            t = view.transform()
+            state['transform'] = [t.m11(), t.m12(), t.m13(),
+                                  t.m21(), t.m22(), t.m23(),
+                                  t.m31(), t.m32(), t.m33()]
+            center = view.mapToScene(view.viewport().rect().center())
+            state['center'] = [center.x(), center.y()]
+
+        graphicsitem = getattr(subwin.item, 'graphicsitem', None)
+        if getattr(graphicsitem, 'stretch', None) is not None:
+            state['stretch'] = [float(value)
+                                for value in graphicsitem.stretch.range]
+        if hasattr(graphicsitem, 'ovrlevel'):
+            state['ovrlevel'] = int(graphicsitem.ovrlevel)
+
+        return state
+
+    def state(self):
+        """Return the current session state (JSON serializable)."""
+
+        datasets = []
+        root = self.app.datamodel.invisibleRootItem()
+        for row in range(root.rowCount()):
+            item = root.child(row)
+            if self._backend(item) and getattr(item, 'filename', None):
+                datasets.append(self._datasetState(item))
+
+        windows = []
+        for subwin in self.app.mdiarea.subWindowList():
+            item = getattr(subwin, 'item', None)
+            backend = self._backend(item)
+            if backend is None:
+                continue
+            try:
+                windows.append(self._windowState(subwin, backend))
+            except Exception as e:
+                _log.debug('unable to save the state of "%s": %s',
+                           subwin.windowTitle(), e, exc_info=True)
+
+        return {
+            'version': self.VERSION,
+            'datasets': datasets,
+            'windows': windows,
+        }
+
+    def save(self, filename=None):
+        """Save the current session."""
+
+        if filename is None:
+            filename = self.filename
+
+        data = json.dumps(self.state(), indent=1)
+        try:
+            dirname = os.path.dirname(filename)
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            fd, tmpfilename = tempfile.mkstemp(dir=dirname, suffix='.json')
+            with os.fdopen(fd, 'w') as fd:
+                fd.write(data)
+            os.replace(tmpfilename, filename)
+        except OSError as e:
+            _log.warning('unable to save the session: %s', e)
+
+    # Restore ###############################################################
+    def load(self, filename=None):
+        """Load a session state from file (None if not available)."""
+
+        if filename is None:
+            filename = self.filename
+
+        try:
+            with open(filename) as fd:
+                state = json.load(fd)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            _log.warning('unable to load the session: %s', e)
+            return None
+
+        if state.get('version') != self.VERSION:
+            _log.info('incompatible session file: "%s"', filename)
+            return None
+
+        return state
+
+    def restore(self, state=None):
+        """Restore the session *state* (by default the saved one).
+
+        Products are opened asynchronously, views are restored when
+        the corresponding product becomes available.
+
+        """
+
+        if state is None:
+            state = self.load()
+        if not state:
+            return
+
+        plugins = self.app.pluginmanager.plugins
+        for dsstate in state.get('datasets', []):
+            backend = plugins.get(dsstate.get('backend'))
+            if not hasattr(backend, 'itemState'):
+                continue
+
+            filename = os.path.normpath(os.path.abspath(dsstate['filename']))
+            windows = [winstate for winstate in state.get('windows', [])
+                       if winstate['item']['filename'] == dsstate['filename']]
+            self._pending[filename] = (dsstate, windows)
+
+            if backend not in self._connected:
+                backend.datasetOpened.connect(self._onDatasetOpened)
+                self._connected.add(backend)
+
+            _log.debug('restore "%s"', filename)
+            item = backend.openFile(filename)
+            if item is not None:
+                self.app.datamodel.appendRow(item)
+            else:
+                # already open
+                item = backend.findItemFromFilename(filename)
+                if item is not None:
+                    self._onDatasetOpened(item)
+
+    @QtCore.Slot(object)
+    def _onDatasetOpened(self, item):
+        filename = os.path.normpath(os.path.abspath(item.filename))
+        entry = self._pending.pop(filename, None)
+        if entry is None:
+            return
+
+        dsstate, windows = entry
+        backend = self._backend(item)
+        for subdataset in dsstate.get('subdatasets', []):
+            backend.itemFromState({'filename': item.filename,
+                                   'subdataset': subdataset})
+
+        for winstate in windows:
+            try:
+                self._restoreWindow(backend, winstate)
+            except Exception as e:
+                _log.warning('unable to restore the view of "%s": %s',
+                             item.filename, e)
+                _log.debug('', exc_info=True)
+
+    def _restoreWindow(self, backend, state):
+        item = backend.itemFromState(state['item'])
+        if item is None:
+            _log.info('unable to find the item %s', state['item'])
+            return
+
+        subwin = backend.newImageView(item)
+        if subwin is None:
+            return
+
+        if state.get('maximized'):
+            subwin.showMaximized()
+        else:
+            subwin.showNormal()
+            geometry = state.get('geometry')
+            if geometry:
+                subwin.restoreGeometry(
+                    QtCore.QByteArray.fromHex(geometry.encode('ascii')))
+
+        view = subwin.widget()
+        if isinstance(view, QtWidgets.QGraphicsView):
+            if 'transform' in state:
+                view.setTransform(QtGui.QTransform(*state['transform']))
+            if 'center' in state:
+                view.centerOn(*state['center'])
+
+        graphicsitem = getattr(item, 'graphicsitem', None)
+        stretch = state.get('stretch')
+        if stretch and hasattr(graphicsitem, 'setStretchRange'):
+            if getattr(graphicsitem, 'stretch', None) is not None:
+                graphicsitem.setStretchRange(*stretch)
+
+        # @NOTE: show cached coarse overviews first
+        if hasattr(graphicsitem, 'previewlevel'):
+            graphicsitem.previewlevel = PREVIEW_FACTOR * state.get(
+                'ovrlevel', 1)
+
+        if state.get('active'):
+            self.app.mdiarea.setActiveSubWindow(subwin)
@@ -23,17 +23,22 @@
 
 import os
 import sys
+import json
 import stat
+import time
 import uuid
 import locale
+import hashlib
+import logging
+import tempfile
 import platform
+import threading
 import traceback
 import email.utils  # @TODO: check
 
 try:
     import pkg_resources
 except ImportError:
-    import logging
     logging.getLogger(__name__).debug('"pkg_resources" not found.')
 
 from gsdview import info
@@ -261,14 +266,296 @@ else:
         return total
 
 
-def data_uuid(path, prefixlen=23):
-    path = os.path.normpath(os.path.abspath(os.path.expanduser(path)))
-    st = os.stat(path)
+# Fingerprints ##############################################################
+#: available fingerprinting strategies (see :func:`data_uuid`)
+FINGERPRINT_STRATEGIES = ('stat', 'tree', 'manifest', 'sampled', 'header')
+
+#: default fingerprinting strategies for files and directories
+DEFAULT_FINGERPRINT_STRATEGY = {
+    'file': 'stat',
+    'dir': 'manifest',
+}
+
+#: well known manifest files of directory based products
+MANIFEST_FILENAMES = (
+    'manifest.safe',    # Sentinel SAFE
+    'MTD_MSIL1C.xml',   # Sentinel-2 L1C
+    'MTD_MSIL2A.xml',   # Sentinel-2 L2A
+    'product.xml',      # RADARSAT-2
+    'VDF_DAT.001',      # CEOS volume directory file
+    'METADATA.DIM',     # DIMAP
+)
+
+#: number of files sampled by the "sampled" strategy
+FINGERPRINT_NSAMPLES = 16
+
+#: number of bytes hashed by the "header" strategy
+FINGERPRINT_HEADER_SIZE = 64 * 1024
+
+#: default filename of the persistent fingerprint index
+FINGERPRINT_INDEX_FILENAME = os.path.join(appsite.USERCONFIGDIR,
+                                          'fingerprints.json')
+
+
+def _hash_file(filename, size=None, hashobj=None):
+    if hashobj is None:
+        hashobj = hashlib.sha1()
+    with open(filename, 'rb') as fd:
+        if size is None:
+            for data in iter(lambda: fd.read(FINGERPRINT_HEADER_SIZE), b''):
+                hashobj.update(data)
+        else:
+            hashobj.update(fd.read(size))
+    return hashobj
+
+
+def _scandir(path):
+    return sorted(os.scandir(path), key=lambda entry: entry.name)
+
+
+def _stat_key(entry):
+    st = entry.stat(follow_symlinks=False)
+    return '{}:{}:{}'.format(entry.name, st.st_mtime_ns, st.st_size)
+
+
+def _fingerprint_stat(path, st):
+    # @NOTE: for directories only the top level directory is considered
+    return '{}:{}'.format(st[stat.ST_MTIME], st[stat.ST_SIZE])
+
+
+def _fingerprint_tree(path, st):
     if os.path.isdir(path):
         size = get_tree_size(path)
     else:
         size = st[stat.ST_SIZE]
-    uid = '{}:{}:{}'.format(path, st[stat.ST_MTIME], size)
+    return '{}:{}'.format(st[stat.ST_MTIME], size)
+
+
+def _fingerprint_manifest(path, st):
+    if not os.path.isdir(path):
+        return _fingerprint_stat(path, st)
+
+    entries = _scandir(path)
+    hashobj = hashlib.sha1()
+    manifests = [entry for entry in entries
+                 if entry.name in MANIFEST_FILENAMES and entry.is_file()]
+    if manifests:
+        for entry in manifests:
+            hashobj.update(entry.name.encode('utf-8'))
+            _hash_file(entry.path, hashobj=hashobj)
+    else:
+        # no manifest: use the listing of the top level directory
+        for entry in entries:
+            hashobj.update(_stat_key(entry).encode('utf-8'))
+
+    return '{}:{}'.format(st[stat.ST_MTIME], hashobj.hexdigest())
+
+
+def _fingerprint_sampled(path, st):
+    if not os.path.isdir(path):
+        return _fingerprint_stat(path, st)
+
+    # top level entries are always listed, only a regularly spaced
+    # sample of them is stat-ed
+    entries = _scandir(path)
+    step = max(1, len(entries) // FINGERPRINT_NSAMPLES)
+    hashobj = hashlib.sha1()
+    for entry in entries:
+        hashobj.update(entry.name.encode('utf-8'))
+    for entry in entries[::step][:FINGERPRINT_NSAMPLES]:
+        hashobj.update(_stat_key(entry).encode('utf-8'))
+
+    return '{}:{}'.format(st[stat.ST_MTIME], hashobj.hexdigest())
+
+
+def _fingerprint_header(path, st):
+    # @NOTE: independent from modification times (e.g. products copied
+    #        or re-staged preserve their fingerprint)
+    if os.path.isdir(path):
+        filenames = [entry.path for entry in _scandir(path)
+                     if entry.name in MANIFEST_FILENAMES and entry.is_file()]
+        size = len(filenames)
+    else:
+        filenames = [path]
+        size = st[stat.ST_SIZE]
+
+    hashobj = hashlib.sha1()
+    for filename in filenames:
+        _hash_file(filename, FINGERPRINT_HEADER_SIZE, hashobj)
+
+    return '{}:{}'.format(size, hashobj.hexdigest())
+
+
+_FINGERPRINT_FUNCTIONS = {
+    'stat': _fingerprint_stat,
+    'tree': _fingerprint_tree,
+    'manifest': _fingerprint_manifest,
+    'sampled': _fingerprint_sampled,
+    'header': _fingerprint_header,
+}
+
+
+class FingerprintIndex(object):
+    """Small persistent index of data fingerprints.
+
+    Fingerprints computed by :func:`data_uuid` are stored in a JSON
+    file together with the modification time, size and inode of the
+    top level path, so that the fingerprint of a known (and not
+    modified) product can be retrieved with a single stat call.
+
+    .. note:: changes to files in sub-directories of directory based
+              products that do not modify the top level directory are
+              not detected by the index.
+
+    The index is thread safe (products are opened in worker threads).
+
+    """
+
+    #: maximum number of entries (least recently used ones are dropped)
+    MAXENTRIES = 1000
+
+    def __init__(self, filename=FINGERPRINT_INDEX_FILENAME):
+        self.filename = filename
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # @NOTE: to be called with the lock held
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.filename) as fd:
+                    self._entries = json.load(fd)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logging.getLogger(__name__).debug(
+                    'unable to load the fingerprint index: %s', e)
+        return self._entries
+
+    @property
+    def entries(self):
+        """A snapshot (copy) of the index entries."""
+
+        with self._lock:
+            return dict(self._load())
+
+    @staticmethod
+    def _key(st, strategy):
+        return [st.st_mtime_ns, st.st_size, st.st_ino, strategy]
+
+    def get(self, path, st, strategy):
+        with self._lock:
+            entry = self._load().get(path)
+            if entry and entry['key'] == self._key(st, strategy):
+                entry['atime'] = time.time()
+                return entry['fingerprint']
+        return None
+
+    def set(self, path, st, strategy, fingerprint):
+        with self._lock:
+            entries = self._load()
+            entries[path] = dict(key=self._key(st, strategy),
+                                 fingerprint=fingerprint, atime=time.time())
+            if len(entries) > self.MAXENTRIES:
+                lru = sorted(entries, key=lambda path: entries[path]['atime'])
+                for path in lru[:len(entries) - self.MAXENTRIES]:
+                    del entries[path]
+        self.save()
+
+    def save(self):
+        # entries are copied under the lock, the file is written outside
+        # of it (os.replace makes concurrent saves safe)
+        with self._lock:
+            entries = {path: dict(entry)
+                       for path, entry in self._load().items()}
+
+        dirname = os.path.dirname(self.filename)
+        try:
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            fd, tmpfilename = tempfile.mkstemp(dir=dirname or None,
+                                               suffix='.json')
+            with os.fdopen(fd, 'w') as fd:
+                json.dump(entries, fd)
+            os.replace(tmpfilename, self.filename)
+        except OSError as e:
+            logging.getLogger(__name__).debug(
+                'unable to save the fingerprint index: %s', e)
+
+
+_fingerprint_index = None
+_fingerprint_index_lock = threading.Lock()
+
+
+def fingerprint_index():
+    """Return the default (shared) :class:`FingerprintIndex`."""
+
+    global _fingerprint_index
+    with _fingerprint_index_lock:
+        if _fingerprint_index is None:
+            _fingerprint_index = FingerprintIndex()
+        return _fingerprint_index
+
+
+def set_fingerprint_index(index):
+    """Replace the default :class:`FingerprintIndex` (e.g. in tests).
+
+    Return the previous one.
+
+    """
+
+    global _fingerprint_index
+    with _fingerprint_index_lock:
+        previous, _fingerprint_index = _fingerprint_index, index
+    return previous
+
+
+def data_uuid(path, prefixlen=23, strategy=None, index=None):
+    """Return an unique identifier of the data in *path*.
+
+    The identifier is built from the *path* and a fingerprint of data
+    computed according to the selected *strategy*:
+
+    * "stat": modification time and size of *path* (the top level
+      directory only for directory based products)
+    * "tree": modification time of *path* and total size of all files
+      in the tree (slow for large directory trees)
+    * "manifest": modification time and content hash of the manifest
+      files (see :data:`MANIFEST_FILENAMES`) or, if no manifest is
+      present, of the listing of the top level directory
+    * "sampled": modification time and listing of the top level
+      directory plus the stats of a sample of
+      :data:`FINGERPRINT_NSAMPLES` files
+    * "header": content hash of the first
+      :data:`FINGERPRINT_HEADER_SIZE` bytes of the file (of the
+      manifest files for directories)
+
+    If *strategy* is None the default one for files or directories is
+    used (see :data:`DEFAULT_FINGERPRINT_STRATEGY`).
+
+    If a :class:`FingerprintIndex` is provided, fingerprints are
+    memoized in it.
+
+    """
+
+    path = os.path.normpath(os.path.abspath(os.path.expanduser(path)))
+    st = os.stat(path)
+    if strategy is None:
+        isdir = stat.S_ISDIR(st.st_mode)
+        strategy = DEFAULT_FINGERPRINT_STRATEGY['dir' if isdir else 'file']
+    if strategy not in _FINGERPRINT_FUNCTIONS:
+        raise ValueError('invalid fingerprint strategy: %r' % strategy)
+
+    fingerprint = None
+    if index is not None:
+        fingerprint = index.get(path, st, strategy)
+    if fingerprint is None:
+        fingerprint = _FINGERPRINT_FUNCTIONS[strategy](path, st)
+        if index is not None:
+            index.set(path, st, strategy, fingerprint)
+
+    uid = '{}:{}'.format(path, fingerprint)
     uid = uuid.uuid5(uuid.NAMESPACE_URL, uid)
     if prefixlen > 0:
         prefix = os.path.basename(path)[:prefixlen]
@@ -284,6 +284,10 @@ class GeneralPreferencesPage(QtWidgets.QWidget, GeneralPreferencesPageBase):
             # cache directory
             cachedir = settings.value('cachedir')
             self.cachedirEntryWidget.setText(cachedir)
+
+            # session
+            value = settings.value('restore_session', True, type=bool)
+            self.restoreSessionCheckBox.setChecked(value)
         finally:
             settings.endGroup()
 
@@ -312,6 +316,9 @@ class GeneralPreferencesPage(QtWidgets.QWidget, GeneralPreferencesPageBase):
 
             self.cachedirEntryWidget.setText(cachedir)
 
+            # session
+            settings.setValue('restore_session',
+                              self.restoreSessionCheckBox.isChecked())
         finally:
             settings.endGroup()
 
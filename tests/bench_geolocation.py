@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+"""Benchmarks for coordinate conversions on projected datasets.
+
+A regular grid of points (1e6 points by default) is converted with
+:class:`gsdview.gdalbackend.gdalsupport.CoordinateMapper`:
+
+* "loop": one call to the PROJ library per point (old behaviour)
+* "bulk": a single call to the PROJ library for all points
+
+Both the direct (image to geographic) and the inverse (geographic to
+image) conversions are measured.
+
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from osgeo import gdal
+from osgeo import osr
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview.gdalbackend import gdalsupport
+
+
+def make_dataset(xsize, ysize, epsg=32633):
+    driver = gdal.GetDriverByName('MEM')
+    ds = driver.Create('', xsize, ysize, 1, gdal.GDT_Byte)
+    sref = osr.SpatialReference()
+    sref.ImportFromEPSG(epsg)
+    ds.SetProjection(sref.ExportToWkt())
+    ds.SetGeoTransform((400000., 30., 0., 4600000., 0., -30.))
+    return ds
+
+
+def loop_img2geo(mapper, pixel, line):
+    M, C = mapper._direct_transform
+    xy = mapper._transform(pixel, line, M, C)
+    for index, (x, y) in enumerate(xy.transpose()):
+        xy[:, index] = mapper._srTransform.TransformPoint(x, y)[:2]
+    return xy[0], xy[1]
+
+
+def loop_geo2img(mapper, lon, lat):
+    xy = np.array((np.ravel(lon), np.ravel(lat)))
+    for index, (x, y) in enumerate(xy.transpose()):
+        xy[:, index] = mapper._srInverseTransform.TransformPoint(x, y)[:2]
+    M, C = mapper._inverse_transform
+    rc = mapper._transform(xy[0], xy[1], M, C)
+    return rc[0], rc[1]
+
+
+def timeit(func, *args, repeat=3):
+    elapsed = []
+    for count in range(repeat):
+        t0 = time.time()
+        func(*args)
+        elapsed.append(time.time() - t0)
+    return min(elapsed)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--npoints', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+
+    size = int(np.sqrt(args.npoints))
+    mapper = gdalsupport.CoordinateMapper(make_dataset(size, size))
+    pixel, line = np.meshgrid(np.arange(size, dtype=np.float64),
+                              np.arange(size, dtype=np.float64))
+    lon, lat = mapper.imgToGeoPoints(pixel, line)
+
+    print('%dx%d points grid' % (size, size))
+    print('%-8s %-10s %12s' % ('mode', 'direction', 'time [s]'))
+    for mode, img2geo, geo2img in (
+            ('loop', loop_img2geo, loop_geo2img),
+            ('bulk', mapper.imgToGeoPoints, mapper.geoToImgPoints)):
+        elapsed = timeit(img2geo, pixel, line, repeat=args.repeat)
+        print('%-8s %-10s %12.3f' % (mode, 'img2geo', elapsed))
+        elapsed = timeit(geo2img, lon, lat, repeat=args.repeat)
+        print('%-8s %-10s %12.3f' % (mode, 'geo2img', elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+"""Benchmarks for the opening of datasets with many bands.
+
+A synthetic many-band dataset is opened as a
+:class:`gsdview.gdalbackend.modelitems.CachedDatasetItem` and the
+open time and the memory used are measured:
+
+* "lazy": graphics scenes are created on demand (only the item is
+  created)
+* "eager": graphics scenes and items of all bands are created at open
+  time (old behaviour)
+
+Each measure is performed in a separate process.
+
+"""
+
+import os
+import sys
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+import multiprocessing
+
+from osgeo import gdal
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+
+def make_dataset(filename, xsize, ysize, nbands, dtype=gdal.GDT_UInt16):
+    driver = gdal.GetDriverByName('GTiff')
+    ds = driver.Create(filename, xsize, ysize, nbands, dtype,
+                       ['TILED=YES', 'INTERLEAVE=BAND', 'SPARSE_OK=TRUE'])
+    ds = None
+    return filename
+
+
+def maxrss():
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(filename, cachedir, mode):
+    from qtpy import QtWidgets, QtGui
+
+    from gsdview.gdalbackend import modelitems
+
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication([])
+    model = QtGui.QStandardItemModel()
+    modelitems.CachedDatasetItem.CACHEDIR = cachedir
+
+    # create the cache in advance
+    item = modelitems.CachedDatasetItem(filename)
+    model.appendRow(item)
+    item.close()
+
+    rss0 = maxrss()
+    t0 = time.time()
+    item = modelitems.CachedDatasetItem(filename)
+    model.appendRow(item)
+    if mode == 'eager':
+        for index in range(1, item.RasterCount + 1):
+            item.GetRasterBand(index).scene
+    elapsed = time.time() - t0
+
+    return elapsed, maxrss() - rss0
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--xsize', type=int, default=1024)
+    parser.add_argument('--ysize', type=int, default=1024)
+    parser.add_argument('--nbands', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_modelitems_')
+    try:
+        filename = make_dataset(os.path.join(root, 'cube.tif'), args.xsize,
+                                args.ysize, args.nbands)
+        cachedir = os.path.join(root, 'cache')
+
+        print('%dx%dx%d synthetic dataset' % (args.xsize, args.ysize,
+                                               args.nbands))
+        print('%-8s %12s %12s' % ('mode', 'time [ms]', 'mem [kB]'))
+        ctx = multiprocessing.get_context('spawn')
+        for mode in ('eager', 'lazy'):
+            results = []
+            for count in range(args.repeat):
+                with ctx.Pool(1) as pool:
+                    results.append(pool.apply(run,
+                                              (filename, cachedir, mode)))
+            elapsed = min(result[0] for result in results)
+            memory = min(result[1] for result in results)
+            print('%-8s %12.1f %12d' % (mode, elapsed * 1e3, memory))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
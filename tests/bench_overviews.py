@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+"""Benchmarks for overview computation.
+
+Compare the parallel overview builder (:func:`gdalsupport.ovrBuild`)
+with the external *gdaladdo* tool on a synthetic dataset.
+
+With the "--planner" option overview levels selected by the cost model
+planner (:func:`gdalsupport.ovrPlanLevels`) are compared with the ones
+selected by :func:`gdalsupport.ovrComputeLevels` (using the same storage
+budget) in terms of measured frame latency over a set of synthetic
+datasets.
+
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+from osgeo import gdal
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview.gdalbackend import gdalsupport
+
+
+def make_dataset(filename, xsize, ysize, nbands, dtype=gdal.GDT_UInt16,
+                 options=('TILED=YES',)):
+    driver = gdal.GetDriverByName('GTiff')
+    ds = driver.Create(filename, xsize, ysize, nbands, dtype, list(options))
+    rows = 1024
+    for index in range(1, nbands + 1):
+        band = ds.GetRasterBand(index)
+        for y in range(0, ysize, rows):
+            nrows = min(rows, ysize - y)
+            data = np.random.randint(0, 4096, (nrows, xsize))
+            band.WriteArray(data, 0, y)
+    ds = None
+
+    # use a VRT as GSDView does for cached datasets
+    vrtfilename = os.path.splitext(filename)[0] + '.vrt'
+    gdalsupport.safe_vrt_copy(gdal.Open(filename), vrtfilename)
+
+    return vrtfilename
+
+
+def bench_gdaladdo(filename, levels, resampling):
+    cmd = ['gdaladdo', '-r', resampling, filename]
+    cmd.extend(str(level) for level in levels)
+    t0 = time.time()
+    subprocess.check_call(cmd, stdout=subprocess.DEVNULL)
+    return time.time() - t0
+
+
+def bench_ovrbuild(filename, levels, resampling, nthreads):
+    t0 = time.time()
+    gdalsupport.ovrBuild(filename, levels, resampling, nthreads)
+    return time.time() - t0
+
+
+def compare(filename1, filename2):
+    ds1 = gdal.Open(filename1)
+    ds2 = gdal.Open(filename2)
+    maxdiff = 0
+    for index in range(1, ds1.RasterCount + 1):
+        band1 = ds1.GetRasterBand(index)
+        band2 = ds2.GetRasterBand(index)
+        levels1 = gdalsupport.ovrLevels(band1)
+        levels2 = gdalsupport.ovrLevels(band2)
+        for level in levels1:
+            data1 = band1.GetOverview(levels1.index(level)).ReadAsArray()
+            data2 = band2.GetOverview(levels2.index(level)).ReadAsArray()
+            diff = np.abs(data1.astype(float) - data2).max()
+            maxdiff = max(maxdiff, diff)
+    return maxdiff
+
+
+def frame_latency(filename, zooms, viewsize=(1024, 768), nframes=4):
+    """Measure the mean latency of frames rendered at *zooms* factors."""
+
+    ds = gdal.Open(filename)
+    band = ds.GetRasterBand(1)
+    model = gdalsupport.OvrCostModel(band.XSize, band.YSize,
+                                     levels=gdalsupport.ovrLevels(band),
+                                     viewsize=viewsize)
+    levels = model.bestLevels([], zooms)
+    ovrlevels = gdalsupport.ovrLevels(band)
+
+    elapsed = []
+    for zoom, level in zip(zooms, levels):
+        if level == 1:
+            ovrband = band
+        else:
+            ovrband = band.GetOverview(ovrlevels.index(level))
+        w = int(min(viewsize[0] * zoom / level, ovrband.XSize))
+        h = int(min(viewsize[1] * zoom / level, ovrband.YSize))
+        for frame in range(nframes):
+            x = np.random.randint(0, ovrband.XSize - w + 1)
+            y = np.random.randint(0, ovrband.YSize - h + 1)
+            t0 = time.time()
+            ovrband.ReadAsArray(x, y, w, h)
+            elapsed.append(time.time() - t0)
+
+    return np.mean(elapsed)
+
+
+PLANNER_DATASETS = [
+    # xsize, ysize, nbands, data type, creation options
+    (8192, 8192, 1, gdal.GDT_UInt16, ()),
+    (8192, 8192, 1, gdal.GDT_UInt16, ('TILED=YES',)),
+    (8192, 8192, 1, gdal.GDT_Float32, ('COMPRESS=DEFLATE',)),
+    (4096, 16384, 3, gdal.GDT_Byte, ('TILED=YES', 'COMPRESS=DEFLATE')),
+    (16384, 4096, 2, gdal.GDT_CInt16, ()),
+]
+
+
+def bench_planner(root, nthreads=None):
+    print('%-40s %-22s %-22s %9s %9s' % (
+        'dataset', 'ovrComputeLevels', 'ovrPlanLevels',
+        'lat. [ms]', 'lat. [ms]'))
+    for index, (xsize, ysize, nbands, dtype, options) in enumerate(
+            PLANNER_DATASETS):
+        dirname = os.path.join(root, 'dataset%02d' % index)
+        os.makedirs(dirname)
+        src = make_dataset(os.path.join(dirname, 'src.tif'), xsize, ysize,
+                           nbands, dtype, options)
+
+        ds = gdal.Open(src)
+        default = gdalsupport.ovrComputeLevels(ds)
+        model = gdalsupport.ovrCostModel(ds)
+        budget = model.storage(default)
+        planned = gdalsupport.ovrPlanLevels(ds, budget)
+        ds = None
+
+        latencies = []
+        for name, levels in (('default', default), ('planned', planned)):
+            filename = os.path.join(dirname, name + '.vrt')
+            shutil.copy(src, filename)
+            gdalsupport.ovrBuild(filename, levels, nthreads=nthreads)
+            latencies.append(frame_latency(filename, model.zooms))
+
+        label = '%dx%dx%d %s %s' % (xsize, ysize, nbands,
+                                    gdal.GetDataTypeName(dtype),
+                                    ','.join(options))
+        print('%-40s %-22s %-22s %9.2f %9.2f' % (
+            label, default, planned, latencies[0] * 1e3, latencies[1] * 1e3))
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--xsize', type=int, default=8192)
+    parser.add_argument('--ysize', type=int, default=8192)
+    parser.add_argument('--nbands', type=int, default=3)
+    parser.add_argument('-r', '--resampling', default='average',
+                        choices=gdalsupport.OVR_RESAMPLING_METHODS)
+    parser.add_argument('-j', '--nthreads', type=int, default=None)
+    parser.add_argument('--planner', action='store_true', default=False,
+                        help='benchmark the overview levels planner')
+    parser.add_argument('levels', nargs='*', type=int,
+                        default=[2, 4, 8, 16, 32])
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_overviews_')
+    try:
+        if args.planner:
+            bench_planner(root, args.nthreads)
+            return
+
+        print('creating a %dx%dx%d synthetic dataset ...' % (
+            args.xsize, args.ysize, args.nbands))
+        src = make_dataset(os.path.join(root, 'src.tif'), args.xsize,
+                           args.ysize, args.nbands)
+        addo = os.path.join(root, 'addo.vrt')
+        shutil.copy(src, addo)
+        build = os.path.join(root, 'build.vrt')
+        shutil.copy(src, build)
+
+        t_addo = bench_gdaladdo(addo, args.levels, args.resampling)
+        print('gdaladdo:         %8.3f s' % t_addo)
+        t_build = bench_ovrbuild(build, args.levels, args.resampling,
+                                 args.nthreads)
+        print('ovrBuild:         %8.3f s' % t_build)
+        print('speedup:          %8.2f' % (t_addo / t_build))
+        print('max abs diff:     %8.3f' % compare(addo, build))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
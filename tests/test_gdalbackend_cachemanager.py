@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import threading
+from unittest import mock
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview.gdalbackend import cachemanager
+
+
+class CacheManagerTestCase(unittest.TestCase):
+    DATASIZE = 1024     # 1 kbyte
+    NENTRIES = 4
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(
+            prefix=self.__class__.__name__ + '_')
+        for index in range(self.NENTRIES):
+            self._addentry(index)
+        self.manager = cachemanager.CacheManager(self.cachedir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def _entrydir(self, index):
+        return os.path.join(self.cachedir, 'product%02d' % index)
+
+    def _addentry(self, index):
+        dirname = self._entrydir(index)
+        os.makedirs(os.path.join(dirname, 'subdataset01'))
+        for name in ('virtual-dataset.vrt',
+                     os.path.join('subdataset01', 'virtual-dataset.vrt')):
+            with open(os.path.join(dirname, name), 'wb') as fd:
+                fd.write(b'0' * self.DATASIZE)
+        # entries are sorted by access time
+        atime = time.time() - 100 + index
+        os.utime(dirname, (atime, atime))
+
+    def test_usage(self):
+        self.manager.scan()
+        self.assertEqual(len(self.manager.entries), self.NENTRIES)
+        self.assertEqual(self.manager.usage(),
+                         2 * self.DATASIZE * self.NENTRIES)
+
+    def test_entryname(self):
+        path = os.path.join(self._entrydir(1), 'subdataset01')
+        self.assertEqual(self.manager.entryname(path), 'product01')
+        self.assertIsNone(self.manager.entryname(self.cachedir))
+        self.assertIsNone(self.manager.entryname(tempfile.gettempdir()))
+
+    def test_no_quota(self):
+        self.assertEqual(self.manager.evict(), [])
+
+    def test_lru_eviction(self):
+        self.manager.quota = 2 * 2 * self.DATASIZE
+        self.manager.touch(self._entrydir(0))
+        evicted = self.manager.evict()
+        self.assertEqual(evicted, ['product01', 'product02'])
+        self.assertFalse(os.path.exists(self._entrydir(1)))
+        self.assertTrue(os.path.exists(self._entrydir(0)))
+        self.assertLessEqual(self.manager.usage(), self.manager.quota)
+
+    def test_pinned(self):
+        self.manager.quota = 1
+        self.manager.pin(self._entrydir(0))
+        self.manager.pin(os.path.join(self._entrydir(0), 'subdataset01'))
+        self.manager.unpin(self._entrydir(0))
+        self.manager.evict()
+        self.assertEqual(list(self.manager.entries), ['product00'])
+
+        self.manager.unpin(os.path.join(self._entrydir(0), 'subdataset01'))
+        self.manager.evict()
+        self.assertEqual(self.manager.entries, {})
+
+    def test_index(self):
+        self.manager.scan()
+        self.manager.touch(self._entrydir(0))
+        self.manager.save()
+        manager = cachemanager.CacheManager(self.cachedir)
+        self.assertEqual(manager.entries, self.manager.entries)
+
+    def _grow(self, index):
+        filename = os.path.join(self._entrydir(index), 'overviews.ovr')
+        with open(filename, 'wb') as fd:
+            fd.write(b'0' * self.DATASIZE)
+
+    def test_incremental(self):
+        self.manager.evict()
+        self.manager.save()
+        usage = self.manager.usage()
+
+        manager = cachemanager.CacheManager(self.cachedir)
+        self._grow(0)
+        self._grow(1)
+        manager.touch(self._entrydir(1))
+        sizes = []
+        get_tree_size = cachemanager.utils.get_tree_size
+        with mock.patch.object(cachemanager.utils, 'get_tree_size',
+                               side_effect=lambda path: sizes.append(path)
+                               or get_tree_size(path)):
+            manager.evict()
+        # only the tree of the accessed entry is walked
+        self.assertIn(self._entrydir(1), sizes)
+        self.assertTrue(all(path.startswith(self._entrydir(1))
+                            for path in sizes))
+        self.assertEqual(manager.usage(), usage + self.DATASIZE)
+
+        manager.evict(rescan=True)
+        self.assertEqual(manager.usage(), usage + 2 * self.DATASIZE)
+
+    def test_refresh_removed(self):
+        self.manager.scan()
+        self.manager.touch(self._entrydir(2))
+        shutil.rmtree(self._entrydir(2))
+        self.manager.refresh()
+        self.assertNotIn('product02', self.manager.entries)
+
+    def test_no_save_on_touch(self):
+        self.manager.touch(self._entrydir(0))
+        self.assertFalse(os.path.exists(self.manager.indexfilename))
+        self.manager.evict()
+        self.assertTrue(os.path.exists(self.manager.indexfilename))
+
+    def test_no_lock_while_removing(self):
+        self.manager.quota = 1
+        locked = []
+        rmtree = cachemanager.shutil.rmtree
+
+        def checkedrmtree(path, *args, **kwargs):
+            # the lock can be acquired by other threads
+            result = []
+
+            def acquire():
+                result.append(self.manager._lock.acquire(timeout=5))
+                if result[0]:
+                    self.manager._lock.release()
+
+            thread = threading.Thread(target=acquire)
+            thread.start()
+            thread.join()
+            locked.append(not result[0])
+            return rmtree(path, *args, **kwargs)
+
+        with mock.patch.object(cachemanager.shutil, 'rmtree',
+                               side_effect=checkedrmtree):
+            evicted = self.manager.evict()
+        self.assertEqual(len(evicted), self.NENTRIES)
+        self.assertEqual(locked, [False] * self.NENTRIES)
+        self.assertEqual(os.listdir(self.cachedir),
+                         [cachemanager.CacheManager.INDEX_FILENAME])
+
+    def test_trash(self):
+        trash = os.path.join(self.cachedir,
+                             cachemanager.CacheManager.TRASH_PREFIX + 'old')
+        os.makedirs(trash)
+        self.manager.scan()
+        self.assertFalse(os.path.exists(trash))
+        self.assertEqual(len(self.manager.entries), self.NENTRIES)
+
+    def test_background(self):
+        self.manager.quota = 1
+        self.manager.evictInBackground()
+        self.manager.evictInBackground()
+        self.manager.wait(10)
+        self.assertEqual(self.manager.usage(), 0)
+        self.assertEqual(os.listdir(self.cachedir),
+                         [cachemanager.CacheManager.INDEX_FILENAME])
+
+
+if __name__ == '__main__':
+    unittest.main()
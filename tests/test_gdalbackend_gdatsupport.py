@@ -22,10 +22,12 @@ import sys
 import shutil
 import tempfile
 import unittest
+import threading
 from xml.etree import ElementTree as etree
 
 import numpy as np
 from osgeo import gdal
+from osgeo import osr
 from osgeo.gdal_array import NumericTypeCodeToGDALTypeCode
 
 # Fix sys path
@@ -160,5 +162,737 @@ class SafeVrtCopyTestCase06(SafeVrtCopyTestCase05):
     RELATIVE_TO_VRT = 1
 
 
+class OvrDownsampleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.data = np.arange(35, dtype=np.uint16).reshape(5, 7)
+
+    def test_shape(self):
+        for factor in (1, 2, 3, 4, 8):
+            result = gdalsupport.ovrDownsample(self.data, factor)
+            self.assertEqual(result.shape, (-(-5 // factor), -(-7 // factor)))
+            self.assertEqual(result.dtype, self.data.dtype)
+
+    def test_average(self):
+        result = gdalsupport.ovrDownsample(self.data, 2)
+        self.assertEqual(result[0, 0], 4)
+        self.assertEqual(result[-1, -1], 34)
+
+    def test_nearest(self):
+        result = gdalsupport.ovrDownsample(self.data, 2, 'nearest')
+        self.assertEqual(result[0, 0], self.data[1, 1])
+        self.assertEqual(result[-1, -1], self.data[-1, -1])
+
+    def test_nodata(self):
+        data = self.data.copy()
+        data[:3, :3] = 0
+        result = gdalsupport.ovrDownsample(data, 3, nodata=0)
+        self.assertEqual(result[0, 0], 0)
+        self.assertEqual(result[1, 0], np.rint(np.mean(data[3:, :3])))
+
+    def test_cascade(self):
+        data = np.random.rand(100, 101)
+        result = gdalsupport.ovrDownsample(
+            gdalsupport.ovrDownsample(data, 2), 2)
+        expected = gdalsupport.ovrDownsample(data, 4)
+        self.assertTrue(np.allclose(result, expected))
+
+    def test_magphase(self):
+        data = np.exp(1j * np.full((4, 4), 0.5)) * np.arange(16).reshape(4, 4)
+        result = gdalsupport.ovrDownsample(data, 2, 'average_magphase')
+        self.assertTrue(np.allclose(np.angle(result), 0.5))
+        self.assertTrue(np.allclose(np.abs(result[0, 0]), 2.5))
+
+    def test_invalid_resampling(self):
+        self.assertRaises(ValueError, gdalsupport.ovrDownsample,
+                          self.data, 2, 'cubicspline')
+
+
+class OvrBuildTestCase(unittest.TestCase):
+    XSIZE = 301
+    YSIZE = 203
+    NBANDS = 3
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        self.data = np.random.randint(
+            0, 1000, (self.NBANDS, self.YSIZE, self.XSIZE)).astype(np.uint16)
+
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_UInt16)
+        for index, data in enumerate(self.data, 1):
+            ds.GetRasterBand(index).WriteArray(data)
+        ds = None
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_levels(self):
+        levels = gdalsupport.ovrBuild(self.filename, [2, 4, 3, 9],
+                                      nthreads=2)
+        self.assertEqual(levels, [2, 3, 4, 9])
+        ds = gdal.Open(self.filename)
+        self.assertEqual(sorted(gdalsupport.ovrLevels(ds)), levels)
+
+    def test_existing_levels(self):
+        gdalsupport.ovrBuild(self.filename, [2])
+        levels = gdalsupport.ovrBuild(self.filename, [2, 4])
+        self.assertEqual(levels, [4])
+
+    def test_data(self):
+        gdalsupport.ovrBuild(self.filename, [2, 4], nthreads=3)
+        ds = gdal.Open(self.filename)
+        for index, data in enumerate(self.data, 1):
+            band = ds.GetRasterBand(index)
+            level2 = gdalsupport.ovrDownsample(data, 2)
+            level4 = gdalsupport.ovrDownsample(level2, 2)
+            ovrlevels = gdalsupport.ovrLevels(band)
+            ovrband = band.GetOverview(ovrlevels.index(2))
+            self.assertTrue(np.all(ovrband.ReadAsArray() == level2))
+            ovrband = band.GetOverview(ovrlevels.index(4))
+            self.assertTrue(np.all(ovrband.ReadAsArray() == level4))
+
+    def test_callback(self):
+        progress = []
+
+        def callback(complete, message, data):
+            progress.append(complete)
+            return True
+
+        gdalsupport.ovrBuild(self.filename, [2, 4], callback=callback)
+        self.assertEqual(progress[-1], 1.)
+        self.assertEqual(progress, sorted(progress))
+
+    def test_interrupt(self):
+        self.assertRaises(RuntimeError, gdalsupport.ovrBuild,
+                          self.filename, [2, 4],
+                          callback=lambda *args: False)
+
+        # no blank level is left
+        ds = gdal.Open(self.filename)
+        self.assertEqual(gdalsupport.ovrLevels(ds), [])
+        ds = None
+        self.assertEqual(gdalsupport.ovrBuild(self.filename, [2, 4]),
+                         [2, 4])
+
+    def test_interrupt_internal(self):
+        gdalsupport.ovrBuild(self.filename, [2])
+        self.assertRaises(RuntimeError, gdalsupport.ovrBuild,
+                          self.filename, [2, 4],
+                          callback=lambda *args: False)
+
+        # existing internal overviews are preserved
+        ds = gdal.Open(self.filename)
+        band = ds.GetRasterBand(1)
+        self.assertEqual(gdalsupport.ovrLevels(band), [2])
+        self.assertTrue(np.all(band.GetOverview(0).ReadAsArray() ==
+                               gdalsupport.ovrDownsample(self.data[0], 2)))
+        ds = None
+        self.assertEqual(os.listdir(self.root), ['dataset.tif'])
+
+    def test_interrupt_external(self):
+        vrtfilename = os.path.join(self.root, 'dataset.vrt')
+        ds = gdal.GetDriverByName('VRT').CreateCopy(
+            vrtfilename, gdal.Open(self.filename))
+        ds = None
+        gdalsupport.ovrBuild(vrtfilename, [2])
+        self.assertTrue(os.path.isfile(vrtfilename + '.ovr'))
+
+        calls = []
+
+        def callback(complete, message, data):
+            calls.append(complete)
+            return False
+
+        self.assertRaises(RuntimeError, gdalsupport.ovrBuild,
+                          vrtfilename, [2, 4], nthreads=2,
+                          callback=callback)
+        self.assertEqual(len(calls), 1)
+
+        # existing overviews are preserved
+        ds = gdal.Open(vrtfilename)
+        self.assertEqual(gdalsupport.ovrLevels(ds), [2])
+        band = ds.GetRasterBand(1)
+        self.assertTrue(np.all(band.GetOverview(0).ReadAsArray() ==
+                               gdalsupport.ovrDownsample(self.data[0], 2)))
+        self.assertEqual(
+            [name for name in os.listdir(self.root) if name.endswith('.ovr')],
+            ['dataset.vrt.ovr'])
+
+
+class OvrCostModelTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = gdalsupport.OvrCostModel(
+            20000, 20000, nbands=1, itemsize=2, blocksize=(20000, 1),
+            readcost=2e-8, ovrreadcost=2e-9)
+
+    def test_storage(self):
+        self.assertEqual(self.model.storage([2]), 10000 * 10000 * 2)
+        self.assertEqual(self.model.storage([]), 0)
+
+    def test_existing_levels_storage(self):
+        model = gdalsupport.OvrCostModel(100, 100, levels=[2])
+        self.assertEqual(model.storage([2]), 0)
+
+    def test_read_time_scaling(self):
+        model = gdalsupport.OvrCostModel(
+            20000, 20000, nbands=3, itemsize=2, blocksize=(20000, 1),
+            readcost=2e-8, ovrreadcost=2e-9)
+        for level in (1, 4):
+            self.assertAlmostEqual(model.readTime(level, 4.),
+                                   3 * self.model.readTime(level, 4.))
+
+    def test_latency_decreases(self):
+        self.assertLess(self.model.latency([3, 9, 27]), self.model.latency())
+        self.assertLess(self.model.latency([2, 3, 9, 27]),
+                        self.model.latency([3, 9, 27]))
+
+    def test_candidates(self):
+        candidates = self.model.candidates()
+        self.assertIn(2, candidates)
+        self.assertIn(3, candidates)
+        self.assertIn(12, candidates)
+        self.assertNotIn(5, candidates)
+        self.assertLessEqual(max(candidates), np.ceil(self.model.maxfactor))
+
+    def test_budget(self):
+        for budget in (1e6, 1e7, 1e8):
+            levels = self.model.plan(budget)
+            self.assertLessEqual(self.model.storage(levels), budget)
+
+    def test_zero_budget(self):
+        self.assertEqual(self.model.plan(0), [])
+
+    def test_not_worse_than_default(self):
+        default = [3, 9, 27]
+        budget = self.model.storage(default)
+        levels = self.model.plan(budget)
+        self.assertLessEqual(self.model.latency(levels),
+                             self.model.latency(default))
+
+    def test_small_image(self):
+        model = gdalsupport.OvrCostModel(800, 600)
+        self.assertEqual(model.plan(), [])
+
+
+class OptimizeCachedVrtTestCase(unittest.TestCase):
+    XSIZE = 301
+    YSIZE = 203
+    NBANDS = 2
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        self.data = np.random.randint(
+            0, 1000, (self.NBANDS, self.YSIZE, self.XSIZE)).astype(np.uint16)
+
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_UInt16)
+        for index, data in enumerate(self.data, 1):
+            ds.GetRasterBand(index).WriteArray(data)
+
+        self.cachedir = os.path.join(self.root, 'cache')
+        self.vrtfilename, vrtds = gdalsupport.openCachedVrt(ds,
+                                                            self.cachedir)
+        vrtds = None
+        ds = None
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_optimize(self):
+        self.assertFalse(gdalsupport.isOptimizedVrt(self.vrtfilename))
+        filename = gdalsupport.optimizeCachedVrt(self.vrtfilename, [2, 4])
+        self.assertTrue(os.path.isfile(filename))
+        self.assertTrue(gdalsupport.isOptimizedVrt(self.vrtfilename))
+
+        # the original dataset is no longer needed
+        os.remove(self.filename)
+
+        ds = gdal.Open(self.vrtfilename)
+        for index, data in enumerate(self.data, 1):
+            band = ds.GetRasterBand(index)
+            self.assertTrue(np.all(band.ReadAsArray() == data))
+            self.assertEqual(gdalsupport.ovrLevels(band), [2, 4])
+            stats = band.GetStatistics(False, False)
+            self.assertEqual(stats[:2], [data.min(), data.max()])
+
+    def test_tiled(self):
+        filename = gdalsupport.optimizeCachedVrt(self.vrtfilename, [2])
+        ds = gdal.Open(filename)
+        self.assertEqual(ds.GetRasterBand(1).GetBlockSize(), [256, 256])
+        self.assertEqual(ds.GetMetadataItem('COMPRESSION',
+                                            'IMAGE_STRUCTURE'), 'DEFLATE')
+        self.assertFalse(os.path.exists(self.vrtfilename + '.ovr'))
+
+    def test_interrupt(self):
+        with open(self.vrtfilename, 'rb') as fd:
+            xml = fd.read()
+
+        self.assertRaises(RuntimeError, gdalsupport.optimizeCachedVrt,
+                          self.vrtfilename, [2],
+                          callback=lambda *args: False)
+
+        with open(self.vrtfilename, 'rb') as fd:
+            self.assertEqual(fd.read(), xml)
+        self.assertEqual(os.listdir(self.cachedir),
+                         [os.path.basename(self.vrtfilename)])
+
+
+class HandleRegistryTestCase(unittest.TestCase):
+    XSIZE = 64
+    YSIZE = 32
+    NBANDS = 2
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_Byte)
+        ds = None
+        self.registry = gdalsupport.HandleRegistry()
+
+    def tearDown(self):
+        self.registry.release()
+        shutil.rmtree(self.root)
+
+    def _threadhandle(self):
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(
+                self.registry.dataset(self.filename)))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_same_thread(self):
+        ds = self.registry.dataset(self.filename)
+        self.assertIs(self.registry.dataset(self.filename), ds)
+        self.assertEqual(ds.RasterXSize, self.XSIZE)
+
+    def test_other_thread(self):
+        ds = self.registry.dataset(self.filename)
+        self.assertIsNot(self._threadhandle(), ds)
+
+    def test_band(self):
+        band = self.registry.band(self.filename, self.NBANDS)
+        self.assertEqual(band.YSize, self.YSIZE)
+
+    def test_invalidate(self):
+        ds = self.registry.dataset(self.filename)
+        self.registry.invalidate(self.filename)
+        self.assertEqual(self.registry.generation(self.filename), 1)
+        self.assertIsNot(self.registry.dataset(self.filename), ds)
+
+    def test_invalid_key(self):
+        self.assertRaises((ValueError, RuntimeError), self.registry.dataset,
+                          os.path.join(self.root, 'missing.tif'))
+
+
+class PixelProbeTestCase(unittest.TestCase):
+    XSIZE = 64
+    YSIZE = 32
+    NBANDS = 3
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_UInt16)
+        for index in range(1, self.NBANDS + 1):
+            data = np.arange(self.XSIZE * self.YSIZE, dtype=np.uint16)
+            data.shape = (self.YSIZE, self.XSIZE)
+            ds.GetRasterBand(index).WriteArray(data * index)
+        ds = None
+        self.dataset = gdal.Open(self.filename)
+        self.probe = gdalsupport.PixelProbe(self.dataset)
+
+    def tearDown(self):
+        self.probe = None
+        self.dataset = None
+        shutil.rmtree(self.root)
+
+    def _expected(self, x, y):
+        return [(y * self.XSIZE + x) * index
+                for index in range(1, self.NBANDS + 1)]
+
+    def test_read(self):
+        self.assertEqual(self.probe.values(10, 5), self._expected(10, 5))
+        self.assertEqual(len(self.probe._cache), 1)
+
+    def test_outside(self):
+        self.assertIsNone(self.probe.values(self.XSIZE, 0))
+        self.assertIsNone(self.probe.values(-1, 0))
+
+    def test_blocks(self):
+        data = np.full((4, 4), 7, dtype=np.uint16)
+        values = self.probe.values(10, 5, {2: (8, 4, data, 1)})
+        expected = self._expected(10, 5)
+        expected[1] = 7
+        self.assertEqual(values, expected)
+
+    def test_no_read(self):
+        blocks = {
+            index: (8, 4, np.full((4, 4), index, dtype=np.uint16), 1)
+            for index in range(1, self.NBANDS + 1)
+        }
+        self.assertEqual(self.probe.values(10, 5, blocks), [1, 2, 3])
+        self.assertEqual(len(self.probe._cache), 0)
+
+    def test_overview_blocks(self):
+        # block of the overview level 4 including the pixel (20, 9)
+        data = np.arange(16, dtype=np.uint16).reshape(4, 4)
+        blocks = {index: (4, 1, data, 4)
+                  for index in range(1, self.NBANDS + 1)}
+        self.assertEqual(self.probe.values(20, 9, blocks), [5] * 3)
+        self.assertEqual(len(self.probe._cache), 0)
+
+        # probed full resolution values are preferred
+        self.probe.values(21, 9)
+        self.assertEqual(self.probe.values(21, 9, blocks),
+                         self._expected(21, 9))
+
+    def test_tilestores(self):
+        class TileStore(object):
+            def cachedValue(self, x, y):
+                return 100 if x < 8 else None
+
+        tilestores = {3: TileStore()}
+        values = self.probe.values(2, 3, tilestores=tilestores)
+        self.assertEqual(values, self._expected(2, 3)[:2] + [100])
+
+        values = self.probe.values(12, 3, tilestores=tilestores)
+        self.assertEqual(values, self._expected(12, 3))
+
+    def test_cache_size(self):
+        self.probe.cachesize = 2
+        for x in range(5):
+            self.probe.values(x, 0)
+        self.assertEqual(list(self.probe._cache), [(3, 0), (4, 0)])
+
+    def test_single_band(self):
+        driver = gdal.GetDriverByName('MEM')
+        ds = driver.Create('', 8, 8, 1, gdal.GDT_Float32)
+        ds.GetRasterBand(1).Fill(1.5)
+        probe = gdalsupport.PixelProbe(ds)
+        self.assertEqual(probe.values(3, 3), [1.5])
+
+    def test_mixed_types(self):
+        driver = gdal.GetDriverByName('MEM')
+        ds = driver.Create('', 8, 8, 1, gdal.GDT_UInt16)
+        ds.GetRasterBand(1).Fill(3)
+        ds.AddBand(gdal.GDT_Float32)
+        ds.GetRasterBand(2).Fill(0.25)
+        probe = gdalsupport.PixelProbe(ds)
+        self.assertEqual(probe.values(3, 3), [3, 0.25])
+
+
+class TransformPointsTestCase(unittest.TestCase):
+    class ArrayTransform(object):
+        # GDAL >= 3 bindings
+        def __init__(self):
+            self.calls = []
+
+        def TransformPoints(self, points):
+            self.calls.append(points)
+            points = np.asarray(points, dtype=np.float64)
+            return [(x + 1, y * 2, 0.) for x, y in points[:, :2]]
+
+    class SequenceTransform(ArrayTransform):
+        # older bindings
+        def TransformPoints(self, points):
+            if isinstance(points, np.ndarray):
+                raise TypeError('sequence of tuples expected')
+            return super(TransformPointsTestCase.SequenceTransform,
+                         self).TransformPoints(points)
+
+    def test_arrays(self):
+        transform = self.ArrayTransform()
+        x, y = gdalsupport.transformPoints(transform, [[1, 2], [3, 4]],
+                                           [5, 6, 7, 8])
+        np.testing.assert_array_equal(x, [2, 3, 4, 5])
+        np.testing.assert_array_equal(y, [10, 12, 14, 16])
+        self.assertEqual(len(transform.calls), 1)
+        self.assertIsInstance(transform.calls[0], np.ndarray)
+        self.assertEqual(transform.calls[0].shape, (4, 2))
+
+    def test_z(self):
+        transform = self.ArrayTransform()
+        gdalsupport.transformPoints(transform, [1, 2], [3, 4], [5, 6])
+        self.assertEqual(transform.calls[0].shape, (2, 3))
+
+    def test_sequences(self):
+        transform = self.SequenceTransform()
+        x, y = gdalsupport.transformPoints(transform, [1, 2], [3, 4])
+        np.testing.assert_array_equal(x, [2, 3])
+        np.testing.assert_array_equal(y, [6, 8])
+        self.assertEqual(transform.calls[-1], [(1., 3.), (2., 4.)])
+
+    def test_empty(self):
+        transform = self.ArrayTransform()
+        x, y = gdalsupport.transformPoints(transform, [], [])
+        self.assertEqual(len(x), 0)
+        self.assertEqual(transform.calls, [])
+
+
+class GeolocationGridTestCase(unittest.TestCase):
+    XSIZE = 3600
+    YSIZE = 1800
+    NNODES = 65
+
+    def setUp(self):
+        self.xnodes = np.linspace(0, self.XSIZE, self.NNODES)
+        self.ynodes = np.linspace(0, self.YSIZE, self.NNODES)
+        self.pixel, self.line = np.meshgrid(self.xnodes, self.ynodes)
+        self.lat = 90. - self.line / 10.
+
+    def _check(self, grid, pixel, line, expected):
+        lon, lat = grid.interpolate(pixel, line)
+        np.testing.assert_allclose(lon, expected, atol=1e-9)
+        for index, (x, y) in enumerate(zip(pixel, line)):
+            self.assertAlmostEqual(grid.lookup(x, y)[0], expected[index])
+
+    def test_global(self):
+        # 0.1 degrees per pixel, the prime meridian at the center
+        lon = -180. + self.pixel / 10.
+        grid = gdalsupport.GeolocationGrid(self.xnodes, self.ynodes, lon,
+                                           self.lat)
+        self.assertFalse(grid.wrapped)
+
+        pixel = np.array([0., 1790., 1800., 1810., 3600.])
+        line = np.full(pixel.shape, 900.)
+        self._check(grid, pixel, line, [-180., -1., 0., 1., 180.])
+
+    def test_antimeridian(self):
+        # from 170 to 190 (i.e. -170) degrees
+        lon = 170. + self.pixel / 180.
+        lon = np.where(lon > 180, lon - 360, lon)
+        grid = gdalsupport.GeolocationGrid(self.xnodes, self.ynodes, lon,
+                                           self.lat)
+        self.assertTrue(grid.wrapped)
+
+        pixel = np.array([0., 900., 1790., 1810., 2700., 3600.])
+        line = np.full(pixel.shape, 900.)
+        expected = 170. + pixel / 180.
+        expected = np.where(expected > 180, expected - 360, expected)
+        self._check(grid, pixel, line, expected)
+
+
+class CoordinateMapperTestCase(unittest.TestCase):
+    XSIZE = 200
+    YSIZE = 100
+    EPSG = 32633    # UTM 33N
+    GEOTRANSFORM = (400000., 30., 0., 4600000., 0., -30.)
+
+    def setUp(self):
+        driver = gdal.GetDriverByName('MEM')
+        self.dataset = driver.Create('', self.XSIZE, self.YSIZE, 1,
+                                     gdal.GDT_Byte)
+        sref = osr.SpatialReference()
+        sref.ImportFromEPSG(self.EPSG)
+        self.dataset.SetProjection(sref.ExportToWkt())
+        self.dataset.SetGeoTransform(self.GEOTRANSFORM)
+        self.mapper = gdalsupport.CoordinateMapper(self.dataset)
+
+    def test_per_point(self):
+        pixel = np.linspace(0, self.XSIZE, 7)
+        line = np.linspace(0, self.YSIZE, 7)
+        lon, lat = self.mapper.imgToGeoPoints(pixel, line)
+        transform = self.mapper._srTransform
+        for index, (x, y) in enumerate(zip(pixel, line)):
+            xgeo = self.GEOTRANSFORM[0] + x * self.GEOTRANSFORM[1]
+            ygeo = self.GEOTRANSFORM[3] + y * self.GEOTRANSFORM[5]
+            expected = transform.TransformPoint(xgeo, ygeo)[:2]
+            self.assertAlmostEqual(lon[index], expected[0])
+            self.assertAlmostEqual(lat[index], expected[1])
+
+        # lon, lat order
+        self.assertTrue(np.all((lon > 12) & (lon < 16)))
+        self.assertTrue(np.all((lat > 40) & (lat < 43)))
+
+    def test_geographic_srs(self):
+        wgs84 = osr.SpatialReference()
+        wgs84.SetWellKnownGeogCS('WGS84')
+        self.assertTrue(self.mapper.geographicSrs().IsSame(wgs84))
+
+        # the geographic reference system of the dataset is preserved
+        sref = osr.SpatialReference()
+        sref.ImportFromEPSG(4267)   # NAD27
+        self.dataset.SetProjection(sref.ExportToWkt())
+        self.dataset.SetGeoTransform((10., 0.01, 0., 45., 0., -0.01))
+        mapper = gdalsupport.CoordinateMapper(self.dataset)
+        self.assertTrue(mapper.geographicSrs().IsSame(sref))
+
+    def test_single_point(self):
+        lon, lat = self.mapper.imgToGeoPoints(10, 20)
+        self.assertEqual(lon.shape, (1,))
+        self.assertEqual(lat.shape, (1,))
+
+    def test_lookup(self):
+        grid = self.mapper.lookupGrid()
+        self.assertIs(self.mapper.lookupGrid(), grid)
+
+        for pixel, line in ((0, 0), (10.5, 20.5), (self.XSIZE, self.YSIZE)):
+            lon, lat = self.mapper.imgToGeo(pixel, line)
+            self.assertIsInstance(lon, float)
+            vlon, vlat = self.mapper.imgToGeoPoints(pixel, line)
+            self.assertAlmostEqual(lon, vlon[0], 6)
+            self.assertAlmostEqual(lat, vlat[0], 6)
+
+    def test_roundtrip(self):
+        pixel, line = np.meshgrid(np.arange(0, self.XSIZE, 10.),
+                                  np.arange(0, self.YSIZE, 10.))
+        lon, lat = self.mapper.imgToGeoPoints(pixel, line)
+        rpixel, rline = self.mapper.geoToImgPoints(lon, lat)
+        np.testing.assert_allclose(rpixel, pixel.ravel(), atol=1e-6)
+        np.testing.assert_allclose(rline, line.ravel(), atol=1e-6)
+
+
+class GCPCoordinateMapperTestCase(unittest.TestCase):
+    XSIZE = 400
+    YSIZE = 2000
+    NGCPS = 6
+
+    def setUp(self):
+        driver = gdal.GetDriverByName('MEM')
+        self.dataset = driver.Create('', self.XSIZE, self.YSIZE, 1,
+                                     gdal.GDT_Byte)
+        sref = osr.SpatialReference()
+        sref.SetWellKnownGeogCS('WGS84')
+
+        # curved swath
+        gcps = []
+        for line in np.linspace(0, self.YSIZE, self.NGCPS):
+            for pixel in np.linspace(0, self.XSIZE, self.NGCPS):
+                lon = 10. + 1e-3 * pixel + 1e-7 * line ** 2
+                lat = 40. + 2e-3 * line + 1e-7 * pixel * line
+                gcps.append(gdal.GCP(lon, lat, 0., pixel, line))
+        self.dataset.SetGCPs(gcps, sref.ExportToWkt())
+
+    def test_coordinate_mapper(self):
+        mapper = gdalsupport.coordinate_mapper(self.dataset)
+        self.assertIsInstance(mapper, gdalsupport.GCPCoordinateMapper)
+
+    def test_accuracy(self):
+        mapper = gdalsupport.GCPCoordinateMapper(self.dataset)
+        affine = gdalsupport.CoordinateMapper(self.dataset)
+
+        pixel = np.linspace(0, self.XSIZE, 11)
+        line = np.linspace(0, self.YSIZE, 11)
+        lon, lat = mapper.imgToGeoPoints(pixel, line)
+        xlon, xlat = mapper._modelImgToGeo(pixel, line)
+        alon, alat = affine.imgToGeoPoints(pixel, line)
+
+        error = np.hypot(lon - xlon, lat - xlat).max()
+        affine_error = np.hypot(alon - xlon, alat - xlat).max()
+        self.assertLess(error, 1e-3)
+        self.assertLess(error, affine_error)
+
+    def test_roundtrip(self):
+        mapper = gdalsupport.GCPCoordinateMapper(self.dataset)
+        pixel = np.linspace(10, self.XSIZE - 10, 7)
+        line = np.linspace(10, self.YSIZE - 10, 7)
+        lon, lat = mapper.imgToGeoPoints(pixel, line)
+        rpixel, rline = mapper.geoToImgPoints(lon, lat)
+        np.testing.assert_allclose(rpixel, pixel, atol=0.5)
+        np.testing.assert_allclose(rline, line, atol=0.5)
+
+
+class GlobalGCPCoordinateMapperTestCase(unittest.TestCase):
+    XSIZE = 3600
+    YSIZE = 1800
+    NGCPS = 11
+
+    def setUp(self):
+        driver = gdal.GetDriverByName('MEM')
+        self.dataset = driver.Create('', self.XSIZE, self.YSIZE, 1,
+                                     gdal.GDT_Byte)
+        sref = osr.SpatialReference()
+        sref.SetWellKnownGeogCS('WGS84')
+
+        # swath wider than 180 degrees of longitude
+        gcps = []
+        for line in np.linspace(0, self.YSIZE, self.NGCPS):
+            for pixel in np.linspace(0, self.XSIZE, self.NGCPS):
+                lon = -170. + pixel * 340. / self.XSIZE
+                lat = 80. - line * 160. / self.YSIZE
+                gcps.append(gdal.GCP(lon, lat, 0., pixel, line))
+        self.dataset.SetGCPs(gcps, sref.ExportToWkt())
+
+    def test_prime_meridian(self):
+        mapper = gdalsupport.GCPCoordinateMapper(self.dataset)
+        pixel = np.array([1790., 1800., 1810.])
+        line = np.full(pixel.shape, 900.)
+        expected = -170. + pixel * 340. / self.XSIZE
+
+        lon, lat = mapper.imgToGeoPoints(pixel, line)
+        np.testing.assert_allclose(lon, expected, atol=1e-3)
+        np.testing.assert_allclose(lat, 0., atol=1e-3)
+        for index, x in enumerate(pixel):
+            self.assertAlmostEqual(mapper.imgToGeo(x, 900.)[0],
+                                   expected[index], 3)
+
+
+class ValidDataFootprintTestCase(unittest.TestCase):
+    XSIZE = 1000
+    YSIZE = 600
+
+    def setUp(self):
+        # parallelogram of valid data (e.g. a rotated image)
+        x, y = np.meshgrid(np.arange(self.XSIZE), np.arange(self.YSIZE))
+        self.valid = (x >= y / 2) & (x < y / 2 + 500)
+        self.data = np.where(self.valid, 10, 0).astype(np.uint8)
+
+        driver = gdal.GetDriverByName('MEM')
+        self.dataset = driver.Create('', self.XSIZE, self.YSIZE, 1,
+                                     gdal.GDT_Byte)
+        self.dataset.GetRasterBand(1).WriteArray(self.data)
+
+    def _area(self, ring):
+        x, y = ring[:, 0], ring[:, 1]
+        return abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2.
+
+    def _check(self, rings):
+        self.assertEqual(len(rings), 1)
+        ring = rings[0]
+        self.assertGreater(len(ring), 3)
+        self.assertLess(len(ring), 20)
+        np.testing.assert_array_equal(ring[0], ring[-1])
+        self.assertAlmostEqual(self._area(ring) / self.valid.sum(), 1.,
+                               delta=0.05)
+        self.assertTrue(gdalsupport.geomutils.pointInRing(500, 300, ring))
+        self.assertFalse(gdalsupport.geomutils.pointInRing(900, 20, ring))
+
+    def test_zero_fill(self):
+        rings = gdalsupport.validDataFootprint(self.dataset)
+        self._check(rings)
+
+    def test_nodata(self):
+        self.dataset.GetRasterBand(1).WriteArray(
+            np.where(self.valid, 0, 255).astype(np.uint8))
+        self.dataset.GetRasterBand(1).SetNoDataValue(255)
+        rings = gdalsupport.validDataFootprint(self.dataset)
+        self._check(rings)
+
+    def test_no_valid_data(self):
+        self.dataset.GetRasterBand(1).Fill(0)
+        rings = gdalsupport.validDataFootprint(self.dataset)
+        self.assertEqual(len(rings), 0)
+
+    def test_parts(self):
+        # a gap of empty rows in the middle of the image
+        data = self.data.copy()
+        data[250:350] = 0
+        self.dataset.GetRasterBand(1).WriteArray(data)
+        rings = gdalsupport.validDataFootprint(self.dataset)
+        self.assertEqual(len(rings), 2)
+        self.assertFalse(any(gdalsupport.geomutils.pointInRing(300, 300, ring)
+                             for ring in rings))
+
+
 if __name__ == '__main__':
     unittest.main()
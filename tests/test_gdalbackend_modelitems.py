@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from osgeo import gdal, osr
+from qtpy import QtCore, QtWidgets
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview import utils
+from gsdview.mdi import ItemModel
+from gsdview.errors import OpenError
+from gsdview.gdalbackend import modelitems
+from gsdview.gdalbackend import cachemanager
+from gsdview.gdalbackend import gdalsupport
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class CachedDatasetItemTestCase(unittest.TestCase):
+    XSIZE = 64
+    YSIZE = 32
+    NBANDS = 5
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_UInt16)
+        ds = None
+
+        self._cachedir = modelitems.CachedDatasetItem.CACHEDIR
+        modelitems.CachedDatasetItem.CACHEDIR = os.path.join(self.root,
+                                                             'cache')
+        self._fpindex = utils.set_fingerprint_index(utils.FingerprintIndex(
+            os.path.join(self.root, 'fingerprints.json')))
+
+        self.model = ItemModel()
+        self.item = modelitems.CachedDatasetItem(self.filename)
+        self.model.appendRow(self.item)
+
+    def tearDown(self):
+        if self.item.vrtfilename:
+            self.item.close()
+        modelitems.CachedDatasetItem.CACHEDIR = self._cachedir
+        utils.set_fingerprint_index(self._fpindex)
+        shutil.rmtree(self.root)
+
+    def test_lazy_scene(self):
+        for index in range(1, self.NBANDS + 1):
+            band = self.item.GetRasterBand(index)
+            self.assertFalse(band.hasscene())
+
+        band = self.item.GetRasterBand(1)
+        self.assertIsNotNone(band.scene)
+        self.assertTrue(band.hasscene())
+        self.assertIs(band.graphicsitem.scene(), band.scene)
+        self.assertFalse(self.item.GetRasterBand(2).hasscene())
+
+    def test_close(self):
+        bands = [self.item.GetRasterBand(index)
+                 for index in range(1, self.NBANDS + 1)]
+        self.item.close()
+        for band in bands:
+            self.assertFalse(band.hasscene())
+            self.assertIsNone(band.graphicsitem)
+
+
+class OptimizationTestCase(CachedDatasetItemTestCase):
+    def test_optimize(self):
+        self.item.optimize([2])
+        self.assertTrue(self.item.isoptimized())
+        self.assertEqual(self.item.RasterCount, self.NBANDS)
+
+    def test_start_optimization(self):
+        optimizer = self.item.startOptimization([2])
+        self.assertTrue(self.item.isbusy())
+
+        # data are available (read-only) during the optimization
+        self.assertEqual(self.item.RasterCount, self.NBANDS)
+
+        self.assertTrue(optimizer.wait(30000))
+        app.processEvents()
+        self.assertIsNone(optimizer.error)
+        self.assertFalse(self.item.isbusy())
+        self.assertTrue(self.item.isoptimized())
+
+        # the item is re-opened in update mode on the new VRT file
+        band = self.item.GetRasterBand(1)
+        band.SetMetadataItem('TEST', '1')
+        self.item.FlushCache()
+        self.assertTrue(gdalsupport.isOptimizedVrt(self.item.vrtfilename))
+
+    def test_close_while_optimizing(self):
+        self.item.startOptimization([2])
+        self.item.close()
+        self.assertIsNone(self.item._optimizer)
+
+
+class OverviewBuilderTestCase(unittest.TestCase):
+    XSIZE = 128
+    YSIZE = 64
+    NBANDS = 2
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_UInt16)
+        ds = None
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_build(self):
+        progress = []
+        builder = modelitems.OverviewBuilder(self.filename, [2, 4])
+        builder.progress.connect(
+            lambda complete, message: progress.append(complete))
+        builder.start()
+        self.assertTrue(builder.wait(30000))
+        app.processEvents()
+        self.assertIsNone(builder.error)
+        self.assertEqual(progress[-1], 1.)
+
+        ds = gdal.Open(self.filename)
+        self.assertEqual(gdalsupport.ovrLevels(ds), [2, 4])
+
+    def test_interrupt(self):
+        builder = modelitems.OverviewBuilder(self.filename, [2, 4])
+        # @NOTE: the request is done in the worker thread at the first
+        #        progress notification
+        builder.progress.connect(
+            lambda complete, message: builder.requestInterruption(),
+            QtCore.Qt.DirectConnection)
+        builder.start()
+        self.assertTrue(builder.wait(30000))
+        self.assertIsInstance(builder.error, RuntimeError)
+
+        ds = gdal.Open(self.filename)
+        self.assertEqual(gdalsupport.ovrLevels(ds), [])
+
+
+class LazyChildrenTestCase(CachedDatasetItemTestCase):
+    NBANDS = 7
+    BATCHSIZE = 3
+
+    def setUp(self):
+        self._batchsize = modelitems.DatasetItem.FETCH_BATCH_SIZE
+        modelitems.DatasetItem.FETCH_BATCH_SIZE = self.BATCHSIZE
+        super(LazyChildrenTestCase, self).setUp()
+
+    def tearDown(self):
+        super(LazyChildrenTestCase, self).tearDown()
+        modelitems.DatasetItem.FETCH_BATCH_SIZE = self._batchsize
+
+    def test_first_batch(self):
+        self.assertEqual(self.item.rowCount(), self.BATCHSIZE)
+        self.assertTrue(self.item.canFetchMore())
+
+    def test_fetch_more(self):
+        index = self.item.index()
+        self.assertTrue(self.model.hasChildren(index))
+        while self.model.canFetchMore(index):
+            self.model.fetchMore(index)
+        self.assertEqual(self.item.rowCount(), self.NBANDS)
+        self.assertFalse(self.item.canFetchMore())
+
+    def test_get_raster_band(self):
+        band = self.item.GetRasterBand(self.NBANDS - 1)
+        self.assertIs(band, self.item.child(self.NBANDS - 2))
+        self.assertEqual(self.item.rowCount(), self.NBANDS - 1)
+        self.assertIsNone(self.item.GetRasterBand(self.NBANDS + 1))
+
+    def test_reopen(self):
+        self.item.reopen()
+        self.assertEqual(self.item.rowCount(), self.BATCHSIZE)
+        band = self.item.GetRasterBand(self.NBANDS)
+        self.assertEqual(band.XSize, self.XSIZE)
+
+    def test_no_subdatasets(self):
+        self.assertEqual(self.item.GetSubDatasets(), [])
+        self.assertEqual(self.item.rowCount(), self.NBANDS)
+
+
+class DatasetPoolTestCase(unittest.TestCase):
+    XSIZE = 64
+    YSIZE = 32
+    NBANDS = 2
+    NDATASETS = 4
+    MAXSIZE = 2
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+
+        self._cachedir = modelitems.CachedDatasetItem.CACHEDIR
+        modelitems.CachedDatasetItem.CACHEDIR = os.path.join(self.root,
+                                                             'cache')
+        self._fpindex = utils.set_fingerprint_index(utils.FingerprintIndex(
+            os.path.join(self.root, 'fingerprints.json')))
+        self._maxsize = modelitems.DATASET_POOL.maxsize
+        modelitems.DATASET_POOL.maxsize = self.MAXSIZE
+
+        srs = osr.SpatialReference()
+        srs.SetWellKnownGeogCS('WGS84')
+        driver = gdal.GetDriverByName('GTiff')
+        self.model = ItemModel()
+        self.items = []
+        for index in range(self.NDATASETS):
+            filename = os.path.join(self.root, 'dataset%02d.tif' % index)
+            ds = driver.Create(filename, self.XSIZE, self.YSIZE,
+                               self.NBANDS, gdal.GDT_Byte)
+            ds.SetGeoTransform([10. * index, 0.01, 0., 45., 0., -0.01])
+            ds.SetProjection(srs.ExportToWkt())
+            ds = None
+            item = modelitems.CachedDatasetItem(filename)
+            self.model.appendRow(item)
+            self.items.append(item)
+
+    def tearDown(self):
+        for item in self.items:
+            if item.vrtfilename:
+                item.close()
+        modelitems.DATASET_POOL.maxsize = self._maxsize
+        modelitems.CachedDatasetItem.CACHEDIR = self._cachedir
+        utils.set_fingerprint_index(self._fpindex)
+        shutil.rmtree(self.root)
+
+    def test_maxsize(self):
+        self.assertEqual(len(modelitems.DATASET_POOL), self.MAXSIZE)
+        for item in self.items[:-self.MAXSIZE]:
+            self.assertTrue(item._suspended)
+            self.assertIsNone(item._vrtgdalobj)
+            self.assertTrue(item.isopen())
+        for item in self.items[-self.MAXSIZE:]:
+            self.assertFalse(item._suspended)
+
+    def test_transparent_reopen(self):
+        item = self.items[0]
+        band = item.GetRasterBand(self.NBANDS)
+        self.assertEqual(band.XSize, self.XSIZE)
+        self.assertFalse(item._suspended)
+        self.assertIn(item, modelitems.DATASET_POOL)
+        self.assertEqual(len(modelitems.DATASET_POOL), self.MAXSIZE)
+
+        # suspended bands are re-opened as well
+        self.items[1].RasterCount
+        self.items[2].RasterCount
+        self.assertTrue(item._suspended)
+        self.assertTrue(band._suspended)
+        self.assertEqual(band.YSize, self.YSIZE)
+        self.assertFalse(item._suspended)
+
+    def test_no_resume_on_count(self):
+        item = self.items[0]
+        self.assertTrue(item._suspended)
+        self.assertTrue(self.model.hasChildren(item.index()))
+        self.assertTrue(item._suspended)
+
+    def test_no_touch_on_count(self):
+        order = list(modelitems.DATASET_POOL._items)
+        for item in reversed(self.items):
+            self.assertTrue(self.model.hasChildren(item.index()))
+            self.model.canFetchMore(item.index())
+        self.assertEqual(list(modelitems.DATASET_POOL._items), order)
+
+    def test_no_resume_on_footprint(self):
+        order = list(modelitems.DATASET_POOL._items)
+        for index, item in enumerate(self.items):
+            footprint = item.footprint()
+            self.assertAlmostEqual(footprint.boundingRect().left(),
+                                   10. * index, delta=0.01)
+        self.assertEqual(list(modelitems.DATASET_POOL._items), order)
+        for item in self.items[:-self.MAXSIZE]:
+            self.assertTrue(item._suspended)
+
+    def test_close(self):
+        item = self.items[0]
+        item.close()
+        self.assertFalse(item._suspended)
+        self.assertNotIn(item, modelitems.DATASET_POOL)
+
+
+class DatasetOpenerTestCase(unittest.TestCase):
+    XSIZE = 64
+    YSIZE = 32
+    NBANDS = 3
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE,
+                           self.NBANDS, gdal.GDT_Byte)
+        ds = None
+
+        self._cachedir = modelitems.CachedDatasetItem.CACHEDIR
+        modelitems.CachedDatasetItem.CACHEDIR = os.path.join(self.root,
+                                                             'cache')
+        self._fpindex = utils.set_fingerprint_index(utils.FingerprintIndex(
+            os.path.join(self.root, 'fingerprints.json')))
+
+    def tearDown(self):
+        modelitems.CachedDatasetItem.CACHEDIR = self._cachedir
+        utils.set_fingerprint_index(self._fpindex)
+        shutil.rmtree(self.root)
+
+    def test_open(self):
+        progress = []
+        opener = modelitems.DatasetOpener(self.filename)
+        opener.progress.connect(
+            lambda fract, msg: progress.append(fract),
+            QtCore.Qt.DirectConnection)
+        opener.start()
+        self.assertTrue(opener.wait(10000))
+        self.assertIsNone(opener.error)
+        self.assertEqual(progress[-1], 1.)
+
+        item = modelitems.datasetitem(self.filename, opener.handles)
+        try:
+            self.assertIsInstance(item, modelitems.CachedDatasetItem)
+            self.assertEqual(item.RasterCount, self.NBANDS)
+            self.assertEqual(item.filename, self.filename)
+        finally:
+            item.close()
+
+    def test_error(self):
+        opener = modelitems.DatasetOpener(
+            os.path.join(self.root, 'missing.tif'))
+        opener.start()
+        self.assertTrue(opener.wait(10000))
+        self.assertIsNone(opener.handles)
+        self.assertIsInstance(opener.error, OpenError)
+
+    def test_identify_driver(self):
+        driver = modelitems.identifydriver(self.filename)
+        self.assertEqual(driver.ShortName, 'GTiff')
+
+        filename = os.path.join(self.root, 'dataset.txt')
+        with open(filename, 'w') as fd:
+            fd.write('not a dataset')
+        self.assertRaises(OpenError, modelitems.identifydriver, filename)
+        self.assertRaises(OpenError, modelitems.identifydriver,
+                          os.path.join(self.root, 'missing.tif'))
+
+    def test_cancel(self):
+        model = ItemModel()
+        item = modelitems.PendingDatasetItem(self.filename)
+        model.appendRow(item)
+        item.close()
+        self.assertTrue(item.iscancelled())
+        self.assertEqual(model.rowCount(), 0)
+
+        item.start()
+        self.assertFalse(item.opener.isRunning())
+        self.assertIsNone(item.opener.handles)
+
+    def _setcachemanager(self):
+        manager = cachemanager.CacheManager(
+            modelitems.CachedDatasetItem.CACHEDIR)
+        self.addCleanup(setattr, modelitems.CachedDatasetItem,
+                        'CACHEMANAGER',
+                        modelitems.CachedDatasetItem.CACHEMANAGER)
+        modelitems.CachedDatasetItem.CACHEMANAGER = manager
+        return manager
+
+    def test_cancel_after_pin(self):
+        manager = self._setcachemanager()
+
+        def callback(fract, msg):
+            if fract >= 1:
+                raise modelitems._OpenCancelled()
+
+        self.assertRaises(modelitems._OpenCancelled,
+                          modelitems.CachedDatasetItem.openhandles,
+                          self.filename, callback)
+        manager.wait()
+        self.assertEqual(sum(manager._pinned.values()), 0)
+
+    def test_close_while_opening(self):
+        manager = self._setcachemanager()
+
+        model = ItemModel()
+        item = modelitems.PendingDatasetItem(self.filename)
+        model.appendRow(item)
+        item.start()
+        item.close()
+        self.assertFalse(item.opener.isRunning())
+        self.assertIsNone(item.opener.handles)
+        manager.wait()
+        self.assertEqual(sum(manager._pinned.values()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
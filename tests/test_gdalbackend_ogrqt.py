@@ -0,0 +1,491 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import time
+import shutil
+import threading
+import tempfile
+import unittest
+
+import numpy as np
+from osgeo import ogr, osr
+from qtpy import QtCore, QtWidgets, QtGui
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview.gdalbackend import ogrqt
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class LayerTestCase(unittest.TestCase):
+    # features are short segments on a NCOLS x NROWS grid with STEP spacing
+    NCOLS = 50
+    NROWS = 20
+    STEP = 10.
+    BATCHSIZE = 64
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'lines.shp')
+
+        driver = ogr.GetDriverByName('ESRI Shapefile')
+        ds = driver.CreateDataSource(self.filename)
+        layer = ds.CreateLayer('lines', geom_type=ogr.wkbLineString)
+        for row in range(self.NROWS):
+            for col in range(self.NCOLS):
+                x, y = col * self.STEP, row * self.STEP
+                geom = ogr.CreateGeometryFromWkt(
+                    'LINESTRING (%f %f, %f %f)' % (x, y, x + 1, y + 1))
+                feature = ogr.Feature(layer.GetLayerDefn())
+                feature.SetGeometry(geom)
+                layer.CreateFeature(feature)
+        ds = None
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    @property
+    def nfeatures(self):
+        return self.NCOLS * self.NROWS
+
+
+class GraphicsLayerItemTestCase(unittest.TestCase):
+    RING = ogrqt.GraphicsLayerItem.RING
+    LINE = ogrqt.GraphicsLayerItem.LINE
+    POINT = ogrqt.GraphicsLayerItem.POINT
+
+    def setUp(self):
+        parts = [
+            # 0: square ring
+            (self.RING, [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]),
+            # 1: closed line (not a ring)
+            (self.LINE, [(20, 0), (30, 0), (30, 10), (20, 10), (20, 0)]),
+            # 2: point
+            (self.POINT, [(50, 50)]),
+            # 3: square ring overlapping feature 0
+            (self.RING, [(5, 5), (15, 5), (15, 15), (5, 15), (5, 5)]),
+            # 4: two lines (multi-part feature)
+            (self.LINE, [(100, 0), (110, 0)]),
+            (self.LINE, [(100, 20), (110, 20)]),
+        ]
+        coords = np.concatenate([np.asarray(points, dtype=float)
+                                 for kind, points in parts])
+        partoffsets = np.cumsum([0] + [len(points) for kind, points in parts])
+        partkinds = [kind for kind, points in parts]
+        featureoffsets = [0, 1, 2, 3, 4, 6]
+
+        self.item = ogrqt.GraphicsLayerItem()
+        self.item.setArrays(coords, partoffsets, partkinds, featureoffsets,
+                            fids=[10, 11, 12, 13, 14])
+
+    def test_arrays(self):
+        self.assertEqual(self.item.featureCount(), 5)
+        np.testing.assert_array_equal(self.item.fids(),
+                                      [10, 11, 12, 13, 14])
+        np.testing.assert_array_equal(self.item._bboxes, [
+            (0, 0, 10, 10),
+            (20, 0, 30, 10),
+            (50, 50, 50, 50),
+            (5, 5, 15, 15),
+            (100, 0, 110, 20),
+        ])
+        self.assertEqual(len(self.item.featureCoords(4)), 2)
+
+    def test_bounding_rect(self):
+        pen = QtGui.QPen()
+        pen.setWidthF(2.)
+        self.item.setPen(pen)
+        self.assertEqual(self.item.boundingRect(),
+                         QtCore.QRectF(-1, -1, 112, 52))
+
+        self.item.setArrays(np.zeros((0, 2)), [0], [], [0])
+        self.assertEqual(self.item.featureCount(), 0)
+        self.assertTrue(self.item.boundingRect().isNull())
+
+    def test_default_fids(self):
+        self.item.setArrays(self.item._coords, self.item._partoffsets,
+                            self.item._partkinds, self.item._featureoffsets)
+        np.testing.assert_array_equal(self.item.fids(), range(5))
+
+    def test_non_finite(self):
+        coords = self.item._coords.copy()
+        coords[1] = np.nan
+        coords[5:10] = np.inf
+        self.item.setArrays(coords, self.item._partoffsets,
+                            self.item._partkinds, self.item._featureoffsets)
+        np.testing.assert_array_equal(self.item._bboxes[0], (0, 0, 10, 10))
+        self.assertTrue(np.isnan(self.item._bboxes[1]).all())
+        self.assertEqual(self.item.boundingRect().width(), 111)
+
+    def test_features_in_rect(self):
+        def features(x, y, w, h):
+            return list(self.item.featuresInRect(QtCore.QRectF(x, y, w, h)))
+
+        self.assertEqual(features(-1, -1, 3, 3), [0])
+        self.assertEqual(features(4, 4, 2, 2), [0, 3])
+        self.assertEqual(features(40, 40, 20, 20), [2])
+        self.assertEqual(features(105, 5, 1, 1), [4])
+        self.assertEqual(features(60, 60, 10, 10), [])
+
+    def test_feature_at_ring(self):
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(2, 2)), 0)
+        self.assertTrue(self.item.contains(QtCore.QPointF(2, 2)))
+        self.assertIsNone(self.item.featureAt(QtCore.QPointF(17, 17)))
+        self.assertFalse(self.item.contains(QtCore.QPointF(17, 17)))
+
+    def test_feature_at_line(self):
+        # the inner area of closed lines is not part of the feature
+        self.assertIsNone(self.item.featureAt(QtCore.QPointF(25, 5)))
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(25, 0)), 1)
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(25, 5), 5.), 1)
+        self.assertIsNone(self.item.featureAt(QtCore.QPointF(25, 5), 4.))
+
+    def test_feature_at_tolerance(self):
+        pos = QtCore.QPointF(51, 50)
+        self.assertIsNone(self.item.featureAt(pos))
+        self.assertIsNone(self.item.featureAt(pos, 0.5))
+        self.assertEqual(self.item.featureAt(pos, 2.), 2)
+
+        pos = QtCore.QPointF(105, 19)
+        self.assertIsNone(self.item.featureAt(pos, 0.5))
+        self.assertEqual(self.item.featureAt(pos, 1.5), 4)
+
+    def test_feature_at_topmost(self):
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(7, 7)), 3)
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(12, 12)), 3)
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(3, 7)), 0)
+
+    def test_selectable(self):
+        self.assertTrue(
+            self.item.flags() & QtWidgets.QGraphicsItem.ItemIsSelectable)
+
+    def test_paint(self):
+        painted = []
+
+        def paintFeatures(painter, features, lod):
+            painted.append(list(features))
+
+        self.item._paintFeatures = paintFeatures
+        scene = QtWidgets.QGraphicsScene(-10, -10, 130, 70)
+        scene.addItem(self.item)
+
+        def render(source):
+            image = QtGui.QImage(100, 100, QtGui.QImage.Format_ARGB32)
+            image.fill(0)
+            painter = QtGui.QPainter(image)
+            scene.render(painter, QtCore.QRectF(image.rect()), source,
+                         QtCore.Qt.IgnoreAspectRatio)
+            painter.end()
+
+        render(scene.sceneRect())
+        self.assertEqual(painted, [[0, 1, 2, 3, 4]])
+
+        # only features intersecting the exposed area are painted
+        del painted[:]
+        render(QtCore.QRectF(-1, -1, 3, 3))
+        self.assertEqual(painted, [[0]])
+
+        del painted[:]
+        render(QtCore.QRectF(40, 20, 4, 4))
+        self.assertEqual(painted, [])
+
+    def test_paint_features(self):
+        scene = QtWidgets.QGraphicsScene(-10, -10, 130, 70)
+        scene.addItem(self.item)
+        image = QtGui.QImage(130, 70, QtGui.QImage.Format_ARGB32)
+        image.fill(0)
+        painter = QtGui.QPainter(image)
+        scene.render(painter)
+        painter.end()
+        self.assertNotEqual(image.pixel(10, 10), 0)
+
+
+class LodTestCase(unittest.TestCase):
+    NPOINTS = 20001
+
+    def setUp(self):
+        # random walk along x (extent 1000)
+        rs = np.random.RandomState(0)
+        x = np.linspace(0, 1000, self.NPOINTS)
+        y = np.cumsum(rs.normal(0, 0.05, self.NPOINTS))
+        self.coords = np.column_stack((x, y))
+        self.item = ogrqt.GraphicsLayerItem()
+
+    def _setCoords(self, coords):
+        self.item.setArrays(coords, [0, len(coords)],
+                            [ogrqt.GraphicsLayerItem.LINE], [0, 1])
+
+    def test_levels(self):
+        self._setCoords(self.coords)
+        self.assertEqual(len(self.item._lods), self.item.LOD_COUNT)
+
+        # from the coarsest to the finest level
+        tolerance = 1000 * self.item.LOD_RESOLUTION
+        nvertices = 0
+        for tol, coords, partoffsets in self.item._lods:
+            self.assertAlmostEqual(tol, tolerance)
+            self.assertGreater(len(coords), nvertices)
+            self.assertEqual(list(partoffsets), [0, len(coords)])
+            tolerance /= self.item.LOD_FACTOR
+            nvertices = len(coords)
+        self.assertLessEqual(nvertices,
+                             self.item.LOD_MAX_RATIO * self.NPOINTS)
+
+    def test_cascade(self):
+        # each level is computed from the finer one
+        self._setCoords(self.coords)
+        for (tol, coarse, _), (_, fine, _) in zip(self.item._lods[:-1],
+                                                  self.item._lods[1:]):
+            finerows = set(map(tuple, fine.tolist()))
+            self.assertTrue(all(tuple(point) in finerows
+                                for point in coarse.tolist()))
+
+    def test_dropped_levels(self):
+        # straight line: all levels have only the end points, coarser
+        # levels do not reduce the number of vertices
+        x = np.linspace(0, 1000, 101)
+        self._setCoords(np.column_stack((x, x)))
+        self.assertEqual(len(self.item._lods), 1)
+        tolerance, coords, partoffsets = self.item._lods[0]
+        self.assertAlmostEqual(
+            tolerance, 1000 * self.item.LOD_RESOLUTION /
+            self.item.LOD_FACTOR ** (self.item.LOD_COUNT - 1))
+        self.assertEqual(len(coords), 2)
+
+    def test_max_ratio(self):
+        self.item.LOD_MAX_RATIO = 0.
+        self._setCoords(self.coords)
+        self.assertEqual(self.item._lods, [])
+
+    def test_no_lods(self):
+        self.item.LOD_COUNT = 0
+        self._setCoords(self.coords)
+        self.assertEqual(self.item._lods, [])
+
+        self.item.LOD_COUNT = 3
+        self._setCoords(self.coords[:1])
+        self.assertEqual(self.item._lods, [])
+
+    def test_lod_arrays(self):
+        self._setCoords(self.coords)
+        lods = self.item._lods
+
+        for index, (tolerance, coords, partoffsets) in enumerate(lods):
+            selected = self.item._lodArrays(2 * tolerance)[0]
+            self.assertIs(selected, coords)
+            if index + 1 < len(lods):
+                selected = self.item._lodArrays(1.9 * tolerance)[0]
+                self.assertIs(selected, lods[index + 1][1])
+
+        finest = lods[-1][0]
+        self.assertIs(self.item._lodArrays(1.9 * finest)[0],
+                      self.item._coords)
+        self.assertIs(self.item._lodArrays(0.)[0], self.item._coords)
+        self.assertIs(self.item._lodArrays(1e9)[0], lods[0][1])
+
+    def test_non_finite(self):
+        npoints = 100
+        coords = np.concatenate((self.coords[:npoints], self.coords))
+        coords[10] = np.nan
+        coords[20, 1] = np.inf
+        self.item.setArrays(coords, [0, npoints, npoints + self.NPOINTS],
+                            [ogrqt.GraphicsLayerItem.LINE] * 2, [0, 1, 2])
+        self.assertEqual(len(self.item._lods), self.item.LOD_COUNT)
+        for tolerance, lodcoords, partoffsets in self.item._lods:
+            # the part with non-finite vertices is not simplified
+            self.assertEqual(partoffsets[1], npoints)
+            np.testing.assert_array_equal(lodcoords[:npoints],
+                                          coords[:npoints])
+            self.assertLess(partoffsets[2] - partoffsets[1], self.NPOINTS)
+
+
+class FeatureArraysTestCase(unittest.TestCase):
+    def setUp(self):
+        self.layer_srs = osr.SpatialReference()
+        self.layer_srs.SetWellKnownGeogCS('WGS84')
+        self.mercator = osr.SpatialReference()
+        self.mercator.ImportFromEPSG(3857)
+        for srs in (self.layer_srs, self.mercator):
+            if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+                srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+        defn = ogr.FeatureDefn()
+        self.features = []
+        for wkt, srs in (('POINT (10 0)', self.layer_srs),
+                         ('POINT (1113194.9079327357 0)', self.mercator)):
+            geom = ogr.CreateGeometryFromWkt(wkt)
+            geom.AssignSpatialReference(srs)
+            feature = ogr.Feature(defn)
+            feature.SetGeometry(geom)
+            self.features.append(feature)
+
+    def test_geometry_srs(self):
+        coords = ogrqt.GraphicsLayerItem.featureArrays(
+            self.features, layer_srs=self.layer_srs)[0]
+        np.testing.assert_allclose(coords, [(10, 0), (10, 0)], atol=1e-6)
+
+    def test_target_srs(self):
+        srs_transform = osr.CoordinateTransformation(self.layer_srs,
+                                                     self.mercator)
+        coords = ogrqt.GraphicsLayerItem.featureArrays(
+            self.features, srs_transform, srs=self.mercator,
+            layer_srs=self.layer_srs)[0]
+        np.testing.assert_allclose(coords, [(1113194.9079327357, 0)] * 2,
+                                   atol=1e-3)
+
+
+class LayerLoaderTestCase(LayerTestCase):
+    def _run(self, **kwargs):
+        batches = []
+        loader = ogrqt.LayerLoader(self.filename, batchsize=self.BATCHSIZE,
+                                   **kwargs)
+        loader.batchReady.connect(batches.append, QtCore.Qt.DirectConnection)
+        loader.start()
+        self.assertTrue(loader.wait(10000))
+        self.assertIsNone(loader.error)
+        self.assertTrue(loader.done)
+        return loader, batches
+
+    def test_batches(self):
+        loader, batches = self._run()
+        self.assertFalse(loader.filtered)
+        self.assertEqual(len(batches),
+                         int(np.ceil(self.nfeatures / self.BATCHSIZE)))
+        fids = np.concatenate([batch[-1] for batch in batches])
+        self.assertEqual(len(np.unique(fids)), self.nfeatures)
+
+    def test_spatial_filter(self):
+        loader, batches = self._run(rect=(-1, -1, 25, 15))
+        self.assertTrue(loader.filtered)
+        coords = np.concatenate([batch[0] for batch in batches])
+        self.assertEqual(len(coords), 3 * 2 * 2)
+
+    def test_no_filter_for_whole_extent(self):
+        loader, batches = self._run(rect=(-100, -100, 1000, 1000))
+        self.assertFalse(loader.filtered)
+
+    def test_skip(self):
+        loader, batches = self._run(skip=range(10))
+        fids = np.concatenate([batch[-1] for batch in batches])
+        self.assertEqual(len(fids), self.nfeatures - 10)
+        self.assertNotIn(0, fids)
+
+    def test_transform(self):
+        threads = set()
+
+        def transform(x, y, z):
+            threads.add(threading.get_ident())
+            return x + 1000, y
+
+        loader, batches = self._run(transform=transform)
+        coords = np.concatenate([batch[0] for batch in batches])
+        self.assertEqual(coords[:, 0].min(), 1000)
+        # applied in the worker thread
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_shared_skip(self):
+        skip = set(range(10))
+        loader, batches = self._run(skip=skip)
+        self.assertIs(loader.skip, skip)
+
+    def test_error(self):
+        loader = ogrqt.LayerLoader(os.path.join(self.root, 'missing.shp'))
+        loader.start()
+        self.assertTrue(loader.wait(10000))
+        self.assertIsInstance(loader.error, ValueError)
+
+
+class StreamingLayerItemTestCase(LayerTestCase):
+    def setUp(self):
+        super(StreamingLayerItemTestCase, self).setUp()
+        self.scene = QtWidgets.QGraphicsScene()
+        self.item = ogrqt.StreamingLayerItem(self.filename,
+                                             batchsize=self.BATCHSIZE)
+        self.scene.addItem(self.item)
+        self.view = QtWidgets.QGraphicsView(self.scene)
+        self.view.resize(200, 200)
+        self.view.show()
+
+    def tearDown(self):
+        if self.item is not None:
+            self.item.close()
+        self.view.close()
+        super(StreamingLayerItemTestCase, self).tearDown()
+
+    def _wait(self, timeout=10.):
+        t0 = time.time()
+        while time.time() - t0 < timeout:
+            app.processEvents()
+            if not self.item.isLoading() and not self.item._timer.isActive():
+                break
+            time.sleep(0.01)
+
+    def test_bounding_rect(self):
+        rect = self.item.boundingRect()
+        self.assertEqual(rect.width(), (self.NCOLS - 1) * self.STEP + 1)
+        self.assertEqual(rect.height(), (self.NROWS - 1) * self.STEP + 1)
+
+    def test_partial_load(self):
+        self.view.scale(4, 4)
+        self.view.centerOn(0, 0)
+        self._wait()
+        self.assertFalse(self.item.isComplete())
+        self.assertGreater(self.item.featureCount(), 0)
+        self.assertLess(self.item.featureCount(), self.nfeatures)
+        self.assertEqual(self.item.featureAt(QtCore.QPointF(0.5, 0.5)), 0)
+
+    def test_full_load(self):
+        self.view.scale(4, 4)
+        self.view.centerOn(0, 0)
+        self._wait()
+        self.view.fitInView(self.item)
+        self._wait()
+        self.assertTrue(self.item.isComplete())
+        self.assertEqual(self.item.featureCount(), self.nfeatures)
+
+    def _startLoading(self):
+        self.item._startLoader(None, None)
+        self.assertTrue(self.item.isLoading())
+        return list(self.item._loaders)
+
+    def test_remove_from_scene(self):
+        loaders = self._startLoading()
+        self.scene.removeItem(self.item)
+        self.assertFalse(self.item.isLoading())
+        self.assertFalse(any(loader.isRunning() for loader in loaders))
+
+    def test_delete_scene(self):
+        loaders = self._startLoading()
+        self.view.close()
+        self.view.setScene(None)
+        self.scene.clear()
+        self.item = None
+        self.assertFalse(any(loader.isRunning() for loader in loaders))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from osgeo import gdal
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview.gdalbackend import gdalsupport
+from gsdview.gdalbackend import tilestore
+
+
+class OvrTileStoreTestCase(unittest.TestCase):
+    XSIZE = 1000
+    YSIZE = 700
+    TILESIZE = 64
+    LEVELS = [3, 9]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.data = np.random.randint(
+            0, 1000, (self.YSIZE, self.XSIZE)).astype(np.uint16)
+
+        driver = gdal.GetDriverByName('MEM')
+        self.dataset = driver.Create('', self.XSIZE, self.YSIZE, 1,
+                                     gdal.GDT_UInt16)
+        self.band = self.dataset.GetRasterBand(1)
+        self.band.WriteArray(self.data)
+
+        self.store = self._tilestore()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _tilestore(self):
+        return tilestore.OvrTileStore(self.band, self.root, self.LEVELS,
+                                      tilesize=self.TILESIZE)
+
+    def test_levels(self):
+        self.assertEqual(self.store.levels, self.LEVELS)
+        ovr = self.store.overview(3)
+        self.assertEqual((ovr.XSize, ovr.YSize),
+                         (-(-self.XSIZE // 3), -(-self.YSIZE // 3)))
+        self.assertRaises(gdalsupport.MissingOvrError,
+                          self.store.overview, 2)
+
+    def test_best_level(self):
+        self.assertEqual(self.store.bestLevel(4), 3)
+        self.assertEqual(self.store.bestLevel(7.5), 9)
+
+    def test_read_full_level(self):
+        level3 = gdalsupport.ovrDownsample(self.data, 3)
+        self.assertTrue(np.all(self.store.overview(3).ReadAsArray() ==
+                               level3))
+
+        # level 9 is computed from level 3
+        level9 = gdalsupport.ovrDownsample(level3, 3)
+        self.assertTrue(np.all(self.store.overview(9).ReadAsArray() ==
+                               level9))
+
+    def test_only_visible_tiles(self):
+        data = self.store.read(9, 10, 5, 20, 15)
+        self.assertEqual(data.shape, (15, 20))
+
+        # a single tile of level 9 and the tiles of level 3 it depends on
+        tiles = glob.glob(os.path.join(self.root, 'level009', '*.npy'))
+        self.assertEqual(len(tiles), 1)
+        tiles = glob.glob(os.path.join(self.root, 'level003', '*.npy'))
+        self.assertEqual(len(tiles), 9)
+
+    def test_reuse(self):
+        data = self.store.read(3, 100, 100, 50, 50)
+
+        # tiles are reloaded from disk
+        self.band.Fill(0)
+        store = self._tilestore()
+        self.assertTrue(np.all(store.read(3, 100, 100, 50, 50) == data))
+
+    def test_stamp(self):
+        source = os.path.join(self.root, 'source.dat')
+        with open(source, 'wb') as fd:
+            fd.write(b'data')
+        stamp = tilestore.sourceStamp([source])
+        store = tilestore.OvrTileStore(self.band, self.root, self.LEVELS,
+                                       tilesize=self.TILESIZE, stamp=stamp)
+        data = store.read(3, 100, 100, 50, 50)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.root, tilestore.STAMP_FILENAME)))
+
+        # same source: tiles are reloaded from disk
+        self.band.Fill(0)
+        store = tilestore.OvrTileStore(self.band, self.root, self.LEVELS,
+                                       tilesize=self.TILESIZE, stamp=stamp)
+        self.assertTrue(store.isAvailable(3, 1, 1))
+        self.assertTrue(np.all(store.read(3, 100, 100, 50, 50) == data))
+
+        # modified source: stored tiles are discarded
+        with open(source, 'ab') as fd:
+            fd.write(b'more data')
+        stamp = tilestore.sourceStamp([source])
+        store = tilestore.OvrTileStore(self.band, self.root, self.LEVELS,
+                                       tilesize=self.TILESIZE, stamp=stamp)
+        self.assertFalse(store.isAvailable(3, 1, 1))
+        self.assertTrue(np.all(store.read(3, 100, 100, 50, 50) == 0))
+
+    def test_no_stamp(self):
+        # tiles stored without stamp are discarded
+        self.store.read(3, 100, 100, 50, 50)
+        store = tilestore.OvrTileStore(self.band, self.root, self.LEVELS,
+                                       tilesize=self.TILESIZE, stamp=[])
+        self.assertFalse(store.isAvailable(3, 1, 1))
+
+    def test_cached_value(self):
+        self.assertIsNone(self.store.cachedValue(500, 300))
+
+        level3 = gdalsupport.ovrDownsample(self.data, 3)
+        level9 = gdalsupport.ovrDownsample(level3, 3)
+        self.store.read(9, 50, 30, 10, 10)
+
+        # the finest level in memory is used
+        self.assertEqual(self.store.cachedValue(500, 300), level3[100, 166])
+        self.assertIsNone(self.store.cachedValue(590, 300))
+
+        # only level 9
+        self.store._tiles = {key: data
+                             for key, data in self.store._tiles.items()
+                             if key[0] == 9}
+        self.assertEqual(self.store.cachedValue(500, 300), level9[33, 55])
+
+    def test_invalid_window(self):
+        self.assertRaises(ValueError, self.store.read, 3, 0, 0, 1000, 10)
+        self.assertRaises(ValueError, self.store.read, 3, -1, 0, 10, 10)
+
+    def test_clear(self):
+        self.store.read(3, 0, 0, 10, 10)
+        self.store.clear()
+        self.assertFalse(os.path.exists(self.root))
+
+
+
+class TileRequestTestCase(unittest.TestCase):
+    XSIZE = 1000
+    YSIZE = 700
+    TILESIZE = 64
+    LEVELS = [3, 9]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.data = np.random.randint(
+            0, 1000, (self.YSIZE, self.XSIZE)).astype(np.uint16)
+
+        self.filename = os.path.join(self.root, 'dataset.tif')
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(self.filename, self.XSIZE, self.YSIZE, 1,
+                           gdal.GDT_UInt16)
+        ds.GetRasterBand(1).WriteArray(self.data)
+        ds = None
+
+        self.dataset = gdal.Open(self.filename)
+        self.band = self.dataset.GetRasterBand(1)
+        self.tilesdir = os.path.join(self.root, 'tiles')
+        self.store = tilestore.OvrTileStore(
+            self.band, self.tilesdir, self.LEVELS, tilesize=self.TILESIZE,
+            handlekey=self.filename)
+
+    def tearDown(self):
+        self.store.close(wait=True)
+        gdalsupport.THREAD_HANDLES.invalidate(self.filename)
+        self.band = None
+        self.dataset = None
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _wait(self, timeout=10.):
+        t0 = time.time()
+        while self.store.pendingCount() and time.time() - t0 < timeout:
+            time.sleep(0.01)
+        self.assertEqual(self.store.pendingCount(), 0)
+
+    def test_missing_tiles(self):
+        self.assertEqual(self.store.missingTiles(3, 60, 0, 10, 10),
+                         [(0, 0), (1, 0)])
+        self.store.read(3, 0, 0, 10, 10)
+        self.assertEqual(self.store.missingTiles(3, 60, 0, 10, 10), [(1, 0)])
+        self.assertTrue(self.store.isAvailable(3, 0, 0))
+
+        # tiles stored on disk are available
+        store = tilestore.OvrTileStore(self.band, self.tilesdir, self.LEVELS,
+                                       tilesize=self.TILESIZE)
+        self.assertTrue(store.isAvailable(3, 0, 0))
+
+    def test_request(self):
+        ready = []
+        available = self.store.requestTiles(9, 10, 5, 60, 15, ready.append)
+        self.assertFalse(available)
+        self._wait()
+
+        self.assertEqual(sorted(ready), [(9, 0, 0), (9, 1, 0)])
+        self.assertTrue(self.store.requestTiles(9, 10, 5, 60, 15))
+
+        level9 = gdalsupport.ovrDownsample(
+            gdalsupport.ovrDownsample(self.data, 3), 3)
+        self.assertTrue(np.all(self.store.read(9, 10, 5, 60, 15) ==
+                               level9[5:20, 10:70]))
+
+    def test_request_once(self):
+        self.store.NTHREADS = 1
+        ready = []
+
+        def callback(level, tx, ty):
+            ready.append((level, tx, ty))
+
+        self.store.requestTiles(3, 0, 0, 10, 10, callback)
+        self.store.requestTiles(3, 0, 0, 10, 10, callback)
+        self._wait()
+        self.assertEqual(ready, [(3, 0, 0)])
+
+    def test_request_sync(self):
+        store = tilestore.OvrTileStore(self.band, self.tilesdir, self.LEVELS,
+                                       tilesize=self.TILESIZE)
+        self.assertTrue(store.requestTiles(3, 0, 0, 10, 10))
+        self.assertEqual(store.missingTiles(3, 0, 0, 10, 10), [])
+
+    def test_callback_error(self):
+        def callback(level, tx, ty):
+            raise RuntimeError('deleted')
+
+        self.store.requestTiles(3, 0, 0, 10, 10, callback)
+        self._wait()
+        self.assertTrue(self.store.isAvailable(3, 0, 0))
+
+    def test_close(self):
+        self.store.NTHREADS = 1
+        self.assertFalse(self.store.requestTiles(3, 0, 0, 300, 200))
+        self.store.close(wait=True)
+        self.assertEqual(self.store.pendingCount(), 0)
+
+        # new requests restart workers
+        self.store.requestTiles(9, 0, 0, 10, 10)
+        self._wait()
+        self.assertTrue(self.store.isAvailable(9, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
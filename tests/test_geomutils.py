@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview import geomutils
+
+
+class SpatialIndexTestCase(unittest.TestCase):
+    NBOXES = 5000
+    NODESIZE = 8
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        xy = rs.uniform(0, 1000, (self.NBOXES, 2))
+        wh = rs.uniform(0, 10, (self.NBOXES, 2))
+        self.bboxes = np.hstack((xy, xy + wh))
+        self.index = geomutils.SpatialIndex(self.bboxes, self.NODESIZE)
+
+    def _bruteforce(self, xmin, ymin, xmax, ymax):
+        b = self.bboxes
+        mask = ((b[:, 0] <= xmax) & (b[:, 2] >= xmin) &
+                (b[:, 1] <= ymax) & (b[:, 3] >= ymin))
+        return np.nonzero(mask)[0]
+
+    def test_len(self):
+        self.assertEqual(len(self.index), self.NBOXES)
+
+    def test_query(self):
+        for query in ((10, 10, 50, 80), (500, 500, 500, 500),
+                      (-100, -100, 2000, 2000), (990, 0, 1200, 1000)):
+            np.testing.assert_array_equal(self.index.query(*query),
+                                          self._bruteforce(*query))
+
+    def test_empty_result(self):
+        self.assertEqual(len(self.index.query(-10, -10, -5, -5)), 0)
+
+    def test_bounds(self):
+        bounds = self.index.bounds()
+        np.testing.assert_allclose(bounds, (
+            self.bboxes[:, 0].min(), self.bboxes[:, 1].min(),
+            self.bboxes[:, 2].max(), self.bboxes[:, 3].max()))
+
+    def test_empty_index(self):
+        index = geomutils.SpatialIndex(np.zeros((0, 4)))
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.bounds())
+        self.assertEqual(len(index.query(0, 0, 1, 1)), 0)
+
+    def test_small_index(self):
+        index = geomutils.SpatialIndex(self.bboxes[:3], self.NODESIZE)
+        np.testing.assert_array_equal(index.query(-1, -1, 2000, 2000),
+                                      [0, 1, 2])
+
+    def test_nan_boxes(self):
+        bboxes = self.bboxes.copy()
+        bboxes[::7] = np.nan
+        index = geomutils.SpatialIndex(bboxes, self.NODESIZE)
+        valid = np.arange(self.NBOXES) % 7 != 0
+        np.testing.assert_array_equal(
+            index.query(-100, -100, 2000, 2000), np.flatnonzero(valid))
+        np.testing.assert_allclose(index.bounds(), (
+            bboxes[valid, 0].min(), bboxes[valid, 1].min(),
+            bboxes[valid, 2].max(), bboxes[valid, 3].max()))
+
+        index = geomutils.SpatialIndex(np.full((3, 4), np.nan))
+        self.assertIsNone(index.bounds())
+
+
+class GeometryHelpersTestCase(unittest.TestCase):
+    SQUARE = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]], dtype=float)
+
+    def test_point_in_ring(self):
+        self.assertTrue(geomutils.pointInRing(0.5, 0.5, self.SQUARE))
+        self.assertFalse(geomutils.pointInRing(1.5, 0.5, self.SQUARE))
+
+    def test_point_segment_distance(self):
+        self.assertAlmostEqual(
+            geomutils.pointSegmentDistance(2, 0.5, self.SQUARE), 1.)
+        self.assertAlmostEqual(
+            geomutils.pointSegmentDistance(3, 4, self.SQUARE[:1]), 5.)
+
+    def test_mask_outline(self):
+        mask = np.zeros((4, 5), dtype=bool)
+        mask[0, 1:3] = True
+        mask[1:3, :] = True
+        mask[3, 2] = True
+        ring = geomutils.maskOutline(mask)
+        np.testing.assert_array_equal(ring[0], ring[-1])
+
+        # shoelace formula
+        x, y = ring[:, 0], ring[:, 1]
+        area = abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2.
+        self.assertEqual(area, np.count_nonzero(mask))
+        self.assertTrue(geomutils.pointInRing(2.5, 3.5, ring))
+        self.assertFalse(geomutils.pointInRing(0.5, 0.5, ring))
+
+    def test_empty_mask_outline(self):
+        mask = np.zeros((4, 5), dtype=bool)
+        self.assertEqual(len(geomutils.maskOutline(mask)), 0)
+        self.assertEqual(geomutils.maskOutlines(mask), [])
+
+    def test_mask_outlines(self):
+        mask = np.zeros((6, 5), dtype=bool)
+        mask[0:2, 1:3] = True
+        mask[4:6, :] = True
+        rings = geomutils.maskOutlines(mask)
+        self.assertEqual(len(rings), 2)
+        for ring in rings:
+            np.testing.assert_array_equal(ring[0], ring[-1])
+        self.assertTrue(geomutils.pointInRing(1.5, 0.5, rings[0]))
+        self.assertTrue(geomutils.pointInRing(4.5, 5.5, rings[1]))
+        self.assertFalse(any(geomutils.pointInRing(2, 3, ring)
+                             for ring in rings))
+
+        # the single outline fills the gap
+        self.assertTrue(
+            geomutils.pointInRing(2, 3, geomutils.maskOutline(mask)))
+
+
+class SimplifyTestCase(unittest.TestCase):
+    def setUp(self):
+        # noisy polyline with a corner at (5, 5)
+        x = np.linspace(0, 10, 101)
+        y = 5 - np.abs(x - 5) + 0.01 * np.sin(x * 10)
+        y[[0, 50, 100]] = [0, 5, 0]
+        self.coords = np.column_stack((x, y))
+
+    def test_endpoints(self):
+        coords = geomutils.simplify(self.coords, 0.1)
+        self.assertEqual(len(coords), 3)
+        np.testing.assert_array_equal(coords[0], self.coords[0])
+        np.testing.assert_array_equal(coords[1], self.coords[50])
+        np.testing.assert_array_equal(coords[-1], self.coords[-1])
+
+    def test_zero_tolerance(self):
+        mask = geomutils.simplifyMask(self.coords, 0)
+        self.assertTrue(mask.all())
+
+    def test_small_tolerance(self):
+        mask = geomutils.simplifyMask(self.coords, 1e-3)
+        self.assertTrue(mask[[0, 50, 100]].all())
+        self.assertGreater(np.count_nonzero(mask), 3)
+
+    def test_closed_ring(self):
+        ring = GeometryHelpersTestCase.SQUARE
+        np.testing.assert_array_equal(geomutils.simplify(ring, 0.1), ring)
+
+    def test_parts(self):
+        coords = np.concatenate((self.coords, self.coords[:2],
+                                 self.coords + 10))
+        offsets = [0, 101, 101, 103, 204]
+        newcoords, newoffsets = geomutils.simplifyParts(coords, offsets, 0.1)
+        np.testing.assert_array_equal(newoffsets, [0, 3, 3, 5, 8])
+        np.testing.assert_array_equal(newcoords[5:], geomutils.simplify(
+            self.coords + 10, 0.1))
+
+    def test_non_finite(self):
+        coords = self.coords.copy()
+        coords[20] = np.nan
+        coords[70, 1] = np.inf
+        mask = geomutils.simplifyMask(coords, 0.1)
+        self.assertTrue(mask.all())
+
+        coords = np.concatenate((coords, self.coords + 10))
+        offsets = [0, 101, 202]
+        newcoords, newoffsets = geomutils.simplifyParts(coords, offsets, 0.1)
+        np.testing.assert_array_equal(newoffsets, [0, 101, 104])
+        np.testing.assert_array_equal(newcoords[:101], coords[:101])
+
+        coords[-1] = np.inf
+        newcoords, newoffsets = geomutils.simplifyParts(coords, offsets, 0.1)
+        np.testing.assert_array_equal(newoffsets, [0, 101, 202])
+
+    def test_non_finite_douglas_peucker(self):
+        coords = self.coords.copy()
+        coords[[0, 30]] = np.nan
+        keep = geomutils._douglasPeucker(coords, np.array([0]),
+                                         np.array([100]), 0.1)
+        self.assertTrue(keep[[0, 30, 50, 100]].all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from osgeo import gdal
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdtools import precache
+from gsdview.utils import data_uuid
+from gsdview.gdalbackend import gdalsupport
+
+
+class JobJournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'journal.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_append(self):
+        journal = precache.JobJournal(self.filename)
+        journal.append('/data/a.tif', 'id-a', journal.DONE)
+        self.assertTrue(journal.isdone('/data/a.tif', 'id-a'))
+        self.assertFalse(journal.isdone('/data/a.tif', 'id-b'))
+        self.assertFalse(journal.isdone('/data/b.tif', 'id-b'))
+
+    def test_reload(self):
+        journal = precache.JobJournal(self.filename)
+        journal.append('/data/a.tif', 'id-a', journal.DONE)
+        journal.append('/data/b.tif', 'id-b', journal.FAILED)
+        journal = precache.JobJournal(self.filename)
+        self.assertTrue(journal.isdone('/data/a.tif', 'id-a'))
+        self.assertFalse(journal.isdone('/data/b.tif', 'id-b'))
+
+    def test_last_record(self):
+        journal = precache.JobJournal(self.filename)
+        journal.append('/data/a.tif', 'id-a', journal.DONE)
+        journal.append('/data/a.tif', 'id-a', journal.FAILED)
+        journal = precache.JobJournal(self.filename)
+        self.assertFalse(journal.isdone('/data/a.tif', 'id-a'))
+
+    def test_truncated_record(self):
+        journal = precache.JobJournal(self.filename)
+        journal.append('/data/a.tif', 'id-a', journal.DONE)
+        with open(self.filename, 'a') as fd:
+            fd.write('{"path": "/data/b.tif", "fing')
+        journal = precache.JobJournal(self.filename)
+        self.assertTrue(journal.isdone('/data/a.tif', 'id-a'))
+
+
+class PrecacheTestCase(unittest.TestCase):
+    XSIZE = 2000
+    YSIZE = 1500
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.datadir = os.path.join(self.root, 'data')
+        self.cachedir = os.path.join(self.root, 'cache')
+        os.makedirs(os.path.join(self.datadir, 'subdir'))
+
+        self.filenames = [
+            os.path.join(self.datadir, 'image1.tif'),
+            os.path.join(self.datadir, 'subdir', 'image2.tif'),
+        ]
+        driver = gdal.GetDriverByName('GTiff')
+        for filename in self.filenames:
+            ds = driver.Create(filename, self.XSIZE, self.YSIZE, 1,
+                               gdal.GDT_UInt16)
+            data = np.random.randint(0, 1000, (self.YSIZE, self.XSIZE))
+            ds.GetRasterBand(1).WriteArray(data)
+            ds = None
+
+        with open(os.path.join(self.datadir, 'README.txt'), 'w') as fd:
+            fd.write('not a raster')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_find_rasters(self):
+        filenames = list(precache.find_rasters([self.datadir]))
+        self.assertEqual(sorted(filenames), sorted(self.filenames))
+
+    def test_cache_layout(self):
+        dscachedir = precache.precache(self.filenames[0], self.cachedir)
+        ds = gdal.Open(self.filenames[0])
+        self.assertEqual(
+            dscachedir, gdalsupport.datasetCacheDir(ds, self.cachedir))
+
+        vrtfilename = os.path.join(dscachedir,
+                                   gdalsupport.VRT_CACHE_FILENAME)
+        self.assertTrue(os.path.exists(vrtfilename))
+        self.assertTrue(os.path.exists(vrtfilename + '.ovr'))
+        self.assertGreater(gdal.Open(vrtfilename).GetRasterBand(
+            1).GetOverviewCount(), 0)
+
+    def test_find_files(self):
+        filenames = list(precache.find_files([self.datadir]))
+        self.assertEqual(
+            sorted(filenames),
+            sorted(self.filenames +
+                   [os.path.join(self.datadir, 'README.txt')]))
+
+    def test_job(self):
+        kwargs = dict(cachedir=self.cachedir)
+        filename, fingerprint, status, info = precache._precache_job(
+            (self.filenames[0], None, kwargs))
+        self.assertEqual(status, precache.JobJournal.DONE)
+        self.assertEqual(fingerprint, data_uuid(self.filenames[0]))
+
+        # already done
+        shutil.rmtree(self.cachedir)
+        filename, fingerprint, status, info = precache._precache_job(
+            (self.filenames[0], fingerprint, kwargs))
+        self.assertIsNone(status)
+        self.assertFalse(os.path.exists(self.cachedir))
+
+        # not a raster
+        readme = os.path.join(self.datadir, 'README.txt')
+        filename, fingerprint, status, info = precache._precache_job(
+            (readme, None, kwargs))
+        self.assertIsNone(status)
+        self.assertNotIn('reason', info)
+
+    def test_precache_tree(self):
+        journal = os.path.join(self.root, 'journal.jsonl')
+        nfailures = precache.precache_tree([self.datadir], self.cachedir,
+                                           journal, nprocs=2)
+        self.assertEqual(nfailures, 0)
+
+        journal = precache.JobJournal(journal)
+        self.assertEqual(len(journal.records), 2)
+        for filename in self.filenames:
+            self.assertEqual(journal.records[filename]['status'],
+                             journal.DONE)
+
+    def test_resume(self):
+        journal = precache.JobJournal(
+            os.path.join(self.root, 'journal.jsonl'))
+        precache.precache_tree([self.filenames[0]], self.cachedir, journal,
+                               nprocs=1)
+        self.assertEqual(len(open(journal.filename).readlines()), 1)
+
+        precache.precache_tree([self.datadir], self.cachedir, journal,
+                               nprocs=1)
+        # only the second file is processed
+        self.assertEqual(len(open(journal.filename).readlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
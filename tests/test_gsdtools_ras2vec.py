@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from osgeo import gdal, ogr, osr
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdtools import ras2vec
+
+
+class UpdateIndexTestCase(unittest.TestCase):
+    XSIZE = 64
+    YSIZE = 32
+    NFILES = 3
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.datadir = os.path.join(self.root, 'data')
+        os.makedirs(os.path.join(self.datadir, 'subdir'))
+        self.index = os.path.join(self.root, 'index.gpkg')
+
+        self.filenames = [
+            os.path.join(self.datadir, 'subdir', 'image%d.tif' % index)
+            for index in range(self.NFILES)
+        ]
+        for index, filename in enumerate(self.filenames):
+            self._create(filename, 10. + index)
+
+        with open(os.path.join(self.datadir, 'README.txt'), 'w') as fd:
+            fd.write('not a raster')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _create(self, filename, lon):
+        srs = osr.SpatialReference()
+        srs.SetWellKnownGeogCS('EPSG:4326')
+
+        driver = gdal.GetDriverByName('GTiff')
+        ds = driver.Create(filename, self.XSIZE, self.YSIZE, 1,
+                           gdal.GDT_Byte)
+        ds.SetGeoTransform([lon, 0.01, 0, 45., 0, -0.01])
+        ds.SetProjection(srs.ExportToWkt())
+        ds = None
+
+    def _update(self):
+        return ras2vec.update_index([self.datadir], self.index, 'GPKG',
+                                    nprocs=2)
+
+    def _locations(self):
+        ds = ogr.Open(self.index)
+        layer = ds.GetLayerByName(ras2vec.INDEX_LAYER_NAME)
+        return sorted(feature.GetField(ras2vec.LOCATION_FIELD)
+                      for feature in layer)
+
+    def test_create(self):
+        nadded, nremoved, nfailures = self._update()
+        self.assertEqual((nadded, nremoved, nfailures), (self.NFILES, 0, 0))
+        self.assertEqual(self._locations(), self.filenames)
+
+    def test_no_changes(self):
+        self._update()
+        self.assertEqual(self._update(), (0, 0, 0))
+        self.assertEqual(self._locations(), self.filenames)
+
+    def test_removed(self):
+        self._update()
+        os.remove(self.filenames[0])
+        self.assertEqual(self._update(), (0, 1, 0))
+        self.assertEqual(self._locations(), self.filenames[1:])
+
+    def test_modified(self):
+        self._update()
+        st = os.stat(self.filenames[1])
+        self._create(self.filenames[1], 20.)
+        os.utime(self.filenames[1], (st.st_atime, st.st_mtime + 10))
+        self.assertEqual(self._update(), (1, 1, 0))
+        self.assertEqual(self._locations(), self.filenames)
+
+        ds = ogr.Open(self.index)
+        layer = ds.GetLayerByName(ras2vec.INDEX_LAYER_NAME)
+        layer.SetAttributeFilter("%s = '%s'" % (ras2vec.LOCATION_FIELD,
+                                                self.filenames[1]))
+        xmin, xmax, ymin, ymax = layer.GetExtent()
+        self.assertGreaterEqual(xmin, 20.)
+
+    def test_unreadable(self):
+        self._update()
+        # os.stat fails on dangling links
+        os.remove(self.filenames[0])
+        os.symlink(os.path.join(self.root, 'missing.tif'),
+                   self.filenames[0])
+        self.assertEqual(self._update(), (0, 0, 0))
+        self.assertEqual(self._locations(), self.filenames)
+
+    def test_job(self):
+        srswkt = ras2vec.makesrs(None).ExportToWkt()
+        filename, fingerprint, records, error = ras2vec._footprint_job(
+            (self.filenames[0], None, srswkt, False))
+        self.assertIsNone(error)
+        self.assertEqual(len(records), 1)
+
+        job = (self.filenames[0], fingerprint, srswkt, False)
+        self.assertEqual(ras2vec._footprint_job(job),
+                         (self.filenames[0], fingerprint, None, None))
+
+    def test_footprint(self):
+        # valid data in the lower left triangle
+        ds = gdal.Open(self.filenames[0], gdal.GA_Update)
+        x, y = np.meshgrid(np.arange(self.XSIZE), np.arange(self.YSIZE))
+        ds.GetRasterBand(1).WriteArray(
+            np.where(x <= y * self.XSIZE / self.YSIZE, 1, 0))
+        ds = None
+
+        ras2vec.update_index([self.filenames[0]], self.index, 'GPKG',
+                             nprocs=1, footprint=True)
+
+        ds = ogr.Open(self.index)
+        layer = ds.GetLayerByName(ras2vec.INDEX_LAYER_NAME)
+        feature = layer.GetNextFeature()
+        geom = feature.GetGeometryRef()
+        xmin, xmax, ymin, ymax = geom.GetEnvelope()
+        self.assertAlmostEqual(geom.GetArea() / (xmax - xmin) / (ymax - ymin),
+                               0.5, delta=0.05)
+
+
+    def test_footprint_parts(self):
+        # valid data in the top and bottom quarters
+        ds = gdal.Open(self.filenames[0], gdal.GA_Update)
+        data = np.ones((self.YSIZE, self.XSIZE), dtype=np.uint8)
+        data[self.YSIZE // 4:3 * self.YSIZE // 4] = 0
+        ds.GetRasterBand(1).WriteArray(data)
+        ds = None
+
+        nadded, nremoved, nfailures = ras2vec.update_index(
+            [self.filenames[0]], self.index, 'GPKG', nprocs=1,
+            footprint=True)
+        self.assertEqual(nadded, 2)
+        self.assertEqual(self._locations(), [self.filenames[0]] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
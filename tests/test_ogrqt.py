@@ -21,8 +21,11 @@
 
 import os
 import sys
+import time
+import struct
 import logging
 
+import numpy as np
 from osgeo import ogr
 
 
@@ -40,6 +43,9 @@ from gsdview.gdalbackend import ogrqt
 
 
 class VectorGraphicsApp(QtWidgets.QMainWindow):
+    #: load layers progressively (see :class:`ogrqt.StreamingLayerItem`)
+    streaming = False
+
     def __init__(self, parent=None, flags=QtCore.Qt.WindowFlags(0)):
         QtWidgets.QMainWindow.__init__(self, parent, flags)
         self.statusBar().show()
@@ -229,8 +235,19 @@ class VectorGraphicsApp(QtWidgets.QMainWindow):
         text = self.tr('\n'.join(text))
         QtWidgets.QMessageBox.about(self, title, text)
 
+    def _closeLayers(self):
+        # stop background loaders before items are deleted
+        for item in self.scene.items():
+            if isinstance(item, ogrqt.StreamingLayerItem):
+                item.close()
+
+    def closeEvent(self, event):
+        self._closeLayers()
+        QtWidgets.QMainWindow.closeEvent(self, event)
+
     @QtCore.Slot()
     def reset(self):
+        self._closeLayers()
         self.scene.clear()
         self.graphicsview.resetTransform()
         self.graphicsview.scale(1., -1.)
@@ -284,7 +301,11 @@ class VectorGraphicsApp(QtWidgets.QMainWindow):
             raise RuntimeError('too many layers: %d' % ds.GetLayerCount())
 
         for index, layer in enumerate(ds):
-            qlayer = ogrqt.layerToGraphicsItem(layer, srs, transform)
+            if self.streaming:
+                qlayer = ogrqt.StreamingLayerItem(filename, index, srs,
+                                                  transform)
+            else:
+                qlayer = ogrqt.layerToGraphicsItem(layer, srs, transform)
             # qlayer.datasource = ds.GetName()
             # qlayer.index = index
             qlayer.setData(ogrqt.DATAKEY['datasource'], ds.GetName())
@@ -293,7 +314,14 @@ class VectorGraphicsApp(QtWidgets.QMainWindow):
             if affine_transform:
                 qlayer.setTransform(affine_transform)
 
-            if qlayer.childItems():
+            if isinstance(qlayer, ogrqt.StreamingLayerItem):
+                nfeatures = layer.GetFeatureCount()
+            elif isinstance(qlayer, ogrqt.GraphicsLayerItem):
+                nfeatures = qlayer.featureCount()
+            else:
+                nfeatures = len(qlayer.childItems())
+
+            if nfeatures:
                 self.scene.addItem(qlayer)
 
                 item = QtGui.QStandardItem(layer.GetName())
@@ -302,8 +330,7 @@ class VectorGraphicsApp(QtWidgets.QMainWindow):
                 item.setData(qlayer)
                 item.setToolTip(
                     self.tr('Layer "%s": %d features.' % (
-                        layer.GetName(),
-                        len(qlayer.childItems()))))
+                        layer.GetName(), nfeatures)))
 
                 self.model.appendRow(item)
 
@@ -351,6 +378,65 @@ class VectorGraphicsApp(QtWidgets.QMainWindow):
             qlayer.setBrush(brush)
 
 
+def _legacyLineToGraphicsItem(geom, transform=None):
+    # per-vertex conversion (old implementation)
+    qpath = QtGui.QPainterPath()
+    point = geom.GetPoint(0)
+    if transform:
+        point = transform(*point)
+    qpath.moveTo(point[0], point[1])
+    for index in range(1, geom.GetPointCount()):
+        point = geom.GetPoint(index)
+        if transform:
+            point = transform(*point)
+        qpath.lineTo(point[0], point[1])
+    return QtWidgets.QGraphicsPathItem(qpath)
+
+
+def _makeLineStrings(npoints, nvertices):
+    geoms = []
+    for count in range(max(npoints // nvertices, 1)):
+        t = np.linspace(0, 2 * np.pi, nvertices) + count
+        xy = np.column_stack((180 * np.cos(t), 90 * np.sin(3 * t)))
+        wkb = struct.pack('<bII', 1, ogr.wkbLineString, nvertices)
+        wkb += xy.astype('<f8').tobytes()
+        geoms.append(ogr.CreateGeometryFromWkb(wkb))
+    return geoms
+
+
+def benchmark(npoints=1000000, nvertices=10000, repeat=3):
+    """Throughput of the conversion of line strings into graphics items.
+
+    The per-vertex (old) conversion is compared with the bulk one
+    (:func:`ogrqt.singleGeometryToGraphicsItem`) with and without a
+    coordinate transformation.
+
+    """
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    geoms = _makeLineStrings(npoints, nvertices)
+    nvertices = sum(geom.GetPointCount() for geom in geoms)
+
+    def transform(x, y, z=0):
+        return 2 * x + 1, 0.5 * y - 1, z
+
+    print('%d vertices in %d line strings' % (nvertices, len(geoms)))
+    print('%-8s %-10s %16s' % ('mode', 'transform', 'vertices/s'))
+    for mode, func in (('legacy', _legacyLineToGraphicsItem),
+                       ('bulk', ogrqt.singleGeometryToGraphicsItem)):
+        for label, tr in (('none', None), ('affine', transform)):
+            elapsed = []
+            for count in range(repeat):
+                t0 = time.time()
+                for geom in geoms:
+                    func(geom, tr)
+                elapsed.append(time.time() - t0)
+            print('%-8s %-10s %16.0f' % (mode, label,
+                                         nvertices / min(elapsed)))
+
+    return app
+
+
 def main(*argv):
     # @NOTE: basic config doesn't work since other modules (e.g. sip)
     #        use it before this line
@@ -376,6 +462,14 @@ def main(*argv):
 
 
 if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        benchmark()
+        sys.exit(0)
+
+    if '--streaming' in sys.argv:
+        sys.argv.remove('--streaming')
+        VectorGraphicsApp.streaming = True
+
     import glob
     datadir = os.path.expanduser('~/Immagini/naturalearth_small_scale')
     shapefiles = glob.glob(os.path.join(datadir, '110m_physical', '*.shp'))
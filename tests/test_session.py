@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from qtpy import QtCore, QtWidgets, QtGui
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview import session
+from gsdview.mdi import ItemModelMainWindow, ItemSubWindow
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class DatasetItem(QtGui.QStandardItem):
+    backend = 'testbackend'
+
+    def __init__(self, filename):
+        super(DatasetItem, self).__init__(os.path.basename(filename))
+        self.filename = filename
+        self.scene = QtWidgets.QGraphicsScene(0, 0, 1000, 1000)
+
+
+class Backend(QtCore.QObject):
+    """Minimal backend: files are "opened" when :meth:`flush` is called."""
+
+    datasetOpened = QtCore.Signal(object)
+
+    def __init__(self, app):
+        super(Backend, self).__init__(app)
+        self.app = app
+        self.pending = []
+
+    def openFile(self, filename):
+        item = DatasetItem(filename)
+        self.pending.append(item)
+        return item
+
+    def flush(self):
+        while self.pending:
+            self.datasetOpened.emit(self.pending.pop(0))
+
+    def findItemFromFilename(self, filename):
+        root = self.app.datamodel.invisibleRootItem()
+        for row in range(root.rowCount()):
+            if root.child(row).filename == filename:
+                return root.child(row)
+        return None
+
+    def itemState(self, item):
+        return {'filename': item.filename}
+
+    def itemFromState(self, state):
+        return self.findItemFromFilename(state['filename'])
+
+    def newImageView(self, item):
+        subwin = ItemSubWindow(item)
+        subwin.setWidget(QtWidgets.QGraphicsView(item.scene))
+        self.app.mdiarea.addSubWindow(subwin)
+        subwin.show()
+        return subwin
+
+
+class PluginManager(object):
+    def __init__(self, plugins):
+        self.plugins = plugins
+
+
+class MainWindow(ItemModelMainWindow):
+    def __init__(self):
+        super(MainWindow, self).__init__()
+        self.backend = Backend(self)
+        self.pluginmanager = PluginManager({'testbackend': self.backend})
+
+
+class SessionManagerTestCase(unittest.TestCase):
+    NDATASETS = 3
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'session.json')
+        self.filenames = [os.path.join(self.root, 'dataset%02d.tif' % index)
+                          for index in range(self.NDATASETS)]
+
+        self.mainwin = MainWindow()
+        self.mainwin.resize(800, 600)
+        self.mainwin.show()
+        self.manager = session.SessionManager(self.mainwin, self.filename)
+
+    def tearDown(self):
+        self.mainwin.mdiarea.closeAllSubWindows()
+        self.mainwin.close()
+        shutil.rmtree(self.root)
+
+    def _open(self, mainwin):
+        for filename in self.filenames:
+            mainwin.datamodel.appendRow(mainwin.backend.openFile(filename))
+        mainwin.backend.flush()
+
+    def test_no_session(self):
+        self.assertIsNone(self.manager.load())
+
+    def test_state(self):
+        self._open(self.mainwin)
+        item = self.mainwin.datamodel.item(1)
+        subwin = self.mainwin.backend.newImageView(item)
+        subwin.widget().scale(2, 2)
+
+        state = self.manager.state()
+        self.assertEqual([ds['filename'] for ds in state['datasets']],
+                         self.filenames)
+        self.assertEqual(len(state['windows']), 1)
+        winstate = state['windows'][0]
+        self.assertEqual(winstate['item'], {'filename': self.filenames[1]})
+        self.assertEqual(winstate['transform'][0], 2.)
+
+    def test_save_restore(self):
+        self._open(self.mainwin)
+        item = self.mainwin.datamodel.item(2)
+        subwin = self.mainwin.backend.newImageView(item)
+        subwin.widget().scale(4, 4)
+        subwin.widget().centerOn(300, 200)
+        self.manager.save()
+        self.assertTrue(os.path.isfile(self.filename))
+
+        mainwin = MainWindow()
+        try:
+            manager = session.SessionManager(mainwin, self.filename)
+            manager.restore()
+
+            # products are opened asynchronously
+            self.assertEqual(mainwin.datamodel.rowCount(), self.NDATASETS)
+            self.assertEqual(mainwin.mdiarea.subWindowList(), [])
+
+            mainwin.backend.flush()
+            subwindows = mainwin.mdiarea.subWindowList()
+            self.assertEqual(len(subwindows), 1)
+            self.assertEqual(subwindows[0].item.filename, self.filenames[2])
+            self.assertEqual(subwindows[0].widget().transform().m11(), 4.)
+        finally:
+            mainwin.mdiarea.closeAllSubWindows()
+            mainwin.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,7 @@ import os
 import shutil
 import tempfile
 import unittest
+import threading
 
 
 from gsdview import utils
@@ -119,5 +120,121 @@ class TestDataUuid(unittest.TestCase):
         self.assertNotEqual(data_uuid1, data_uuid2)
 
 
+class TestDataUuidStrategies(unittest.TestCase):
+    DATASIZE = 1024     # 1 kbyte
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='gsdview_test_utils_')
+        self.product = os.path.join(self.dirname, 'product.SAFE')
+        subdir = os.path.join(self.product, 'measurement')
+        os.makedirs(subdir)
+        for name in ('manifest.safe', os.path.join('measurement', 'a.tiff')):
+            with open(os.path.join(self.product, name), 'wb') as fd:
+                fd.write(b'0' * self.DATASIZE)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_strategies(self):
+        uids = set()
+        for strategy in utils.FINGERPRINT_STRATEGIES:
+            uid = utils.data_uuid(self.product, strategy=strategy)
+            self.assertEqual(uid, utils.data_uuid(self.product,
+                                                  strategy=strategy))
+            uids.add(uid)
+        self.assertEqual(len(uids), len(utils.FINGERPRINT_STRATEGIES))
+
+    def test_invalid_strategy(self):
+        self.assertRaises(ValueError, utils.data_uuid, self.product,
+                          strategy='invalid')
+
+    def test_manifest_change(self):
+        uid1 = utils.data_uuid(self.product, strategy='manifest')
+        with open(os.path.join(self.product, 'manifest.safe'), 'ab') as fd:
+            fd.write(b'1')
+        uid2 = utils.data_uuid(self.product, strategy='manifest')
+        self.assertNotEqual(uid1, uid2)
+
+    def test_header_ignores_mtime(self):
+        uid1 = utils.data_uuid(self.product, strategy='header')
+        os.utime(self.product, (0, 0))
+        uid2 = utils.data_uuid(self.product, strategy='header')
+        self.assertEqual(uid1, uid2)
+
+    def test_index(self):
+        filename = os.path.join(self.dirname, 'index.json')
+        index = utils.FingerprintIndex(filename)
+        uid = utils.data_uuid(self.product, strategy='tree', index=index)
+        self.assertTrue(os.path.isfile(filename))
+
+        # the fingerprint is retrieved from the index (a change in a
+        # sub-directory is not detected)
+        with open(os.path.join(self.product, 'measurement', 'a.tiff'),
+                  'ab') as fd:
+            fd.write(b'1')
+        index = utils.FingerprintIndex(filename)
+        self.assertEqual(
+            utils.data_uuid(self.product, strategy='tree', index=index), uid)
+        self.assertNotEqual(utils.data_uuid(self.product, strategy='tree'),
+                            uid)
+
+        # changes of the top level directory invalidate the entry
+        os.utime(self.product, (0, 0))
+        self.assertNotEqual(
+            utils.data_uuid(self.product, strategy='tree', index=index), uid)
+
+    def test_index_maxentries(self):
+        index = utils.FingerprintIndex(
+            os.path.join(self.dirname, 'index.json'))
+        index.MAXENTRIES = 1
+        utils.data_uuid(self.product, index=index)
+        utils.data_uuid(os.path.join(self.product, 'manifest.safe'),
+                        index=index)
+        self.assertEqual(len(index.entries), 1)
+
+    def test_index_threads(self):
+        index = utils.FingerprintIndex(
+            os.path.join(self.dirname, 'index.json'))
+        index.MAXENTRIES = 200
+        paths = []
+        for count in range(400):
+            path = os.path.join(self.dirname, 'file%03d.dat' % count)
+            with open(path, 'wb') as fd:
+                fd.write(b'0' * count)
+            paths.append(path)
+
+        errors = []
+
+        def worker(paths):
+            try:
+                for path in paths:
+                    utils.data_uuid(path, index=index)
+                    utils.data_uuid(path, index=index)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(paths[n::8],))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(index.entries), index.MAXENTRIES)
+        self.assertEqual(
+            len(utils.FingerprintIndex(index.filename).entries),
+            index.MAXENTRIES)
+
+    def test_default_index(self):
+        index = utils.FingerprintIndex(
+            os.path.join(self.dirname, 'index.json'))
+        previous = utils.set_fingerprint_index(index)
+        try:
+            self.assertIs(utils.fingerprint_index(), index)
+        finally:
+            utils.set_fingerprint_index(previous)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from osgeo import ogr, osr
+from qtpy import QtCore, QtWidgets, QtGui, QtTest
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview import qtsupport
+from gsdview.plugins.worldmap import footprints
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def box(lon, lat, size=1.):
+    return np.array([(lon, lat), (lon + size, lat), (lon + size, lat + size),
+                     (lon, lat + size), (lon, lat)])
+
+
+class FootprintArraysTestCase(unittest.TestCase):
+    def test_qpolygonf2numpy(self):
+        xy = box(10, 20)
+        qpoly = qtsupport.numpy2qpolygonf(xy)
+        self.assertTrue(np.array_equal(qtsupport.qpolygonf2numpy(qpoly), xy))
+        self.assertEqual(
+            qtsupport.qpolygonf2numpy(QtGui.QPolygonF()).shape, (0, 2))
+
+    def test_arrays(self):
+        polygons = [box(0, 0), QtGui.QPolygonF(), box(10, 10)]
+        coords, partoffsets, partkinds, featureoffsets, indices = (
+            footprints.footprintArrays(polygons))
+        self.assertEqual(len(coords), 10)
+        self.assertEqual(list(partoffsets), [0, 5, 10])
+        self.assertEqual(list(featureoffsets), [0, 1, 2])
+        self.assertEqual(list(indices), [0, 2])
+
+    def test_geonormalize(self):
+        polygons = [box(185, 0), box(-200, 0), box(170, 0, 20)]
+        coords = footprints.footprintArrays(polygons)[0]
+        self.assertTrue(np.allclose(coords[:5], box(-175, 0)))
+        self.assertTrue(np.allclose(coords[5:10], box(160, 0)))
+        # the mean longitude is 180
+        self.assertTrue(np.allclose(coords[10:], box(170, 0, 20)))
+
+
+class FootprintsItemTestCase(unittest.TestCase):
+    NCOLS = 36
+    NROWS = 18
+
+    def setUp(self):
+        self.polygons = []
+        self.labels = []
+        for row in range(self.NROWS):
+            for col in range(self.NCOLS):
+                self.polygons.append(box(-180 + 10 * col, -90 + 10 * row, 5))
+                self.labels.append('%d_%d' % (row, col))
+
+        self.item = footprints.FootprintsItem()
+        self.item.setFootprints(self.polygons, self.labels)
+
+    def _view(self):
+        scene = QtWidgets.QGraphicsScene(-180, -90, 360, 180)
+        scene.addItem(self.item)
+        view = QtWidgets.QGraphicsView(scene)
+        view.resize(400, 300)
+        view.scale(4., 4.)
+        view.centerOn(17.5, 2)
+        view.show()
+        QtTest.QTest.qWaitForWindowExposed(view)
+        return view
+
+    def _click(self, view, x, y, double=False):
+        pos = view.mapFromScene(QtCore.QPointF(x, y))
+        if double:
+            QtTest.QTest.mouseDClick(view.viewport(), QtCore.Qt.LeftButton,
+                                     pos=pos)
+        else:
+            QtTest.QTest.mouseClick(view.viewport(), QtCore.Qt.LeftButton,
+                                    pos=pos)
+
+    def test_footprints(self):
+        self.assertEqual(self.item.featureCount(), self.NCOLS * self.NROWS)
+        self.assertTrue(self.item.boundingRect().contains(
+            QtCore.QRectF(-180, -90, 355, 175)))
+
+        feature = self.item.featureAt(QtCore.QPointF(-148, -68))
+        self.assertEqual(self.item.label(feature), '2_3')
+        self.assertEqual(self.item.key(feature), 2 * self.NCOLS + 3)
+        self.assertIsNone(self.item.featureAt(QtCore.QPointF(-143, -68)))
+
+    def test_hover(self):
+        feature = self.item.featureAt(QtCore.QPointF(2, 2))
+        self.item.setHoveredFeature(feature)
+        self.assertEqual(self.item.hoveredFeature(), feature)
+        self.assertEqual(self.item.toolTip(), self.labels[feature])
+
+        self.item.setHoveredFeature(None)
+        self.assertEqual(self.item.toolTip(), '')
+
+    def test_selection(self):
+        selected = []
+        activated = []
+        self.item.selectionCallback = selected.append
+        self.item.activationCallback = activated.append
+        view = self._view()
+
+        self._click(view, 12, 2)
+        feature = self.item.selectedFeature()
+        self.assertEqual(self.item.label(feature), '9_19')
+        self.assertEqual(selected, [self.item.key(feature)])
+
+        # outside footprints (2.5 degrees, i.e. 10 pixels, far)
+        self._click(view, 17.5, 2)
+        self.assertEqual(self.item.selectedFeature(), feature)
+        self.assertEqual(len(selected), 1)
+
+        self._click(view, 22, 2, double=True)
+        self.assertEqual(activated, [self.item.key(feature + 1)])
+
+    def test_keys(self):
+        keys = [object() for polygon in self.polygons]
+        self.item.setFootprints(self.polygons, self.labels, keys)
+        self.assertEqual(self.item.findKey(keys[10]), 10)
+        self.assertIsNone(self.item.findKey(object()))
+
+    def test_paint(self):
+        scene = QtWidgets.QGraphicsScene(-180, -90, 360, 180)
+        scene.addItem(self.item)
+        for size in (100, 2000):
+            image = QtGui.QImage(size, size // 2,
+                                 QtGui.QImage.Format_ARGB32)
+            image.fill(0)
+            painter = QtGui.QPainter(image)
+            scene.render(painter)
+            painter.end()
+            self.assertNotEqual(image.pixel(size // 4, size // 4), 0)
+
+    def test_clear(self):
+        self.item.setSelectedFeature(0)
+        self.item.clear()
+        self.assertEqual(self.item.featureCount(), 0)
+        self.assertIsNone(self.item.selectedFeature())
+
+
+class LoadIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.filename = os.path.join(self.root, 'index.shp')
+
+        srs = osr.SpatialReference()
+        srs.SetWellKnownGeogCS('WGS84')
+
+        driver = ogr.GetDriverByName('ESRI Shapefile')
+        ds = driver.CreateDataSource(self.filename)
+        layer = ds.CreateLayer('index', srs, ogr.wkbPolygon)
+        layer.CreateField(ogr.FieldDefn('Location', ogr.OFTString))
+        for index in range(10):
+            ring = ', '.join('%f %f' % tuple(point)
+                             for point in box(10 * index, 0))
+            feature = ogr.Feature(layer.GetLayerDefn())
+            feature.SetField('Location', 'product%d.tif' % index)
+            feature.SetGeometry(
+                ogr.CreateGeometryFromWkt('POLYGON ((%s))' % ring))
+            layer.CreateFeature(feature)
+        ds = None
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_load(self):
+        item = footprints.FootprintsItem()
+        item.loadIndex(self.filename)
+        self.assertEqual(item.featureCount(), 10)
+
+        feature = item.featureAt(QtCore.QPointF(30.5, 0.5))
+        self.assertEqual(item.label(feature), 'product3.tif')
+        self.assertEqual(item.key(feature), 'product3.tif')
+
+    def test_invalid(self):
+        item = footprints.FootprintsItem()
+        self.assertRaises(ValueError, item.loadIndex,
+                          os.path.join(self.root, 'missing.shp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+# GSDView - Geo-Spatial Data Viewer
+# Copyright (C) 2008-2020 Antonio Valentino <antonio.valentino@tiscali.it>
+#
+# This module is free software you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation either version 2 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this module if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  US
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from qtpy import QtCore, QtWidgets, QtGui
+
+# Fix sys path
+GSDVIEWROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, GSDVIEWROOT)
+
+from gsdview.plugins.worldmap import tiles
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class WorldImageTestCase(unittest.TestCase):
+    WIDTH = 1000
+    HEIGHT = 500
+    TILESIZE = 128
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=self.__class__.__name__ + '_')
+        self.srcfile = os.path.join(self.root, 'world.jpg')
+        image = QtGui.QImage(self.WIDTH, self.HEIGHT,
+                             QtGui.QImage.Format_RGB32)
+        image.fill(QtGui.QColor(QtCore.Qt.blue))
+        image.save(self.srcfile)
+
+        self.tiledir = os.path.join(self.root, 'tiles')
+        self.pyramid = tiles.TilePyramid(self.srcfile, self.tiledir,
+                                         self.TILESIZE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+
+class TilePyramidTestCase(WorldImageTestCase):
+    def test_build(self):
+        self.assertFalse(self.pyramid.isvalid())
+        self.assertTrue(self.pyramid.build())
+        self.assertTrue(self.pyramid.isvalid())
+
+        self.assertEqual(self.pyramid.levelSize(0), (self.WIDTH, self.HEIGHT))
+        self.assertEqual(self.pyramid.levelCount(), 4)
+        self.assertEqual(self.pyramid.levelSize(3), (125, 62))
+
+        # last (partial) tile of the first level
+        image = QtGui.QImage(self.pyramid.tileFilename(0, 3, 7))
+        self.assertEqual((image.width(), image.height()), (104, 116))
+
+    def test_source_changed(self):
+        self.pyramid.build()
+        with open(self.srcfile, 'ab') as fd:
+            fd.write(b'\0')
+        pyramid = tiles.TilePyramid(self.srcfile, self.tiledir,
+                                    self.TILESIZE)
+        self.assertFalse(pyramid.isvalid())
+
+    def test_interrupted(self):
+        self.assertFalse(self.pyramid.build(lambda: True))
+        self.assertFalse(self.pyramid.isvalid())
+        self.assertEqual(os.listdir(self.root), ['world.jpg'])
+
+
+class TiledWorldmapItemTestCase(WorldImageTestCase):
+    def setUp(self):
+        super(TiledWorldmapItemTestCase, self).setUp()
+        self.pyramid.build()
+        self.item = tiles.TiledWorldmapItem(self.pyramid)
+
+        self.scene = QtWidgets.QGraphicsScene()
+        self.scene.addItem(self.item)
+        self.view = QtWidgets.QGraphicsView(self.scene)
+        self.view.resize(200, 100)
+        self.view.show()
+
+    def tearDown(self):
+        self.item.close()
+        self.view.close()
+        super(TiledWorldmapItemTestCase, self).tearDown()
+
+    def test_level(self):
+        # 1000 pixels / 360 degrees at level 0
+        self.assertEqual(self.item.level(2.7), 0)
+        self.assertEqual(self.item.level(1.), 1)
+        self.assertEqual(self.item.level(0.5), 2)
+        self.assertEqual(self.item.level(1e-3), 3)
+        self.assertEqual(self.item.level(100.), 0)
+
+    def test_paint(self):
+        self.assertTrue(self.item.isReady())
+        self.view.resetTransform()
+        self.view.scale(10, -10)
+        self.view.centerOn(0, 0)
+        image = self.view.grab().toImage()
+        self.assertGreater(QtGui.QColor(image.pixel(100, 50)).blue(), 240)
+
+        # only visible tiles are loaded
+        self.assertTrue(0 < len(self.item._cache) <= 4)
+        self.assertTrue(all(key[0] == 0 for key in self.item._cache))
+
+    def test_cache_size(self):
+        self.item.cachesize = 2
+        for col in range(4):
+            self.item.tile(0, 0, col)
+        self.assertEqual(list(self.item._cache), [(0, 0, 2), (0, 0, 3)])
+
+    def test_build_in_background(self):
+        shutil.rmtree(self.tiledir)
+        pyramid = tiles.TilePyramid(self.srcfile, self.tiledir,
+                                    self.TILESIZE)
+        item = tiles.TiledWorldmapItem(pyramid)
+        self.assertFalse(item.isReady())
+        item._builder.wait()
+        app.processEvents()
+        self.assertTrue(item.isReady())
+
+
+if __name__ == '__main__':
+    unittest.main()